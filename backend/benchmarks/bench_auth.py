@@ -0,0 +1,111 @@
+"""認證效能基準：同時登入時的吞吐量與 event loop 延遲
+
+模擬 N 個同時登入請求（bcrypt 驗證），比較：
+
+- inline：直接在 coroutine 中呼叫 verify_password（舊做法，阻塞 event loop）
+- pool：透過 verify_password_async 在認證執行緒池執行
+
+同時有一個 ticker task 每 --tick-ms 毫秒醒來一次，量測實際醒來時間與預期的落差，
+代表其他請求（API、Socket.IO）在登入尖峰期間感受到的延遲。
+
+執行方式：
+    cd backend && uv run python benchmarks/bench_auth.py [--logins 32] [--rounds 12] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import bcrypt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from ching_tech_os.services.password import verify_password, verify_password_async  # noqa: E402
+from ching_tech_os.services.workers import get_auth_pool_stats  # noqa: E402
+
+
+async def _ticker(interval: float, stop: asyncio.Event, lags: list[float]) -> None:
+    """定時醒來並記錄延遲（實際間隔 - 預期間隔）"""
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+def _percentile(values: list[float], ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def run_scenario(mode: str, password_hash: str, logins: int, tick: float) -> dict:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    ticker = asyncio.create_task(_ticker(tick, stop, lags))
+    await asyncio.sleep(tick * 2)
+
+    async def login(i: int) -> bool:
+        if mode == "inline":
+            return verify_password("Abcd1234", password_hash)
+        return await verify_password_async("Abcd1234", password_hash, client_key=f"10.0.0.{i}")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(i) for i in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    return {
+        "mode": mode,
+        "logins": logins,
+        "all_ok": all(results),
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(logins / elapsed, 2),
+        "loop_lag_p50_ms": round(_percentile(lags, 0.5) * 1000, 2),
+        "loop_lag_p99_ms": round(_percentile(lags, 0.99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lags, default=0.0) * 1000, 2),
+        "ticks": len(lags),
+    }
+
+
+async def run(logins: int, rounds: int, tick_ms: float) -> dict:
+    password_hash = bcrypt.hashpw(b"Abcd1234", bcrypt.gensalt(rounds=rounds)).decode()
+    tick = tick_ms / 1000
+    results = [
+        await run_scenario("inline", password_hash, logins, tick),
+        await run_scenario("pool", password_hash, logins, tick),
+    ]
+    return {"bcrypt_rounds": rounds, "results": results, "auth_pool": get_auth_pool_stats()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="認證效能基準")
+    parser.add_argument("--logins", type=int, default=32, help="同時登入數")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost（預設與 gensalt 相同）")
+    parser.add_argument("--tick-ms", type=float, default=10.0, help="ticker 間隔（毫秒）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.logins, args.rounds, args.tick_ms))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"bcrypt rounds={report['bcrypt_rounds']}")
+    print(f"{'mode':<8} {'logins':>7} {'elapsed':>9} {'login/s':>9} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+    for r in report["results"]:
+        print(
+            f"{r['mode']:<8} {r['logins']:>7} {r['elapsed_s']:>9} {r['logins_per_s']:>9} "
+            f"{r['loop_lag_p50_ms']:>9} {r['loop_lag_p99_ms']:>9} {r['loop_lag_max_ms']:>9}"
+        )
+    pool = report["auth_pool"]
+    print(f"auth pool: workers={pool['workers']} peak_pending={pool['peak_pending']} avg_wait_ms={pool['avg_wait_ms']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""主動推送效能基準：排程報告推送給多個群組
+
+以固定延遲模擬 Line push API（不連網），比較推送 N 個目標、每個目標 M 則訊息：
+
+- sequential：逐目標、逐則呼叫（舊做法，每則一次 HTTP 請求）
+- delivery：bot.delivery.deliver_many（同目標每 5 則一個請求、多目標並行）
+
+執行方式：
+    cd backend && uv run python benchmarks/bench_delivery.py [--targets 30] [--messages 3] [--latency-ms 120] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from linebot.v3.messaging import TextMessage  # noqa: E402
+
+from ching_tech_os.services.bot import delivery  # noqa: E402
+
+
+class _Api:
+    """固定延遲的 push API"""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.requests = 0
+
+    async def push(self, target: str, batch: list, _retry_key: str = "") -> list[str]:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return [f"{target}-{self.requests}-{i}" for i in range(len(batch))]
+
+
+async def _sequential(api: _Api, targets: list[str], messages: list) -> None:
+    for target in targets:
+        for message in messages:
+            await api.push(target, [message])
+
+
+async def _delivery(api: _Api, targets: list[str], messages: list) -> None:
+    delivery._push_line_batch = api.push
+    results = await delivery.deliver_many(delivery.Delivery("line", t, messages) for t in targets)
+    assert all(r.ok for r in results)
+
+
+async def run(targets: int, messages: int, latency_ms: float) -> dict:
+    target_ids = [f"C{i:04d}" for i in range(targets)]
+    payload = [TextMessage(text=f"報告第 {i + 1} 段") for i in range(messages)]
+    results = []
+    for name, fn in (("sequential", _sequential), ("delivery", _delivery)):
+        api = _Api(latency_ms / 1000)
+        started = time.perf_counter()
+        await fn(api, target_ids, payload)
+        results.append({
+            "variant": name,
+            "seconds": round(time.perf_counter() - started, 3),
+            "requests": api.requests,
+        })
+    baseline = results[0]["seconds"]
+    for r in results:
+        r["speedup"] = round(baseline / r["seconds"], 1) if r["seconds"] else None
+    return {
+        "targets": targets,
+        "messages": messages,
+        "latency_ms": latency_ms,
+        "concurrency": delivery.settings.bot_delivery_concurrency,
+        "results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="主動推送效能基準")
+    parser.add_argument("--targets", type=int, default=30, help="推送目標數")
+    parser.add_argument("--messages", type=int, default=3, help="每個目標的訊息數")
+    parser.add_argument("--latency-ms", type=float, default=120, help="模擬的單次 API 延遲")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.targets, args.messages, args.latency_ms))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    print(
+        f"targets={report['targets']} messages={report['messages']} "
+        f"latency={report['latency_ms']}ms concurrency={report['concurrency']}"
+    )
+    print(f"{'variant':<12} {'seconds':>8} {'requests':>9} {'speedup':>8}")
+    for r in report["results"]:
+        print(f"{r['variant']:<12} {r['seconds']:>8} {r['requests']:>9} {r['speedup']:>7}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,440 @@
+"""熱路徑效能基準：可在 commit 之間比較的固定情境
+
+涵蓋 Bot 回覆與檔案存取最常走的路徑，外部服務全部以 benchmarks/fakes.py 的本地替身取代，
+資料由 benchmarks/datagen.py 以固定 seed 產生：
+
+- knowledge_search_*：search_knowledge 於 10k 筆知識庫（關鍵字 / 純過濾）
+- conversation_context_*：get_conversation_context 冷 / 熱快取，及 compose_prompt_with_history
+- line_webhook_text：Line webhook 完整流程（簽章、解析、存訊息、權限、AI、回覆）
+- document_extract_*：document_reader.extract_text 讀取大型 XLSX / PDF
+- smb_read_file：SMBService.read_file 讀取大檔（每次 SMB 請求加上模擬 RTT）
+- nas_search：search_nas_files 於合成的專案目錄樹
+
+執行方式：
+    cd backend && uv run python benchmarks/bench_hot_paths.py [--only knowledge,line] [--iterations N] [--json]
+    cd backend && uv run python benchmarks/bench_hot_paths.py --output before.json
+    cd backend && uv run python benchmarks/bench_hot_paths.py --compare before.json [--threshold 0.2]
+
+--compare 以 p50 比較，任一情境變慢超過門檻（且超過 --min-delta-ms）時以結束碼 1 離開；
+資料規模參數不同時只警告。
+search_knowledge 的關鍵字搜尋依賴 ripgrep，未安裝時結果會標示 rg_available=false。
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+from fastapi import FastAPI
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from ching_tech_os.config import settings  # noqa: E402
+
+import datagen  # noqa: E402
+import fakes  # noqa: E402
+from fakes import FakeConnection, FakeRecord  # noqa: E402
+
+CHANNEL_SECRET = "bench-channel-secret"
+
+
+def _percentile(values: list[float], ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def _summarize(latencies: list[float], **extra) -> dict:
+    total = sum(latencies)
+    return {
+        "iterations": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+        "ops_per_s": round(len(latencies) / total, 1) if total else 0.0,
+        **extra,
+    }
+
+
+async def _measure(fn, iterations: int, warmup: int = 1) -> list[float]:
+    """執行 fn（同步或 async）並回傳每次耗時（秒）"""
+    for _ in range(warmup):
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+# ============================================================
+# 情境
+# ============================================================
+
+
+async def bench_knowledge(args, workdir: Path) -> dict:
+    from ching_tech_os.services import knowledge
+
+    base = workdir / "knowledge"
+    datagen.write_knowledge_corpus(base, args.kb_entries)
+    settings.knowledge_data_path = str(base)
+
+    rg = shutil.which("rg") is not None
+    query = await _measure(lambda: knowledge.search_knowledge(query="水切爐 報價"), args.iterations or 20)
+    filtered = await _measure(
+        lambda: knowledge.search_knowledge(category="technical", role="engineer"),
+        args.iterations or 20,
+    )
+    return {
+        "knowledge_search_query": _summarize(query, entries=args.kb_entries, rg_available=rg),
+        "knowledge_search_filter": _summarize(filtered, entries=args.kb_entries),
+    }
+
+
+async def bench_conversation(args, workdir: Path) -> dict:
+    from ching_tech_os.services import linebot_ai
+    from ching_tech_os.services.bot.context_cache import conversation_context_cache
+    from ching_tech_os.services.claude_agent import compose_prompt_with_history
+
+    conn = FakeConnection(
+        [("FROM bot_messages m", lambda _q, *a: [FakeRecord(r) for r in datagen.conversation_rows(a[1])])],
+        latency=args.db_latency_ms / 1000,
+    )
+    group_id = uuid.uuid4()
+    iterations = args.iterations or 200
+
+    async def cold():
+        conversation_context_cache.clear()
+        return await linebot_ai.get_conversation_context(group_id, None, limit=20)
+
+    with fakes.fake_database(conn):
+        cold_lat = await _measure(cold, iterations)
+        conversation_context_cache.clear()
+        warm_lat = await _measure(
+            lambda: linebot_ai.get_conversation_context(group_id, None, limit=20), iterations
+        )
+        history, _, _ = await linebot_ai.get_conversation_context(group_id, None, limit=40)
+    conversation_context_cache.clear()
+
+    compose_lat = await _measure(
+        lambda: compose_prompt_with_history(history, "請整理剛才討論的報價重點"), iterations * 5
+    )
+    return {
+        "conversation_context_cold": _summarize(cold_lat, db_latency_ms=args.db_latency_ms),
+        "conversation_context_warm": _summarize(warm_lat, db_latency_ms=args.db_latency_ms),
+        "compose_prompt": _summarize(compose_lat, history_messages=len(history)),
+    }
+
+
+def _agent_row() -> FakeRecord:
+    """ai_manager.get_agent_by_name 查詢結果（含關聯 prompt）"""
+    row = FakeRecord(
+        id=uuid.uuid4(),
+        name="linebot-personal",
+        model="claude-sonnet",
+        is_active=True,
+        tools="[]",
+        prompt_id=uuid.uuid4(),
+        prompt_content="你是擎添工業的 AI 助理，請以繁體中文回覆。\n" * 40,
+    )
+    for key in (
+        "display_name", "description", "system_prompt_id", "settings", "created_at", "updated_at",
+        "prompt_name", "prompt_display_name", "prompt_category", "prompt_description",
+        "prompt_variables", "prompt_created_at", "prompt_updated_at",
+    ):
+        row.setdefault(key, None)
+    return row
+
+
+async def bench_line_webhook(args, workdir: Path) -> dict:
+    from ching_tech_os.api import linebot_router
+    from ching_tech_os.services import claude_agent
+    from ching_tech_os.services.bot.context_cache import conversation_context_cache
+
+    settings.line_channel_secret = CHANNEL_SECRET
+    fakes.StubClaudeClient.latency = args.claude_latency_ms / 1000
+    conn = FakeConnection(
+        [
+            ("FROM ai_agents a", lambda *_: _agent_row()),
+            ("FROM bot_messages m", lambda _q, *a: [FakeRecord(r) for r in datagen.conversation_rows(a[1])]),
+        ],
+        latency=args.db_latency_ms / 1000,
+        row_defaults={"user_id": 1, "role": "user", "allow_ai_response": True},
+    )
+    api = fakes.FakeMessagingApi(rtt=args.line_rtt_ms / 1000)
+
+    app = FastAPI()
+    app.include_router(linebot_router.line_router)
+    seq = iter(range(1, 1_000_000))
+
+    # 量測事件處理到回覆送出的路徑：停用 bot_webhook_events 佇列，事件改由 BackgroundTasks 處理，
+    # ASGITransport 會等它完成才回傳（佇列的寫入 / 派送不在此基準範圍內）
+    with (
+        fakes.fake_database(conn),
+        fakes.fake_line_api(api),
+        patch.object(claude_agent, "ClaudeClient", fakes.StubClaudeClient),
+        patch.object(settings, "webhook_queue_enabled", False),
+    ):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def deliver():
+                body = datagen.line_webhook_body(
+                    [datagen.line_text_event("Ubench0001", None, "請幫我查水切爐的報價", next(seq))]
+                )
+                signature = datagen.line_signature(body, CHANNEL_SECRET)
+                # ASGITransport 會等背景工作（事件處理與回覆）完成才回傳
+                response = await client.post(
+                    "/webhook",
+                    content=body,
+                    headers={"x-line-signature": signature, "content-type": "application/json"},
+                )
+                response.raise_for_status()
+
+            iterations = args.iterations or 50
+            latencies = await _measure(deliver, iterations)
+    conversation_context_cache.clear()
+
+    delivered = len(api.replies) + len(api.pushes)
+    if delivered < iterations:
+        raise RuntimeError(f"Line webhook 只送出 {delivered}/{iterations} 則回覆，流程中途失敗")
+    return {
+        "line_webhook_text": _summarize(
+            latencies,
+            line_rtt_ms=args.line_rtt_ms,
+            claude_latency_ms=args.claude_latency_ms,
+            db_latency_ms=args.db_latency_ms,
+            queries_per_event=round(len(conn.queries) / (iterations + 1), 1),
+        )
+    }
+
+
+async def bench_documents(args, workdir: Path) -> dict:
+    from ching_tech_os.services import document_reader
+
+    xlsx = datagen.write_xlsx(workdir / "bench.xlsx", sheets=3, rows=args.xlsx_rows)
+    pdf = datagen.write_pdf(workdir / "bench.pdf", pages=args.pdf_pages)
+    iterations = args.iterations or 5
+
+    results = {}
+    for name, path in (("document_extract_xlsx", xlsx), ("document_extract_pdf", pdf)):
+        latencies = await _measure(lambda p=path: document_reader.extract_text(str(p)), iterations)
+        results[name] = _summarize(latencies, file_bytes=path.stat().st_size)
+    return results
+
+
+async def bench_smb(args, workdir: Path) -> dict:
+    from ching_tech_os.services.smb import SMBService
+
+    share = workdir / "smb" / "home"
+    share.mkdir(parents=True)
+    size = args.smb_file_mb * 1024 * 1024
+    datagen.write_blob(share / "large.bin", size)
+
+    service = SMBService("bench-nas", "bench", "bench")
+    service._session = object()
+    with fakes.fake_smb(workdir / "smb", rtt=args.smb_rtt_ms / 1000):
+        latencies = await _measure(lambda: service.read_file("home", "large.bin"), args.iterations or 5)
+    return {
+        "smb_read_file": _summarize(
+            latencies,
+            file_bytes=size,
+            smb_rtt_ms=args.smb_rtt_ms,
+            mb_per_s=round(size / 1024 / 1024 / statistics.fmean(latencies), 1),
+        )
+    }
+
+
+async def bench_nas_search(args, workdir: Path) -> dict:
+    from ching_tech_os.services.mcp import nas_tools
+
+    root = workdir / "nas" / "projects"
+    files = datagen.build_nas_tree(root, dirs=args.nas_dirs, files_per_dir=args.nas_files)
+
+    with (
+        patch.object(nas_tools, "ensure_db_connection", AsyncMock()),
+        patch.object(nas_tools, "check_mcp_tool_permission", AsyncMock(return_value=(True, None))),
+        patch.object(nas_tools, "_get_user_shared_mounts", AsyncMock(return_value={"projects": str(root)})),
+    ):
+        latencies = await _measure(
+            lambda: nas_tools.search_nas_files("報價", file_types="pdf,xlsx", ctos_user_id=1),
+            args.iterations or 10,
+        )
+    return {"nas_search": _summarize(latencies, files=files)}
+
+
+SCENARIOS = {
+    "knowledge": bench_knowledge,
+    "conversation": bench_conversation,
+    "line": bench_line_webhook,
+    "documents": bench_documents,
+    "smb": bench_smb,
+    "nas": bench_nas_search,
+}
+
+# 影響結果的資料規模參數（比較時需一致）
+PARAM_KEYS = (
+    "iterations", "kb_entries", "db_latency_ms", "line_rtt_ms", "claude_latency_ms",
+    "xlsx_rows", "pdf_pages", "smb_file_mb", "smb_rtt_ms", "nas_dirs", "nas_files",
+)
+
+
+# ============================================================
+# 執行與比較
+# ============================================================
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCH_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+async def run(args, selected: list[str]) -> dict:
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="ctos-bench-") as tmp:
+        for name in selected:
+            workdir = Path(tmp) / name
+            workdir.mkdir()
+            # 服務內部的 print 輸出不混入報表
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.update(await SCENARIOS[name](args, workdir))
+
+    return {
+        "suite": "hot_paths",
+        "git_commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {key: getattr(args, key) for key in PARAM_KEYS},
+        "results": results,
+    }
+
+
+def compare(
+    report: dict, baseline: dict, threshold: float, min_delta_ms: float
+) -> tuple[list[dict], list[str]]:
+    """以 p50 比較兩份報表，回傳 (各情境比較, 警告)
+
+    微秒級情境的相對抖動很大，絕對差距小於 min_delta_ms 時不視為退步。
+    """
+    warnings = []
+    if report.get("params") != baseline.get("params"):
+        warnings.append("資料規模參數與基準不同，比較結果僅供參考")
+
+    rows = []
+    for name, current in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = current["p50_ms"] / base["p50_ms"] if base["p50_ms"] else 1.0
+        rows.append({
+            "scenario": name,
+            "baseline_p50_ms": base["p50_ms"],
+            "current_p50_ms": current["p50_ms"],
+            "change_pct": round((ratio - 1) * 100, 1),
+            "regression": ratio > 1 + threshold
+            and current["p50_ms"] - base["p50_ms"] > min_delta_ms,
+        })
+    return rows, warnings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="熱路徑效能基準")
+    parser.add_argument("--only", help=f"只執行指定情境（逗號分隔）：{','.join(SCENARIOS)}")
+    parser.add_argument("--iterations", type=int, default=0, help="每個情境的量測次數（0 使用各情境預設值）")
+    parser.add_argument("--kb-entries", type=int, default=10000, help="知識庫筆數")
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="模擬資料庫查詢延遲")
+    parser.add_argument("--line-rtt-ms", type=float, default=20.0, help="模擬 Line API 來回時間")
+    parser.add_argument("--claude-latency-ms", type=float, default=0.0, help="模擬 Claude 回覆時間")
+    parser.add_argument("--xlsx-rows", type=int, default=8000, help="XLSX 每個工作表的列數")
+    parser.add_argument("--pdf-pages", type=int, default=200, help="PDF 頁數")
+    parser.add_argument("--smb-file-mb", type=int, default=8, help="SMB 讀取的檔案大小（MB）")
+    parser.add_argument("--smb-rtt-ms", type=float, default=0.5, help="模擬每次 SMB 請求的來回時間")
+    parser.add_argument("--nas-dirs", type=int, default=2000, help="NAS 目錄樹的專案目錄數")
+    parser.add_argument("--nas-files", type=int, default=10, help="每個專案目錄的檔案數")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    parser.add_argument("--output", type=Path, help="將 JSON 報表寫入檔案")
+    parser.add_argument("--compare", type=Path, help="與先前的 JSON 報表比較")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定退步的 p50 增幅（0.2 = 20%%）")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="判定退步的最小 p50 絕對增加量")
+    args = parser.parse_args()
+
+    selected = [s.strip() for s in args.only.split(",")] if args.only else list(SCENARIOS)
+    unknown = [s for s in selected if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知的情境：{', '.join(unknown)}")
+
+    # 服務的錯誤日誌會寫到 stderr；基準只關心結果
+    logging.basicConfig(level=logging.CRITICAL)
+
+    report = asyncio.run(run(args, selected))
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    comparison, warnings = [], []
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        comparison, warnings = compare(report, baseline, args.threshold, args.min_delta_ms)
+        report["comparison"] = {
+            "baseline_commit": baseline.get("git_commit"),
+            "threshold": args.threshold,
+            "warnings": warnings,
+            "scenarios": comparison,
+        }
+    regressed = any(row["regression"] for row in comparison)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 1 if regressed else 0
+
+    print(f"commit={report['git_commit']} python={report['python']}")
+    print(f"{'scenario':<28} {'iter':>5} {'mean':>10} {'p50':>10} {'p95':>10} {'max':>10} {'ops/s':>9}")
+    for name, r in report["results"].items():
+        print(
+            f"{name:<28} {r['iterations']:>5} {r['mean_ms']:>10} {r['p50_ms']:>10} "
+            f"{r['p95_ms']:>10} {r['max_ms']:>10} {r['ops_per_s']:>9}"
+        )
+    if args.compare:
+        print(f"\n與 {args.compare}（commit={baseline.get('git_commit')}）比較，門檻 +{args.threshold:.0%}")
+        for warning in warnings:
+            print(f"警告：{warning}")
+        for row in comparison:
+            flag = "  ← 退步" if row["regression"] else ""
+            print(
+                f"{row['scenario']:<28} {row['baseline_p50_ms']:>10} → {row['current_p50_ms']:>10} "
+                f"({row['change_pct']:+.1f}%){flag}"
+            )
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""HTTP 層效能基準：/api/health 與靜態資源的每秒請求數
+
+比較舊版 BaseHTTPMiddleware 實作與目前的純 ASGI CacheControlMiddleware，
+並量測 PrecompressedStaticFiles 在有無 Accept-Encoding、304 命中時的吞吐量。
+使用 httpx.ASGITransport 直接呼叫 ASGI app（不經網路），數字僅供前後比較。
+
+執行方式：
+    cd backend && uv run python benchmarks/bench_http.py [--requests 2000] [--frontend DIR] [--json]
+
+先執行 scripts/precompress_static.py 才會量測到 .br/.gz 回應。
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from starlette.middleware.base import BaseHTTPMiddleware
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from ching_tech_os.middleware.cache_control import CacheControlMiddleware  # noqa: E402
+from ching_tech_os.middleware.static_files import PrecompressedStaticFiles  # noqa: E402
+
+DEFAULT_FRONTEND = Path(__file__).resolve().parents[2] / "frontend"
+
+
+class LegacyCacheControlMiddleware(BaseHTTPMiddleware):
+    """舊版實作（BaseHTTPMiddleware），作為比較基準"""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if "cache-control" not in response.headers:
+            value = CacheControlMiddleware._get_cache_value(request.url.path)
+            if value:
+                response.headers["cache-control"] = value
+        return response
+
+
+def build_app(frontend: Path, *, legacy: bool) -> FastAPI:
+    """建立與 main.py 相同 middleware 堆疊的精簡 app"""
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    app.add_middleware(LegacyCacheControlMiddleware if legacy else CacheControlMiddleware)
+
+    @app.get("/api/health")
+    async def health():
+        return {"status": "healthy"}
+
+    static_cls = StaticFiles if legacy else PrecompressedStaticFiles
+    for name in ("css", "js"):
+        if (frontend / name).is_dir():
+            app.mount(f"/{name}", static_cls(directory=frontend / name), name=name)
+    return app
+
+
+def pick_asset(frontend: Path, prefix: str) -> str | None:
+    """挑選目錄中最大的檔案作為資源路由代表"""
+    directory = frontend / prefix
+    if not directory.is_dir():
+        return None
+    candidates = [p for p in directory.iterdir() if p.is_file() and p.suffix in (".js", ".css")]
+    if not candidates:
+        return None
+    largest = max(candidates, key=lambda p: p.stat().st_size)
+    return f"/{prefix}/{largest.name}"
+
+
+async def measure(app, path: str, count: int, concurrency: int, headers: dict | None = None) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # 暖機
+        first = await client.get(path, headers=headers)
+        queue = iter(range(count))
+        latencies: list[float] = []
+        total_bytes = 0
+
+        async def worker():
+            nonlocal total_bytes
+            for _ in queue:
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                total_bytes += response.num_bytes_downloaded
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "path": path,
+        "headers": headers or {},
+        "status": first.status_code,
+        "content_encoding": first.headers.get("content-encoding"),
+        "requests": count,
+        "rps": round(count / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+        "avg_wire_bytes": total_bytes // max(count, 1),
+    }
+
+
+async def run(frontend: Path, count: int, concurrency: int) -> list[dict]:
+    results = []
+    scenarios = [("/api/health", None)]
+    for prefix in ("js", "css"):
+        asset = pick_asset(frontend, prefix)
+        if asset:
+            scenarios.append((asset, {"accept-encoding": "identity"}))
+            scenarios.append((asset, {"accept-encoding": "br, gzip"}))
+
+    for legacy in (True, False):
+        app = build_app(frontend, legacy=legacy)
+        variant = "legacy" if legacy else "current"
+        for path, headers in scenarios:
+            result = await measure(app, path, count, concurrency, headers)
+            result["variant"] = variant
+            results.append(result)
+
+        # 條件式請求（304）
+        for path, _ in scenarios[1:2]:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                etag = (await client.get(path)).headers.get("etag")
+            if etag:
+                result = await measure(app, path, count, concurrency, {"if-none-match": etag})
+                result["variant"] = variant
+                results.append(result)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="HTTP 層效能基準")
+    parser.add_argument("--requests", type=int, default=2000, help="每個情境的請求數")
+    parser.add_argument("--concurrency", type=int, default=16, help="同時請求數")
+    parser.add_argument("--frontend", type=Path, default=DEFAULT_FRONTEND, help="前端目錄")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.frontend, args.requests, args.concurrency))
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"{'variant':<8} {'path':<40} {'headers':<24} {'status':>6} {'rps':>9} {'p50ms':>8} {'p99ms':>8} {'bytes':>9}")
+    for r in results:
+        header_desc = ",".join(f"{k}={v[:10]}" for k, v in r["headers"].items()) or "-"
+        print(
+            f"{r['variant']:<8} {r['path']:<40} {header_desc:<24} {r['status']:>6} "
+            f"{r['rps']:>9} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['avg_wire_bytes']:>9}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""JSON 編解碼效能基準：大型對話與 AI Log 內容
+
+以固定 seed 產生 ai_chats.messages（長對話）與 ai_logs.parsed_response（大量工具呼叫）內容，比較：
+
+- jsonb_write：寫入 jsonb 欄位時的編碼
+    - double_stdlib：先 json.dumps 再經標準庫 codec 編碼一次（舊做法）
+    - stdlib：直接傳入 list / dict，標準庫 codec 編碼
+    - codec：直接傳入，utils.json_codec（有 orjson 時為 orjson）
+- jsonb_read：讀取 jsonb 欄位時的解碼（double_stdlib 需要再 json.loads 一次）
+- response：API 回應序列化（starlette JSONResponse vs FastJSONResponse）
+- socketio：Socket.IO 事件封包編碼（標準庫 vs SocketIOJson）
+
+執行方式：
+    cd backend && uv run python benchmarks/bench_json.py [--messages 400] [--tool-calls 300] [--iterations 50] [--json]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import string
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from starlette.responses import JSONResponse  # noqa: E402
+
+from ching_tech_os.utils import json_codec  # noqa: E402
+from ching_tech_os.utils.json_codec import FastJSONResponse, SocketIOJson  # noqa: E402
+
+_CJK = "的一是在不了有和人這中大為上個國我以要他時來用們生到作地於出就分對成會可主發年動同工也能下過子說產種面而方後多定行學法所民得經十三之進著等部度家電力裡如水化高自二理起小物現實加量都兩體制機當使點從業本去把性好應開它合還因由其些然前外天政四日那社義事平形相全表間樣與關各重新線內數正心反你明看原又麼利比或但質氣第向道命此變條只沒結解問意建月公無系軍很情者最立代想已通並提直題黨程展五果料象員革位入常文總次品式活設及管特件長求老頭基資邊流路級少圖山統接知較將組見計別她手角期根論運農指幾九區強放決西被幹做必戰先回則任取據處理府研質"
+
+
+def _text(rng: random.Random, length: int) -> str:
+    """中英混合的訊息內容"""
+    chars = []
+    for _ in range(length):
+        chars.append(rng.choice(_CJK) if rng.random() < 0.7 else rng.choice(string.ascii_letters + " "))
+    return "".join(chars)
+
+
+def make_chat(rng: random.Random, messages: int) -> list[dict]:
+    """ai_chats.messages：user / assistant 交替的長對話"""
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": _text(rng, rng.randint(40, 600)),
+            "timestamp": 1_700_000_000 + i * 37,
+        }
+        for i in range(messages)
+    ]
+
+
+def make_log(rng: random.Random, tool_calls: int) -> dict:
+    """ai_logs.parsed_response：工具呼叫與執行時間統計"""
+    calls = [
+        {
+            "id": f"toolu_{i:05d}",
+            "name": rng.choice(["search_knowledge", "search_nas_files", "get_message_attachments", "read_file"]),
+            "input": {"query": _text(rng, 20), "limit": rng.randint(1, 20), "project_id": None},
+            "output": _text(rng, rng.randint(100, 1200)),
+            "duration_ms": round(rng.uniform(1, 900), 3),
+        }
+        for i in range(tool_calls)
+    ]
+    return {
+        "tool_calls": calls,
+        "tool_timings": {c["id"]: {"ms": c["duration_ms"], "cache": "miss"} for c in calls},
+        "context": {"prompt_tokens": 7421, "history_tokens": 5300, "summary_tokens": 812, "truncated": 0},
+        "model": "claude-sonnet",
+    }
+
+
+def _stdlib_dumps(obj) -> str:
+    # 原本 asyncpg codec 使用的 encoder
+    return json.dumps(obj)
+
+
+def _measure(fn: Callable[[], object], iterations: int) -> dict:
+    fn()
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    ordered = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+    }
+
+
+def run(messages: int, tool_calls: int, iterations: int) -> dict:
+    rng = random.Random(20240601)
+    payloads = {"chat": make_chat(rng, messages), "log": make_log(rng, tool_calls)}
+    results = []
+
+    for name, payload in payloads.items():
+        stored_double = _stdlib_dumps(json.dumps(payload, ensure_ascii=False))
+        stored = _stdlib_dumps(payload)
+        cases = {
+            "jsonb_write": {
+                "double_stdlib": lambda p=payload: _stdlib_dumps(json.dumps(p, ensure_ascii=False)),
+                "stdlib": lambda p=payload: _stdlib_dumps(p),
+                "codec": lambda p=payload: json_codec.dumps(p),
+            },
+            "jsonb_read": {
+                "double_stdlib": lambda s=stored_double: json.loads(json.loads(s)),
+                "stdlib": lambda s=stored: json.loads(s),
+                "codec": lambda s=stored: json_codec.loads(s),
+            },
+            "response": {
+                "stdlib": lambda p=payload: JSONResponse(p).body,
+                "codec": lambda p=payload: FastJSONResponse(p).body,
+            },
+            "socketio": {
+                "stdlib": lambda p=payload: json.dumps(["ai_chat_update", p], separators=(",", ":")),
+                "codec": lambda p=payload: SocketIOJson.dumps(["ai_chat_update", p], separators=(",", ":")),
+            },
+        }
+        for case, variants in cases.items():
+            baseline = None
+            for variant, fn in variants.items():
+                stats = _measure(fn, iterations)
+                baseline = baseline or stats["p50_ms"]
+                results.append({
+                    "payload": name,
+                    "case": case,
+                    "variant": variant,
+                    **stats,
+                    "speedup": round(baseline / stats["p50_ms"], 2) if stats["p50_ms"] else None,
+                })
+
+    return {
+        "backend": json_codec.BACKEND,
+        "payload_bytes": {name: len(json_codec.dumps_bytes(p)) for name, p in payloads.items()},
+        "iterations": iterations,
+        "results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="JSON 編解碼效能基準")
+    parser.add_argument("--messages", type=int, default=400, help="對話訊息數")
+    parser.add_argument("--tool-calls", type=int, default=300, help="AI Log 工具呼叫數")
+    parser.add_argument("--iterations", type=int, default=50, help="每個情境的執行次數")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    args = parser.parse_args()
+
+    report = run(args.messages, args.tool_calls, args.iterations)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    sizes = ", ".join(f"{k}={v / 1024:.0f}KB" for k, v in report["payload_bytes"].items())
+    print(f"backend={report['backend']} iterations={report['iterations']} payload: {sizes}")
+    print(f"{'payload':<6} {'case':<12} {'variant':<14} {'p50 ms':>9} {'p95 ms':>9} {'speedup':>8}")
+    for r in report["results"]:
+        print(
+            f"{r['payload']:<6} {r['case']:<12} {r['variant']:<14} "
+            f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['speedup']:>7}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""效能基準用的合成資料產生器
+
+所有產生器都以固定 seed 產生，確保不同 commit 之間量測的是相同資料。
+產出的檔案放在呼叫端指定的暫存目錄，不會寫到正式的資料路徑。
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import random
+import uuid
+from pathlib import Path
+
+# 常見的中英文詞彙，讓搜尋與分詞接近實際內容
+WORDS = [
+    "水切爐", "乾燥機", "輸送帶", "溫控", "馬達", "變頻器", "報價", "保固", "維修", "巡檢",
+    "配電盤", "PLC", "感測器", "氣壓缸", "減速機", "軸承", "校正", "SOP", "驗收", "交貨",
+    "controller", "firmware", "sensor", "layout", "drawing", "spec", "quotation", "manual",
+    "alarm", "timeout", "recipe", "calibration", "maintenance", "inspection", "shipping",
+]
+CATEGORIES = ["technical", "business", "management"]
+TYPES = ["context", "knowledge", "operations", "reference"]
+ROLES = ["engineer", "pm", "manager", "all"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+EXTENSIONS = ["pdf", "xlsx", "docx", "dwg", "jpg", "png", "txt", "pptx"]
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+# ============================================================
+# 知識庫
+# ============================================================
+
+
+def write_knowledge_corpus(base: Path, count: int, seed: int = 38) -> None:
+    """產生 index.json 與 entries/*.md（格式與 services/knowledge.py 相同）"""
+    rng = random.Random(seed)
+    entries_dir = base / "entries"
+    entries_dir.mkdir(parents=True, exist_ok=True)
+
+    entries = []
+    for i in range(1, count + 1):
+        kb_id = f"kb-{i:05d}"
+        title = _sentence(rng, 4)
+        filename = f"{kb_id}-bench.md"
+        body = "\n\n".join(_sentence(rng, 40) for _ in range(rng.randint(3, 12)))
+        (entries_dir / filename).write_text(
+            f"---\nid: {kb_id}\ntitle: {title}\n---\n\n# {title}\n\n{body}\n",
+            encoding="utf-8",
+        )
+        scope = rng.choice(["global", "global", "global", "personal"])
+        entries.append({
+            "id": kb_id,
+            "title": title,
+            "filename": filename,
+            "type": rng.choice(TYPES),
+            "category": rng.choice(CATEGORIES),
+            "scope": scope,
+            "owner": f"user{rng.randint(1, 20)}" if scope == "personal" else None,
+            "is_public": rng.random() < 0.3,
+            "tags": {
+                "projects": [f"project-{rng.randint(1, 50)}"],
+                "roles": [rng.choice(ROLES)],
+                "topics": rng.sample(WORDS, 2),
+                "level": rng.choice(LEVELS),
+            },
+            "author": "bench",
+            "created_at": "2026-01-01",
+            "updated_at": "2026-01-01",
+        })
+
+    index = {"version": 1, "next_id": count + 1, "entries": entries}
+    (base / "index.json").write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+
+
+# ============================================================
+# 對話歷史
+# ============================================================
+
+
+def conversation_rows(count: int, seed: int = 38) -> list[dict]:
+    """產生 _fetch_conversation_rows 查詢結果格式的對話列（由新到舊，與 SQL 排序相同）"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        is_bot = i % 2 == 1
+        rows.append({
+            "id": uuid.UUID(int=rng.getrandbits(128)),
+            "content": _sentence(rng, rng.randint(8, 80)),
+            "is_from_bot": is_bot,
+            "display_name": None if is_bot else f"使用者{rng.randint(1, 8)}",
+            "message_type": "text",
+            "line_message_id": f"{100000 + i}",
+            "nas_path": None,
+            "file_name": None,
+            "file_size": None,
+            "actual_file_type": None,
+        })
+    return rows
+
+
+# ============================================================
+# 文件
+# ============================================================
+
+
+def write_xlsx(path: Path, sheets: int, rows: int, cols: int = 12, seed: int = 38) -> Path:
+    """產生多工作表的大型 XLSX"""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    for s in range(sheets):
+        ws = wb.create_sheet(f"Sheet{s + 1}")
+        ws.append([f"欄位{c + 1}" for c in range(cols)])
+        for _ in range(rows):
+            ws.append([
+                rng.choice(WORDS) if c % 3 == 0 else round(rng.random() * 10000, 2)
+                for c in range(cols)
+            ])
+    wb.save(path)
+    return path
+
+
+def write_pdf(path: Path, pages: int, seed: int = 38) -> Path:
+    """產生多頁純文字 PDF"""
+    import fitz
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        text = "\n".join(
+            " ".join(rng.choice(WORDS[20:]) for _ in range(10)) for _ in range(45)
+        )
+        page.insert_text((40, 40), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def write_blob(path: Path, size: int, seed: int = 38) -> Path:
+    """產生指定大小的隨機二進位檔"""
+    path.write_bytes(random.Random(seed).randbytes(size))
+    return path
+
+
+# ============================================================
+# NAS 目錄樹
+# ============================================================
+
+
+def build_nas_tree(root: Path, dirs: int, files_per_dir: int, seed: int = 38) -> int:
+    """產生兩層的專案目錄樹（空檔案），回傳檔案總數"""
+    rng = random.Random(seed)
+    total = 0
+    for d in range(dirs):
+        project = root / f"{2020 + d % 6}-{rng.choice(WORDS)}-{d:04d}"
+        sub = project / rng.choice(["圖面", "報價", "文件", "照片"])
+        sub.mkdir(parents=True, exist_ok=True)
+        for f in range(files_per_dir):
+            target = sub if f % 2 else project
+            (target / f"{rng.choice(WORDS)}-{f:03d}.{rng.choice(EXTENSIONS)}").touch()
+            total += 1
+    return total
+
+
+# ============================================================
+# Line webhook
+# ============================================================
+
+
+def line_text_event(user_id: str, group_id: str | None, text: str, seq: int) -> dict:
+    """Line Messaging API 的文字訊息事件"""
+    source = {"type": "group", "groupId": group_id, "userId": user_id} if group_id else {
+        "type": "user",
+        "userId": user_id,
+    }
+    return {
+        "type": "message",
+        "mode": "active",
+        "timestamp": 1760000000000 + seq,
+        "source": source,
+        "webhookEventId": f"01BENCH{seq:020d}",
+        "deliveryContext": {"isRedelivery": False},
+        "replyToken": f"reply-token-{seq}",
+        "message": {"id": f"{500000000 + seq}", "type": "text", "quoteToken": f"q-{seq}", "text": text},
+    }
+
+
+def line_webhook_body(events: list[dict], destination: str = "Ubench") -> bytes:
+    return json.dumps({"destination": destination, "events": events}).encode("utf-8")
+
+
+def line_signature(body: bytes, channel_secret: str) -> str:
+    """計算 X-Line-Signature"""
+    digest = hmac.new(channel_secret.encode("utf-8"), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("utf-8")
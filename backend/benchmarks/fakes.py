@@ -0,0 +1,292 @@
+"""效能基準用的本地替身
+
+讓熱路徑在沒有 PostgreSQL、Line API、Claude CLI、SMB 伺服器的環境下也能完整執行：
+
+- FakeConnection：依 SQL 片段回傳預設資料列的 asyncpg 連線替身
+- StubClaudeClient：與 ClaudeClient 相同介面，依固定延遲回覆並觸發工具回呼
+- FakeMessagingApi：記錄 reply / push 的 Line Messaging API 替身
+- FakeTreeConnect / FakeOpen：以本地目錄模擬 SMB 共享，每次請求加上模擬 RTT
+
+替身只取代網路與外部服務邊界，服務本身的程式碼照常執行。
+"""
+
+import asyncio
+import contextlib
+import itertools
+import sys
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+_ids = itertools.count(1)
+
+
+# ============================================================
+# 資料庫
+# ============================================================
+
+
+class FakeRecord(dict):
+    """asyncpg Record 替身：未定義的欄位回傳 None"""
+
+    def __missing__(self, key):
+        return None
+
+
+class FakeConnection:
+    """依 SQL 片段比對回傳結果的連線替身
+
+    rules 為 (SQL 片段, 結果) 的序列，第一個包含該片段的規則生效；
+    結果可以是值或 callable(query, *args)。未命中時 fetchrow 回傳帶有新 id 與
+    row_defaults 欄位的預設列，fetch 回傳空列表，fetchval 回傳 None。
+    """
+
+    def __init__(self, rules=(), latency: float = 0.0, row_defaults: dict | None = None):
+        self.rules = list(rules)
+        self.latency = latency
+        self.row_defaults = row_defaults or {}
+        self.queries: list[str] = []
+
+    async def _resolve(self, query: str, args: tuple, default):
+        self.queries.append(query)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for fragment, result in self.rules:
+            if fragment in query:
+                return result(query, *args) if callable(result) else result
+        return default() if callable(default) else default
+
+    async def fetch(self, query: str, *args):
+        return await self._resolve(query, args, list)
+
+    async def fetchrow(self, query: str, *args):
+        return await self._resolve(query, args, lambda: FakeRecord(self.row_defaults, id=uuid.uuid4()))
+
+    async def fetchval(self, query: str, *args):
+        return await self._resolve(query, args, None)
+
+    async def execute(self, query: str, *args):
+        await self._resolve(query, args, None)
+        return "OK"
+
+    async def executemany(self, query: str, args):
+        await self._resolve(query, (), None)
+
+    def transaction(self):
+        return contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def fake_database(conn: FakeConnection):
+    """將所有已載入模組的 get_connection 換成回傳 conn 的替身"""
+    from ching_tech_os import database
+
+    @contextlib.asynccontextmanager
+    async def _get_connection(*_args, **_kwargs):
+        yield conn
+
+    original = database.get_connection
+    with contextlib.ExitStack() as stack:
+        for name, module in list(sys.modules.items()):
+            if name.startswith("ching_tech_os") and getattr(module, "get_connection", None) is original:
+                stack.enter_context(patch.object(module, "get_connection", _get_connection))
+        yield conn
+
+
+# ============================================================
+# Claude
+# ============================================================
+
+
+class StubClaudeClient:
+    """ClaudeClient 替身：固定延遲後回覆，並依序觸發一次工具呼叫的回呼"""
+
+    latency = 0.0
+    reply = "好的，這是模擬的 AI 回覆。"
+
+    def __init__(self, cwd=None, mcp_servers=None, system_prompt=None) -> None:
+        self.cwd = cwd
+        self.mcp_servers = mcp_servers
+        self.system_prompt = system_prompt
+        self._on_tool_start = None
+        self._on_tool_end = None
+        self._on_permission = None
+        self._on_result = None
+        self._on_tool_input_transform = None
+        self._text_buffer = ""
+        self.prompt_chars = 0
+
+    def on_tool_start(self, fn):
+        self._on_tool_start = fn
+        return fn
+
+    def on_tool_end(self, fn):
+        self._on_tool_end = fn
+        return fn
+
+    def on_permission(self, fn):
+        self._on_permission = fn
+        return fn
+
+    def on_result(self, fn):
+        self._on_result = fn
+        return fn
+
+    def on_tool_input_transform(self, fn):
+        self._on_tool_input_transform = fn
+        return fn
+
+    async def start_session(self):
+        return None
+
+    async def set_model(self, model: str):
+        return None
+
+    async def set_mode(self, mode: str):
+        return None
+
+    async def query(self, prompt: str) -> str:
+        self.prompt_chars = len(prompt)
+        tool_input = {"query": "bench"}
+        if self._on_permission:
+            await self._on_permission("search_knowledge", tool_input)
+        if self._on_tool_start:
+            await self._on_tool_start("tool-1", "search_knowledge", tool_input)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._on_tool_end:
+            await self._on_tool_end("tool-1", "ok", {"ok": True})
+        if self._on_result:
+            await self._on_result({"input_tokens": len(prompt) // 4, "output_tokens": 32})
+        self._text_buffer = self.reply
+        return self.reply
+
+    async def close(self):
+        return None
+
+
+# ============================================================
+# Line Messaging API
+# ============================================================
+
+
+class FakeMessagingApi:
+    """AsyncMessagingApi 替身：每次呼叫加上模擬 RTT 並記錄送出的訊息"""
+
+    def __init__(self, rtt: float = 0.0):
+        self.rtt = rtt
+        self.replies: list = []
+        self.pushes: list = []
+
+    async def _call(self):
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+
+    def _sent(self, request):
+        return SimpleNamespace(
+            sent_messages=[SimpleNamespace(id=str(next(_ids))) for _ in request.messages]
+        )
+
+    async def reply_message(self, request):
+        await self._call()
+        self.replies.append(request)
+        return self._sent(request)
+
+    async def push_message(self, request):
+        await self._call()
+        self.pushes.append(request)
+        return self._sent(request)
+
+    async def get_profile(self, user_id):
+        await self._call()
+        return SimpleNamespace(display_name=f"bench-{user_id[-4:]}", picture_url=None, status_message=None)
+
+    async def get_group_member_profile(self, group_id, user_id):
+        await self._call()
+        return SimpleNamespace(display_name=f"bench-{user_id[-4:]}", picture_url=None)
+
+    async def get_group_summary(self, group_id):
+        await self._call()
+        return SimpleNamespace(group_name="bench group", picture_url=None)
+
+    async def get_group_member_count(self, group_id):
+        await self._call()
+        return SimpleNamespace(count=12)
+
+    async def show_loading_animation(self, request):
+        await self._call()
+
+
+@contextlib.contextmanager
+def fake_line_api(api: FakeMessagingApi):
+    """將 bot_line 各模組的 get_messaging_api 換成回傳 api 的替身"""
+    from ching_tech_os.services.bot_line import client
+
+    async def _get_messaging_api():
+        return api
+
+    original = client.get_messaging_api
+    with contextlib.ExitStack() as stack:
+        for name, module in list(sys.modules.items()):
+            if name.startswith("ching_tech_os") and getattr(module, "get_messaging_api", None) is original:
+                stack.enter_context(patch.object(module, "get_messaging_api", _get_messaging_api))
+        yield api
+
+
+# ============================================================
+# SMB
+# ============================================================
+
+
+class FakeTreeConnect:
+    """TreeConnect 替身：\\\\host\\share 對應到 root/share 本地目錄"""
+
+    root: Path = Path(".")
+    rtt = 0.0
+
+    def __init__(self, session, unc_path: str):
+        self.share = unc_path.rsplit("\\", 1)[-1]
+        self.path = self.root / self.share
+
+    def connect(self):
+        time.sleep(self.rtt)
+
+    def disconnect(self):
+        time.sleep(self.rtt)
+
+
+class FakeOpen:
+    """Open 替身：每次 create / read / close 都是一個來回"""
+
+    def __init__(self, tree: FakeTreeConnect, path: str):
+        self.file_path = tree.path / path.replace("\\", "/")
+        self.rtt = tree.rtt
+        self._fh = None
+        self.end_of_file = 0
+
+    def create(self, *_args, **_kwargs):
+        time.sleep(self.rtt)
+        self._fh = open(self.file_path, "rb")
+        self.end_of_file = self.file_path.stat().st_size
+
+    def read(self, offset: int, length: int) -> bytes:
+        time.sleep(self.rtt)
+        self._fh.seek(offset)
+        return self._fh.read(length)
+
+    def close(self):
+        time.sleep(self.rtt)
+        if self._fh is not None:
+            self._fh.close()
+
+
+@contextlib.contextmanager
+def fake_smb(root: Path, rtt: float = 0.0):
+    """讓 services/smb.py 的 TreeConnect / Open 改用本地目錄"""
+    from ching_tech_os.services import smb
+
+    tree_cls = type("BenchTreeConnect", (FakeTreeConnect,), {"root": root, "rtt": rtt})
+    with patch.object(smb, "TreeConnect", tree_cls), patch.object(smb, "Open", FakeOpen):
+        yield
@@ -0,0 +1,32 @@
+"""新增對話上下文查詢用的複合索引
+
+get_conversation_context 依對話（群組或個人）取最近 N 則 text/image/file 訊息，
+以部分複合索引讓查詢直接依 created_at 倒序掃描，不需排序整個對話。
+
+Revision ID: 016
+"""
+
+from alembic import op
+
+revision = "016"
+down_revision = "015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_bot_messages_group_context
+        ON bot_messages (bot_group_id, created_at DESC)
+        WHERE message_type IN ('text', 'image', 'file')
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_bot_messages_personal_context
+        ON bot_messages (bot_user_id, created_at DESC)
+        WHERE bot_group_id IS NULL AND message_type IN ('text', 'image', 'file')
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_bot_messages_personal_context")
+    op.execute("DROP INDEX IF EXISTS idx_bot_messages_group_context")
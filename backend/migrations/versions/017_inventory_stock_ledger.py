@@ -0,0 +1,217 @@
+"""物料庫存改為增量維護，新增專案物料彙總表與庫存對帳快照
+
+- update_inventory_current_stock() 改為依異動數量加減 current_stock，
+  不再每次 SUM 該物料的全部進出貨記錄
+- inventory_project_item_totals：(專案, 物料) 進出貨彙總，由同一個 trigger 維護，
+  供 get_project_inventory_status 直接查詢
+- inventory_stock_snapshots：定期對帳時記錄各物料的帳面庫存與差異
+- 批次匯入（COPY）時設定 ctos.inventory_bulk_import = 'on'，trigger 略過逐筆更新，
+  改由匯入流程依物料一次套用
+
+inventory_* 資料表不在 clean_schema.sql 中（由既有部署建立），
+因此 trigger 掛載與資料回填只在資料表存在時執行。
+
+Revision ID: 017
+"""
+
+from alembic import op
+
+revision = "017"
+down_revision = "016"
+branch_labels = None
+depends_on = None
+
+
+_DELTA_FUNCTION = """
+CREATE OR REPLACE FUNCTION public.update_inventory_current_stock() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+        DECLARE
+            old_delta NUMERIC := 0;
+            new_delta NUMERIC := 0;
+        BEGIN
+            -- 批次匯入時由匯入流程統一套用差額
+            IF current_setting('ctos.inventory_bulk_import', true) = 'on' THEN
+                IF TG_OP = 'DELETE' THEN
+                    RETURN OLD;
+                END IF;
+                RETURN NEW;
+            END IF;
+
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                old_delta := CASE WHEN OLD.type = 'in' THEN OLD.quantity ELSE -OLD.quantity END;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                new_delta := CASE WHEN NEW.type = 'in' THEN NEW.quantity ELSE -NEW.quantity END;
+            END IF;
+
+            -- 物料庫存
+            IF TG_OP = 'UPDATE' AND NEW.item_id = OLD.item_id THEN
+                IF new_delta <> old_delta THEN
+                    UPDATE inventory_items
+                    SET current_stock = COALESCE(current_stock, 0) + new_delta - old_delta
+                    WHERE id = NEW.item_id;
+                END IF;
+            ELSE
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    UPDATE inventory_items
+                    SET current_stock = COALESCE(current_stock, 0) - old_delta
+                    WHERE id = OLD.item_id;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    UPDATE inventory_items
+                    SET current_stock = COALESCE(current_stock, 0) + new_delta
+                    WHERE id = NEW.item_id;
+                END IF;
+            END IF;
+
+            -- 專案物料彙總
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.project_id IS NOT NULL THEN
+                UPDATE inventory_project_item_totals
+                SET total_in = total_in - CASE WHEN OLD.type = 'in' THEN OLD.quantity ELSE 0 END,
+                    total_out = total_out - CASE WHEN OLD.type = 'out' THEN OLD.quantity ELSE 0 END,
+                    transaction_count = transaction_count - 1
+                WHERE project_id = OLD.project_id AND item_id = OLD.item_id;
+                DELETE FROM inventory_project_item_totals
+                WHERE project_id = OLD.project_id AND item_id = OLD.item_id
+                  AND transaction_count <= 0;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.project_id IS NOT NULL THEN
+                INSERT INTO inventory_project_item_totals
+                    (project_id, item_id, total_in, total_out, transaction_count)
+                VALUES (
+                    NEW.project_id,
+                    NEW.item_id,
+                    CASE WHEN NEW.type = 'in' THEN NEW.quantity ELSE 0 END,
+                    CASE WHEN NEW.type = 'out' THEN NEW.quantity ELSE 0 END,
+                    1
+                )
+                ON CONFLICT (project_id, item_id) DO UPDATE
+                SET total_in = inventory_project_item_totals.total_in + EXCLUDED.total_in,
+                    total_out = inventory_project_item_totals.total_out + EXCLUDED.total_out,
+                    transaction_count = inventory_project_item_totals.transaction_count + 1;
+            END IF;
+
+            -- 與舊版相同回傳 OLD/NEW（既有部署若以 BEFORE trigger 掛載也不會略過該列）
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$;
+"""
+
+_LEGACY_FUNCTION = """
+CREATE OR REPLACE FUNCTION public.update_inventory_current_stock() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+        BEGIN
+            IF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') THEN
+                UPDATE inventory_items
+                SET current_stock = (
+                    SELECT COALESCE(SUM(CASE WHEN type = 'in' THEN quantity ELSE -quantity END), 0)
+                    FROM inventory_transactions
+                    WHERE item_id = NEW.item_id
+                )
+                WHERE id = NEW.item_id;
+            END IF;
+
+            IF (TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND NEW.item_id <> OLD.item_id)) THEN
+                UPDATE inventory_items
+                SET current_stock = (
+                    SELECT COALESCE(SUM(CASE WHEN type = 'in' THEN quantity ELSE -quantity END), 0)
+                    FROM inventory_transactions
+                    WHERE item_id = OLD.item_id
+                )
+                WHERE id = OLD.item_id;
+            END IF;
+
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            ELSE
+                RETURN NEW;
+            END IF;
+        END;
+        $$;
+"""
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_project_item_totals (
+            project_id UUID NOT NULL,
+            item_id UUID NOT NULL,
+            total_in NUMERIC NOT NULL DEFAULT 0,
+            total_out NUMERIC NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (project_id, item_id)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_stock_snapshots (
+            id BIGSERIAL PRIMARY KEY,
+            item_id UUID NOT NULL,
+            stock NUMERIC NOT NULL,
+            recorded_stock NUMERIC,
+            taken_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_inventory_stock_snapshots_item
+        ON inventory_stock_snapshots (item_id, taken_at DESC)
+    """)
+
+    op.execute(_DELTA_FUNCTION)
+
+    # 既有部署：回填彙總表、校正庫存，並確保 trigger 已掛載（AFTER 每列）
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('public.inventory_transactions') IS NULL
+               OR to_regclass('public.inventory_items') IS NULL THEN
+                RETURN;
+            END IF;
+
+            INSERT INTO inventory_project_item_totals
+                (project_id, item_id, total_in, total_out, transaction_count)
+            SELECT project_id, item_id,
+                   COALESCE(SUM(CASE WHEN type = 'in' THEN quantity ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN type = 'out' THEN quantity ELSE 0 END), 0),
+                   COUNT(*)
+            FROM inventory_transactions
+            WHERE project_id IS NOT NULL
+            GROUP BY project_id, item_id
+            ON CONFLICT (project_id, item_id) DO NOTHING;
+
+            WITH ledger AS (
+                SELECT i.id,
+                       COALESCE(SUM(CASE WHEN t.type = 'in' THEN t.quantity ELSE -t.quantity END), 0) AS stock
+                FROM inventory_items i
+                LEFT JOIN inventory_transactions t ON t.item_id = i.id
+                GROUP BY i.id
+            )
+            UPDATE inventory_items i
+            SET current_stock = ledger.stock
+            FROM ledger
+            WHERE i.id = ledger.id AND i.current_stock IS DISTINCT FROM ledger.stock;
+
+            DROP TRIGGER IF EXISTS trigger_update_inventory_current_stock ON inventory_transactions;
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_trigger
+                WHERE tgrelid = 'public.inventory_transactions'::regclass
+                  AND tgfoid = 'public.update_inventory_current_stock'::regproc
+                  AND NOT tgisinternal
+            ) THEN
+                CREATE TRIGGER trigger_update_inventory_current_stock
+                AFTER INSERT OR UPDATE OR DELETE ON inventory_transactions
+                FOR EACH ROW EXECUTE FUNCTION public.update_inventory_current_stock();
+            END IF;
+        END;
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.execute(_LEGACY_FUNCTION)
+    op.execute("DROP TABLE IF EXISTS inventory_stock_snapshots")
+    op.execute("DROP TABLE IF EXISTS inventory_project_item_totals")
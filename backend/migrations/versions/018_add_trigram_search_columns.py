@@ -0,0 +1,64 @@
+"""新增正規化搜尋欄位與 pg_trgm GIN 索引（物料、廠商、專案）
+
+search_text 為 stored generated column：各欄位轉小寫並移除連字符與空白，
+欄位間以 | 分隔避免跨欄位誤配對。規則需與 services/text_search.normalize_search_text 一致。
+
+inventory_items / vendors / projects 不在 clean_schema.sql 中（由既有部署建立），
+只在資料表存在時新增欄位與索引。
+
+Revision ID: 018
+"""
+
+from alembic import op
+
+revision = "018"
+down_revision = "017"
+branch_labels = None
+depends_on = None
+
+
+def _normalized(*columns: str) -> str:
+    joined = " || '|' || ".join(f"COALESCE({c}, '')" for c in columns)
+    return f"regexp_replace(lower({joined}), '[-[:space:]]+', '', 'g')"
+
+
+# (資料表, 組成搜尋文字的欄位)
+_TABLES = (
+    ("inventory_items", ("name", "specification", "model", "category", "default_vendor")),
+    ("vendors", ("name", "short_name", "erp_code")),
+    ("projects", ("name", "description")),
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for table, columns in _TABLES:
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF to_regclass('public.{table}') IS NULL THEN
+                    RETURN;
+                END IF;
+                ALTER TABLE {table}
+                    ADD COLUMN IF NOT EXISTS search_text TEXT
+                    GENERATED ALWAYS AS ({_normalized(*columns)}) STORED;
+                CREATE INDEX IF NOT EXISTS idx_{table}_search_text_trgm
+                    ON {table} USING gin (search_text gin_trgm_ops);
+            END;
+            $$
+        """)
+
+
+def downgrade() -> None:
+    for table, _ in _TABLES:
+        op.execute(f"DROP INDEX IF EXISTS idx_{table}_search_text_trgm")
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF to_regclass('public.{table}') IS NOT NULL THEN
+                    ALTER TABLE {table} DROP COLUMN IF EXISTS search_text;
+                END IF;
+            END;
+            $$
+        """)
@@ -0,0 +1,48 @@
+"""新增 bot_webhook_events 資料表
+
+Line / Telegram webhook（以及 Telegram polling）收到的事件先寫入此表再回應平台，
+由程序內的 dispatcher 依對話依序處理；程序重啟時補處理未完成的事件。
+(platform, event_key) 唯一：Line webhookEventId、Telegram update_id，重送事件直接略過。
+
+Revision ID: 019
+"""
+
+from alembic import op
+
+revision = "019"
+down_revision = "018"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE bot_webhook_events (
+            id BIGSERIAL PRIMARY KEY,
+            platform VARCHAR(20) NOT NULL,
+            event_key VARCHAR(128) NOT NULL,
+            conversation_key VARCHAR(160) NOT NULL,
+            payload JSONB NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            last_error TEXT,
+            received_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            started_at TIMESTAMPTZ,
+            finished_at TIMESTAMPTZ,
+            UNIQUE (platform, event_key)
+        )
+    """)
+    # 啟動補處理只掃描未完成的事件
+    op.execute("""
+        CREATE INDEX idx_bot_webhook_events_unfinished
+        ON bot_webhook_events (id)
+        WHERE status IN ('pending', 'processing')
+    """)
+    op.execute("""
+        CREATE INDEX idx_bot_webhook_events_received_at
+        ON bot_webhook_events (received_at)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS bot_webhook_events")
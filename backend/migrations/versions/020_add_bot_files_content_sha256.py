@@ -0,0 +1,32 @@
+"""bot_files 新增 content_sha256 欄位
+
+Line / Telegram 收到的媒體改以內容雜湊儲存（blobs/{前兩碼}/{sha256}{副檔名}），
+相同檔案只存一份，各則訊息的 bot_files 記錄指向同一個 nas_path。
+刪除記錄時以 nas_path 判斷是否仍有其他參照。
+
+Revision ID: 020
+"""
+
+from alembic import op
+
+revision = "020"
+down_revision = "019"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE bot_files ADD COLUMN IF NOT EXISTS content_sha256 CHAR(64)")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_bot_files_content_sha256
+        ON bot_files (content_sha256)
+        WHERE content_sha256 IS NOT NULL
+    """)
+    # 刪除檔案時查詢同一路徑的其他參照
+    op.execute("CREATE INDEX IF NOT EXISTS idx_bot_files_nas_path ON bot_files (nas_path)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_bot_files_nas_path")
+    op.execute("DROP INDEX IF EXISTS idx_bot_files_content_sha256")
+    op.execute("ALTER TABLE bot_files DROP COLUMN IF EXISTS content_sha256")
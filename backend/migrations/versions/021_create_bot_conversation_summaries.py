@@ -0,0 +1,32 @@
+"""新增 bot_conversation_summaries 資料表
+
+Bot 對話超出上下文 token 預算的較舊訊息整理成滾動摘要，每個對話一筆：
+群組以 "group:{bot_groups.id}"、個人對話以 "user:{platform_user_id}" 為 key。
+covered_message_id 為摘要涵蓋到的最後一則 bot_messages.id，之後只增量摘要新超出預算的訊息。
+
+Revision ID: 021
+"""
+
+from alembic import op
+
+revision = "021"
+down_revision = "020"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE bot_conversation_summaries (
+            conversation_key VARCHAR(160) PRIMARY KEY,
+            summary TEXT NOT NULL,
+            covered_message_id UUID,
+            covered_count INT NOT NULL DEFAULT 0,
+            summary_tokens INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS bot_conversation_summaries")
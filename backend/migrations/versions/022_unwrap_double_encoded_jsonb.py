@@ -0,0 +1,64 @@
+"""將重複編碼的 jsonb 欄位轉回原本的 JSON 結構
+
+ai_chats.messages、ai_logs.allowed_tools / parsed_response、users.preferences、
+messages.metadata 與 ai_prompts.variables 過去先以 json.dumps 轉成字串，
+再經連線的 jsonb codec 編碼一次，資料庫中存成 JSON 字串純量（'"[...]"'）。
+寫入端已改為直接傳入 list / dict，這裡把既有的字串純量還原為陣列 / 物件，
+讀取端仍保留 decode_jsonb 相容尚未轉換的資料。
+
+users.preferences 另外以 `preferences || $2::jsonb` 合併更新，物件接上字串純量會變成陣列
+（[{...}, "{...}"]）；依序合併陣列中的物件（字串先解析）還原為單一物件。
+
+Revision ID: 022
+"""
+
+from alembic import op
+
+revision = "022"
+down_revision = "021"
+branch_labels = None
+depends_on = None
+
+
+_COLUMNS = (
+    ("ai_chats", "messages"),
+    ("ai_logs", "allowed_tools"),
+    ("ai_logs", "parsed_response"),
+    ("users", "preferences"),
+    ("messages", "metadata"),
+    ("ai_prompts", "variables"),
+)
+
+
+def upgrade() -> None:
+    for table, column in _COLUMNS:
+        op.execute(f"""
+            UPDATE {table}
+            SET {column} = ({column} #>> '{{}}')::jsonb
+            WHERE jsonb_typeof({column}) = 'string'
+              AND left(btrim({column} #>> '{{}}'), 1) IN ('[', '{{')
+        """)
+
+    # 合併更新產生的陣列：後面的設定覆蓋前面的
+    op.execute("""
+        UPDATE users
+        SET preferences = COALESCE((
+            SELECT jsonb_object_agg(kv.key, kv.value ORDER BY elem.ord)
+            FROM jsonb_array_elements(preferences) WITH ORDINALITY AS elem(value, ord)
+            CROSS JOIN LATERAL jsonb_each(
+                CASE
+                    WHEN jsonb_typeof(elem.value) = 'object' THEN elem.value
+                    WHEN jsonb_typeof(elem.value) = 'string'
+                         AND left(btrim(elem.value #>> '{}'), 1) = '{'
+                        THEN (elem.value #>> '{}')::jsonb
+                    ELSE '{}'::jsonb
+                END
+            ) AS kv
+        ), '{}'::jsonb)
+        WHERE jsonb_typeof(preferences) = 'array'
+    """)
+
+
+def downgrade() -> None:
+    # 讀取端同時支援兩種格式，不需要還原
+    pass
@@ -0,0 +1,41 @@
+"""物料、專案名稱的 pg_trgm GIN 索引
+
+find_item_by_id_or_name / find_project_by_id_or_name 只比對名稱（name ILIKE '%x%'，
+結果直接用於庫存異動，不走 search_text 的正規化 / 相似度搜尋）。
+開頭萬用字元無法使用 B-tree 索引，改以 gin_trgm_ops 索引讓同一條 ILIKE 走索引。
+
+inventory_items / projects 不在 clean_schema.sql 中（由既有部署建立），
+只在資料表存在時建立索引。pg_trgm 由 migration 018 啟用。
+
+Revision ID: 023
+"""
+
+from alembic import op
+
+revision = "023"
+down_revision = "022"
+branch_labels = None
+depends_on = None
+
+
+_TABLES = ("inventory_items", "projects")
+
+
+def upgrade() -> None:
+    for table in _TABLES:
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF to_regclass('public.{table}') IS NULL THEN
+                    RETURN;
+                END IF;
+                CREATE INDEX IF NOT EXISTS idx_{table}_name_trgm
+                    ON {table} USING gin (name gin_trgm_ops);
+            END;
+            $$
+        """)
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        op.execute(f"DROP INDEX IF EXISTS idx_{table}_name_trgm")
@@ -0,0 +1,118 @@
+"""建置腳本：為前端靜態資源產生 .br / .gz 預壓縮檔
+
+PrecompressedStaticFiles 會依 Accept-Encoding 直接回傳這些檔案，
+請求時不需要再壓縮。原檔更新後重新執行即可（未變更的檔案會略過）。
+
+- gzip 使用標準函式庫（level 9，不寫入 mtime，輸出可重現）
+- brotli 需安裝 `brotli` 套件，未安裝時只產生 .gz
+
+執行方式：
+    cd backend && uv run python scripts/precompress_static.py [--frontend ../frontend] [--force]
+"""
+
+import argparse
+import gzip
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 選用套件
+    brotli = None
+
+# 需要預壓縮的目錄（相對 frontend）
+STATIC_DIRS = ("css", "js", "src", "assets")
+
+# 可壓縮的文字類型
+COMPRESSIBLE_SUFFIXES = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml"}
+
+# 太小的檔案壓縮效益低
+MIN_SIZE = 1024
+
+
+def _is_fresh(source: Path, target: Path) -> bool:
+    try:
+        return target.stat().st_mtime >= source.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def _write_if_smaller(target: Path, data: bytes, original_size: int) -> bool:
+    """壓縮後沒有變小就不寫入（並移除舊的壓縮檔）"""
+    if len(data) >= original_size:
+        target.unlink(missing_ok=True)
+        return False
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(target)
+    return True
+
+
+def precompress_file(path: Path, force: bool = False) -> list[str]:
+    """壓縮單一檔案，回傳已寫入的編碼"""
+    written = []
+    raw = None
+    size = path.stat().st_size
+
+    gz_path = path.with_name(path.name + ".gz")
+    if force or not _is_fresh(path, gz_path):
+        raw = path.read_bytes()
+        if _write_if_smaller(gz_path, gzip.compress(raw, compresslevel=9, mtime=0), size):
+            written.append("gzip")
+
+    if brotli is not None:
+        br_path = path.with_name(path.name + ".br")
+        if force or not _is_fresh(path, br_path):
+            raw = raw if raw is not None else path.read_bytes()
+            if _write_if_smaller(br_path, brotli.compress(raw, quality=11), size):
+                written.append("br")
+
+    return written
+
+
+def iter_static_files(frontend: Path):
+    for dirname in STATIC_DIRS:
+        root = frontend / dirname
+        if not root.is_dir():
+            continue
+        for path in sorted(root.rglob("*")):
+            if (
+                path.is_file()
+                and path.suffix.lower() in COMPRESSIBLE_SUFFIXES
+                and path.stat().st_size >= MIN_SIZE
+            ):
+                yield path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="產生前端靜態資源預壓縮檔")
+    parser.add_argument(
+        "--frontend",
+        type=Path,
+        default=Path(__file__).resolve().parents[2] / "frontend",
+        help="前端目錄（預設 ../frontend）",
+    )
+    parser.add_argument("--force", action="store_true", help="忽略 mtime，全部重新壓縮")
+    args = parser.parse_args()
+
+    if not args.frontend.is_dir():
+        print(f"找不到前端目錄: {args.frontend}", file=sys.stderr)
+        return 1
+    if brotli is None:
+        print("未安裝 brotli，只產生 .gz 檔案")
+
+    files = 0
+    outputs = 0
+    for path in iter_static_files(args.frontend):
+        files += 1
+        written = precompress_file(path, force=args.force)
+        if written:
+            outputs += len(written)
+            print(f"  {path.relative_to(args.frontend)}: {', '.join(written)}")
+
+    print(f"完成：檢查 {files} 個檔案，寫入 {outputs} 個壓縮檔")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -94,16 +94,27 @@ def register_events(sio: AsyncServer):
         agent_id = agent_config.get("id") if agent_config else None
         agent_tools = agent_config.get("tools") if agent_config else None
 
+        async def _on_queued(position: int) -> None:
+            # 系統忙碌時 typing 指示改顯示排隊位置；取得名額（position 0）後恢復一般 typing 指示
+            payload = {"chatId": chat_id_str, "typing": True}
+            if position > 0:
+                payload["queuePosition"] = position
+            await sio.emit("ai_typing", payload, to=sid)
+
         # 記錄開始時間
         start_time = time.time()
 
         # 呼叫 Claude CLI（自己管理歷史）
+        chat_user_id = chat.get("user_id")
         response = await call_claude(
             prompt=message,
             model=model,
             history=history,
             system_prompt=system_prompt,
             tools=agent_tools,
+            user_key=f"user:{chat_user_id}" if chat_user_id else f"sid:{sid}",
+            on_queued=_on_queued,
+            session_key=f"web:{chat_id}",
         )
 
         # 計算耗時
@@ -13,7 +13,7 @@ from ..services.session import session_manager, SessionData
 from ..services.smb import create_smb_service, SMBAuthError, SMBConnectionError
 from ..services.workers import run_in_smb_pool
 from ..services.user import upsert_user, get_user_by_username, get_user_for_auth, update_last_login, get_user_role
-from ..services.password import verify_password
+from ..services.password import verify_password_async
 from ..services.login_record import record_login
 from ..services.message import log_message
 from ..services.geoip import resolve_ip_location, parse_device_info
@@ -234,7 +234,9 @@ async def login(request: LoginRequest, req: Request) -> LoginResponse:
             return LoginResponse(success=False, error="此帳號已被停用")
 
         # 驗證密碼
-        if verify_password(request.password, user_data["password_hash"]):
+        if await verify_password_async(
+            request.password, user_data["password_hash"], client_key=ip_address
+        ):
             auth_success = True
             must_change_password = user_data.get("must_change_password", False)
         else:
@@ -431,7 +433,7 @@ async def change_password(
     - 若尚未設定密碼（NAS 認證使用者）：可直接設定新密碼
     變更成功後會清除 must_change_password 標記。
     """
-    from ..services.password import verify_password, hash_password, validate_password_strength
+    from ..services.password import verify_password_async, hash_password_async, validate_password_strength
     from ..services.user import get_user_for_auth, set_user_password, upsert_user
 
     # 確保使用者存在於資料庫（NAS 使用者可能尚未建立記錄）
@@ -453,7 +455,9 @@ async def change_password(
         # 已有密碼，需驗證目前密碼
         if not request.current_password:
             return ChangePasswordResponse(success=False, error="請輸入目前密碼")
-        if not verify_password(request.current_password, user_data["password_hash"]):
+        if not await verify_password_async(
+            request.current_password, user_data["password_hash"], client_key=session.username
+        ):
             return ChangePasswordResponse(success=False, error="目前密碼錯誤")
     # 若沒有密碼，允許直接設定（首次設定）
 
@@ -463,7 +467,7 @@ async def change_password(
         return ChangePasswordResponse(success=False, error=error_msg)
 
     # 更新密碼
-    new_hash = hash_password(request.new_password)
+    new_hash = await hash_password_async(request.new_password, client_key=session.username)
     success = await set_user_password(user_id, new_hash, must_change=False)
 
     if not success:
@@ -402,10 +402,10 @@ async def get_knowledge_history(
 ) -> HistoryResponse:
     """取得知識的 Git 版本歷史
 
-    使用 git log --follow 追蹤檔案歷史（含重命名）。
+    使用 git log --follow 追蹤檔案歷史（含重命名），依 HEAD 增量快取。
     """
     try:
-        return get_history(kb_id)
+        return await get_history(kb_id)
     except KnowledgeNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -430,10 +430,10 @@ async def get_knowledge_version(
 ) -> VersionResponse:
     """取得知識的特定版本內容
 
-    使用 git show 取得該版本的檔案內容。
+    透過常駐 git cat-file 行程取得該版本的檔案內容。
     """
     try:
-        return get_version(kb_id, commit)
+        return await get_version(kb_id, commit)
     except KnowledgeNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
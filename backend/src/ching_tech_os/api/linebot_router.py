@@ -5,6 +5,8 @@
 - 群組/用戶/訊息管理 API
 """
 
+import hashlib
+import json
 import logging
 from typing import Literal
 from uuid import UUID
@@ -12,6 +14,7 @@ from uuid import UUID
 from fastapi import APIRouter, Query, Request, HTTPException, Header, BackgroundTasks, Depends
 from fastapi.responses import Response
 from linebot.v3.webhooks import (
+    Event,
     MessageEvent,
     TextMessageContent,
     ImageMessageContent,
@@ -50,6 +53,7 @@ from ..services.bot_line import (
     save_message,
     save_file_record,
     download_and_save_file,
+    guess_mime_type,
     handle_join_event,
     handle_leave_event,
     list_groups,
@@ -84,6 +88,13 @@ from ..services.bot_line import (
     push_text,
     get_line_user_record,
 )
+from ..config import settings
+from ..services.bot.webhook_queue import (
+    QueuedEvent,
+    enqueue_events,
+    line_conversation_key,
+    register_handler,
+)
 from ..services.linebot_ai import handle_text_message
 
 logger = logging.getLogger("linebot_router")
@@ -127,13 +138,48 @@ async def webhook(
         logger.error(f"解析 Webhook 事件失敗: {e}")
         raise HTTPException(status_code=400, detail="Invalid webhook body")
 
-    # 處理每個事件
-    for event in events:
-        background_tasks.add_task(process_event, event)
+    if not settings.webhook_queue_enabled:
+        # 程序內背景處理（重啟時未處理的事件會遺失）
+        for event in events:
+            background_tasks.add_task(process_event, event)
+        return {"status": "ok"}
+
+    # 寫入持久化佇列後立即回應，由佇列依對話依序處理
+    raw_events = json.loads(body).get("events") or []
+    await enqueue_events([
+        QueuedEvent(
+            platform="line",
+            event_key=_line_event_key(raw),
+            conversation_key=line_conversation_key(raw),
+            payload=raw,
+        )
+        for raw in raw_events
+    ])
 
     return {"status": "ok"}
 
 
+def _line_event_key(raw: dict) -> str:
+    """Line 事件的去重 key：webhookEventId（舊格式沒有時以內容雜湊代替）"""
+    if raw.get("webhookEventId"):
+        return raw["webhookEventId"]
+    digest = hashlib.sha256(json.dumps(raw, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"sha256:{digest[:40]}"
+
+
+async def process_queued_event(payload: dict) -> None:
+    """處理佇列中的 Line 事件（原始 JSON）"""
+    try:
+        event = Event.from_dict(payload)
+    except ValueError:
+        logger.debug(f"未處理的事件類型: {payload.get('type')}")
+        return
+    await process_event(event)
+
+
+register_handler("line", process_queued_event)
+
+
 async def process_event(event) -> None:
     """
     處理單個 Line 事件
@@ -408,25 +454,27 @@ async def process_media_message(
                 actual_file_type = "image"
                 logger.info(f"檔案 {file_name} 重新分類為 image")
 
-        # 下載並儲存檔案到 NAS
-        nas_path = await download_and_save_file(
+        # 串流下載並以內容雜湊儲存到 NAS（相同檔案只存一份）
+        stored = await download_and_save_file(
             message_id=message_id,
-            message_uuid=message_uuid,
             file_type=actual_file_type,
-            line_group_id=line_group_id,
-            line_user_id=line_user_id,
             file_name=file_name,
         )
+        nas_path = stored.nas_path if stored else None
+        mime_type = guess_mime_type(stored.head) if stored else None
+        if mime_type == "application/octet-stream":
+            mime_type = None  # 無法從檔頭判斷
 
-        # 儲存檔案記錄到資料庫
+        # 儲存檔案記錄到資料庫（每則訊息一筆參照）
         await save_file_record(
             message_uuid=message_uuid,
             file_type=actual_file_type,
             file_name=file_name,
-            file_size=file_size,
-            mime_type=None,  # 稍後可從內容判斷
+            file_size=stored.size if stored else file_size,
+            mime_type=mime_type,
             nas_path=nas_path,
             duration=duration,
+            content_sha256=stored.sha256 if stored else None,
         )
 
         logger.info(f"媒體訊息處理完成: {message_id} -> {nas_path}")
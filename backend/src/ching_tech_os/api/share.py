@@ -1,8 +1,8 @@
 """公開分享連結 API"""
 
 import mimetypes
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse, Response
 
 from ching_tech_os.models.share import (
     ShareLinkCreate,
@@ -30,11 +30,11 @@ from ching_tech_os.services.share import (
     NasFileAccessDenied,
 )
 from ching_tech_os.config import settings
-from ching_tech_os.services.knowledge import get_nas_attachment, KnowledgeError
+from ching_tech_os.services.knowledge import get_nas_attachment_path, KnowledgeError
 from ching_tech_os.services.permissions import check_knowledge_permission
 from ching_tech_os.services.user import get_user_preferences
 from ching_tech_os.services.knowledge import get_knowledge, KnowledgeNotFoundError
-from ching_tech_os.api.auth import get_current_session
+from ching_tech_os.api.auth import get_client_ip, get_current_session
 from ching_tech_os.models.auth import SessionData
 
 # 需登入的 API
@@ -195,6 +195,7 @@ async def delete_link(
 )
 async def get_resource(
     token: str,
+    req: Request,
     password: str | None = None,
 ) -> PublicResourceResponse | PasswordRequiredResponse:
     """取得公開分享的資源內容
@@ -202,7 +203,7 @@ async def get_resource(
     無需登入即可存取。如果連結有密碼保護，需要在 query parameter 中提供 password。
     """
     try:
-        result = await get_public_resource(token, password)
+        result = await get_public_resource(token, password, client_key=get_client_ip(req))
 
         # 如果返回的是 PasswordRequiredResponse，表示需要密碼
         if isinstance(result, PasswordRequiredResponse):
@@ -336,13 +337,11 @@ async def get_public_attachment(token: str, path: str) -> Response:
             assets_base = Path(settings.knowledge_data_path)
             file_path = assets_base / assets_path
 
-            if not file_path.exists():
+            if not file_path.is_file():
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="附件不存在",
                 )
-
-            content = file_path.read_bytes()
         else:
             # NAS 附件
             # 驗證附件路徑是否屬於該知識庫
@@ -352,13 +351,14 @@ async def get_public_attachment(token: str, path: str) -> Response:
                     detail="無權存取此附件",
                 )
 
-            # get_nas_attachment 期望的 path 不含 attachments/ 前綴
+            # get_nas_attachment_path 期望的 path 不含 attachments/ 前綴
             nas_path = path[len("attachments/"):]
-            content = get_nas_attachment(nas_path)
+            file_path = get_nas_attachment_path(nas_path)
 
+        # 直接從磁碟串流（支援 Range），不整個讀入記憶體
         mime_type, _ = mimetypes.guess_type(filename)
-        return Response(
-            content=content,
+        return FileResponse(
+            file_path,
             media_type=mime_type or "application/octet-stream",
         )
 
@@ -387,10 +387,11 @@ async def download_shared_file(token: str) -> Response:
     """透過分享連結下載檔案
 
     支援 nas_file 和 project_attachment 類型的分享連結，無需登入。
+    檔案直接從磁碟串流並支援 Range 請求（大檔案可續傳）。
     """
     from urllib.parse import quote
     from ..services.share import get_project_attachment_info
-    from ..services.project import get_attachment_content, ProjectError
+    from ..services.project import get_attachment_file_path, ProjectError
 
     try:
         # 驗證 token 有效
@@ -402,17 +403,15 @@ async def download_shared_file(token: str) -> Response:
             file_path = link_info["resource_id"]
             # 驗證並取得檔案路徑
             full_path = validate_nas_file_path(file_path)
-            # 讀取檔案內容
-            content = full_path.read_bytes()
             filename = full_path.name
         elif resource_type == "project_attachment":
             attachment_id = link_info["resource_id"]
             # 取得附件資訊（已包含 project_id）
             attachment_info = await get_project_attachment_info(attachment_id)
             project_id = attachment_info["project_id"]
-            # 使用專案服務讀取附件內容
+            # 使用專案服務解析附件路徑
             from uuid import UUID
-            content, filename = await get_attachment_content(project_id, UUID(attachment_id))
+            full_path, filename = await get_attachment_file_path(project_id, UUID(attachment_id))
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -430,8 +429,8 @@ async def download_shared_file(token: str) -> Response:
         is_html = mime_type == "text/html"
         disposition = "inline" if (is_image or is_html) else "attachment"
 
-        return Response(
-            content=content,
+        return FileResponse(
+            full_path,
             media_type=mime_type or "application/octet-stream",
             headers={
                 "Content-Disposition": f"{disposition}; filename*=UTF-8''{encoded_filename}",
@@ -0,0 +1,61 @@
+"""系統健康監控 API
+
+- 管理員限定：event loop 延遲統計與最近的慢回呼事件（含卡住當下的堆疊、task 與路由），
+  用來找出在 event loop 上執行同步工作的 handler
+- `/metrics`：Prometheus 文字格式指標（需 Bearer token，或明確設定為公開）
+"""
+
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from ..config import settings
+from ..models.auth import SessionData
+from ..services.loop_monitor import loop_monitor
+from ..services.metrics import CONTENT_TYPE, render_metrics
+from .auth import require_admin
+
+router = APIRouter(prefix="/api/admin/system", tags=["admin"])
+
+
+@router.get("/event-loop")
+async def get_event_loop_stats(
+    session: SessionData = Depends(require_admin),
+) -> dict:
+    """取得 event loop 延遲統計與最近的慢回呼事件"""
+    return loop_monitor.snapshot()
+
+
+@router.post("/event-loop/reset")
+async def reset_event_loop_stats(
+    session: SessionData = Depends(require_admin),
+) -> dict:
+    """清除 event loop 統計與事件記錄"""
+    loop_monitor.reset()
+    return {"success": True}
+
+
+# ── Prometheus 指標 ─────────────────────────────────────────
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request) -> Response:
+    """輸出程序內指標（Prometheus 文字格式）
+
+    需帶 `Authorization: Bearer <METRICS_TOKEN>`；未設定 token 時一律拒絕，
+    除非設定 METRICS_PUBLIC=true 明確開放匿名存取。
+    """
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        if not hmac.compare_digest(request.headers.get("authorization", ""), expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    elif not settings.metrics_public:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="未設定 METRICS_TOKEN，/metrics 不開放存取",
+        )
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
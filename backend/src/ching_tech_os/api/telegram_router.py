@@ -12,6 +12,7 @@ from fastapi import APIRouter, Request, HTTPException, BackgroundTasks
 from telegram import Update
 
 from ..config import settings
+from ..services.bot.webhook_queue import enqueue_events, telegram_queued_event
 from ..services.bot_telegram.adapter import TelegramBotAdapter
 from ..services.bot_telegram.handler import handle_update
 
@@ -61,8 +62,13 @@ async def telegram_webhook(
         logger.error(f"解析 Telegram Update 失敗: {e}")
         raise HTTPException(status_code=400, detail="Invalid update body")
 
-    # 背景處理
-    background_tasks.add_task(handle_update, update, adapter)
+    if not settings.webhook_queue_enabled:
+        # 程序內背景處理（重啟時未處理的 update 會遺失）
+        background_tasks.add_task(handle_update, update, adapter)
+        return {"status": "ok"}
+
+    # 寫入持久化佇列後立即回應（與 polling 共用同一條處理管線）
+    await enqueue_events([telegram_queued_event(body)])
 
     return {"status": "ok"}
 
@@ -36,7 +36,7 @@ from ..services.user import (
     clear_user_password,
     delete_user,
 )
-from ..services.password import hash_password, validate_password_strength
+from ..services.password import hash_password_async, validate_password_strength
 from ..services.permissions import (
     get_user_permissions_for_role,
     get_default_permissions,
@@ -357,7 +357,7 @@ async def create_user_api(
 
     # 建立使用者
     try:
-        password_hashed = hash_password(request.password)
+        password_hashed = await hash_password_async(request.password)
         user_id = await create_user(
             username=request.username,
             password_hash=password_hashed,
@@ -449,7 +449,7 @@ async def reset_user_password_api(
         )
 
     from ..services.user import reset_user_password
-    password_hashed = hash_password(request.new_password)
+    password_hashed = await hash_password_async(request.new_password)
     success = await reset_user_password(user_id, password_hashed, must_change=True)
 
     if not success:
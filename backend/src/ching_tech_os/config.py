@@ -58,6 +58,34 @@ class Settings:
     db_password: str = _get_env("DB_PASSWORD", required=True)
     db_name: str = _get_env("DB_NAME", "ching_tech_os")
 
+    # 連線池（interactive：API / webhook；background：排程任務；analytics：管理統計）
+    db_pool_min_size: int = _get_env_int("DB_POOL_MIN_SIZE", 2)
+    db_pool_max_size: int = _get_env_int("DB_POOL_MAX_SIZE", 10)
+    # background / analytics 的 max 設為 0 時與 interactive 共用連線池
+    db_pool_background_min_size: int = _get_env_int("DB_POOL_BACKGROUND_MIN_SIZE", 1)
+    db_pool_background_max_size: int = _get_env_int("DB_POOL_BACKGROUND_MAX_SIZE", 4)
+    db_pool_analytics_min_size: int = _get_env_int("DB_POOL_ANALYTICS_MIN_SIZE", 0)
+    db_pool_analytics_max_size: int = _get_env_int("DB_POOL_ANALYTICS_MAX_SIZE", 2)
+    # MCP server 等子行程的單一連線池上限
+    db_pool_subprocess_max_size: int = _get_env_int("DB_POOL_SUBPROCESS_MAX_SIZE", 3)
+    # 等待連線的逾時秒數（0 = 不限制）
+    db_pool_acquire_timeout_seconds: int = _get_env_int("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", 30)
+    # 每個連線的 prepared statement 快取數（經 pgbouncer transaction 模式時設為 0）
+    db_statement_cache_size: int = _get_env_int("DB_STATEMENT_CACHE_SIZE", 100)
+    # prepared statement 快取存活秒數
+    db_max_cached_statement_lifetime: int = _get_env_int("DB_MAX_CACHED_STATEMENT_LIFETIME", 300)
+    # 超過此長度（bytes）的 SQL 不快取
+    db_max_cacheable_statement_size: int = _get_env_int("DB_MAX_CACHEABLE_STATEMENT_SIZE", 15 * 1024)
+    # 閒置連線關閉秒數
+    db_max_inactive_connection_lifetime: int = _get_env_int("DB_MAX_INACTIVE_CONNECTION_LIFETIME", 300)
+    # 讀取副本（留空 = 不使用；唯讀統計查詢改送副本）
+    db_replica_host: str = _get_env("DB_REPLICA_HOST", "")
+    db_replica_port: int = _get_env_int("DB_REPLICA_PORT", 0)
+    db_pool_replica_max_size: int = _get_env_int("DB_POOL_REPLICA_MAX_SIZE", 4)
+
+    # JSON 編解碼實作（auto：有安裝 orjson 就使用；orjson / stdlib 強制指定）
+    json_backend: str = _get_env("JSON_BACKEND", "auto")
+
     # ===================
     # NAS 認證
     enable_nas_auth: bool = _get_env_bool("ENABLE_NAS_AUTH", True)
@@ -87,6 +115,25 @@ class Settings:
     session_ttl_hours: int = _get_env_int("SESSION_TTL_HOURS", 8)
     session_cleanup_interval_minutes: int = 10
 
+    # 認證雜湊執行緒池（bcrypt 驗證/雜湊不在 event loop 上執行）
+    auth_pool_workers: int = _get_env_int("AUTH_POOL_WORKERS", 2)
+    # 排隊中 + 執行中的上限，超過時直接回 503（避免登入尖峰無限堆積）
+    auth_pool_max_pending: int = _get_env_int("AUTH_POOL_MAX_PENDING", 32)
+    # 單一 IP 同時進行的雜湊運算上限，超過時回 429
+    auth_max_concurrent_per_ip: int = _get_env_int("AUTH_MAX_CONCURRENT_PER_IP", 4)
+
+    # Event loop 健康監控（延遲取樣 + 卡住時擷取堆疊）
+    loop_monitor_enabled: bool = _get_env_bool("LOOP_MONITOR_ENABLED", True)
+    loop_monitor_interval_ms: int = _get_env_int("LOOP_MONITOR_INTERVAL_MS", 100)
+    # event loop 超過此毫秒數未回應即記錄為慢回呼並擷取堆疊
+    loop_slow_callback_ms: int = _get_env_int("LOOP_SLOW_CALLBACK_MS", 200)
+
+    # /metrics（Prometheus 文字格式）；需帶 METRICS_TOKEN 的 Bearer token，
+    # 未設定 token 時拒絕存取，除非明確設定 METRICS_PUBLIC=true 開放匿名存取
+    metrics_enabled: bool = _get_env_bool("METRICS_ENABLED", True)
+    metrics_token: str = _get_env("METRICS_TOKEN", "")
+    metrics_public: bool = _get_env_bool("METRICS_PUBLIC", False)
+
     # ===================
     # 路徑設定
     # ===================
@@ -125,6 +172,8 @@ class Settings:
         "SKILL_SCRIPT_FALLBACK_ENABLED",
         True,
     )
+    # skill 目錄變動檢查間隔（秒，0 = 停用自動重載）
+    skill_watch_interval_seconds: int = _get_env_int("SKILL_WATCH_INTERVAL_SECONDS", 5)
     # 啟用模組清單（* = 全部啟用）
     enabled_modules: str = _get_env("ENABLED_MODULES", "*")
     # Brave Search API（金鑰留空時 research-skill 會 fallback 到既有 provider）
@@ -137,6 +186,38 @@ class Settings:
     research_stale_timeout_minutes: int = _get_env_int("RESEARCH_STALE_TIMEOUT_MINUTES", 15)
     # 單次 AI 回合中 nanobanana 工具最多可呼叫次數（0 表示不限制）
     nanobanana_max_calls_per_request: int = _get_env_int("NANOBANANA_MAX_CALLS_PER_REQUEST", 1)
+    # 同時執行的 AI 呼叫上限（每次呼叫會啟動 Claude client 與 MCP 子行程；0 = 不限制）
+    ai_max_concurrent_calls: int = _get_env_int("AI_MAX_CONCURRENT_CALLS", 4)
+    # AI 呼叫排隊等待上限（秒，0 = 不限制）
+    ai_queue_timeout_seconds: int = _get_env_int("AI_QUEUE_TIMEOUT_SECONDS", 600)
+    # 保留的 Claude 對話 session 上限（同一對話連續提問只送新訊息；0 = 停用，每次重送歷史）
+    claude_session_max_active: int = _get_env_int("CLAUDE_SESSION_MAX_ACTIVE", 16)
+    # 對話 session 閒置多久關閉（秒）
+    claude_session_idle_seconds: int = _get_env_int("CLAUDE_SESSION_IDLE_SECONDS", 600)
+    # 保留的預熱 Claude agent host 數（依序承載多個 session；0 = 停用，每次建立新的 client）
+    claude_agent_pool_size: int = _get_env_int("CLAUDE_AGENT_POOL_SIZE", 4)
+    # 每個 agent host 承載多少個 session 後回收重建
+    claude_agent_recycle_sessions: int = _get_env_int("CLAUDE_AGENT_RECYCLE_SESSIONS", 50)
+    # 保留的 session 工作目錄數（清空後沿用；0 = 停用，每次 mkdtemp / rmtree）
+    claude_workdir_pool_size: int = _get_env_int("CLAUDE_WORKDIR_POOL_SIZE", 8)
+    # 每個工作目錄沿用幾次後刪除重建
+    claude_workdir_recycle_uses: int = _get_env_int("CLAUDE_WORKDIR_RECYCLE_USES", 50)
+    # 對話歷史的 token 預算（估計值；由新到舊放入訊息直到用完，0 = 不限制）
+    ai_context_budget_tokens: int = _get_env_int("AI_CONTEXT_BUDGET_TOKENS", 8000)
+    # 對話歷史最多放入的訊息數
+    ai_context_max_messages: int = _get_env_int("AI_CONTEXT_MAX_MESSAGES", 40)
+    # 單則歷史訊息的 token 上限，超過時截斷（0 = 不截斷）
+    ai_context_message_max_tokens: int = _get_env_int("AI_CONTEXT_MESSAGE_MAX_TOKENS", 2000)
+    # 超出預算的較舊訊息是否整理成滾動摘要（Bot 對話）
+    ai_context_summary_enabled: bool = _get_env_bool("AI_CONTEXT_SUMMARY_ENABLED", True)
+    # 累積多少則未摘要的較舊訊息才更新摘要
+    ai_context_summary_min_messages: int = _get_env_int("AI_CONTEXT_SUMMARY_MIN_MESSAGES", 6)
+    # 更新摘要時最多補查多少則已超出上下文則數上限（AI_CONTEXT_MAX_MESSAGES）的較舊訊息
+    ai_context_summary_backfill_messages: int = _get_env_int("AI_CONTEXT_SUMMARY_BACKFILL_MESSAGES", 200)
+    # 唯讀 MCP 工具結果快取保留秒數（同一 session 內相同參數的查詢直接回傳；0 = 停用）
+    mcp_tool_cache_ttl_seconds: int = _get_env_int("MCP_TOOL_CACHE_TTL_SECONDS", 300)
+    # 唯讀 MCP 工具結果快取筆數上限（每個 MCP server 行程）
+    mcp_tool_cache_max_entries: int = _get_env_int("MCP_TOOL_CACHE_MAX_ENTRIES", 256)
 
     # ===================
     # Line Bot 設定
@@ -188,6 +269,38 @@ class Settings:
         )
         bot_rate_limit_hourly = bot_rate_limit_daily
 
+    # 對話上下文快取：每個對話保留的訊息筆數（0 = 停用）
+    bot_context_cache_size: int = _get_env_int("BOT_CONTEXT_CACHE_SIZE", 50)
+    # 對話上下文快取存活秒數
+    bot_context_cache_ttl_seconds: int = _get_env_int("BOT_CONTEXT_CACHE_TTL_SECONDS", 600)
+
+    # 附件暫存（/tmp/bot-images、/tmp/bot-files）總容量上限（MB），超過時淘汰最久未用的檔案
+    bot_staging_cache_max_mb: int = _get_env_int("BOT_STAGING_CACHE_MAX_MB", 2048)
+    # 附件暫存閒置多久後刪除（小時）
+    bot_staging_cache_max_idle_hours: int = _get_env_int("BOT_STAGING_CACHE_MAX_IDLE_HOURS", 24)
+
+    # Webhook 事件佇列：事件先寫入 bot_webhook_events 再由背景 worker 處理
+    # （false = 沿用程序內背景工作，重啟時未處理的事件會遺失）
+    webhook_queue_enabled: bool = _get_env_bool("WEBHOOK_QUEUE_ENABLED", True)
+    # 同時處理的事件數上限（同一對話內永遠依序處理）
+    webhook_queue_workers: int = _get_env_int("WEBHOOK_QUEUE_WORKERS", 8)
+    # 單一事件最多處理次數（處理中重啟會再處理一次）
+    webhook_queue_max_attempts: int = _get_env_int("WEBHOOK_QUEUE_MAX_ATTEMPTS", 3)
+    # 重啟後只補處理幾分鐘內收到的事件（過舊的訊息補回覆已無意義）
+    webhook_queue_recover_minutes: int = _get_env_int("WEBHOOK_QUEUE_RECOVER_MINUTES", 30)
+    # 關閉時等待處理中事件的秒數（逾時的事件於下次啟動時補處理）
+    webhook_queue_shutdown_timeout: int = _get_env_int("WEBHOOK_QUEUE_SHUTDOWN_TIMEOUT", 20)
+    # 已處理事件保留天數（重送去重與追查用）
+    webhook_event_retention_days: int = _get_env_int("WEBHOOK_EVENT_RETENTION_DAYS", 7)
+
+    # 主動推送（push）：同時推送的目標數上限
+    bot_delivery_concurrency: int = _get_env_int("BOT_DELIVERY_CONCURRENCY", 8)
+    # 各平台每秒推送請求上限（0 = 不限制；Telegram 全域建議不超過 30 則/秒）
+    bot_delivery_line_rate: int = _get_env_int("BOT_DELIVERY_LINE_RATE", 100)
+    bot_delivery_telegram_rate: int = _get_env_int("BOT_DELIVERY_TELEGRAM_RATE", 25)
+    # 限流（429）與暫時性錯誤的重試次數
+    bot_delivery_max_retries: int = _get_env_int("BOT_DELIVERY_MAX_RETRIES", 3)
+
     # 圖書館公開資料夾（逗號分隔，未綁定用戶只能看到這些資料夾）
     library_public_folders: list[str] = [
         f.strip()
@@ -213,6 +326,16 @@ class Settings:
     md2ppt_url: str = _get_env("MD2PPT_URL", "https://md-2-ppt-evolution.vercel.app")
     md2doc_url: str = _get_env("MD2DOC_URL", "https://md-2-doc-evolution.vercel.app")
 
+    # ===================
+    # 簡報生成設定
+    # ===================
+    # 簡報渲染結果與配圖快取目錄
+    presentation_cache_dir: str = _get_env("PRESENTATION_CACHE_DIR", "/tmp/ctos/presentation-cache")
+    # marp-cli 同時轉換數量上限
+    marp_render_concurrency: int = _get_env_int("MARP_RENDER_CONCURRENCY", 2)
+    # 配圖同時下載/生成數量上限
+    presentation_image_concurrency: int = _get_env_int("PRESENTATION_IMAGE_CONCURRENCY", 4)
+
     # ===================
     # CORS 設定
     # ===================
@@ -1,64 +1,264 @@
-"""資料庫連線管理"""
+"""資料庫連線管理
+
+依工作負載分成多個連線池，避免慢查詢拖垮即時路徑：
+
+- interactive：API 與 webhook（預設）
+- background：排程任務（大量刪除、分區建立等）
+- analytics：管理統計查詢
+- replica：設定 DB_REPLICA_HOST 時，唯讀查詢（readonly=True）改送讀取副本
+
+background / analytics 的 max_size 設為 0 時與 interactive 共用連線池。
+工作負載可在 get_connection 直接指定，或以 use_workload / db_workload 設定，
+同一個 task 內的所有查詢都沿用（排程任務呼叫的其他 service 也會走 background 池）。
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any, AsyncGenerator, TypeVar
 
-import json
 import asyncpg
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator
 
 from .config import settings
+from .services.metrics import counter, gauge, histogram
+from .utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+class Workload(str, Enum):
+    """連線池工作負載"""
+
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+    ANALYTICS = "analytics"
+
+
+REPLICA_POOL = "replica"
 
+# interactive 連線池（維持原名稱，MCP server 以此判斷是否已初始化）
 _pool: asyncpg.Pool | None = None
+_workload_pools: dict[Workload, asyncpg.Pool] = {}
+_replica_pool: asyncpg.Pool | None = None
+
+# 目前 task 的工作負載提示：(工作負載, 是否唯讀)
+_workload_hint: ContextVar[tuple[Workload, bool]] = ContextVar(
+    "db_workload", default=(Workload.INTERACTIVE, False)
+)
+
+
+def _named_pools() -> dict[str, asyncpg.Pool]:
+    pools: dict[str, asyncpg.Pool] = {}
+    if _pool is not None:
+        pools[Workload.INTERACTIVE.value] = _pool
+    for workload, pool in _workload_pools.items():
+        pools[workload.value] = pool
+    if _replica_pool is not None:
+        pools[REPLICA_POOL] = _replica_pool
+    return pools
+
+
+def _pool_connection_stats() -> dict[tuple[str, ...], float]:
+    stats: dict[tuple[str, ...], float] = {}
+    for name, pool in _named_pools().items():
+        size = pool.get_size()
+        idle = pool.get_idle_size()
+        stats[(name, "in_use")] = size - idle
+        stats[(name, "idle")] = idle
+        stats[(name, "max")] = pool.get_max_size()
+    return stats
+
+
+gauge(
+    "ctos_db_pool_connections",
+    "資料庫連線池連線數（in_use / idle / max）",
+    ("pool", "state"),
+    callback=_pool_connection_stats,
+)
+_acquire_seconds = histogram(
+    "ctos_db_pool_acquire_seconds",
+    "從連線池取得連線的等待時間",
+    ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+_acquire_timeouts_total = counter(
+    "ctos_db_pool_acquire_timeouts_total",
+    "等待連線逾時次數（DB_POOL_ACQUIRE_TIMEOUT_SECONDS）",
+    ("pool",),
+)
+_replica_fallbacks_total = counter(
+    "ctos_db_replica_fallbacks_total",
+    "讀取副本無法連線、改用主資料庫的次數",
+)
 
 
 async def _setup_json_codec(conn: asyncpg.Connection) -> None:
-    """設定 JSON/JSONB 類型的編解碼器"""
+    """設定 JSON/JSONB 類型的編解碼器（使用 utils.json_codec，有 orjson 時使用 orjson）"""
     await conn.set_type_codec(
         "jsonb",
-        encoder=json.dumps,
-        decoder=json.loads,
+        encoder=json_codec.dumps,
+        decoder=json_codec.loads,
         schema="pg_catalog",
     )
     await conn.set_type_codec(
         "json",
-        encoder=json.dumps,
-        decoder=json.loads,
+        encoder=json_codec.dumps,
+        decoder=json_codec.loads,
         schema="pg_catalog",
     )
 
 
-async def init_db_pool() -> None:
-    """初始化資料庫連線池"""
-    global _pool
-    _pool = await asyncpg.create_pool(
-        host=settings.db_host,
-        port=settings.db_port,
-        user=settings.db_user,
-        password=settings.db_password,
-        database=settings.db_name,
-        min_size=2,
-        max_size=10,
-        init=_setup_json_codec,  # 每個連線建立時自動設定 JSON 編解碼器
-    )
+async def _create_pool(min_size: int, max_size: int, **overrides: Any) -> asyncpg.Pool:
+    options: dict[str, Any] = {
+        "host": settings.db_host,
+        "port": settings.db_port,
+        "user": settings.db_user,
+        "password": settings.db_password,
+        "database": settings.db_name,
+        "min_size": min(min_size, max_size),
+        "max_size": max_size,
+        # prepared statement 快取（經 pgbouncer transaction 模式連線時需設為 0）
+        "statement_cache_size": settings.db_statement_cache_size,
+        "max_cached_statement_lifetime": settings.db_max_cached_statement_lifetime,
+        "max_cacheable_statement_size": settings.db_max_cacheable_statement_size,
+        "max_inactive_connection_lifetime": settings.db_max_inactive_connection_lifetime,
+        "init": _setup_json_codec,  # 每個連線建立時自動設定 JSON 編解碼器
+    }
+    options.update(overrides)
+    return await asyncpg.create_pool(**options)
+
+
+async def init_db_pool(compact: bool = False) -> None:
+    """初始化資料庫連線池
+
+    Args:
+        compact: 只建立單一小型連線池（MCP server 等子行程使用，
+            每個 Claude session 各有一個行程，不需要分池）
+    """
+    global _pool, _replica_pool
+    if compact:
+        _pool = await _create_pool(1, settings.db_pool_subprocess_max_size)
+        return
+
+    _pool = await _create_pool(settings.db_pool_min_size, settings.db_pool_max_size)
+    for workload, min_size, max_size in (
+        (Workload.BACKGROUND, settings.db_pool_background_min_size, settings.db_pool_background_max_size),
+        (Workload.ANALYTICS, settings.db_pool_analytics_min_size, settings.db_pool_analytics_max_size),
+    ):
+        if max_size > 0:
+            _workload_pools[workload] = await _create_pool(min_size, max_size)
+
+    if settings.db_replica_host:
+        try:
+            _replica_pool = await _create_pool(
+                0,
+                settings.db_pool_replica_max_size,
+                host=settings.db_replica_host,
+                port=settings.db_replica_port or settings.db_port,
+            )
+        except (OSError, asyncpg.PostgresError) as e:
+            # 副本無法連線不影響啟動，唯讀查詢改走主資料庫
+            logger.warning(f"讀取副本連線池建立失敗，唯讀查詢使用主資料庫: {e}")
+            _replica_pool = None
 
 
 async def close_db_pool() -> None:
-    """關閉資料庫連線池"""
-    global _pool
-    if _pool:
-        await _pool.close()
-        _pool = None
+    """關閉所有資料庫連線池"""
+    global _pool, _replica_pool
+    pools = list(_named_pools().values())
+    _pool = None
+    _replica_pool = None
+    _workload_pools.clear()
+    for pool in pools:
+        await pool.close()
 
 
-def get_pool() -> asyncpg.Pool:
-    """取得資料庫連線池"""
+def get_pool(workload: Workload | str = Workload.INTERACTIVE) -> asyncpg.Pool:
+    """取得資料庫連線池（未設定獨立連線池的工作負載使用 interactive）"""
     if _pool is None:
         raise RuntimeError("Database pool not initialized")
-    return _pool
+    return _workload_pools.get(Workload(workload), _pool)
+
+
+def _resolve_pool(workload: Workload | str, readonly: bool) -> tuple[str, asyncpg.Pool]:
+    pool = get_pool(workload)
+    if readonly and _replica_pool is not None:
+        return REPLICA_POOL, _replica_pool
+    name = Workload(workload).value if pool is not _pool else Workload.INTERACTIVE.value
+    return name, pool
+
+
+async def _acquire(name: str, pool: asyncpg.Pool) -> asyncpg.Connection:
+    timeout = settings.db_pool_acquire_timeout_seconds or None
+    started = time.perf_counter()
+    try:
+        conn = await pool.acquire(timeout=timeout)
+    except asyncio.TimeoutError:
+        _acquire_timeouts_total.inc(pool=name)
+        logger.warning(f"取得資料庫連線逾時: pool={name}, timeout={timeout}s")
+        raise
+    _acquire_seconds.observe(time.perf_counter() - started, pool=name)
+    return conn
 
 
 @asynccontextmanager
-async def get_connection() -> AsyncGenerator[asyncpg.Connection, None]:
-    """取得資料庫連線"""
-    pool = get_pool()
-    async with pool.acquire() as conn:
+async def get_connection(
+    workload: Workload | str | None = None,
+    readonly: bool | None = None,
+) -> AsyncGenerator[asyncpg.Connection, None]:
+    """取得資料庫連線
+
+    Args:
+        workload: 工作負載（None 沿用 use_workload / db_workload 設定，預設 interactive）
+        readonly: 唯讀查詢，設定讀取副本時改送副本（None 沿用工作負載設定）
+    """
+    hint_workload, hint_readonly = _workload_hint.get()
+    workload = hint_workload if workload is None else workload
+    readonly = hint_readonly if readonly is None else readonly
+
+    name, pool = _resolve_pool(workload, readonly)
+    try:
+        conn = await _acquire(name, pool)
+    except (OSError, asyncpg.PostgresConnectionError, asyncpg.CannotConnectNowError) as e:
+        if name != REPLICA_POOL:
+            raise
+        _replica_fallbacks_total.inc()
+        logger.warning(f"讀取副本無法連線，改用主資料庫: {e}")
+        name, pool = _resolve_pool(workload, False)
+        conn = await _acquire(name, pool)
+    try:
         yield conn
+    finally:
+        await pool.release(conn)
+
+
+@contextmanager
+def db_workload(workload: Workload | str, readonly: bool = False) -> Iterator[None]:
+    """在此範圍內的 get_connection 預設使用指定工作負載"""
+    token = _workload_hint.set((Workload(workload), readonly))
+    try:
+        yield
+    finally:
+        _workload_hint.reset(token)
+
+
+_F = TypeVar("_F", bound=Callable[..., Awaitable[Any]])
+
+
+def use_workload(workload: Workload | str, readonly: bool = False) -> Callable[[_F], _F]:
+    """async 函式裝飾器：函式內（含呼叫的其他 service）的查詢使用指定工作負載"""
+
+    def decorator(func: _F) -> _F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with db_workload(workload, readonly):
+                return await func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -13,10 +13,12 @@ import socketio
 
 from .config import settings
 from .database import init_db_pool, close_db_pool
+from .middleware.static_files import PrecompressedStaticFiles
 from .services.session import session_manager
 from .services.terminal import terminal_service
 from .services.scheduler import start_scheduler, stop_scheduler
 from .modules import get_module_registry, is_module_enabled
+from .utils.json_codec import FastJSONResponse, SocketIOJson
 
 try:  # 向下相容：保留可 monkeypatch 的符號
     from .services.linebot_agents import ensure_default_linebot_agents  # noqa: F401
@@ -25,7 +27,7 @@ except Exception:  # pragma: no cover - 僅在依賴缺失時啟用
         return None
 
 # 建立 Socket.IO 伺服器
-sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*', json=SocketIOJson)
 
 
 def ensure_directories():
@@ -181,6 +183,7 @@ async def lifespan(app: FastAPI):
     try:
         from .skills import get_skill_manager
         await get_skill_manager().load_skills()
+        await get_skill_manager().start_watch_task()
     except Exception as e:
         _logging.getLogger(__name__).warning("Skills 預載入失敗: %s", e)
     # 初始化 ClawHub client（存入 app.state 供依賴注入）
@@ -192,6 +195,15 @@ async def lifespan(app: FastAPI):
         app.state.skillhub_client = SkillHubClient()
     await init_db_pool()
 
+    # 建立附件暫存索引（目錄掃描在執行緒中進行）
+    import asyncio
+    from .services.bot.staging_cache import staging_cache
+    await asyncio.to_thread(staging_cache.scan)
+
+    # 啟動 event loop 健康監控
+    from .services.loop_monitor import start_loop_monitor
+    start_loop_monitor()
+
     # 註冊 Bot 斜線指令
     from .services.bot.command_handlers import register_builtin_commands
     register_builtin_commands()
@@ -218,8 +230,11 @@ async def lifespan(app: FastAPI):
     await terminal_service.start_cleanup_task()
     start_scheduler()
 
+    # 補處理上次未完成的 webhook 事件（處理函式已於載入路由時註冊）
+    from .services.bot.webhook_queue import start_webhook_queue, stop_webhook_queue
+    await start_webhook_queue()
+
     # 啟動 Telegram Polling（取代 webhook 模式）
-    import asyncio
     telegram_polling_task = None
     if is_module_enabled("telegram-bot"):
         from .services.bot_telegram.polling import run_telegram_polling
@@ -241,10 +256,17 @@ async def lifespan(app: FastAPI):
             await telegram_polling_task
         except asyncio.CancelledError:
             pass
+    # 等待佇列中處理到一半的事件（逾時的留待下次啟動補處理）
+    await stop_webhook_queue()
     stop_scheduler()
     await terminal_service.stop_cleanup_task()
     terminal_service.close_all()
     await session_manager.stop_cleanup_task()
+    try:
+        from .skills import get_skill_manager
+        await get_skill_manager().stop_watch_task()
+    except Exception as e:
+        _logging.getLogger(__name__).warning("停止 Skills 監看失敗: %s", e)
     from .services.workers import shutdown_pools
     shutdown_pools()
     # 關閉 Hub clients
@@ -262,6 +284,19 @@ async def lifespan(app: FastAPI):
     # 關閉 Line Bot 共用客戶端
     from .services.bot_line.client import close_line_client
     await close_line_client()
+    from .services.bot.media_store import close_http_client
+    await close_http_client()
+    # 停止常駐 marp 渲染 server
+    from .services.marp_renderer import marp_renderer
+    await marp_renderer.close()
+    # 停止常駐 git 讀取行程
+    from .services.git_reader import close_git_readers
+    await close_git_readers()
+    # 關閉保留中的 Claude 對話 session（須在刪除工作目錄基底之前）
+    from .services.claude_sessions import close_all_sessions
+    await close_all_sessions()
+    from .services.claude_hosts import agent_hosts
+    await agent_hosts.close_all()
     # 清理 Claude agent 工作目錄基底
     try:
         from .services.claude_agent import _WORKING_DIR_BASE
@@ -269,6 +304,11 @@ async def lifespan(app: FastAPI):
         shutil.rmtree(_WORKING_DIR_BASE, ignore_errors=True)
     except Exception as e:
         logging.getLogger(__name__).warning(f"清理 Claude agent 工作目錄失敗: {e}")
+    # 寫入尚未寫入的分享連結存取次數
+    from .services.scheduler import flush_share_access_counts
+    await flush_share_access_counts()
+    from .services.loop_monitor import stop_loop_monitor
+    await stop_loop_monitor()
     await close_db_pool()
 
 
@@ -276,6 +316,7 @@ app = FastAPI(
     title="Ching Tech OS API",
     version="0.5.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # --- 全域 ServiceError handler ---
@@ -315,14 +356,19 @@ app.add_middleware(
 from .middleware.cache_control import CacheControlMiddleware  # noqa: E402
 app.add_middleware(CacheControlMiddleware)
 
+# Event loop 監控：標記處理中的路由（最外層，涵蓋所有 HTTP 請求）
+from .middleware.loop_monitor import LoopMonitorMiddleware  # noqa: E402
+app.add_middleware(LoopMonitorMiddleware)
+
 # 註冊路由
 _register_module_routers(app)
 
 
 @app.get("/api/health")
 async def health():
-    """API 健康檢查"""
-    return {"status": "healthy"}
+    """API 健康檢查（含 event loop 延遲摘要）"""
+    from .services.loop_monitor import loop_monitor
+    return {"status": "healthy", "event_loop": loop_monitor.summary()}
 
 
 # 前端路由
@@ -426,13 +472,14 @@ async def short_share_url(token: str):
 
 
 # 掛載靜態檔案（放在最後，避免覆蓋 API 路由）
-app.mount("/css", StaticFiles(directory=FRONTEND / "css"), name="css")
-app.mount("/js", StaticFiles(directory=FRONTEND / "js"), name="js")
-app.mount("/fonts", StaticFiles(directory=FRONTEND / "fonts"), name="fonts")
-app.mount("/assets", StaticFiles(directory=FRONTEND / "assets"), name="assets")
-app.mount("/src", StaticFiles(directory=FRONTEND / "src"), name="src")
+# 前端資源優先回傳建置時產生的 .br/.gz 檔案（scripts/precompress_static.py）
+app.mount("/css", PrecompressedStaticFiles(directory=FRONTEND / "css"), name="css")
+app.mount("/js", PrecompressedStaticFiles(directory=FRONTEND / "js"), name="js")
+app.mount("/fonts", PrecompressedStaticFiles(directory=FRONTEND / "fonts"), name="fonts")
+app.mount("/assets", PrecompressedStaticFiles(directory=FRONTEND / "assets"), name="assets")
+app.mount("/src", PrecompressedStaticFiles(directory=FRONTEND / "src"), name="src")
 if (FRONTEND / "fonts").is_dir():
-    app.mount("/fonts", StaticFiles(directory=FRONTEND / "fonts"), name="fonts")
+    app.mount("/fonts", PrecompressedStaticFiles(directory=FRONTEND / "fonts"), name="fonts")
 
 # 知識庫本機附件目錄
 KNOWLEDGE_ASSETS = Path(settings.knowledge_data_path) / "assets"
@@ -447,9 +494,21 @@ app.mount("/data/projects/attachments", StaticFiles(directory=PROJECT_ATTACHMENT
 
 # === Socket.IO 事件 ===
 
+from .services.metrics import counter as _metric_counter, gauge as _metric_gauge  # noqa: E402
+
+# 目前連線數於輸出時直接讀取 manager（disconnect handler 可能被其他模組覆寫，不以 inc/dec 維護）
+_metric_gauge(
+    "ctos_socketio_connections",
+    "目前的 Socket.IO 連線數",
+    callback=lambda: sum(1 for _ in sio.manager.get_participants("/", None)),
+)
+_sio_connects = _metric_counter("ctos_socketio_connects_total", "Socket.IO 累計連線次數")
+
+
 @sio.event
 async def connect(sid, environ):
     """客戶端連線"""
+    _sio_connects.inc()
     print(f"Client connected: {sid}")
 
 
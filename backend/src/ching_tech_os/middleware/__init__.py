@@ -1,3 +1,5 @@
 from .cache_control import CacheControlMiddleware
+from .loop_monitor import LoopMonitorMiddleware
+from .static_files import PrecompressedStaticFiles
 
-__all__ = ["CacheControlMiddleware"]
+__all__ = ["CacheControlMiddleware", "LoopMonitorMiddleware", "PrecompressedStaticFiles"]
@@ -2,11 +2,15 @@
 
 根據請求路徑設定適當的 Cache-Control 標頭，
 解決 no-store 阻止瀏覽器 BFCache 的問題。
+
+以純 ASGI middleware 實作（不使用 BaseHTTPMiddleware），只在
+`http.response.start` 訊息補上標頭，不額外建立 task 或 memory stream，
+串流回應（SSE、檔案下載）也能直接通過。
 """
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from functools import lru_cache
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 
 # 認證端點：必須阻止快取（安全需求）
@@ -24,51 +28,63 @@ _PUBLIC_PREFIXES = ("/share/", "/public", "/s/", "/api/config/public")
 # SPA 入口頁面：允許 BFCache，但每次驗證
 _SPA_PATHS = ("/", "/login.html", "/index.html", "/public.html")
 
+# 前綴規則（依優先順序，在認證端點與 SPA 入口頁面之後比對）
+_PREFIX_RULES: tuple[tuple[tuple[str, ...], bytes], ...] = (
+    (_IMMUTABLE_PREFIXES, b"public, max-age=31536000, immutable"),
+    (_REVALIDATE_PREFIXES, b"no-cache"),
+    (_PUBLIC_PREFIXES, b"public, max-age=300"),
+    (("/api/",), b"private, no-cache"),
+)
 
-class CacheControlMiddleware(BaseHTTPMiddleware):
-    """根據路徑類型自動設定 Cache-Control 標頭"""
+# 路徑查表結果快取上限（路徑種類有限，含 ID 的 API 路徑靠 LRU 淘汰）
+_LOOKUP_CACHE_SIZE = 4096
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response = await call_next(request)
 
-        # 若回應已有 cache-control 標頭，不覆蓋
-        if "cache-control" in response.headers:
-            return response
+@lru_cache(maxsize=_LOOKUP_CACHE_SIZE)
+def _lookup(path: str) -> bytes | None:
+    """根據路徑決定 Cache-Control 值（已編碼為 header bytes）"""
+    # 認證端點：嚴格禁止快取（優先於 SPA 入口頁面）
+    if path.startswith(_AUTH_PREFIXES):
+        return b"private, no-store"
 
-        path = request.url.path
-        cache_value = self._get_cache_value(path)
+    # SPA 入口頁面：允許 BFCache，每次驗證新鮮度（須在公開前綴之前檢查）
+    if path in _SPA_PATHS:
+        return b"no-cache"
 
-        if cache_value:
-            response.headers["cache-control"] = cache_value
+    for prefixes, value in _PREFIX_RULES:
+        if path.startswith(prefixes):
+            return value
+    return None
 
-        return response
 
-    @staticmethod
-    def _get_cache_value(path: str) -> str | None:
-        """根據路徑決定 Cache-Control 值"""
-
-        # 認證端點：嚴格禁止快取
-        if any(path.startswith(p) for p in _AUTH_PREFIXES):
-            return "private, no-store"
+class CacheControlMiddleware:
+    """根據路徑類型自動設定 Cache-Control 標頭"""
 
-        # SPA 入口頁面：允許 BFCache，每次驗證新鮮度（須在公開前綴之前檢查）
-        if path in _SPA_PATHS:
-            return "no-cache"
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        # 靜態資源（不常變動）：長期不可變快取
-        if any(path.startswith(p) for p in _IMMUTABLE_PREFIXES):
-            return "public, max-age=31536000, immutable"
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # JS/CSS：每次驗證 ETag，命中 304 不重新下載
-        if any(path.startswith(p) for p in _REVALIDATE_PREFIXES):
-            return "no-cache"
+        cache_value = _lookup(scope["path"])
+        if cache_value is None:
+            await self.app(scope, receive, send)
+            return
 
-        # 公開分享頁面：短期快取（5 分鐘）
-        if any(path.startswith(p) for p in _PUBLIC_PREFIXES):
-            return "public, max-age=300"
+        async def send_with_cache_control(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = message.get("headers") or []
+                # 若回應已有 cache-control 標頭，不覆蓋
+                if not any(name.lower() == b"cache-control" for name, _ in headers):
+                    message["headers"] = [*headers, (b"cache-control", cache_value)]
+            await send(message)
 
-        # 一般 API 端點：私有、每次驗證
-        if path.startswith("/api/"):
-            return "private, no-cache"
+        await self.app(scope, receive, send_with_cache_control)
 
-        return None
+    @staticmethod
+    def _get_cache_value(path: str) -> str | None:
+        """根據路徑決定 Cache-Control 值"""
+        value = _lookup(path)
+        return value.decode("latin-1") if value is not None else None
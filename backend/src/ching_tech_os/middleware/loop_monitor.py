@@ -0,0 +1,30 @@
+"""Event loop 監控路由標記 Middleware
+
+把目前 task 標記為「METHOD 路由」，讓 watchdog 在 event loop 卡住時
+能記錄是哪個 API 造成的。純 ASGI 實作，只做一次 dict 寫入與移除。
+"""
+
+import asyncio
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..services.loop_monitor import loop_monitor
+
+
+class LoopMonitorMiddleware:
+    """以目前 task 記錄處理中的 HTTP 路由"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        task = asyncio.current_task() if scope["type"] == "http" else None
+        if task is None:
+            await self.app(scope, receive, send)
+            return
+
+        loop_monitor.tag_task(task, f"{scope.get('method', '')} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_monitor.untag_task(task)
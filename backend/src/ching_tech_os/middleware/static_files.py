@@ -0,0 +1,162 @@
+"""預壓縮靜態檔案服務
+
+在 StaticFiles 之上加入：
+
+- 依 Accept-Encoding 優先回傳建置時產生的 `.br` / `.gz` 檔案
+  （由 scripts/precompress_static.py 產生，不在請求時壓縮）
+- 以檔案內容雜湊產生的強 ETag（不同編碼各自獨立），
+  If-None-Match 命中時回傳 304
+
+雜湊在 lookup_path（StaticFiles 於執行緒中呼叫）時計算並快取，file_response 在 event loop
+上只讀快取；未命中時（例如壓縮檔在兩次呼叫之間才出現）改用 mtime + 大小組成 ETag。
+"""
+
+import hashlib
+import os
+import stat
+import threading
+from collections import OrderedDict
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# 依優先順序嘗試的預壓縮格式：(Content-Encoding, 副檔名)
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# ETag 雜湊快取上限（以檔案為單位）
+_ETAG_CACHE_SIZE = 2048
+
+
+def parse_accept_encoding(value: str) -> set[str]:
+    """解析 Accept-Encoding，回傳可接受的編碼（忽略 q=0）"""
+    accepted = set()
+    for part in value.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = params.strip().replace(" ", "")
+        if q in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token)
+    return accepted
+
+
+def _signature(stat_result: os.stat_result) -> tuple[int, int]:
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+class _ETagCache:
+    """(路徑, mtime, 大小) → 內容雜湊，檔案變更時自動重新計算
+
+    compute() 會讀檔，只在執行緒中呼叫；get() 只查快取。
+    """
+
+    def __init__(self, maxsize: int = _ETAG_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._store: OrderedDict[str, tuple[tuple[int, int], str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat_result: os.stat_result) -> str | None:
+        with self._lock:
+            cached = self._store.get(path)
+            if cached is not None and cached[0] == _signature(stat_result):
+                self._store.move_to_end(path)
+                return cached[1]
+        return None
+
+    def compute(self, path: str, stat_result: os.stat_result) -> str:
+        cached = self.get(path, stat_result)
+        if cached is not None:
+            return cached
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(256 * 1024), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()
+
+        with self._lock:
+            self._store[path] = (_signature(stat_result), value)
+            self._store.move_to_end(path)
+            while len(self._store) > self._maxsize:
+                self._store.popitem(last=False)
+        return value
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """支援預壓縮檔案與強 ETag 的 StaticFiles"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._etags = _ETagCache()
+
+    def lookup_path(self, path: str) -> tuple[str, os.stat_result | None]:
+        """在執行緒中執行：找到檔案時一併計算原檔與各預壓縮檔的 ETag"""
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+            try:
+                self._etags.compute(full_path, stat_result)
+                for encoding, _suffix in PRECOMPRESSED_ENCODINGS:
+                    variant, variant_stat, found = self._find_variant(full_path, stat_result, {encoding})
+                    if found:
+                        self._etags.compute(variant, variant_stat)
+            except OSError:
+                pass
+        return full_path, stat_result
+
+    def _find_variant(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        accepted: set[str],
+    ) -> tuple[str, os.stat_result, str | None]:
+        """找出可用的預壓縮檔案；過期（比原檔舊）的壓縮檔不使用"""
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            variant = f"{full_path}{suffix}"
+            try:
+                variant_stat = os.stat(variant)
+            except OSError:
+                continue
+            if stat.S_ISREG(variant_stat.st_mode) and variant_stat.st_mtime >= stat_result.st_mtime:
+                return variant, variant_stat, encoding
+        return full_path, stat_result, None
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        accepted = parse_accept_encoding(request_headers.get("accept-encoding", ""))
+
+        serve_path, serve_stat, encoding = self._find_variant(full_path, stat_result, accepted)
+        etag = self._etags.get(serve_path, serve_stat)
+        if etag is None:
+            mtime_ns, size = _signature(serve_stat)
+            etag = f"{mtime_ns:x}-{size:x}"
+        headers = {
+            "etag": f'"{etag}"',
+            "vary": "Accept-Encoding",
+        }
+        if encoding:
+            headers["content-encoding"] = encoding
+
+        response = FileResponse(
+            serve_path,
+            status_code=status_code,
+            stat_result=serve_stat,
+            media_type=guess_type(full_path)[0] or "text/plain",
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
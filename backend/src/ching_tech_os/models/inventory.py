@@ -117,6 +117,13 @@ class InventoryTransactionCreate(InventoryTransactionBase):
     pass
 
 
+class InventoryTransactionImportItem(InventoryTransactionBase):
+    """批次匯入的進出貨記錄（含物料 ID）"""
+
+    item_id: UUID
+    created_by: str | None = None
+
+
 class InventoryTransactionUpdate(BaseModel):
     """更新進出貨記錄請求"""
 
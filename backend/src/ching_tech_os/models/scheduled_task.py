@@ -33,12 +33,20 @@ class IntervalTriggerConfig(BaseModel):
 # ── Executor 設定 ─────────────────────────────────────────────
 
 
+class NotifyTarget(BaseModel):
+    """執行結果推送目標"""
+
+    platform: Literal["line", "telegram"]
+    target: str = Field(..., min_length=1, description="Line 用戶 / 群組 ID 或 Telegram chat_id")
+
+
 class AgentExecutorConfig(BaseModel):
     """Agent 執行設定"""
 
     agent_name: str = Field(..., description="對應 ai_agents.name")
     prompt: str = Field(..., description="要求 Agent 執行的指令")
     ctos_user_id: int | None = Field(None, description="執行身份")
+    notify_targets: list[NotifyTarget] = Field(default_factory=list, description="執行成功後推送結果的目標")
 
 
 class SkillScriptExecutorConfig(BaseModel):
@@ -50,6 +50,8 @@ BUILTIN_MODULES: dict[str, ModuleInfo] = {
             {"module": ".api.user", "attr": "admin_router"},
             {"module": ".api.config_public", "attr": "router"},
             {"module": ".api.internal_push", "attr": "router"},
+            {"module": ".api.system", "attr": "router"},
+            {"module": ".api.system", "attr": "metrics_router"},
         ],
         "app_ids": ["settings"],
         "app_manifest": [
@@ -79,7 +81,7 @@ BUILTIN_MODULES: dict[str, ModuleInfo] = {
         ],
         "mcp_module": ".services.mcp.nas_tools",
         "scheduler_jobs": [
-            {"fn": "cleanup_linebot_temp_files", "trigger": "interval", "hours": 1},
+            {"fn": "cleanup_linebot_temp_files", "trigger": "interval", "minutes": 10},
             {"fn": "cleanup_media_temp_folders", "trigger": "cron", "hour": 5, "minute": 0},
         ],
         "app_ids": ["file-manager"],
@@ -192,6 +194,9 @@ BUILTIN_MODULES: dict[str, ModuleInfo] = {
     "erpnext": {
         "id": "erpnext",
         "source": "builtin",
+        "scheduler_jobs": [
+            {"fn": "reconcile_inventory_stock", "trigger": "cron", "hour": 2, "minute": 30},
+        ],
         "app_ids": ["project-management", "inventory-management", "vendor-management"],
         "app_manifest": [
             {"id": "erpnext", "name": "ERPNext", "icon": "erpnext"},
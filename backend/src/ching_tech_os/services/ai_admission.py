@@ -0,0 +1,293 @@
+"""AI 呼叫准入控制
+
+每次 call_claude 都會啟動 ClaudeClient 與 MCP 子行程，群組訊息尖峰時同時啟動數十個
+會耗盡記憶體與 CPU。所有 AI 呼叫先向本模組取得執行名額：
+
+- 同時執行數受 AI_MAX_CONCURRENT_CALLS 限制（0 = 不限制）
+- 名額已滿時依優先等級排隊：個人對話 / Web > 群組 > 排程與背景任務
+- 同一優先等級內以使用者輪轉（round-robin），單一使用者大量請求不會餓死其他人
+- 進入排隊時以 on_queued(position) 通知呼叫端，讓使用者看到「排隊中，第 N 位」；
+  輪到執行時再呼叫 on_queued(0)，讓呼叫端清除排隊提示
+- 排隊超過 AI_QUEUE_TIMEOUT_SECONDS 放棄並拋出 AIQueueTimeoutError
+
+名額只在本程序內計算；MCP server 子行程內的呼叫（簡報、研究）各自計算。
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import count
+
+from ..config import settings
+from .errors import ServiceError
+from .metrics import counter, gauge, histogram
+
+logger = logging.getLogger(__name__)
+
+# 排隊通知 callback：參數為排隊位置（1 = 下一個執行）；排隊後取得名額時再以 0 通知一次
+QueueNotifyCallback = Callable[[int], Awaitable[None]]
+
+
+class Priority(IntEnum):
+    """AI 呼叫優先等級（數值越小越優先）"""
+
+    INTERACTIVE = 0  # 個人對話、Web AI 助手
+    GROUP = 1  # 群組對話
+    BACKGROUND = 2  # 排程任務、簡報、研究等背景工作
+
+
+class AIQueueTimeoutError(ServiceError):
+    """AI 呼叫排隊逾時"""
+
+    def __init__(self, waited: float):
+        super().__init__(
+            f"AI 服務忙碌中，排隊 {int(waited)} 秒仍未輪到，請稍後再試",
+            "AI_BUSY",
+            503,
+        )
+
+
+_admissions = counter(
+    "ctos_ai_admissions_total",
+    "AI 呼叫准入結果（immediate=直接執行、queued=排隊後執行）",
+    ("priority", "result"),
+)
+_queue_wait = histogram(
+    "ctos_ai_queue_wait_seconds",
+    "AI 呼叫排隊等待時間",
+    ("priority",),
+)
+
+_waiter_ids = count()
+
+
+@dataclass
+class _Waiter:
+    user_key: str
+    priority: Priority
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+class AdmissionController:
+    """AI 呼叫名額管理（優先等級 + 使用者輪轉）"""
+
+    def __init__(self, max_concurrent: int, queue_timeout: float = 0) -> None:
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        # 各優先等級：user_key -> 該使用者的等待佇列；OrderedDict 的順序即輪轉順序
+        self._queues: dict[Priority, OrderedDict[str, deque[_Waiter]]] = {
+            p: OrderedDict() for p in Priority
+        }
+        self.admitted = 0
+        self.queued = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.max_wait = 0.0
+
+    # ---------- 狀態 ----------
+
+    @property
+    def unlimited(self) -> bool:
+        return self.max_concurrent <= 0
+
+    def depth(self, priority: Priority | None = None) -> int:
+        """排隊中的請求數"""
+        priorities = [priority] if priority is not None else list(Priority)
+        return sum(len(q) for p in priorities for q in self._queues[p].values())
+
+    def position(self, waiter: _Waiter) -> int:
+        """計算等待者目前的排隊位置（1 = 下一個取得名額）
+
+        依實際派發規則推算：較高優先等級全部在前；同等級內逐輪輪轉，
+        每輪每位使用者取一個。
+        """
+        ahead = sum(self.depth(p) for p in Priority if p < waiter.priority)
+        users = self._queues[waiter.priority]
+        own = users.get(waiter.user_key)
+        if own is None or waiter not in own:
+            return ahead + 1
+        rank = own.index(waiter)
+        before_user = True
+        for key, queue in users.items():
+            if key == waiter.user_key:
+                before_user = False
+                continue
+            # 前 rank 輪每人取一個；第 rank 輪排在此使用者之前的人再取一個
+            ahead += min(len(queue), rank + (1 if before_user else 0))
+        return ahead + rank + 1
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "queued_now": {p.name.lower(): self.depth(p) for p in Priority},
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "max_wait_seconds": round(self.max_wait, 3),
+        }
+
+    # ---------- 取得 / 釋放名額 ----------
+
+    async def acquire(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        user_key: str | None = None,
+        on_queued: QueueNotifyCallback | None = None,
+    ) -> None:
+        """取得執行名額；名額已滿時排隊等待"""
+        label = priority.name.lower()
+        if self.unlimited or (self.active < self.max_concurrent and self.depth() == 0):
+            self.active += 1
+            self.admitted += 1
+            _admissions.inc(priority=label, result="immediate")
+            _queue_wait.observe(0, priority=label)
+            return
+
+        # 未指定使用者時各自成為一組，不與他人共用輪轉位置
+        key = user_key or f"anonymous:{next(_waiter_ids)}"
+        waiter = _Waiter(
+            user_key=key,
+            priority=priority,
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._queues[priority].setdefault(key, deque()).append(waiter)
+        self.queued += 1
+        position = self.position(waiter)
+        logger.info(
+            "AI 呼叫排隊: user=%s priority=%s position=%s active=%s/%s",
+            key, label, position, self.active, self.max_concurrent,
+        )
+
+        try:
+            if on_queued is not None:
+                try:
+                    await on_queued(position)
+                except Exception as e:
+                    logger.debug(f"排隊通知失敗: {e}")
+            if self.queue_timeout > 0:
+                remaining = self.queue_timeout - (time.monotonic() - waiter.enqueued_at)
+                await asyncio.wait_for(waiter.future, timeout=max(remaining, 0))
+            else:
+                await waiter.future
+        except BaseException as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # 名額已分配但呼叫端放棄，交給下一位
+                self.release()
+            else:
+                waiter.future.cancel()
+                self._discard(waiter)
+            waited = time.monotonic() - waiter.enqueued_at
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                _admissions.inc(priority=label, result="timeout")
+                raise AIQueueTimeoutError(waited) from None
+            self.cancelled += 1
+            _admissions.inc(priority=label, result="cancelled")
+            raise
+
+        waited = time.monotonic() - waiter.enqueued_at
+        self.max_wait = max(self.max_wait, waited)
+        self.admitted += 1
+        _admissions.inc(priority=label, result="queued")
+        _queue_wait.observe(waited, priority=label)
+        if on_queued is not None:
+            try:
+                await on_queued(0)
+            except Exception as e:
+                logger.debug(f"排隊通知失敗: {e}")
+            except BaseException:
+                # 名額已取得但呼叫端在通知時被取消，歸還名額
+                self.release()
+                raise
+
+    def release(self) -> None:
+        """釋放名額並派發給下一位等待者"""
+        self.active = max(0, self.active - 1)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.unlimited or self.active < self.max_concurrent:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            if waiter.future.done():
+                continue
+            waiter.future.set_result(None)
+            self.active += 1
+
+    def _next_waiter(self) -> _Waiter | None:
+        for priority in Priority:
+            users = self._queues[priority]
+            if not users:
+                continue
+            key, queue = next(iter(users.items()))
+            waiter = queue.popleft()
+            if queue:
+                users.move_to_end(key)
+            else:
+                del users[key]
+            return waiter
+        return None
+
+    def _discard(self, waiter: _Waiter) -> None:
+        users = self._queues[waiter.priority]
+        queue = users.get(waiter.user_key)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            return
+        if not queue:
+            del users[waiter.user_key]
+
+
+controller = AdmissionController(
+    settings.ai_max_concurrent_calls,
+    queue_timeout=settings.ai_queue_timeout_seconds,
+)
+
+gauge(
+    "ctos_ai_calls_active",
+    "執行中的 AI 呼叫數",
+    callback=lambda: controller.active,
+)
+gauge(
+    "ctos_ai_queue_depth",
+    "排隊中的 AI 呼叫數",
+    ("priority",),
+    callback=lambda: {(p.name.lower(),): controller.depth(p) for p in Priority},
+)
+
+
+@asynccontextmanager
+async def ai_call_slot(
+    priority: Priority = Priority.INTERACTIVE,
+    user_key: str | None = None,
+    on_queued: QueueNotifyCallback | None = None,
+) -> AsyncIterator[None]:
+    """在名額內執行一段 AI 呼叫
+
+    Raises:
+        AIQueueTimeoutError: 排隊超過 AI_QUEUE_TIMEOUT_SECONDS
+    """
+    await controller.acquire(priority, user_key, on_queued)
+    try:
+        yield
+    finally:
+        controller.release()
+
+
+def get_admission_stats() -> dict:
+    """取得准入控制統計（除錯與監控用）"""
+    return controller.stats()
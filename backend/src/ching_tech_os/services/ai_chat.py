@@ -5,6 +5,7 @@ import time
 from uuid import UUID
 
 from ..database import get_connection
+from ..utils.json_codec import decode_jsonb
 
 
 # ============================================================
@@ -121,7 +122,7 @@ async def create_chat(
         )
         result = dict(row)
         # Parse JSONB messages
-        result["messages"] = json.loads(result["messages"]) if isinstance(result["messages"], str) else result["messages"]
+        result["messages"] = decode_jsonb(result["messages"])
         return result
 
 
@@ -151,7 +152,7 @@ async def get_chat(chat_id: UUID, user_id: int | None = None) -> dict | None:
             return None
         result = dict(row)
         # Parse JSONB messages
-        result["messages"] = json.loads(result["messages"]) if isinstance(result["messages"], str) else result["messages"]
+        result["messages"] = decode_jsonb(result["messages"])
         return result
 
 
@@ -215,16 +216,14 @@ async def update_chat(
         if row is None:
             return None
         result = dict(row)
-        result["messages"] = json.loads(result["messages"]) if isinstance(result["messages"], str) else result["messages"]
+        result["messages"] = decode_jsonb(result["messages"])
         return result
 
 
 async def update_chat_messages(
     chat_id: UUID, messages: list[dict], user_id: int | None = None
 ) -> dict | None:
-    """更新對話訊息"""
-    messages_json = json.dumps(messages, ensure_ascii=False)
-
+    """更新對話訊息（直接傳入 list，由連線的 jsonb codec 編碼）"""
     async with get_connection() as conn:
         if user_id is not None:
             row = await conn.fetchrow(
@@ -234,7 +233,7 @@ async def update_chat_messages(
                 WHERE id = $2 AND user_id = $3
                 RETURNING id, user_id, title, model, prompt_name, messages, created_at, updated_at
                 """,
-                messages_json,
+                messages,
                 chat_id,
                 user_id,
             )
@@ -246,13 +245,13 @@ async def update_chat_messages(
                 WHERE id = $2
                 RETURNING id, user_id, title, model, prompt_name, messages, created_at, updated_at
                 """,
-                messages_json,
+                messages,
                 chat_id,
             )
         if row is None:
             return None
         result = dict(row)
-        result["messages"] = json.loads(result["messages"]) if isinstance(result["messages"], str) else result["messages"]
+        result["messages"] = decode_jsonb(result["messages"])
         return result
 
 
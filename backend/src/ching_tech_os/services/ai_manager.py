@@ -10,7 +10,8 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from ..database import get_connection
+from ..database import Workload, get_connection, use_workload
+from ..utils.json_codec import decode_jsonb
 from ..models.ai import (
     AiAgentCreate,
     AiAgentResponse,
@@ -70,7 +71,7 @@ async def get_prompt(prompt_id: UUID) -> dict | None:
             return None
         result = dict(row)
         if result.get("variables"):
-            result["variables"] = json.loads(result["variables"])
+            result["variables"] = decode_jsonb(result["variables"])
         return result
 
 
@@ -90,13 +91,13 @@ async def get_prompt_by_name(name: str) -> dict | None:
             return None
         result = dict(row)
         if result.get("variables"):
-            result["variables"] = json.loads(result["variables"])
+            result["variables"] = decode_jsonb(result["variables"])
         return result
 
 
 async def create_prompt(data: AiPromptCreate) -> dict:
     """建立 Prompt"""
-    variables_json = json.dumps(data.variables) if data.variables else None
+    variables = data.variables or None
 
     async with get_connection() as conn:
         row = await conn.fetchrow(
@@ -111,11 +112,11 @@ async def create_prompt(data: AiPromptCreate) -> dict:
             data.category,
             data.content,
             data.description,
-            variables_json,
+            variables,
         )
         result = dict(row)
         if result.get("variables"):
-            result["variables"] = json.loads(result["variables"])
+            result["variables"] = decode_jsonb(result["variables"])
         return result
 
 
@@ -152,7 +153,7 @@ async def update_prompt(prompt_id: UUID, data: AiPromptUpdate) -> dict | None:
 
     if data.variables is not None:
         updates.append(f"variables = ${param_idx}::jsonb")
-        params.append(json.dumps(data.variables))
+        params.append(data.variables)
         param_idx += 1
 
     if not updates:
@@ -176,7 +177,7 @@ async def update_prompt(prompt_id: UUID, data: AiPromptUpdate) -> dict | None:
             return None
         result = dict(row)
         if result.get("variables"):
-            result["variables"] = json.loads(result["variables"])
+            result["variables"] = decode_jsonb(result["variables"])
         return result
 
 
@@ -283,7 +284,7 @@ async def get_agent(agent_id: UUID) -> dict | None:
                 "category": result["prompt_category"],
                 "content": result["prompt_content"],
                 "description": result["prompt_description"],
-                "variables": json.loads(prompt_vars) if prompt_vars else None,
+                "variables": decode_jsonb(prompt_vars) if prompt_vars else None,
                 "created_at": result["prompt_created_at"],
                 "updated_at": result["prompt_updated_at"],
             }
@@ -335,7 +336,7 @@ async def get_agent_by_name(name: str) -> dict | None:
                 "category": result["prompt_category"],
                 "content": result["prompt_content"],
                 "description": result["prompt_description"],
-                "variables": json.loads(prompt_vars) if prompt_vars else None,
+                "variables": decode_jsonb(prompt_vars) if prompt_vars else None,
                 "created_at": result["prompt_created_at"],
                 "updated_at": result["prompt_updated_at"],
             }
@@ -487,10 +488,7 @@ async def delete_agent(agent_id: UUID) -> bool:
 
 
 async def create_log(data: AiLogCreate) -> dict:
-    """建立 AI Log"""
-    parsed_json = json.dumps(data.parsed_response) if data.parsed_response else None
-    allowed_tools_json = json.dumps(data.allowed_tools) if data.allowed_tools else None
-
+    """建立 AI Log（parsed_response / allowed_tools 直接傳入，由連線的 jsonb codec 編碼）"""
     async with get_connection() as conn:
         row = await conn.fetchrow(
             """
@@ -508,9 +506,9 @@ async def create_log(data: AiLogCreate) -> dict:
             data.context_id,
             data.input_prompt,
             data.system_prompt,
-            allowed_tools_json,
+            data.allowed_tools or None,
             data.raw_response,
-            parsed_json,
+            data.parsed_response or None,
             data.model,
             data.success,
             data.error_message,
@@ -520,9 +518,9 @@ async def create_log(data: AiLogCreate) -> dict:
         )
         result = dict(row)
         if result.get("parsed_response"):
-            result["parsed_response"] = json.loads(result["parsed_response"])
+            result["parsed_response"] = decode_jsonb(result["parsed_response"])
         if result.get("allowed_tools"):
-            result["allowed_tools"] = json.loads(result["allowed_tools"]) if isinstance(result["allowed_tools"], str) else result["allowed_tools"]
+            result["allowed_tools"] = decode_jsonb(result["allowed_tools"])
         return result
 
 
@@ -604,10 +602,10 @@ async def get_logs(
             item = dict(row)
             # 解析 allowed_tools
             if item.get("allowed_tools"):
-                item["allowed_tools"] = json.loads(item["allowed_tools"]) if isinstance(item["allowed_tools"], str) else item["allowed_tools"]
+                item["allowed_tools"] = decode_jsonb(item["allowed_tools"])
             # 從 parsed_response 提取 used_tools（對 run_skill_script 加上 skill 資訊）
             if item.get("parsed_response"):
-                parsed = json.loads(item["parsed_response"]) if isinstance(item["parsed_response"], str) else item["parsed_response"]
+                parsed = decode_jsonb(item["parsed_response"])
                 tool_calls = parsed.get("tool_calls", []) if parsed else []
                 used_tools_set = {}
                 for tc in tool_calls:
@@ -662,12 +660,13 @@ async def get_log(log_id: UUID) -> dict | None:
             return None
         result = dict(row)
         if result.get("parsed_response"):
-            result["parsed_response"] = json.loads(result["parsed_response"])
+            result["parsed_response"] = decode_jsonb(result["parsed_response"])
         if result.get("allowed_tools"):
-            result["allowed_tools"] = json.loads(result["allowed_tools"]) if isinstance(result["allowed_tools"], str) else result["allowed_tools"]
+            result["allowed_tools"] = decode_jsonb(result["allowed_tools"])
         return result
 
 
+@use_workload(Workload.ANALYTICS, readonly=True)
 async def get_log_stats(
     agent_id: UUID | None = None,
     start_date: datetime | None = None,
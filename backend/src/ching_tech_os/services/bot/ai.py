@@ -8,8 +8,17 @@ import json
 import logging
 import re
 
+from ..metrics import histogram
+
 logger = logging.getLogger("bot.ai")
 
+# 觸發 AI 到回覆送出的延遲（platform: line / telegram；delivery: reply / push / failed）
+bot_reply_seconds = histogram(
+    "ctos_bot_reply_seconds",
+    "Bot 訊息觸發 AI 到回覆送出的延遲",
+    ("platform", "delivery"),
+)
+
 
 # ============================================================
 # AI 回應解析
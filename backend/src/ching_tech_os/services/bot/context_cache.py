@@ -0,0 +1,205 @@
+"""Bot 對話上下文快取
+
+每個對話（群組或個人）保留最近 N 則上下文原始資料的環狀緩衝區，
+讓 get_conversation_context 在大多數回合不需要查詢資料庫。
+
+- 第一次讀取時由資料庫載入（cache miss），之後新訊息由儲存端直接 append
+- 圖片/檔案訊息的 bot_files 資料在訊息之後才寫入，因此改為讓該對話失效
+- 對話重置、群組刪除、檔案刪除等操作也會讓對應對話失效
+- 快取項目有 TTL，避免顯示名稱等關聯資料長期不一致
+"""
+
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from ...config import settings
+
+logger = logging.getLogger(__name__)
+
+# 上下文只包含這些訊息類型（與 get_conversation_context 的 SQL 條件一致）
+CONTEXT_MESSAGE_TYPES = ("text", "image", "file")
+
+ConversationKey = tuple[str, str]
+
+
+def conversation_key(
+    bot_group_id: UUID | str | None,
+    platform_user_id: str | None,
+) -> ConversationKey | None:
+    """計算對話 key：群組以 bot_groups.id、個人對話以 platform_user_id 區分"""
+    if bot_group_id:
+        return ("group", str(bot_group_id))
+    if platform_user_id:
+        return ("user", platform_user_id)
+    return None
+
+
+def is_context_row(message_type: str, content: str | None) -> bool:
+    """判斷訊息是否會出現在對話上下文中"""
+    if message_type not in CONTEXT_MESSAGE_TYPES:
+        return False
+    return content is not None or message_type in ("image", "file")
+
+
+@dataclass
+class _Entry:
+    rows: deque
+    # 載入時資料庫筆數少於容量，表示已包含完整歷史
+    complete: bool
+    expires_at: float
+    message_ids: set[str] = field(default_factory=set)
+
+
+class ConversationContextCache:
+    """per-conversation 上下文環狀緩衝區（LRU 管理對話數量）"""
+
+    def __init__(
+        self,
+        capacity: int | None = None,
+        ttl: int | None = None,
+        max_conversations: int = 1000,
+    ):
+        self._capacity = capacity if capacity is not None else settings.bot_context_cache_size
+        self._ttl = ttl if ttl is not None else settings.bot_context_cache_ttl_seconds
+        self._max_conversations = max_conversations
+        self._store: OrderedDict[ConversationKey, _Entry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def enabled(self) -> bool:
+        return self._capacity > 0 and self._ttl > 0
+
+    def _get_entry(self, key: ConversationKey) -> _Entry | None:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() > entry.expires_at:
+            del self._store[key]
+            return None
+        self._store.move_to_end(key)
+        return entry
+
+    def get(
+        self,
+        key: ConversationKey,
+        limit: int,
+        exclude_message_id: UUID | str | None = None,
+    ) -> list[dict] | None:
+        """取得最近 limit 筆上下文（由舊到新），無法由快取提供時回傳 None"""
+        entry = self._get_entry(key) if self.enabled else None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        rows = list(entry.rows)
+        if exclude_message_id is not None:
+            excluded = str(exclude_message_id)
+            rows = [r for r in rows if str(r.get("id")) != excluded]
+
+        # 緩衝區不足以涵蓋 limit 筆，且並非完整歷史 → 交給資料庫
+        if len(rows) < limit and not entry.complete:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return rows[-limit:] if limit > 0 else []
+
+    def fill(self, key: ConversationKey, rows_oldest_first: list[dict]) -> None:
+        """以資料庫查詢結果（由舊到新，最多 capacity 筆）建立快取"""
+        if not self.enabled:
+            return
+        rows = deque(rows_oldest_first[-self._capacity:], maxlen=self._capacity)
+        self._store[key] = _Entry(
+            rows=rows,
+            complete=len(rows_oldest_first) < self._capacity,
+            expires_at=time.monotonic() + self._ttl,
+            message_ids={str(r.get("id")) for r in rows if r.get("id") is not None},
+        )
+        self._store.move_to_end(key)
+        while len(self._store) > self._max_conversations:
+            self._store.popitem(last=False)
+
+    def append(self, key: ConversationKey | None, row: dict) -> None:
+        """新訊息寫入後附加到已快取的對話（未快取的對話不處理）"""
+        if key is None:
+            return
+        entry = self._get_entry(key)
+        if entry is None:
+            return
+        if len(entry.rows) == entry.rows.maxlen:
+            dropped = entry.rows[0]
+            entry.message_ids.discard(str(dropped.get("id")))
+            entry.complete = False
+        entry.rows.append(row)
+        if row.get("id") is not None:
+            entry.message_ids.add(str(row["id"]))
+
+    def invalidate(self, key: ConversationKey | None) -> None:
+        """讓單一對話的快取失效"""
+        if key is not None:
+            self._store.pop(key, None)
+
+    def invalidate_message(self, message_uuid: UUID | str) -> None:
+        """讓包含指定訊息的對話失效（例如 bot_files 寫入或刪除後）"""
+        target = str(message_uuid)
+        for key in [k for k, e in self._store.items() if target in e.message_ids]:
+            del self._store[key]
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "conversations": len(self._store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def record_saved_message(
+    message_uuid: UUID | str,
+    *,
+    bot_group_id: UUID | str | None,
+    platform_user_id: str | None,
+    message_id: str,
+    message_type: str,
+    content: str | None,
+    is_from_bot: bool,
+    display_name: str | None,
+) -> None:
+    """訊息寫入 bot_messages 後更新上下文快取
+
+    文字訊息直接 append；圖片/檔案因 bot_files 尚未寫入，改為讓對話失效。
+    """
+    key = conversation_key(bot_group_id, platform_user_id)
+    if key is None or not is_context_row(message_type, content):
+        return
+    if message_type != "text":
+        conversation_context_cache.invalidate(key)
+        return
+    conversation_context_cache.append(key, {
+        "id": message_uuid,
+        "content": content,
+        "is_from_bot": is_from_bot,
+        "display_name": display_name,
+        "message_type": message_type,
+        "line_message_id": message_id,
+        "nas_path": None,
+        "file_name": None,
+        "file_size": None,
+        "actual_file_type": None,
+    })
+
+
+# 全域對話上下文快取實例
+conversation_context_cache = ConversationContextCache()
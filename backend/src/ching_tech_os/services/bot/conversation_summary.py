@@ -0,0 +1,227 @@
+"""Bot 對話滾動摘要
+
+對話超出上下文 token 預算時，較舊的訊息不再放入 prompt。這些訊息整理成每個對話一份的
+滾動摘要，存在 bot_conversation_summaries，之後的回合直接沿用：
+
+- 摘要記錄涵蓋到哪一則訊息（covered_message_id），只增量摘要新超出預算的訊息
+  （前一份摘要 + 新訊息 → 新摘要），不重新摘要整段對話
+- 未摘要的較舊訊息累積到 AI_CONTEXT_SUMMARY_MIN_MESSAGES 則才更新，
+  以背景優先等級在回覆之後執行，不延遲本回合
+- 訊息也可能在預算內就被新訊息擠出上下文則數上限（limit），沒有經過「超出預算」這一步；
+  此時由呼叫端提供 backfill，在背景補查摘要涵蓋範圍之後、這批訊息之前的較舊訊息
+  （最多 AI_CONTEXT_SUMMARY_BACKFILL_MESSAGES 則）一併摘要，離開上下文的訊息都會進入摘要
+- 摘要在程序內快取，同一對話不必每回合查詢資料庫
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from ...config import settings
+from ...database import get_connection
+from ..ai_admission import Priority
+from ..claude_agent import call_claude_for_summary
+from ..context_window import estimate_tokens, truncate_to_tokens
+from ..metrics import counter
+from .context_cache import ConversationKey
+
+logger = logging.getLogger("bot.conversation_summary")
+
+_updates_total = counter(
+    "ctos_bot_conversation_summary_updates_total",
+    "對話滾動摘要更新結果",
+    ("result",),
+)
+
+
+@dataclass
+class ConversationSummary:
+    """對話的滾動摘要"""
+
+    summary: str
+    covered_message_id: str | None  # 摘要涵蓋到的最後一則訊息
+    covered_count: int  # 累計摘要的訊息數
+
+
+# 補查較舊訊息：回傳 (原始訊息, 對應的 {"role", "content"} 訊息)，皆由舊到新
+Backfill = Callable[[], Awaitable[tuple[list[dict], list[dict]]]]
+
+
+def summary_key(key: ConversationKey) -> str:
+    """資料表使用的對話 key（group:{bot_groups.id} / user:{platform_user_id}）"""
+    kind, identifier = key
+    return f"{kind}:{identifier}"
+
+
+class ConversationSummaryStore:
+    """滾動摘要的讀取、增量更新與程序內快取"""
+
+    def __init__(self) -> None:
+        # 對話 key -> 摘要（None 表示已查過、尚無摘要）
+        self._cache: dict[str, ConversationSummary | None] = {}
+        self._updating: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get(self, key: ConversationKey) -> ConversationSummary | None:
+        """取得對話摘要（查詢失敗時視為沒有摘要）"""
+        skey = summary_key(key)
+        if skey in self._cache:
+            return self._cache[skey]
+        try:
+            async with get_connection() as conn:
+                row = await conn.fetchrow(
+                    """
+                    SELECT summary, covered_message_id, covered_count
+                    FROM bot_conversation_summaries
+                    WHERE conversation_key = $1
+                    """,
+                    skey,
+                )
+        except Exception as e:
+            logger.warning(f"讀取對話摘要失敗 {skey}: {e}")
+            return None
+        stored = None
+        if row:
+            stored = ConversationSummary(
+                summary=row["summary"],
+                covered_message_id=str(row["covered_message_id"]) if row["covered_message_id"] else None,
+                covered_count=row["covered_count"],
+            )
+        self._cache[skey] = stored
+        return stored
+
+    @staticmethod
+    def uncovered(stored: ConversationSummary | None, rows: list[dict], dropped: int) -> list[dict]:
+        """超出預算（rows[:dropped]）且尚未納入摘要的訊息
+
+        摘要涵蓋的訊息在 rows 中時，只取其後的訊息；不在 rows 中表示摘要涵蓋範圍
+        早於這批訊息，超出預算的訊息都尚未摘要。
+        """
+        if stored is None or stored.covered_message_id is None:
+            return rows[:dropped]
+        for index, row in enumerate(rows):
+            if str(row.get("id")) == stored.covered_message_id:
+                return rows[index + 1:dropped]
+        return rows[:dropped]
+
+    @staticmethod
+    def covers(stored: ConversationSummary | None, rows: list[dict]) -> bool:
+        """摘要涵蓋的最後一則訊息是否在 rows 中（是則 rows 之前的訊息都已摘要）"""
+        if stored is None or stored.covered_message_id is None:
+            return False
+        return any(str(row.get("id")) == stored.covered_message_id for row in rows)
+
+    def schedule_update(
+        self,
+        key: ConversationKey,
+        stored: ConversationSummary | None,
+        rows: list[dict],
+        messages: list[dict],
+        backfill: Backfill | None = None,
+    ) -> bool:
+        """在背景更新摘要（同一對話同時只有一個更新）
+
+        Args:
+            rows: 要納入摘要的原始訊息（由舊到新，用於記錄涵蓋範圍）
+            messages: rows 對應的 {"role", "content"} 訊息
+            backfill: 補查 rows 之前、尚未摘要的較舊訊息；合計不足
+                AI_CONTEXT_SUMMARY_MIN_MESSAGES 則時不更新
+        """
+        skey = summary_key(key)
+        if skey in self._updating or not (messages or backfill):
+            return False
+        self._updating.add(skey)
+        task = asyncio.get_running_loop().create_task(self._run_update(key, stored, rows, messages, backfill))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run_update(self, key, stored, rows, messages, backfill=None) -> None:
+        try:
+            if backfill is not None:
+                older_rows, older_messages = await backfill()
+                rows, messages = [*older_rows, *rows], [*older_messages, *messages]
+                if len(messages) < settings.ai_context_summary_min_messages:
+                    return
+            await self.update(key, stored, rows, messages)
+        except Exception as e:
+            _updates_total.inc(result="error")
+            logger.warning(f"更新對話摘要失敗 {summary_key(key)}: {e}")
+        finally:
+            self._updating.discard(summary_key(key))
+
+    async def update(
+        self,
+        key: ConversationKey,
+        stored: ConversationSummary | None,
+        rows: list[dict],
+        messages: list[dict],
+    ) -> ConversationSummary | None:
+        """以前一份摘要加上新訊息產生新摘要並儲存"""
+        source = []
+        if stored is not None:
+            source.append({"role": "system", "content": f"[先前對話摘要]\n{stored.summary}"})
+        source.extend(messages)
+
+        response = await call_claude_for_summary(source, priority=Priority.BACKGROUND)
+        summary = (response.message or "").strip()
+        if not response.success or not summary:
+            _updates_total.inc(result="failed")
+            logger.warning(f"對話摘要產生失敗 {summary_key(key)}: {response.error}")
+            return None
+
+        # 摘要最多佔預算的一半（其餘留給近期訊息）
+        if settings.ai_context_budget_tokens > 0:
+            summary = truncate_to_tokens(summary, settings.ai_context_budget_tokens // 2)
+        covered_id = rows[-1].get("id") if rows else None
+        updated = ConversationSummary(
+            summary=summary,
+            covered_message_id=str(covered_id) if covered_id else None,
+            covered_count=(stored.covered_count if stored else 0) + len(messages),
+        )
+        skey = summary_key(key)
+        async with get_connection() as conn:
+            await conn.execute(
+                """
+                INSERT INTO bot_conversation_summaries
+                    (conversation_key, summary, covered_message_id, covered_count, summary_tokens, updated_at)
+                VALUES ($1, $2, $3, $4, $5, NOW())
+                ON CONFLICT (conversation_key) DO UPDATE SET
+                    summary = EXCLUDED.summary,
+                    covered_message_id = EXCLUDED.covered_message_id,
+                    covered_count = EXCLUDED.covered_count,
+                    summary_tokens = EXCLUDED.summary_tokens,
+                    updated_at = NOW()
+                """,
+                skey,
+                updated.summary,
+                covered_id,
+                updated.covered_count,
+                estimate_tokens(updated.summary),
+            )
+        self._cache[skey] = updated
+        _updates_total.inc(result="updated")
+        logger.info(
+            f"已更新對話摘要 {skey}: 新增 {len(messages)} 則，累計 {updated.covered_count} 則"
+        )
+        return updated
+
+    async def clear(self, key: ConversationKey | None) -> None:
+        """刪除對話摘要（重置對話時呼叫）"""
+        if key is None:
+            return
+        skey = summary_key(key)
+        self._cache[skey] = None
+        try:
+            async with get_connection() as conn:
+                await conn.execute(
+                    "DELETE FROM bot_conversation_summaries WHERE conversation_key = $1",
+                    skey,
+                )
+        except Exception as e:
+            # 快取已標記為無摘要，資料庫殘留的摘要在程序重啟前不會被使用
+            logger.warning(f"刪除對話摘要失敗 {skey}: {e}")
+
+
+conversation_summaries = ConversationSummaryStore()
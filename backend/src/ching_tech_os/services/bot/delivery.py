@@ -0,0 +1,317 @@
+"""Bot 主動推送（push）投遞
+
+主動推送統一經過這裡（Line push 補送、背景任務完成通知、排程 Agent 結果推送）：
+
+- 批次：Line 單次請求最多 5 則訊息，同一目標的訊息依序分批送出；
+  Telegram 沒有多則訊息 API，逐則送出。長文字依平台上限分段（split_text / text_messages）
+- 多目標並行：deliver_many() 同時推送給多個目標，同時進行的目標數受 BOT_DELIVERY_CONCURRENCY 限制；
+  各平台另有每秒請求上限（BOT_DELIVERY_LINE_RATE / BOT_DELIVERY_TELEGRAM_RATE），所有推送共用
+- 限流退避：收到 429（Line）或 RetryAfter（Telegram）時，該平台所有推送暫停到平台指定的時間後再重試；
+  Line 5xx 與連線錯誤以指數退避重試，最多 BOT_DELIVERY_MAX_RETRIES 次
+- 冪等重試：Line 每批訊息產生一個 X-Line-Retry-Key，重試沿用同一個 key，
+  平台已接受過的請求回 409，視為已送出而不會重複推送；
+  Telegram 沒有冪等機制，只在平台明確拒絕（RetryAfter）時重試
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any
+
+import aiohttp
+
+from ...config import settings
+from ..metrics import counter, histogram
+
+logger = logging.getLogger("bot.delivery")
+
+# 單次請求的訊息數上限
+MAX_MESSAGES_PER_REQUEST = {"line": 5, "telegram": 1}
+# 單則文字訊息的字數上限
+MAX_TEXT_CHARS = {"line": 5000, "telegram": 4096}
+
+# 暫時性錯誤的指數退避
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 30.0
+# 平台要求等待超過此秒數時不再重試（避免背景任務長時間卡住）
+_RETRY_AFTER_MAX_SECONDS = 60.0
+
+_delivery_seconds = histogram(
+    "ctos_bot_delivery_seconds",
+    "單一目標主動推送的完成時間（含分批、限流等待與重試）",
+    ("platform", "outcome"),
+)
+_requests_total = counter(
+    "ctos_bot_delivery_requests_total",
+    "主動推送 API 請求結果（sent / retried / rate_limited / duplicate / failed）",
+    ("platform", "result"),
+)
+
+# (target, 一批訊息, retry key) -> 平台訊息 ID 列表
+Sender = Callable[[str, list[Any], str], Awaitable[list[str]]]
+
+
+@dataclass
+class Delivery:
+    """推送給單一目標的訊息（Line：TextMessage / ImageMessage；Telegram：文字）"""
+
+    platform: str
+    target: str
+    messages: list[Any]
+
+
+@dataclass
+class DeliveryResult:
+    platform: str
+    target: str
+    message_ids: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _ChannelQuota:
+    """單一平台的推送配額：每秒請求數上限，以及收到限流回應後的全平台暫停"""
+
+    def __init__(self, rate: int) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        start = max(now, self._next_slot, self._paused_until)
+        self._next_slot = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+_quotas = {
+    "line": _ChannelQuota(settings.bot_delivery_line_rate),
+    "telegram": _ChannelQuota(settings.bot_delivery_telegram_rate),
+}
+
+
+def split_text(text: str, max_chars: int) -> list[str]:
+    """將超過上限的長文字分割成多段（優先在換行處斷開，其次空白）"""
+    if not text or len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks: list[str] = []
+    remaining = text
+    while remaining:
+        if len(remaining) <= max_chars:
+            chunks.append(remaining)
+            break
+        # 在 max_chars 以內找最後一個換行位置
+        cut = remaining.rfind("\n", 0, max_chars)
+        if cut <= 0:
+            # 沒有換行，找空白
+            cut = remaining.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            # 都沒有，硬切
+            cut = max_chars
+        chunks.append(remaining[:cut].rstrip())
+        remaining = remaining[cut:].lstrip("\n ")
+    return chunks
+
+
+def text_messages(platform: str, text: str) -> list[Any]:
+    """依平台字數上限分段並建立訊息物件"""
+    chunks = split_text(text, MAX_TEXT_CHARS.get(platform, MAX_TEXT_CHARS["telegram"]))
+    if platform == "line":
+        from linebot.v3.messaging import TextMessage
+
+        return [TextMessage(text=chunk) for chunk in chunks]
+    return chunks
+
+
+async def deliver(platform: str, target: str, messages: list[Any]) -> DeliveryResult:
+    """推送訊息給單一目標"""
+    return (await deliver_many([Delivery(platform, target, messages)]))[0]
+
+
+async def deliver_many(deliveries: Iterable[Delivery]) -> list[DeliveryResult]:
+    """推送給多個目標（並行），回傳結果順序與輸入相同"""
+    deliveries = list(deliveries)
+    if not deliveries:
+        return []
+
+    senders = await _resolve_senders({d.platform for d in deliveries})
+    semaphore = asyncio.Semaphore(max(1, settings.bot_delivery_concurrency))
+
+    async def run(delivery: Delivery) -> DeliveryResult:
+        async with semaphore:
+            return await _deliver_one(delivery, senders.get(delivery.platform))
+
+    return list(await asyncio.gather(*(run(d) for d in deliveries)))
+
+
+async def _resolve_senders(platforms: set[str]) -> dict[str, Sender | str]:
+    """各平台的發送函式；無法發送時為錯誤訊息"""
+    senders: dict[str, Sender | str] = {}
+    if "line" in platforms:
+        senders["line"] = _push_line_batch
+    if "telegram" in platforms:
+        try:
+            senders["telegram"] = await _telegram_sender()
+        except Exception as e:
+            logger.warning(f"取得 Telegram bot 設定失敗: {e}")
+            senders["telegram"] = f"發送失敗：{e}"
+    return senders
+
+
+async def _push_line_batch(target: str, batch: list[Any], retry_key: str) -> list[str]:
+    from linebot.v3.messaging import PushMessageRequest
+
+    from ..bot_line import messaging
+
+    api = await messaging.get_messaging_api()
+    try:
+        response = await api.push_message(
+            PushMessageRequest(to=target, messages=batch),
+            x_line_retry_key=retry_key,
+        )
+    except Exception as e:
+        # 同一個 retry key 已被接受過（前一次請求其實已送達）
+        if getattr(e, "status", None) == 409:
+            _requests_total.inc(platform="line", result="duplicate")
+            return []
+        raise
+    logger.info(f"推送 {len(batch)} 則訊息到 {target}")
+    if response and response.sent_messages:
+        return [m.id for m in response.sent_messages]
+    return []
+
+
+async def _telegram_sender() -> Sender | str:
+    from ..bot_settings import get_bot_credentials
+    from ..bot_telegram.adapter import TelegramBotAdapter
+
+    credentials = await get_bot_credentials("telegram")
+    token = credentials.get("bot_token", "")
+    if not token:
+        return "Telegram bot_token 未設定"
+    adapter = TelegramBotAdapter(token=token)
+
+    async def send(target: str, batch: list[Any], _retry_key: str) -> list[str]:
+        ids = []
+        for text in batch:
+            sent = await adapter.send_text(target, text)
+            ids.append(sent.message_id)
+        return ids
+
+    return send
+
+
+async def _deliver_one(delivery: Delivery, sender: Sender | str | None) -> DeliveryResult:
+    started = time.monotonic()
+    platform = delivery.platform
+    result = DeliveryResult(platform, delivery.target)
+    sent_batches = 0
+
+    if sender is None or isinstance(sender, str):
+        result.error = sender or f"不支援的平台: {platform}"
+    else:
+        size = MAX_MESSAGES_PER_REQUEST[platform]
+        try:
+            for i in range(0, len(delivery.messages), size):
+                batch = delivery.messages[i:i + size]
+                result.message_ids.extend(await _send_with_retry(platform, sender, delivery.target, batch))
+                sent_batches += 1
+        except Exception as e:
+            logger.error(f"推送訊息失敗（{platform} → {delivery.target}）: {e}")
+            error = _describe_error(platform, e)
+            result.error = f"部分訊息發送失敗: {error}" if sent_batches else error
+
+    if result.ok:
+        outcome = "sent"
+    else:
+        outcome = "partial" if sent_batches else "failed"
+    _delivery_seconds.observe(time.monotonic() - started, platform=platform, outcome=outcome)
+    return result
+
+
+async def _send_with_retry(platform: str, sender: Sender, target: str, batch: list[Any]) -> list[str]:
+    quota = _quotas[platform]
+    # 同一批訊息的所有重試共用同一個 key（Line 以此去重）
+    retry_key = str(uuid.uuid4())
+    attempt = 0
+    while True:
+        await quota.wait()
+        try:
+            ids = await sender(target, batch, retry_key)
+        except Exception as e:
+            retry = _retry_delay(platform, e, attempt)
+            if retry is None or attempt >= settings.bot_delivery_max_retries:
+                _requests_total.inc(platform=platform, result="failed")
+                raise
+            delay, rate_limited = retry
+            attempt += 1
+            if rate_limited:
+                _requests_total.inc(platform=platform, result="rate_limited")
+                logger.warning(f"{platform} 推送被限流，{delay:.1f} 秒後重試（第 {attempt} 次）")
+                quota.pause(delay)
+            else:
+                _requests_total.inc(platform=platform, result="retried")
+                logger.warning(f"{platform} 推送暫時失敗，{delay:.1f} 秒後重試（第 {attempt} 次）: {e}")
+                await asyncio.sleep(delay)
+            continue
+        _requests_total.inc(platform=platform, result="sent")
+        return ids
+
+
+def _retry_delay(platform: str, error: Exception, attempt: int) -> tuple[float, bool] | None:
+    """可重試時回傳 (等待秒數, 是否為平台限流)，否則 None"""
+    backoff = min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt)
+    status = getattr(error, "status", None)
+    retry_after = _retry_after_seconds(error)
+
+    if retry_after is not None or status == 429:
+        # 月額度用完也是 429，重試沒有意義
+        if "monthly limit" in str(getattr(error, "body", "") or "").lower():
+            return None
+        delay = retry_after if retry_after is not None else backoff
+        if delay > _RETRY_AFTER_MAX_SECONDS:
+            return None
+        return delay, True
+
+    # 以下只有帶 retry key 的 Line 請求可安全重試（請求可能已送達）
+    if platform != "line":
+        return None
+    if isinstance(status, int) and status >= 500:
+        return backoff, False
+    if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError)):
+        return backoff, False
+    return None
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    """Telegram RetryAfter.retry_after 或 HTTP Retry-After header"""
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        headers = getattr(error, "headers", None) or {}
+        value = next((v for k, v in headers.items() if str(k).lower() == "retry-after"), None)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _describe_error(platform: str, error: Exception) -> str:
+    if platform == "line":
+        from ..bot_line.messaging import _parse_line_error
+
+        return _parse_line_error(error)
+    return f"發送失敗：{error}"
@@ -155,6 +155,7 @@ async def handle_restricted_mode(
         AI 回應文字，或 None
     """
     from .. import ai_manager
+    from ..ai_admission import Priority
     from ..claude_agent import call_claude
     from ..linebot_ai import (
         build_system_prompt,
@@ -300,6 +301,8 @@ async def handle_restricted_mode(
             required_mcp_servers=required_mcp_servers,
             ctos_user_id=None,  # 未綁定用戶
             extra_mcp_env=extra_mcp_env,
+            priority=Priority.GROUP if is_group else Priority.INTERACTIVE,
+            user_key=f"bot:{bot_user_id or platform_user_id}",
         )
     except Exception:
         logger.exception("受限模式 AI 呼叫失敗")
@@ -0,0 +1,174 @@
+"""平台共用的媒體收錄（內容定址儲存）
+
+Line / Telegram 收到的圖片、影片、檔案以串流方式下載：
+
+- 共用一個 httpx.AsyncClient（連線池），不再每次下載建立新連線
+- 邊下載邊寫入 NAS 上的暫存檔並計算 SHA-256，不把整個檔案放在記憶體
+- 以內容雜湊決定儲存位置：blobs/{前兩碼}/{sha256}{副檔名}
+  同一份檔案轉傳到多個群組只存一份，各則訊息在 bot_files 各自有一筆參照
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from ..local_file import LocalFileError, create_linebot_file_service
+
+logger = logging.getLogger("bot.media_store")
+
+BLOB_DIR = "blobs"
+INCOMING_DIR = f"{BLOB_DIR}/.incoming"
+CHUNK_SIZE = 256 * 1024
+# 猜測檔案類型所需的檔頭長度
+HEAD_BYTES = 16
+
+# 影片可能很大：讀取逾時放寬，連線逾時維持短
+_DOWNLOAD_TIMEOUT = httpx.Timeout(300.0, connect=15.0)
+_DOWNLOAD_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+_http_client: httpx.AsyncClient | None = None
+
+
+@dataclass
+class StoredMedia:
+    """收錄結果"""
+
+    nas_path: str  # 相對於 linebot 檔案根目錄的 blob 路徑
+    sha256: str
+    size: int
+    head: bytes  # 檔頭（判斷 MIME 類型用）
+    deduplicated: bool  # 相同內容已存在，未寫入新檔
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """取得共用的媒體下載 client"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=_DOWNLOAD_TIMEOUT,
+            limits=_DOWNLOAD_LIMITS,
+            follow_redirects=True,
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """關閉共用 client，應在應用程式關閉時呼叫"""
+    global _http_client
+    if _http_client is not None:
+        try:
+            await _http_client.aclose()
+        except Exception as e:
+            logger.warning(f"關閉媒體下載 client 失敗: {e}")
+        _http_client = None
+
+
+def blob_path(sha256: str, ext: str = "") -> str:
+    """內容雜湊對應的儲存路徑"""
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256}{ext.lower()}"
+
+
+def _commit_blob(part_path: Path, target: Path) -> bool:
+    """將暫存檔移到 blob 位置；已有相同內容時刪除暫存檔
+
+    Returns:
+        是否為重複內容
+    """
+    if target.exists():
+        part_path.unlink(missing_ok=True)
+        return True
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # 同一檔案系統內 rename 為原子操作；同時收錄相同內容時後者覆蓋前者，內容一致
+    os.replace(part_path, target)
+    return False
+
+
+async def store_stream(
+    chunks: AsyncIterator[bytes],
+    ext: str | Callable[[bytes], str] = "",
+) -> StoredMedia:
+    """串流寫入並以內容雜湊儲存
+
+    Args:
+        chunks: 檔案內容區塊
+        ext: 副檔名，或由檔頭推斷副檔名的函式
+
+    Raises:
+        LocalFileError: 寫入 NAS 失敗
+    """
+    file_service = create_linebot_file_service()
+    incoming = Path(file_service.get_full_path(INCOMING_DIR))
+    part_path = incoming / f"{uuid.uuid4().hex}.part"
+
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        # NAS 未掛載時不可在本機建立目錄
+        await asyncio.to_thread(file_service._ensure_mount)
+        await asyncio.to_thread(incoming.mkdir, parents=True, exist_ok=True)
+        handle = await asyncio.to_thread(open, part_path, "wb")
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                digest.update(chunk)
+                size += len(chunk)
+                if len(head) < HEAD_BYTES:
+                    head += chunk[: HEAD_BYTES - len(head)]
+                await asyncio.to_thread(handle.write, chunk)
+        finally:
+            await asyncio.to_thread(handle.close)
+
+        sha256 = digest.hexdigest()
+        resolved_ext = ext(head) if callable(ext) else ext
+        nas_path = blob_path(sha256, resolved_ext)
+        target = Path(file_service.get_full_path(nas_path))
+        deduplicated = await asyncio.to_thread(_commit_blob, part_path, target)
+    except OSError as e:
+        await asyncio.to_thread(part_path.unlink, missing_ok=True)
+        raise LocalFileError(f"寫入媒體檔案失敗：{e}") from e
+    except BaseException:
+        await asyncio.to_thread(part_path.unlink, missing_ok=True)
+        raise
+
+    if deduplicated:
+        logger.info(f"媒體內容已存在，沿用: {nas_path} ({size} bytes)")
+    else:
+        logger.info(f"媒體已儲存: {nas_path} ({size} bytes)")
+    return StoredMedia(nas_path=nas_path, sha256=sha256, size=size, head=head, deduplicated=deduplicated)
+
+
+async def store_url(
+    url: str,
+    headers: dict[str, str] | None = None,
+    ext: str | Callable[[bytes], str] = "",
+) -> StoredMedia:
+    """以共用 client 串流下載 URL 並儲存
+
+    Raises:
+        httpx.HTTPError: 下載失敗或回應非 2xx
+        LocalFileError: 寫入 NAS 失敗
+    """
+    client = get_http_client()
+    async with client.stream("GET", url, headers=headers) as response:
+        if response.status_code >= 400:
+            await response.aread()
+            response.raise_for_status()
+        return await store_stream(response.aiter_bytes(CHUNK_SIZE), ext)
+
+
+async def store_bytes(content: bytes, ext: str | Callable[[bytes], str] = "") -> StoredMedia:
+    """儲存已在記憶體中的內容（無法串流下載時使用）"""
+
+    async def _single() -> AsyncIterator[bytes]:
+        yield content
+
+    return await store_stream(_single(), ext)
@@ -0,0 +1,277 @@
+"""附件暫存快取（容量上限 + LRU）
+
+Claude 的 Read 工具只能讀本機檔案，ensure_temp_image / ensure_temp_file 會把 NAS 上的
+附件放到 /tmp/bot-images、/tmp/bot-files（文件另存解析後的 .txt）。
+
+原本每小時刪除修改時間超過 1 小時的暫存檔，仍在進行的對話引用兩小時前的照片或文件時
+就得重新讀 NAS、重新解析。改為：
+
+- 以總容量上限（BOT_STAGING_CACHE_MAX_MB）管理，超過時依最後存取時間淘汰最久未用的檔案
+- 命中時只更新索引中的存取時間，不修改檔案本身；重啟後以檔案 mtime（建立時間）排序
+- 由 NAS 建立暫存時一律複製（copy_file_range 在支援的檔案系統上為 reflink，不實際複製資料），
+  不使用 hardlink：hardlink 與 NAS 原始檔共用 inode，更新 mtime 或寫入暫存檔都會改到原始檔
+- 解析產物（PDF / Office 的 .txt）與原始檔一樣受 LRU 管理，命中時不需重新解析
+- 閒置超過 BOT_STAGING_CACHE_MAX_IDLE_HOURS 的檔案由排程清除
+
+索引同時被 event loop（lookup / record）與執行緒（stage_file、排程 sweep）更新，
+所有索引讀寫都在 _lock 內進行。啟動時與排程在執行緒中 scan() 建立索引，
+event loop 上的查詢不做目錄掃描；尚未掃描前不做容量淘汰。
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+from ...config import settings
+from ..metrics import counter, gauge
+from .media import DOWNLOADED_IMAGE_DIR, TEMP_FILE_DIR, TEMP_IMAGE_DIR
+
+logger = logging.getLogger("bot.staging_cache")
+
+_lookups_total = counter(
+    "ctos_bot_staging_cache_lookups_total",
+    "附件暫存查詢結果（hit=直接使用暫存、miss=從 NAS 重新建立）",
+    ("kind", "result"),
+)
+_evictions_total = counter(
+    "ctos_bot_staging_cache_evictions_total",
+    "附件暫存淘汰數",
+    ("reason",),
+)
+_staged_total = counter(
+    "ctos_bot_staging_cache_staged_total",
+    "從 NAS 建立暫存的方式（copy_file_range / copy）",
+    ("method",),
+)
+
+# 剛存取的檔案可能正被 Claude 讀取，淘汰時略過
+_MIN_RESIDENCY_SECONDS = 300
+# 超過容量時淘汰到上限的 90%，避免每次新增都觸發淘汰
+_LOW_WATER_RATIO = 0.9
+
+
+class StagingCache:
+    """附件暫存目錄的 LRU 索引"""
+
+    def __init__(
+        self,
+        directories: list[str],
+        max_bytes: int,
+        max_idle_seconds: float = 0,
+        min_residency_seconds: float = _MIN_RESIDENCY_SECONDS,
+    ) -> None:
+        self.directories = directories
+        self.max_bytes = max_bytes
+        self.max_idle_seconds = max_idle_seconds
+        self.min_residency_seconds = min_residency_seconds
+        # 路徑 -> (大小, 最後存取時間)；順序即 LRU 順序（最舊在前）
+        self._entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._total_bytes = 0
+        self._scanned = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 狀態 ----------
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries, total_bytes = len(self._entries), self._total_bytes
+        return {
+            "entries": entries,
+            "total_bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    # ---------- 查詢 ----------
+
+    def lookup(self, kind: str, *paths: str) -> bool:
+        """檢查暫存是否存在（全部路徑都在才算命中），命中時更新存取時間"""
+        if paths and all(os.path.exists(p) for p in paths):
+            for path in paths:
+                self.touch(path)
+            self.hits += 1
+            _lookups_total.inc(kind=kind, result="hit")
+            return True
+        self.misses += 1
+        _lookups_total.inc(kind=kind, result="miss")
+        return False
+
+    def touch(self, path: str) -> None:
+        """更新索引中的存取時間（不寫入檔案 mtime）"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            self._forget(path)
+            return
+        self._put(path, size, time.time())
+
+    # ---------- 建立 ----------
+
+    def stage_file(self, source: str, dest: str) -> str:
+        """由 NAS 檔案複製建立暫存（不與原始檔共用 inode）
+
+        Returns:
+            使用的方式（copy_file_range / copy）
+        """
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        if os.path.exists(dest):
+            os.unlink(dest)
+        method = _copy_file(source, dest)
+        _staged_total.inc(method=method)
+        self.record(dest)
+        return method
+
+    def record(self, *paths: str) -> None:
+        """登記新建立的暫存檔，必要時淘汰舊檔"""
+        for path in paths:
+            self.touch(path)
+        if self._scanned:
+            self._evict_over_budget()
+
+    # ---------- 淘汰 ----------
+
+    def sweep(self) -> int:
+        """重新掃描暫存目錄（含其他程式寫入的檔案），淘汰閒置與超過容量的檔案
+
+        Returns:
+            刪除的檔案數
+        """
+        self.scan()
+        removed = 0
+        if self.max_idle_seconds > 0:
+            cutoff = time.time() - self.max_idle_seconds
+            for path, (_, accessed) in self._snapshot():
+                if accessed >= cutoff:
+                    break
+                if self._remove(path, "idle"):
+                    removed += 1
+        return removed + self._evict_over_budget()
+
+    def _evict_over_budget(self) -> int:
+        if self.max_bytes <= 0 or self._total_bytes <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * _LOW_WATER_RATIO)
+        protect_after = time.time() - self.min_residency_seconds
+        removed = 0
+        for path, (_, accessed) in self._snapshot():
+            if self._total_bytes <= target or accessed >= protect_after:
+                break
+            if self._remove(path, "capacity"):
+                removed += 1
+        if self._total_bytes > self.max_bytes:
+            logger.warning(
+                f"附件暫存超過容量上限但檔案皆在使用中: {self._total_bytes} > {self.max_bytes} bytes"
+            )
+        return removed
+
+    def _remove(self, path: str, reason: str) -> bool:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"刪除暫存檔失敗 {path}: {e}")
+            return False
+        self._forget(path)
+        _evictions_total.inc(reason=reason)
+        return True
+
+    # ---------- 索引 ----------
+
+    def _put(self, path: str, size: int, accessed: float) -> None:
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._entries[path] = (size, accessed)
+            self._total_bytes += size
+
+    def _forget(self, path: str) -> None:
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+
+    def _snapshot(self) -> list[tuple[str, tuple[int, float]]]:
+        """LRU 順序的索引副本（淘汰時逐一刪檔，不在鎖內做檔案 I/O）"""
+        with self._lock:
+            return list(self._entries.items())
+
+    def scan(self) -> None:
+        """掃描暫存目錄重建索引（含其他程式寫入的檔案）；會做檔案 I/O，應在執行緒中呼叫"""
+        started = time.time()
+        found: list[tuple[float, str, int]] = []
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        found.append((stat.st_mtime, entry.path, stat.st_size))
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"掃描暫存目錄失敗 {directory}: {e}")
+        with self._lock:
+            # 掃描期間新登記或命中的檔案以索引中的存取時間為準
+            recent = {path: entry for path, entry in self._entries.items() if entry[1] >= started}
+            entries = {path: (size, mtime) for mtime, path, size in found}
+            entries.update(recent)
+            self._entries = OrderedDict(sorted(entries.items(), key=lambda item: item[1][1]))
+            self._total_bytes = sum(size for size, _ in self._entries.values())
+            self._scanned = True
+
+
+def _copy_file(source: str, dest: str) -> str:
+    """複製檔案；支援的檔案系統上 copy_file_range 會建立 reflink
+
+    Returns:
+        使用的方式（copy_file_range / copy）
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(source, "rb") as src, open(dest, "wb") as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return "copy_file_range"
+        except OSError:
+            pass
+    shutil.copyfile(source, dest)
+    return "copy"
+
+
+staging_cache = StagingCache(
+    [TEMP_IMAGE_DIR, TEMP_FILE_DIR, DOWNLOADED_IMAGE_DIR],
+    max_bytes=settings.bot_staging_cache_max_mb * 1024 * 1024,
+    max_idle_seconds=settings.bot_staging_cache_max_idle_hours * 3600,
+)
+
+gauge(
+    "ctos_bot_staging_cache_bytes",
+    "附件暫存目前佔用的位元組數",
+    callback=lambda: staging_cache.total_bytes,
+)
@@ -0,0 +1,384 @@
+"""Bot webhook 事件佇列
+
+Line / Telegram webhook（以及 Telegram polling）收到事件後，以一次 INSERT 寫入
+bot_webhook_events 並立即回應平台，實際處理交給程序內的 dispatcher：
+
+- 同一對話（群組或個人）的事件依收到順序逐一處理，
+  避免連續兩則訊息同時觸發 AI、讀到彼此不完整的上下文
+- 不同對話平行處理，同時處理的事件數受 WEBHOOK_QUEUE_WORKERS 限制
+- (platform, event_key) 唯一：Line webhookEventId、Telegram update_id，重送的事件直接略過
+- 程序重啟時，未完成（pending / processing）的事件依原順序重新派送
+
+事件處理函式由各平台以 register_handler() 註冊，接收寫入時的原始 JSON（dict）。
+寫入資料庫失敗時退回程序內處理（與舊版背景工作行為相同），訊息不會因此被丟棄。
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from ...config import settings
+from ...database import get_connection
+from ..metrics import counter, gauge, histogram
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[dict], Awaitable[None]]
+
+# 錯誤訊息寫入資料庫的長度上限
+_ERROR_MAX_CHARS = 2000
+
+
+@dataclass
+class QueuedEvent:
+    """待寫入佇列的事件"""
+
+    platform: str
+    event_key: str
+    conversation_key: str
+    payload: dict
+
+
+@dataclass
+class _Job:
+    event_id: int | None  # None 表示未持久化（資料庫寫入失敗時的退回路徑）
+    platform: str
+    payload: dict
+    enqueued_at: float
+
+
+def line_conversation_key(event: dict) -> str:
+    """Line 事件的對話 key（群組 / 聊天室 / 個人）"""
+    source = event.get("source") or {}
+    source_type = source.get("type")
+    if source_type == "group" and source.get("groupId"):
+        return f"line:group:{source['groupId']}"
+    if source_type == "room" and source.get("roomId"):
+        return f"line:room:{source['roomId']}"
+    return f"line:user:{source.get('userId') or 'unknown'}"
+
+
+def telegram_conversation_key(update: dict) -> str:
+    """Telegram update 的對話 key（以 chat id 區分）"""
+    for field in ("message", "edited_message", "channel_post", "callback_query"):
+        body = update.get(field)
+        if not isinstance(body, dict):
+            continue
+        if field == "callback_query":
+            body = body.get("message") or {}
+        chat = body.get("chat") or {}
+        if chat.get("id") is not None:
+            return f"telegram:chat:{chat['id']}"
+    return f"telegram:update:{update.get('update_id')}"
+
+
+def telegram_queued_event(update: dict) -> QueuedEvent:
+    """Telegram update（原始 JSON）轉為佇列事件，以 update_id 去重"""
+    return QueuedEvent(
+        platform="telegram",
+        event_key=str(update.get("update_id")),
+        conversation_key=telegram_conversation_key(update),
+        payload=update,
+    )
+
+
+_events_total = counter(
+    "ctos_webhook_events_total",
+    "Webhook 事件寫入佇列次數（enqueued / duplicate / fallback）",
+    ("platform", "result"),
+)
+_event_seconds = histogram(
+    "ctos_webhook_event_seconds",
+    "Webhook 事件處理耗時",
+    ("platform", "outcome"),
+)
+_event_wait_seconds = histogram(
+    "ctos_webhook_event_wait_seconds",
+    "Webhook 事件從寫入到開始處理的等待時間",
+    ("platform",),
+    buckets=(0.001, 0.01, 0.1, 0.5, 1, 5, 15, 30, 60, 300),
+)
+
+
+class WebhookDispatcher:
+    """每個對話一個排水 task，跨對話以 semaphore 限制並行數"""
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max(1, max_workers)
+        self._handlers: dict[str, EventHandler] = {}
+        self._queues: dict[str, deque[_Job]] = {}
+        self._drainers: dict[str, asyncio.Task] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+        self._active = 0
+        self.processed = 0
+        self.failed = 0
+
+    def register_handler(self, platform: str, handler: EventHandler) -> None:
+        self._handlers[platform] = handler
+
+    def submit(self, conversation_key: str, job: _Job) -> None:
+        """加入對話佇列；該對話沒有排水 task 時建立一個"""
+        self._queues.setdefault(conversation_key, deque()).append(job)
+        if conversation_key not in self._drainers:
+            self._drainers[conversation_key] = asyncio.get_running_loop().create_task(
+                self._drain(conversation_key), name=f"webhook:{conversation_key}"
+            )
+
+    @property
+    def pending(self) -> int:
+        """尚未開始處理的事件數"""
+        return sum(len(q) for q in self._queues.values())
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "active": self._active,
+            "conversations": len(self._drainers),
+            "max_workers": self.max_workers,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+    async def _drain(self, conversation_key: str) -> None:
+        queue = self._queues[conversation_key]
+        try:
+            while queue:
+                job = queue[0]
+                if self._semaphore is None:
+                    self._semaphore = asyncio.Semaphore(self.max_workers)
+                async with self._semaphore:
+                    # 取得名額後才出列，pending 才能反映真正在等待的數量
+                    queue.popleft()
+                    await self._run(job)
+        finally:
+            self._drainers.pop(conversation_key, None)
+            if not queue:
+                self._queues.pop(conversation_key, None)
+
+    async def _run(self, job: _Job) -> None:
+        handler = self._handlers.get(job.platform)
+        _event_wait_seconds.observe(max(0.0, time.time() - job.enqueued_at), platform=job.platform)
+        if handler is None:
+            logger.error(f"Webhook 佇列沒有 {job.platform} 的處理函式，事件 {job.event_id} 略過")
+            await _mark_finished(job.event_id, "failed", "no handler")
+            return
+
+        self._active += 1
+        started = time.perf_counter()
+        outcome = "done"
+        error: str | None = None
+        try:
+            await _mark_processing(job.event_id)
+            await handler(job.payload)
+        except asyncio.CancelledError:
+            # 關閉時中斷：保留 processing 狀態，下次啟動補處理
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = "failed"
+            error = f"{type(e).__name__}: {e}"
+            logger.error(f"處理 {job.platform} webhook 事件 {job.event_id} 失敗: {e}", exc_info=True)
+        finally:
+            self._active -= 1
+            _event_seconds.observe(time.perf_counter() - started, platform=job.platform, outcome=outcome)
+        if outcome == "failed":
+            self.failed += 1
+        self.processed += 1
+        await _mark_finished(job.event_id, outcome, error)
+
+    async def stop(self, timeout: float) -> None:
+        """等待處理中的事件完成，逾時則取消（事件保留在資料庫等下次啟動）"""
+        tasks = list(self._drainers.values())
+        if not tasks:
+            return
+        _, still_running = await asyncio.wait(tasks, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            logger.warning(f"Webhook 佇列關閉逾時，{len(still_running)} 個對話留待下次啟動處理")
+            await asyncio.gather(*still_running, return_exceptions=True)
+        self._queues.clear()
+
+
+dispatcher = WebhookDispatcher(max_workers=settings.webhook_queue_workers)
+
+gauge(
+    "ctos_webhook_queue_depth",
+    "Webhook 佇列等待處理的事件數",
+    callback=lambda: dispatcher.pending,
+)
+gauge(
+    "ctos_webhook_queue_active",
+    "Webhook 佇列處理中的事件數",
+    callback=lambda: dispatcher.active,
+)
+
+
+def register_handler(platform: str, handler: EventHandler) -> None:
+    """註冊平台的事件處理函式（接收寫入時的原始 JSON）"""
+    dispatcher.register_handler(platform, handler)
+
+
+# ============================================================
+# 資料庫操作
+# ============================================================
+
+
+async def enqueue_events(events: list[QueuedEvent]) -> int:
+    """寫入佇列並派送新事件，回傳新寫入的事件數（重送的事件不計）
+
+    一批事件只做一次 INSERT；寫入失敗時改為程序內直接派送（不持久化、不去重）。
+    """
+    if not events:
+        return 0
+
+    now = time.time()
+    try:
+        async with get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                INSERT INTO bot_webhook_events (platform, event_key, conversation_key, payload)
+                SELECT * FROM unnest($1::varchar[], $2::varchar[], $3::varchar[], $4::jsonb[])
+                ON CONFLICT (platform, event_key) DO NOTHING
+                RETURNING id, platform, event_key
+                """,
+                [e.platform for e in events],
+                [e.event_key for e in events],
+                [e.conversation_key for e in events],
+                [e.payload for e in events],
+            )
+    except Exception as e:
+        logger.error(f"Webhook 事件寫入佇列失敗，改為直接處理: {e}")
+        for event in events:
+            _events_total.inc(platform=event.platform, result="fallback")
+            dispatcher.submit(event.conversation_key, _Job(None, event.platform, event.payload, now))
+        return len(events)
+
+    by_key = {(e.platform, e.event_key): e for e in events}
+    inserted = sorted(rows, key=lambda r: r["id"])
+    for row in inserted:
+        event = by_key[(row["platform"], row["event_key"])]
+        _events_total.inc(platform=event.platform, result="enqueued")
+        dispatcher.submit(event.conversation_key, _Job(row["id"], event.platform, event.payload, now))
+
+    duplicates = len(by_key) - len(inserted)
+    if duplicates:
+        logger.info(f"略過 {duplicates} 個重送的 webhook 事件")
+        for key in by_key.keys() - {(r["platform"], r["event_key"]) for r in inserted}:
+            _events_total.inc(platform=key[0], result="duplicate")
+    return len(inserted)
+
+
+async def _mark_processing(event_id: int | None) -> None:
+    if event_id is None:
+        return
+    try:
+        async with get_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE bot_webhook_events
+                SET status = 'processing', attempts = attempts + 1, started_at = NOW()
+                WHERE id = $1
+                """,
+                event_id,
+            )
+    except Exception as e:
+        logger.warning(f"更新 webhook 事件 {event_id} 狀態失敗: {e}")
+
+
+async def _mark_finished(event_id: int | None, status: str, error: str | None = None) -> None:
+    if event_id is None or status == "cancelled":
+        return
+    try:
+        async with get_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE bot_webhook_events
+                SET status = $2, last_error = $3, finished_at = NOW()
+                WHERE id = $1
+                """,
+                event_id,
+                status,
+                error[:_ERROR_MAX_CHARS] if error else None,
+            )
+    except Exception as e:
+        # 狀態未更新只會讓事件在下次啟動時被重新處理，不影響本次回覆
+        logger.warning(f"更新 webhook 事件 {event_id} 狀態失敗: {e}")
+
+
+async def recover_pending_events() -> int:
+    """重新派送未完成的事件（啟動時呼叫），回傳派送數
+
+    超過嘗試次數或收到時間過久的事件標記為 failed，不再處理。
+    """
+    async with get_connection() as conn:
+        await conn.execute(
+            """
+            UPDATE bot_webhook_events
+            SET status = 'failed', finished_at = NOW(),
+                last_error = CASE WHEN attempts >= $1 THEN '超過處理次數上限' ELSE '逾時未處理' END
+            WHERE status IN ('pending', 'processing')
+              AND (attempts >= $1 OR received_at < NOW() - INTERVAL '1 minute' * $2)
+            """,
+            settings.webhook_queue_max_attempts,
+            settings.webhook_queue_recover_minutes,
+        )
+        rows = await conn.fetch(
+            """
+            SELECT id, platform, conversation_key, payload,
+                   EXTRACT(EPOCH FROM received_at) AS received_at
+            FROM bot_webhook_events
+            WHERE status IN ('pending', 'processing')
+            ORDER BY id
+            """
+        )
+
+    for row in rows:
+        dispatcher.submit(
+            row["conversation_key"],
+            _Job(row["id"], row["platform"], row["payload"], float(row["received_at"])),
+        )
+    if rows:
+        logger.info(f"補處理 {len(rows)} 個未完成的 webhook 事件")
+    return len(rows)
+
+
+async def cleanup_webhook_events(days: int) -> int:
+    """刪除超過保留天數的已結束事件，回傳刪除筆數"""
+    async with get_connection() as conn:
+        result = await conn.execute(
+            """
+            DELETE FROM bot_webhook_events
+            WHERE status IN ('done', 'failed')
+              AND received_at < NOW() - INTERVAL '1 day' * $1
+            """,
+            days,
+        )
+    return int(result.split()[-1]) if result else 0
+
+
+# ============================================================
+# 生命週期
+# ============================================================
+
+
+async def start_webhook_queue() -> None:
+    """應用程式啟動時呼叫：補處理上次未完成的事件"""
+    if not settings.webhook_queue_enabled:
+        return
+    try:
+        await recover_pending_events()
+    except Exception as e:
+        logger.error(f"補處理 webhook 事件失敗: {e}")
+
+
+async def stop_webhook_queue() -> None:
+    """應用程式關閉時呼叫：等待處理中的事件"""
+    await dispatcher.stop(settings.webhook_queue_shutdown_timeout)
@@ -84,6 +84,7 @@ from .file_handler import (
     download_line_content,
     generate_nas_path,
     guess_mime_type,
+    resolve_extension,
     save_to_nas,
     read_file_from_nas,
     delete_file,
@@ -196,6 +197,7 @@ __all__ = [
     "download_line_content",
     "generate_nas_path",
     "guess_mime_type",
+    "resolve_extension",
     "save_to_nas",
     "read_file_from_nas",
     "delete_file",
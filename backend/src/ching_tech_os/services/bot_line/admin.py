@@ -4,6 +4,7 @@ import logging
 from uuid import UUID
 
 from ...database import get_connection
+from ..bot.context_cache import conversation_context_cache, conversation_key
 
 logger = logging.getLogger("linebot")
 
@@ -275,6 +276,7 @@ async def delete_group(
             "DELETE FROM bot_groups WHERE id = $1",
             group_id,
         )
+        conversation_context_cache.invalidate(conversation_key(group_id, None))
 
         return {
             "group_id": str(group_id),
@@ -1,6 +1,8 @@
 """Line Bot 檔案處理"""
 
+import asyncio
 import logging
+import os
 from datetime import datetime
 from uuid import UUID
 
@@ -10,6 +12,9 @@ from ...config import settings
 from ...database import get_connection
 from ..local_file import LocalFileService, LocalFileError, create_linebot_file_service
 from .. import document_reader
+from ..bot.context_cache import conversation_context_cache
+from ..bot.media_store import StoredMedia, get_http_client, store_url
+from ..bot.staging_cache import staging_cache
 from .constants import FILE_TYPE_EXTENSIONS, MIME_TO_EXTENSION
 
 # 暫存目錄與檔案判斷函式（從 bot.media 匯入）
@@ -36,9 +41,12 @@ async def save_file_record(
     mime_type: str | None = None,
     nas_path: str | None = None,
     duration: int | None = None,
+    content_sha256: str | None = None,
 ) -> UUID:
     """儲存檔案記錄，回傳檔案 UUID
 
+    相同內容的檔案共用同一個 nas_path（見 bot.media_store），每則訊息各自一筆記錄。
+
     Args:
         message_uuid: 訊息的 UUID
         file_type: 檔案類型（image, video, audio, file）
@@ -47,15 +55,16 @@ async def save_file_record(
         mime_type: MIME 類型
         nas_path: NAS 儲存路徑
         duration: 音訊/影片長度（毫秒）
+        content_sha256: 檔案內容 SHA-256
     """
     async with get_connection() as conn:
         row = await conn.fetchrow(
             """
             INSERT INTO bot_files (
                 message_id, file_type, file_name,
-                file_size, mime_type, nas_path, duration
+                file_size, mime_type, nas_path, duration, content_sha256
             )
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
             RETURNING id
             """,
             message_uuid,
@@ -65,6 +74,7 @@ async def save_file_record(
             mime_type,
             nas_path,
             duration,
+            content_sha256,
         )
 
         # 更新訊息的 file_id
@@ -74,63 +84,49 @@ async def save_file_record(
             message_uuid,
         )
 
-        return row["id"]
+    # 上下文快取中的該則訊息缺少檔案資訊，重新載入
+    conversation_context_cache.invalidate_message(message_uuid)
+    return row["id"]
 
 
 async def download_and_save_file(
     message_id: str,
-    message_uuid: UUID,
     file_type: str,
-    line_group_id: str | None = None,
-    line_user_id: str | None = None,
     file_name: str | None = None,
-) -> str | None:
-    """下載 Line 檔案並儲存到 NAS，回傳 NAS 路徑
+) -> StoredMedia | None:
+    """串流下載 Line 檔案並以內容雜湊儲存到 NAS
+
+    下載時直接寫入 NAS 暫存檔並計算 SHA-256，相同內容只保留一份。
 
     Args:
         message_id: Line 訊息 ID
-        message_uuid: 訊息的 UUID
         file_type: 檔案類型（image, video, audio, file）
-        line_group_id: Line 群組 ID（群組訊息時使用）
-        line_user_id: Line 用戶 ID（個人訊息時使用）
         file_name: 原始檔案名稱（file 類型時使用）
 
     Returns:
-        NAS 路徑，失敗時回傳 None
+        收錄結果（含 nas_path、sha256、大小），失敗時回傳 None
     """
+    url = f"https://api-data.line.me/v2/bot/message/{message_id}/content"
+    headers = {"Authorization": f"Bearer {settings.line_channel_access_token}"}
     try:
-        # 1. 使用 Line API 下載檔案
-        content = await download_line_content(message_id)
-        if not content:
-            logger.error(f"無法下載 Line 檔案: {message_id}")
-            return None
-
-        # 2. 決定儲存路徑
-        nas_path = generate_nas_path(
-            file_type=file_type,
-            message_id=message_id,
-            line_group_id=line_group_id,
-            line_user_id=line_user_id,
-            file_name=file_name,
-            content=content,
+        stored = await store_url(
+            url,
+            headers=headers,
+            ext=lambda head: resolve_extension(file_type, file_name, head),
         )
-
-        # 3. 儲存到 NAS
-        success = await save_to_nas(nas_path, content)
-        if not success:
-            logger.error(f"儲存檔案到 NAS 失敗: {nas_path}")
-            return None
-
-        logger.info(f"檔案已儲存到 NAS: {nas_path}")
-        return nas_path
-
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Line API 回應錯誤 {e.response.status_code}: {message_id}")
+        return None
     except Exception as e:
         logger.error(f"下載並儲存檔案失敗 {message_id}: {e}")
         return None
 
+    logger.info(f"檔案已儲存到 NAS: {message_id} -> {stored.nas_path}")
+    return stored
+
 
 async def download_line_content(message_id: str) -> bytes | None:
-    """從 Line API 下載檔案內容
+    """從 Line API 下載檔案內容（整個檔案讀入記憶體，大檔請用 download_and_save_file）
 
     Args:
         message_id: Line 訊息 ID
@@ -143,21 +139,29 @@ async def download_line_content(message_id: str) -> bytes | None:
     headers = {"Authorization": f"Bearer {access_token}"}
 
     try:
-        # 使用較長的 timeout（影片可能較大）
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code == 200:
-                return response.content
-            else:
-                logger.error(
-                    f"Line API 回應錯誤 {response.status_code}: {response.text}"
-                )
-                return None
+        response = await get_http_client().get(url, headers=headers)
+        if response.status_code == 200:
+            return response.content
+        else:
+            logger.error(
+                f"Line API 回應錯誤 {response.status_code}: {response.text}"
+            )
+            return None
     except Exception as e:
         logger.error(f"下載 Line 內容失敗: {e}")
         return None
 
 
+def resolve_extension(file_type: str, file_name: str | None = None, head: bytes | None = None) -> str:
+    """決定儲存副檔名：優先使用原始檔名，其次依檔頭判斷，最後依檔案類型"""
+    if file_name and "." in file_name:
+        return "." + file_name.rsplit(".", 1)[-1].lower()
+    if head:
+        mime_type = guess_mime_type(head)
+        return MIME_TO_EXTENSION.get(mime_type, FILE_TYPE_EXTENSIONS.get(file_type, ""))
+    return FILE_TYPE_EXTENSIONS.get(file_type, "")
+
+
 def generate_nas_path(
     file_type: str,
     message_id: str,
@@ -166,7 +170,9 @@ def generate_nas_path(
     file_name: str | None = None,
     content: bytes | None = None,
 ) -> str:
-    """生成 NAS 儲存路徑
+    """生成依訊息命名的 NAS 儲存路徑
+
+    收到的媒體改以內容雜湊儲存（bot.media_store.blob_path），此格式用於既有檔案。
 
     路徑格式：
     - 群組：linebot/groups/{line_group_id}/{file_type}s/{date}/{message_id}.{ext}
@@ -192,14 +198,7 @@ def generate_nas_path(
         prefix = "unknown"
 
     # 決定副檔名
-    if file_name and "." in file_name:
-        ext = "." + file_name.rsplit(".", 1)[-1].lower()
-    elif content:
-        # 嘗試從內容猜測 MIME 類型
-        mime_type = guess_mime_type(content)
-        ext = MIME_TO_EXTENSION.get(mime_type, FILE_TYPE_EXTENSIONS.get(file_type, ""))
-    else:
-        ext = FILE_TYPE_EXTENSIONS.get(file_type, "")
+    ext = resolve_extension(file_type, file_name, content)
 
     # 日期目錄
     date_str = datetime.now().strftime("%Y-%m-%d")
@@ -308,8 +307,20 @@ async def delete_file(
 
     nas_path = file_info.get("nas_path")
 
-    # 從 NAS 刪除檔案
+    # 內容定址的檔案可能被其他訊息共用，只有最後一筆參照刪除時才移除實體檔案
+    shared_refs = 0
     if nas_path:
+        async with get_connection() as conn:
+            shared_refs = await conn.fetchval(
+                "SELECT COUNT(*) FROM bot_files WHERE nas_path = $1 AND id <> $2",
+                nas_path,
+                file_id,
+            ) or 0
+        if shared_refs:
+            logger.info(f"檔案仍被 {shared_refs} 則訊息參照，保留 NAS 檔案: {nas_path}")
+
+    # 從 NAS 刪除檔案
+    if nas_path and not shared_refs:
         try:
             file_service = create_linebot_file_service()
             file_service.delete_file(nas_path)
@@ -337,6 +348,8 @@ async def delete_file(
                 message_id,
             )
 
+    if message_id:
+        conversation_context_cache.invalidate_message(message_id)
     return True
 
 
@@ -466,13 +479,37 @@ def get_temp_image_path(line_message_id: str) -> str:
     return f"{TEMP_IMAGE_DIR}/{line_message_id}.jpg"
 
 
+def _local_nas_path(nas_path: str) -> str | None:
+    """NAS 檔案在本機掛載路徑上存在時回傳完整路徑（可直接複製 / 解析）"""
+    try:
+        full_path = create_linebot_file_service().get_full_path(nas_path)
+    except Exception:
+        return None
+    return full_path if os.path.isfile(full_path) else None
+
+
+def _write_staged(dest: str, content: bytes) -> None:
+    with open(dest, "wb") as f:
+        f.write(content)
+    staging_cache.record(dest)
+
+
+async def _stage_copy(dest: str, source: str | None, content: bytes | None) -> None:
+    """建立原始檔暫存：有本機路徑時直接複製（支援時為 reflink），否則寫入已讀取的內容"""
+    if source is not None:
+        await asyncio.to_thread(staging_cache.stage_file, source, dest)
+    else:
+        await asyncio.to_thread(_write_staged, dest, content or b"")
+
+
 async def ensure_temp_image(
     line_message_id: str,
     nas_path: str,
 ) -> str | None:
     """確保圖片暫存檔存在
 
-    如果暫存檔不存在，從 NAS 讀取並寫入暫存。
+    暫存由 staging_cache 以容量上限與 LRU 管理；已存在時更新存取時間，
+    不存在時從 NAS 複製建立。
 
     Args:
         line_message_id: Line 訊息 ID
@@ -481,27 +518,27 @@ async def ensure_temp_image(
     Returns:
         暫存檔案路徑，失敗回傳 None
     """
-    import os
-
     # 確保暫存目錄存在
     os.makedirs(TEMP_IMAGE_DIR, exist_ok=True)
 
     temp_path = get_temp_image_path(line_message_id)
 
     # 如果暫存檔已存在，直接回傳
-    if os.path.exists(temp_path):
+    if staging_cache.lookup("image", temp_path):
         return temp_path
 
-    # 從 NAS 讀取圖片
-    content = await read_file_from_nas(nas_path)
-    if content is None:
-        logger.warning(f"無法從 NAS 讀取圖片: {nas_path}")
-        return None
+    source = await asyncio.to_thread(_local_nas_path, nas_path)
+    content = None
+    if source is None:
+        # 從 NAS 讀取圖片
+        content = await read_file_from_nas(nas_path)
+        if content is None:
+            logger.warning(f"無法從 NAS 讀取圖片: {nas_path}")
+            return None
 
     # 寫入暫存檔
     try:
-        with open(temp_path, "wb") as f:
-            f.write(content)
+        await _stage_copy(temp_path, source, content)
         logger.debug(f"已建立圖片暫存: {temp_path}")
         return temp_path
     except Exception as e:
@@ -562,8 +599,9 @@ async def ensure_temp_file(
 ) -> str | None:
     """確保檔案暫存檔存在
 
-    如果暫存檔不存在，從 NAS 讀取並寫入暫存。
-    對於 Office 文件和 PDF，會先解析成純文字再存入 .txt 暫存檔。
+    如果暫存檔不存在，從 NAS 建立暫存（由 staging_cache 以容量上限與 LRU 管理）。
+    對於 Office 文件和 PDF，會先解析成純文字再存入 .txt 暫存檔；
+    解析結果與原始檔一起保留，之後的對話回合命中時不需重新解析。
 
     Args:
         line_message_id: Line 訊息 ID
@@ -574,7 +612,6 @@ async def ensure_temp_file(
     Returns:
         暫存檔案路徑，失敗或不符合條件回傳 None
     """
-    import os
     import tempfile
 
     # 檢查是否為可讀取類型
@@ -610,30 +647,37 @@ async def ensure_temp_file(
     # 如果暫存檔已存在，直接回傳
     # 對於 PDF，回傳特殊格式包含兩個路徑
     if is_pdf:
-        if os.path.exists(pdf_temp_path) and os.path.exists(temp_path):
+        if staging_cache.lookup("file", pdf_temp_path, temp_path):
             # 回傳 "PDF:xxx.pdf|TXT:xxx.txt" 格式
             return f"PDF:{pdf_temp_path}|TXT:{temp_path}"
-    elif os.path.exists(temp_path):
+    elif staging_cache.lookup("file", temp_path):
         return temp_path
 
-    # 從 NAS 讀取檔案
-    content = await read_file_from_nas(nas_path)
-    if content is None:
-        logger.warning(f"無法從 NAS 讀取檔案: {nas_path}")
-        return None
+    # NAS 掛載在本機時直接使用原始檔（複製 / 解析），否則讀取內容
+    source = await asyncio.to_thread(_local_nas_path, nas_path)
+    content = None
+    if source is None:
+        content = await read_file_from_nas(nas_path)
+        if content is None:
+            logger.warning(f"無法從 NAS 讀取檔案: {nas_path}")
+            return None
 
     # 如果需要解析文件
     if needs_parsing:
         try:
-            # 將二進位內容寫入臨時檔案供 document_reader 解析
-            with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
-                tmp.write(content)
-                tmp_path = tmp.name
+            if source is not None:
+                parse_path = source
+            else:
+                # 將二進位內容寫入臨時檔案供 document_reader 解析
+                with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
+                    tmp.write(content)
+                    tmp_path = tmp.name
+                parse_path = tmp_path
 
             try:
                 # 解析文件（在執行緒池中執行，避免阻塞 event loop）
                 from ..workers import run_in_doc_pool
-                result = await run_in_doc_pool(document_reader.extract_text, tmp_path)
+                result = await run_in_doc_pool(document_reader.extract_text, parse_path)
                 text_content = result.text
 
                 # 如果有錯誤訊息（部分成功），附加說明
@@ -643,13 +687,13 @@ async def ensure_temp_file(
                 # 寫入純文字暫存檔
                 with open(temp_path, "w", encoding="utf-8") as f:
                     f.write(text_content)
+                staging_cache.record(temp_path)
 
                 logger.debug(f"已建立文件暫存（已解析）: {temp_path}")
 
                 # PDF 同時保存原始檔副本（供 convert_pdf_to_images 使用）
                 if is_pdf:
-                    with open(pdf_temp_path, "wb") as f:
-                        f.write(content)
+                    await _stage_copy(pdf_temp_path, source, content)
                     logger.debug(f"已建立 PDF 原始檔暫存: {pdf_temp_path}")
                     # 回傳特殊格式包含兩個路徑
                     return f"PDF:{pdf_temp_path}|TXT:{temp_path}"
@@ -664,18 +708,17 @@ async def ensure_temp_file(
                 # 寫入錯誤訊息到暫存檔，讓 AI 知道
                 with open(temp_path, "w", encoding="utf-8") as f:
                     f.write(f"[錯誤] 此文件有密碼保護，無法讀取。")
+                staging_cache.record(temp_path)
                 # PDF 也保存原始檔（即使有密碼保護，仍可能需要轉圖片）
                 if is_pdf:
-                    with open(pdf_temp_path, "wb") as f:
-                        f.write(content)
+                    await _stage_copy(pdf_temp_path, source, content)
                     return f"PDF:{pdf_temp_path}|TXT:{temp_path}"
                 return temp_path
             except document_reader.DocumentReadError as e:
                 logger.warning(f"文件解析失敗: {filename} - {e}")
                 # PDF 解析失敗（如純圖片 PDF）仍保存原始檔供轉圖片使用
                 if is_pdf:
-                    with open(pdf_temp_path, "wb") as f:
-                        f.write(content)
+                    await _stage_copy(pdf_temp_path, source, content)
                     logger.debug(f"PDF 解析失敗但已保存原始檔: {pdf_temp_path}")
                     # 純圖片 PDF 沒有文字版，只回傳 PDF 路徑
                     return f"PDF:{pdf_temp_path}|TXT:"
@@ -694,14 +737,14 @@ async def ensure_temp_file(
     else:
         # 純文字格式：直接寫入
         # 再次檢查實際檔案大小
-        if len(content) > MAX_READABLE_FILE_SIZE:
-            logger.debug(f"檔案實際大小超過限制: {filename} ({len(content)} bytes)")
+        actual_size = os.path.getsize(source) if source is not None else len(content)
+        if actual_size > MAX_READABLE_FILE_SIZE:
+            logger.debug(f"檔案實際大小超過限制: {filename} ({actual_size} bytes)")
             return None
 
         # 寫入暫存檔
         try:
-            with open(temp_path, "wb") as f:
-                f.write(content)
+            await _stage_copy(temp_path, source, content)
             logger.debug(f"已建立檔案暫存: {temp_path}")
             return temp_path
         except Exception as e:
@@ -4,6 +4,7 @@ import logging
 from uuid import UUID
 
 from ...database import get_connection
+from ..bot.context_cache import record_saved_message
 from .user_manager import (
     get_or_create_user,
     get_user_profile,
@@ -63,7 +64,7 @@ async def save_message(
                 message_type, content, reply_token, is_from_bot
             )
             VALUES ($1, $2, $3, $4, $5, $6, $7)
-            RETURNING id
+            RETURNING id, (SELECT display_name FROM bot_users WHERE id = $2) AS display_name
             """,
             message_id,
             user_uuid,
@@ -74,7 +75,18 @@ async def save_message(
             is_from_bot,
         )
         logger.info(f"儲存訊息: {message_id} (type={message_type})")
-        return row["id"]
+
+    record_saved_message(
+        row["id"],
+        bot_group_id=group_uuid,
+        platform_user_id=line_user_id,
+        message_id=message_id,
+        message_type=message_type,
+        content=content,
+        is_from_bot=is_from_bot,
+        display_name=row.get("display_name"),
+    )
+    return row["id"]
 
 
 async def mark_message_ai_processed(message_uuid: UUID) -> None:
@@ -167,7 +179,7 @@ async def save_bot_response(
                 message_type, content, is_from_bot
             )
             VALUES ($1, $2, $3, 'text', $4, true)
-            RETURNING id
+            RETURNING id, (SELECT display_name FROM bot_users WHERE id = $2) AS display_name
             """,
             message_id,
             user_uuid,
@@ -175,7 +187,18 @@ async def save_bot_response(
             content,
         )
         logger.info(f"儲存 Bot 回應: {message_id}")
-        return row["id"]
+
+    record_saved_message(
+        row["id"],
+        bot_group_id=group_uuid,
+        platform_user_id=responding_to_line_user_id,
+        message_id=message_id,
+        message_type="text",
+        content=content,
+        is_from_bot=True,
+        display_name=row.get("display_name"),
+    )
+    return row["id"]
 
 
 async def get_message_content_by_line_message_id(line_message_id: str) -> dict | None:
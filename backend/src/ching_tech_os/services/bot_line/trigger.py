@@ -5,6 +5,9 @@ from uuid import UUID
 
 from ...config import settings
 from ...database import get_connection
+from ..bot.context_cache import conversation_context_cache, conversation_key
+from ..bot.conversation_summary import conversation_summaries
+from ..claude_sessions import conversation_session_key, end_sessions
 
 logger = logging.getLogger("linebot")
 
@@ -86,9 +89,17 @@ async def reset_conversation(
             platform_user_id,
         )
         success = result == "UPDATE 1"
-        if success:
-            logger.info(f"已重置對話歷史: {platform_user_id}")
-        return success
+        conversation_context_cache.invalidate(conversation_key(None, platform_user_id))
+    # 重置前的滾動摘要不再適用
+    await conversation_summaries.clear(conversation_key(None, platform_user_id))
+    # 保留中的 Claude session 仍記得舊對話，一併結束
+    await end_sessions(
+        conversation_session_key("line", platform_user_id),
+        conversation_session_key("telegram", platform_user_id),
+    )
+    if success:
+        logger.info(f"已重置對話歷史: {platform_user_id}")
+    return success
 
 
 def is_reset_command(content: str) -> bool:
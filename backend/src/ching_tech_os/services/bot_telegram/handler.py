@@ -10,8 +10,13 @@ import time
 from telegram import Update
 
 from .adapter import TelegramBotAdapter
-from ..bot.ai import parse_ai_response
+from ...config import settings
+from ..ai_admission import Priority
+from ..bot.ai import bot_reply_seconds, parse_ai_response
+from ..bot.context_cache import record_saved_message
+from ..bot.webhook_queue import register_handler
 from ..claude_agent import call_claude
+from ..claude_sessions import conversation_session_key
 from ...database import get_connection
 from ..linebot_agents import get_linebot_agent
 from ..linebot_ai import (
@@ -138,7 +143,9 @@ async def _save_message(
             message_type, content, is_from_bot, platform_type
         )
         VALUES ($1, $2, $3, $4, $5, $6, $7)
-        RETURNING id
+        RETURNING id,
+            (SELECT display_name FROM bot_users WHERE id = $2) AS display_name,
+            (SELECT platform_user_id FROM bot_users WHERE id = $2) AS platform_user_id
         """,
         message_id,
         bot_user_id,
@@ -148,6 +155,16 @@ async def _save_message(
         is_from_bot,
         PLATFORM_TYPE,
     )
+    record_saved_message(
+        row["id"],
+        bot_group_id=bot_group_id,
+        platform_user_id=row.get("platform_user_id"),
+        message_id=message_id,
+        message_type=message_type,
+        content=content,
+        is_from_bot=is_from_bot,
+        display_name=row.get("display_name"),
+    )
     return row["id"]
 
 
@@ -644,6 +661,7 @@ async def _handle_text_with_ai(
     existing_message_uuid: str | None = None,
 ) -> None:
     """透過 AI 處理文字訊息並回覆"""
+    triggered_at = time.monotonic()
     # 發送「正在輸入」提示
     try:
         await adapter.bot.send_chat_action(chat_id=chat_id, action="typing")
@@ -674,7 +692,7 @@ async def _handle_text_with_ai(
         history, _images, _files = await get_conversation_context(
             line_group_id=bot_group_id if is_group else None,
             line_user_id=platform_user_id if not is_group else None,
-            limit=20,
+            limit=settings.ai_context_max_messages,
             exclude_message_id=message_uuid,
         )
     except Exception as e:
@@ -819,6 +837,17 @@ async def _handle_text_with_ai(
         except Exception as e:
             logger.debug(f"進度通知（tool_end）失敗: {e}")
 
+    async def _on_queued(position: int) -> None:
+        """系統忙碌需要排隊時：以進度訊息顯示排隊位置（開始執行後會被工具進度覆蓋）"""
+        nonlocal progress_message_id
+        if position <= 0:
+            return
+        try:
+            sent = await adapter.send_progress(chat_id, f"⏳ 目前詢問的人較多，排隊中（第 {position} 位）")
+            progress_message_id = sent.message_id
+        except Exception as e:
+            logger.debug(f"排隊通知失敗: {e}")
+
     # 呼叫 AI（含對話歷史和進度通知）
     context_type = "telegram-group" if is_group else "telegram-personal"
     start_time = time.time()
@@ -833,6 +862,12 @@ async def _handle_text_with_ai(
         on_tool_end=_on_tool_end,
         required_mcp_servers=required_mcp_servers,
         ctos_user_id=ctos_user_id,
+        priority=Priority.GROUP if is_group else Priority.INTERACTIVE,
+        user_key=f"telegram:{platform_user_id}",
+        on_queued=_on_queued,
+        session_key=conversation_session_key(
+            "telegram", platform_user_id, chat_id if is_group else None,
+        ),
     )
     duration_ms = int((time.time() - start_time) * 1000)
 
@@ -916,6 +951,7 @@ async def _handle_text_with_ai(
     if not reply_text and not files:
         reply_text = "（AI 沒有產生回覆內容）"
         await adapter.send_text(chat_id, reply_text)
+    bot_reply_seconds.observe(time.monotonic() - triggered_at, platform="telegram", delivery="reply")
 
     # 儲存 Bot 回覆訊息
     if bot_user_id:
@@ -958,3 +994,25 @@ async def _handle_text_with_ai(
                             logger.error(f"儲存圖片記錄失敗: {e}", exc_info=True)
         except Exception as e:
             logger.error(f"儲存 Bot 回覆失敗: {e}", exc_info=True)
+
+
+# ============================================================
+# Webhook 佇列
+# ============================================================
+
+_queue_adapter: TelegramBotAdapter | None = None
+
+
+async def handle_queued_update(payload: dict) -> None:
+    """處理佇列中的 Telegram update（webhook 與 polling 共用，payload 為原始 JSON）"""
+    global _queue_adapter
+    if _queue_adapter is None:
+        if not settings.telegram_bot_token:
+            logger.warning("Telegram Bot Token 未設定，略過佇列中的 update")
+            return
+        _queue_adapter = TelegramBotAdapter(token=settings.telegram_bot_token)
+    update = Update.de_json(payload, _queue_adapter.bot)
+    await handle_update(update, _queue_adapter)
+
+
+register_handler(PLATFORM_TYPE, handle_queued_update)
@@ -1,45 +1,38 @@
 """Telegram Bot 媒體處理
 
 下載 Telegram 圖片和檔案，儲存到 NAS 並記錄到 bot_files。
+與 Line 共用媒體收錄（bot.media_store）：串流下載、內容雜湊儲存，相同檔案只存一份。
 """
 
 import logging
-from datetime import datetime
 
+import httpx
 from telegram import Bot, Message
 
-from ..bot_line import save_file_record, save_to_nas
+from ..bot.media_store import StoredMedia, store_bytes, store_url
+from ..bot_line import resolve_extension, save_file_record
 
 logger = logging.getLogger("bot_telegram.media")
 
 PLATFORM_TYPE = "telegram"
 
 
-def _generate_telegram_nas_path(
-    file_type: str,
-    message_id: int,
-    chat_id: str,
-    is_group: bool,
-    file_name: str | None = None,
-    ext: str = "",
-) -> str:
-    """生成 Telegram 檔案的 NAS 路徑
-
-    路徑格式：
-    - 群組：telegram/groups/{chat_id}/{type}s/{date}/{message_id}.{ext}
-    - 個人：telegram/users/{chat_id}/{type}s/{date}/{message_id}.{ext}
-    """
-    prefix = f"groups/{chat_id}" if is_group else f"users/{chat_id}"
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    subdir = f"{file_type}s"
+async def _store_telegram_file(bot: Bot, file_id: str, ext: str) -> StoredMedia:
+    """下載 Telegram 檔案並以內容雜湊儲存
 
-    if file_name and file_type == "file":
-        safe_name = file_name.replace("/", "_").replace("\\", "_")
-        filename = f"{message_id}_{safe_name}"
-    else:
-        filename = f"{message_id}{ext}"
-
-    return f"telegram/{prefix}/{subdir}/{date_str}/{filename}"
+    file_path 為下載 URL 時以共用 client 串流下載；
+    自架 Bot API（local mode）回傳本機路徑時改由 python-telegram-bot 讀取。
+    """
+    file = await bot.get_file(file_id)
+    file_path = str(getattr(file, "file_path", "") or "")
+    if file_path.startswith(("https://", "http://")):
+        try:
+            return await store_url(file_path, ext=ext)
+        except httpx.HTTPError as e:
+            # 下載 URL 含 bot token，不記錄原始錯誤訊息
+            raise RuntimeError(f"Telegram 檔案下載失敗（{type(e).__name__}）") from None
+    content = await file.download_as_bytearray()
+    return await store_bytes(bytes(content), ext=ext)
 
 
 async def download_telegram_photo(
@@ -68,33 +61,18 @@ async def download_telegram_photo(
     photo = message.photo[-1]
 
     try:
-        # 下載圖片
-        file = await bot.get_file(photo.file_id)
-        content = await file.download_as_bytearray()
-        content = bytes(content)
-
-        # 生成 NAS 路徑
-        nas_path = _generate_telegram_nas_path(
-            file_type="image",
-            message_id=message.message_id,
-            chat_id=chat_id,
-            is_group=is_group,
-            ext=".jpg",
-        )
-
-        # 儲存到 NAS
-        success = await save_to_nas(nas_path, content)
-        if not success:
-            logger.error(f"儲存圖片到 NAS 失敗: {nas_path}")
-            return None
+        # 下載圖片（Telegram 圖片一律為 JPEG）
+        stored = await _store_telegram_file(bot, photo.file_id, ".jpg")
+        nas_path = stored.nas_path
 
         # 記錄到 bot_files
         await save_file_record(
             message_uuid=message_uuid,
             file_type="image",
-            file_size=photo.file_size,
+            file_size=stored.size,
             mime_type="image/jpeg",
             nas_path=nas_path,
+            content_sha256=stored.sha256,
         )
 
         logger.info(f"已儲存 Telegram 圖片: {nas_path}")
@@ -129,40 +107,21 @@ async def download_telegram_document(
         return None
 
     try:
-        # 下載檔案
-        file = await bot.get_file(doc.file_id)
-        content = await file.download_as_bytearray()
-        content = bytes(content)
-
         file_name = doc.file_name or "unknown"
-        ext = ""
-        if "." in file_name:
-            ext = "." + file_name.rsplit(".", 1)[-1].lower()
-
-        # 生成 NAS 路徑
-        nas_path = _generate_telegram_nas_path(
-            file_type="file",
-            message_id=message.message_id,
-            chat_id=chat_id,
-            is_group=is_group,
-            file_name=file_name,
-            ext=ext,
-        )
 
-        # 儲存到 NAS
-        success = await save_to_nas(nas_path, content)
-        if not success:
-            logger.error(f"儲存檔案到 NAS 失敗: {nas_path}")
-            return None
+        # 下載檔案
+        stored = await _store_telegram_file(bot, doc.file_id, resolve_extension("file", file_name))
+        nas_path = stored.nas_path
 
-        # 記錄到 bot_files
+        # 記錄到 bot_files（原始檔名保留在記錄中）
         await save_file_record(
             message_uuid=message_uuid,
             file_type="file",
             file_name=file_name,
-            file_size=doc.file_size,
+            file_size=stored.size,
             mime_type=doc.mime_type,
             nas_path=nas_path,
+            content_sha256=stored.sha256,
         )
 
         logger.info(f"已儲存 Telegram 檔案: {file_name} -> {nas_path}")
@@ -12,6 +12,7 @@ from telegram import Update
 from telegram.request import HTTPXRequest
 
 from ...config import settings
+from ..bot.webhook_queue import enqueue_events, telegram_queued_event
 from .adapter import TelegramBotAdapter
 from .handler import handle_update
 
@@ -72,14 +73,22 @@ async def run_telegram_polling() -> None:
                 # 成功取得更新，重置重試間隔
                 retry_delay = 1
 
-                for update in updates:
-                    # 更新 offset（下次從這之後開始）
-                    offset = update.update_id + 1
-
-                    # 背景處理每則訊息（與 webhook 行為一致）
-                    asyncio.create_task(
-                        _safe_handle_update(update, adapter)
-                    )
+                if not updates:
+                    continue
+                # 更新 offset（下次從這之後開始）
+                offset = updates[-1].update_id + 1
+
+                if settings.webhook_queue_enabled:
+                    # 寫入持久化佇列，與 webhook 共用同一條處理管線（依對話依序、update_id 去重）
+                    await enqueue_events([
+                        telegram_queued_event(update.to_dict()) for update in updates
+                    ])
+                else:
+                    # 背景處理每則訊息
+                    for update in updates:
+                        asyncio.create_task(
+                            _safe_handle_update(update, adapter)
+                        )
 
             except asyncio.CancelledError:
                 raise  # 讓外層捕獲以優雅停止
@@ -8,7 +8,6 @@ import asyncio
 import json
 import logging
 import os
-import shutil
 import tempfile
 import time
 from collections.abc import Awaitable, Callable
@@ -18,9 +17,35 @@ from typing import Any, Optional
 from claude_code_acp import ClaudeClient
 
 from ..config import settings
+from .ai_admission import AIQueueTimeoutError, Priority, QueueNotifyCallback, ai_call_slot
+from .claude_hosts import WorkdirPool, agent_hosts
+from .claude_sessions import PooledSession, session_fingerprint, session_pool
+from .context_window import estimate_tokens, fit_history, record_context_usage, render_prompt
+from .metrics import counter, histogram
 
 logger = logging.getLogger(__name__)
 
+_claude_call_seconds = histogram(
+    "ctos_claude_call_seconds",
+    "call_claude 耗時",
+    ("model", "outcome"),
+)
+_claude_tokens = counter(
+    "ctos_claude_tokens_total",
+    "call_claude 使用的 token 數",
+    ("model", "direction"),
+)
+_tool_seconds = histogram(
+    "ctos_claude_tool_seconds",
+    "AI 工具執行耗時",
+    ("tool",),
+)
+_tool_cache_total = counter(
+    "ctos_claude_tool_cache_total",
+    "唯讀 MCP 工具結果快取查詢結果",
+    ("tool", "result"),
+)
+
 # Tool 進度通知 callback 型態（保持向後相容）
 ToolNotifyCallback = Callable[[str, dict], Awaitable[None]]
 
@@ -34,34 +59,27 @@ if not _WORKING_DIR_BASE:
 os.makedirs(_WORKING_DIR_BASE, exist_ok=True)
 
 
-def _create_session_workdir() -> str:
-    """為每次 AI 呼叫建立隔離的工作目錄，防止跨 session 污染"""
-    session_dir = tempfile.mkdtemp(prefix="session-", dir=_WORKING_DIR_BASE)
-
-    # 設定 nanobanana 輸出目錄（symlink 到 NAS）
-    nas_ai_images_dir = f"{settings.linebot_local_path}/ai-images"
-    if os.path.exists(settings.linebot_local_path):
-        os.makedirs(nas_ai_images_dir, exist_ok=True)
-        nanobanana_link = os.path.join(session_dir, "nanobanana-output")
-        os.symlink(nas_ai_images_dir, nanobanana_link)
+# session 工作目錄池（歸還時清空後沿用，避免每次 mkdtemp / 複製 .mcp.json / rmtree）
+workdir_pool = WorkdirPool(
+    _WORKING_DIR_BASE,
+    settings.claude_workdir_pool_size,
+    settings.claude_workdir_recycle_uses,
+)
 
-    # 複製 .mcp.json（唯讀副本，不可被 AI 修改原檔）
-    project_mcp = os.path.join(settings.project_root, ".mcp.json")
-    if os.path.exists(project_mcp):
-        shutil.copy2(project_mcp, os.path.join(session_dir, ".mcp.json"))
 
-    return session_dir
+def _create_session_workdir() -> str:
+    """為每次 AI 呼叫取得隔離的工作目錄（清空過的回收目錄或新目錄），防止跨 session 污染"""
+    return workdir_pool.acquire()
 
 
 def _cleanup_session_workdir(session_dir: str) -> None:
-    """清理 session 工作目錄"""
+    """歸還 session 工作目錄（清空後回收，超過沿用次數時刪除）"""
     try:
-        shutil.rmtree(session_dir, ignore_errors=True)
+        workdir_pool.release(session_dir)
     except OSError as e:
         logger.warning(f"清理工作目錄失敗 {session_dir}: {e}")
 
 
-
 # 模型對應表
 MODEL_MAP = {
     "claude-opus": "opus",
@@ -93,6 +111,9 @@ class ClaudeResponse:
     input_tokens: Optional[int] = None
     output_tokens: Optional[int] = None
     tool_timings: list[dict] = field(default_factory=list)
+    session_reused: bool = False  # 是否沿用保留中的對話 session
+    tokens_saved: int = 0  # 沿用 session 免重送的歷史 token 數（估計值）
+    context_stats: dict | None = None  # 本次送出的上下文 token 分配（估計值）
 
 
 # ============================================================
@@ -176,31 +197,20 @@ async def get_prompt_content(prompt_name: str) -> str | None:
 
 
 def compose_prompt_with_history(
-    history: list[dict], new_message: str, max_messages: int = 40
+    history: list[dict],
+    new_message: str,
+    max_messages: int | None = None,
+    budget_tokens: int | None = None,
 ) -> str:
-    """組合對話歷史和新訊息成完整 prompt（保持不變）"""
-    recent_history = history[-max_messages:] if len(history) > max_messages else history
-    parts = []
-
-    if recent_history:
-        parts.append("對話歷史：")
-        parts.append("")
-        for msg in recent_history:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            sender = msg.get("sender")
-            if msg.get("is_summary"):
-                continue
-            if sender:
-                # 清理 sender 名稱，防止 prompt injection
-                safe_sender = sender.replace("\n", " ").replace("\r", " ")[:50]
-                parts.append(f"{role}[{safe_sender}]: {content}")
-            else:
-                parts.append(f"{role}: {content}")
-        parts.append("")
+    """組合對話歷史和新訊息成完整 prompt
 
-    parts.append(new_message)
-    return "\n".join(parts)
+    由新到舊放入歷史直到用完 token 預算（budget_tokens，None 使用 AI_CONTEXT_BUDGET_TOKENS），
+    最多 max_messages 則（None 使用 AI_CONTEXT_MAX_MESSAGES）；摘要訊息（is_summary）放在最前面。
+    """
+    if max_messages is None:
+        max_messages = settings.ai_context_max_messages
+    window = fit_history(history, budget_tokens=budget_tokens, max_messages=max_messages)
+    return render_prompt(window, new_message)
 
 
 def _clean_overgenerated_response(text: str) -> str:
@@ -217,6 +227,15 @@ def _clean_overgenerated_response(text: str) -> str:
     return "\n".join(cleaned_lines).rstrip()
 
 
+def tool_cache_stats(tool_timings: list[dict]) -> dict | None:
+    """由 tool_timings 統計唯讀工具快取命中率（沒有可快取的工具呼叫時回傳 None）"""
+    lookups = [t for t in tool_timings if t.get("cache")]
+    if not lookups:
+        return None
+    hits = sum(1 for t in lookups if t["cache"] == "hit")
+    return {"hits": hits, "lookups": len(lookups), "hit_rate": round(hits / len(lookups), 3)}
+
+
 # ============================================================
 # 核心 AI 呼叫
 # ============================================================
@@ -234,9 +253,15 @@ async def call_claude(
     required_mcp_servers: set[str] | None = None,
     ctos_user_id: int | None = None,
     extra_mcp_env: dict[str, str] | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+    user_key: str | None = None,
+    on_queued: QueueNotifyCallback | None = None,
+    session_key: str | None = None,
 ) -> ClaudeResponse:
     """非同步呼叫 Claude（透過 ClaudeClient in-process）
 
+    執行前先向 ai_admission 取得名額；系統忙碌時排隊，timeout 只計算實際執行時間。
+
     Args:
         prompt: 使用者訊息
         model: 模型名稱（opus, sonnet, haiku）
@@ -250,30 +275,102 @@ async def call_claude(
         required_mcp_servers: 需要載入的 MCP server 名稱集合（可選，None=全部）
         ctos_user_id: CTOS 使用者 ID（自動注入至 ching-tech-os MCP 工具參數）
         extra_mcp_env: 額外注入到 ching-tech-os MCP server 的環境變數（可選）
+        priority: 排隊優先等級（個人對話 > 群組 > 背景任務）
+        user_key: 公平排隊用的使用者識別（未提供時使用 ctos_user_id）
+        on_queued: 需要排隊時的通知回調，參數為排隊位置（排隊後取得名額時為 0）
+        session_key: 對話識別（可選）。提供時保留 session，下一回合只送新訊息
 
     Returns:
         ClaudeResponse: 包含成功狀態、回應訊息、工具調用記錄和 token 統計
     """
+    if user_key is None and ctos_user_id is not None:
+        user_key = f"user:{ctos_user_id}"
+    try:
+        async with ai_call_slot(priority, user_key, on_queued):
+            return await _call_claude_admitted(
+                prompt=prompt,
+                model=model,
+                history=history,
+                system_prompt=system_prompt,
+                timeout=timeout,
+                tools=tools,
+                tool_call_limits=tool_call_limits,
+                on_tool_start=on_tool_start,
+                on_tool_end=on_tool_end,
+                required_mcp_servers=required_mcp_servers,
+                ctos_user_id=ctos_user_id,
+                extra_mcp_env=extra_mcp_env,
+                session_key=session_key,
+            )
+    except AIQueueTimeoutError as e:
+        logger.warning(f"call_claude 排隊逾時: user={user_key}, priority={priority.name}")
+        return ClaudeResponse(success=False, message="", error=e.message)
+
+
+async def _call_claude_admitted(
+    prompt: str,
+    model: str,
+    history: list[dict] | None,
+    system_prompt: str | None,
+    timeout: int,
+    tools: list[str] | None,
+    tool_call_limits: dict[str, int] | None,
+    on_tool_start: ToolNotifyCallback | None,
+    on_tool_end: ToolNotifyCallback | None,
+    required_mcp_servers: set[str] | None,
+    ctos_user_id: int | None,
+    extra_mcp_env: dict[str, str] | None,
+    session_key: str | None = None,
+) -> ClaudeResponse:
+    """已取得執行名額的 Claude 呼叫（參數同 call_claude）"""
     cli_model = MODEL_MAP.get(model, model)
 
-    # 組合完整 prompt（包含歷史）
-    if history:
-        full_prompt = compose_prompt_with_history(history, prompt)
-    else:
-        full_prompt = prompt
+    # 組合完整 prompt（包含歷史，依 token 預算由新到舊選取）
+    window = fit_history(history, max_messages=settings.ai_context_max_messages)
+    full_prompt = render_prompt(window, prompt)
+
+    # 沿用同一對話保留中的 session：只送 session 尚未看過的歷史與新訊息
+    fingerprint = ""
+    pooled: PooledSession | None = None
+    tokens_saved = 0
+    if session_key and session_pool.enabled:
+        fingerprint = session_fingerprint(
+            model=cli_model,
+            system_prompt=system_prompt,
+            tools=tools or [],
+            required_mcp_servers=required_mcp_servers,
+            ctos_user_id=ctos_user_id,
+            extra_mcp_env=extra_mcp_env,
+        )
+        pooled = await session_pool.checkout(session_key, fingerprint)
+    if pooled is not None:
+        delta = pooled.unseen(history)
+        replay_prompt = full_prompt
+        window = fit_history(delta, max_messages=settings.ai_context_max_messages)
+        full_prompt = render_prompt(window, prompt)
+        tokens_saved = max(0, estimate_tokens(replay_prompt) - estimate_tokens(full_prompt))
+        logger.info(
+            f"沿用 Claude session: key={session_key}, turn={pooled.turns + 1}, "
+            f"新歷史 {len(delta)} 則, 省下約 {tokens_saved} tokens"
+        )
+
+    context_stats = record_context_usage(window, estimate_tokens(full_prompt))
 
     # 建立隔離的工作目錄（per-session，防止跨 session 攻擊）
-    session_dir = _create_session_workdir()
+    session_dir = pooled.session_dir if pooled else _create_session_workdir()
 
     # 決定是否需要 MCP servers
     # 如果 tools 為空，不載入 MCP（避免不必要的啟動開銷）
-    mcp_servers = _build_mcp_servers(session_dir, required_mcp_servers) if tools else []
+    mcp_servers = (
+        _build_mcp_servers(session_dir, required_mcp_servers) if tools and pooled is None else []
+    )
 
     # 注入環境變數到 ching-tech-os MCP server
     # （bypassPermissions 模式下 on_tool_input_transform 不會被呼叫，
     #  因此改用環境變數在 MCP server 啟動時傳遞使用者身份和 Agent 限制）
-    if mcp_servers and (ctos_user_id is not None or extra_mcp_env):
+    if mcp_servers:
         from acp.schema import EnvVariable
+        from .mcp.tool_cache import TOOL_CACHE_LOG_ENV, TOOL_CACHE_LOG_FILE
         for server in mcp_servers:
             if server.name == "ching-tech-os":
                 if ctos_user_id is not None:
@@ -281,8 +378,19 @@ async def call_claude(
                 if extra_mcp_env:
                     for env_key, env_val in extra_mcp_env.items():
                         server.env.append(EnvVariable(name=env_key, value=env_val))
+                # 啟用唯讀工具結果快取，命中事件寫入 session 工作目錄
+                server.env.append(EnvVariable(
+                    name=TOOL_CACHE_LOG_ENV,
+                    value=os.path.join(session_dir, TOOL_CACHE_LOG_FILE),
+                ))
                 break
 
+    # 唯讀工具快取的命中事件（沿用 session 時 MCP server 仍在，檔案沿用）
+    cache_events = None
+    if tools and any(t.startswith("mcp__ching-tech-os__") for t in tools):
+        from .mcp.tool_cache import TOOL_CACHE_LOG_FILE, ToolCacheEventLog
+        cache_events = ToolCacheEventLog(os.path.join(session_dir, TOOL_CACHE_LOG_FILE))
+
     # 收集回應資料
     tool_calls: list[ToolCall] = []
     tool_timings: list[dict] = []
@@ -313,12 +421,17 @@ async def call_claude(
             return tool_name
         return f"{tool_name}({'; '.join(parts)})"
 
-    # 建立 ClaudeClient（in-process，不走 subprocess）
-    client = ClaudeClient(
-        cwd=session_dir,
-        mcp_servers=mcp_servers,
-        system_prompt=system_prompt,
-    )
+    # 取得 ClaudeClient（in-process，不走 subprocess）：沿用對話 session，或從預熱池取得 host；
+    # 兩者都重新掛上本回合的 callback
+    if pooled is not None:
+        client = pooled.client
+    else:
+        client = await agent_hosts.acquire(
+            lambda: ClaudeClient(cwd=session_dir, mcp_servers=mcp_servers, system_prompt=system_prompt),
+            cwd=session_dir,
+            mcp_servers=mcp_servers,
+            system_prompt=system_prompt,
+        )
 
     @client.on_tool_start
     async def handle_tool_start(tool_id: str, title: str, raw_input: dict):
@@ -347,7 +460,13 @@ async def call_claude(
             input=tool_input,
             output=output_str,
         ))
-        tool_timings.append({"name": tool_name, "duration_ms": duration_ms})
+        timing = {"name": tool_name, "duration_ms": duration_ms}
+        cache_result = cache_events.pop(tool_name) if cache_events and tool_name else None
+        if cache_result:
+            timing["cache"] = cache_result
+            _tool_cache_total.inc(tool=tool_name, result=cache_result)
+        tool_timings.append(timing)
+        _tool_seconds.observe(duration_ms / 1000, tool=tool_name or "unknown")
 
         if on_tool_end:
             try:
@@ -438,6 +557,9 @@ async def call_claude(
     # 避免 start_session() 掛住時沒有超時機制（例如 MCP 工具巢狀呼叫場景）
     async def _run_session() -> str:
         """啟動 session、設定模型/權限、送出 prompt"""
+        if pooled is not None:
+            return await client.query(full_prompt)
+
         await client.start_session()
 
         if cli_model and cli_model != "sonnet":
@@ -451,19 +573,25 @@ async def call_claude(
 
         return await client.query(full_prompt)
 
+    outcome = "error"
     try:
         text_response = await asyncio.wait_for(
             _run_session(),
             timeout=timeout,
         )
+        outcome = "success"
 
         # 清理 text
         text_response = _clean_overgenerated_response(text_response)
 
-        if tool_timings:
-            print(f"[claude_agent] Tool 執行時間:")
-            for t in tool_timings:
-                print(f"  - {t['name']}: {t['duration_ms']}ms")
+        if tool_timings and logger.isEnabledFor(logging.DEBUG):
+            timings = ", ".join(
+                f"{t['name']}={t['duration_ms']}ms" + (f"(cache {t['cache']})" if t.get("cache") else "")
+                for t in tool_timings
+            )
+            cache_stats = tool_cache_stats(tool_timings)
+            cache_note = f"；工具快取命中 {cache_stats['hits']}/{cache_stats['lookups']}" if cache_stats else ""
+            logger.debug(f"Tool 執行時間: {timings}{cache_note}")
 
         return ClaudeResponse(
             success=True,
@@ -472,9 +600,13 @@ async def call_claude(
             input_tokens=_usage_data.get("input_tokens"),
             output_tokens=_usage_data.get("output_tokens"),
             tool_timings=tool_timings,
+            session_reused=pooled is not None,
+            tokens_saved=tokens_saved,
+            context_stats=context_stats,
         )
 
     except asyncio.TimeoutError:
+        outcome = "timeout"
         logger.warning(f"call_claude TIMEOUT after {timeout}s, collected {len(tool_calls)} tool calls")
 
         text_buffer = _clean_overgenerated_response(
@@ -503,6 +635,7 @@ async def call_claude(
             input_tokens=_usage_data.get("input_tokens"),
             output_tokens=_usage_data.get("output_tokens"),
             tool_timings=tool_timings,
+            context_stats=context_stats,
         )
 
     except (ConnectionError, OSError, RuntimeError, asyncio.CancelledError) as e:
@@ -516,20 +649,47 @@ async def call_claude(
             tool_timings=tool_timings,
         )
     finally:
-        # 清理底層 ClaudeClient 的 session 和行程
-        try:
-            await client.close()
-        except Exception as e:
-            logger.debug(f"清理 ClaudeClient 時忽略錯誤: {e}")
-        # 清理 per-session 工作目錄
-        _cleanup_session_workdir(session_dir)
+        metric_model = cli_model or "default"
+        _claude_call_seconds.observe(time.time() - start_time, model=metric_model, outcome=outcome)
+        for direction in ("input", "output"):
+            tokens = _usage_data.get(f"{direction}_tokens")
+            if tokens:
+                _claude_tokens.inc(tokens, model=metric_model, direction=direction)
+        if session_key and session_pool.enabled:
+            # 成功的回合保留 session 供下一回合沿用；失敗時 session 狀態不確定，直接關閉
+            session = pooled or PooledSession(
+                key=session_key,
+                fingerprint=fingerprint,
+                client=client,
+                session_dir=session_dir,
+                close=lambda: _close_client(client, session_dir),
+            )
+            if outcome == "success":
+                reply = _clean_overgenerated_response(getattr(client, "_text_buffer", ""))
+                session.remember(history, prompt, reply)
+                await session_pool.checkin(session, tokens_saved)
+            else:
+                # 失敗的 session 狀態不確定，client 不放回預熱池
+                session.close = lambda: _close_client(client, session_dir, reusable=False)
+                await session_pool.discard(session)
+        else:
+            await _close_client(client, session_dir, reusable=outcome == "success")
+
+
+async def _close_client(client: Any, session_dir: str, reusable: bool = True) -> None:
+    """結束 session：client 歸還預熱池（無法沿用時關閉），工作目錄清空後回收"""
+    # 關閉底層 session 與 CLI 行程
+    await agent_hosts.release(client, reusable=reusable)
+    # 歸還 per-session 工作目錄
+    _cleanup_session_workdir(session_dir)
 
 
 async def call_claude_for_summary(
     messages_to_compress: list[dict],
     timeout: int = DEFAULT_TIMEOUT,
+    priority: Priority = Priority.INTERACTIVE,
 ) -> ClaudeResponse:
-    """呼叫 Claude 壓縮對話歷史（保持不變）"""
+    """呼叫 Claude 壓縮對話歷史（Bot 滾動摘要以背景優先等級呼叫）"""
     summarizer_prompt = await get_prompt_content("summarizer")
     if not summarizer_prompt:
         return ClaudeResponse(
@@ -559,4 +719,5 @@ async def call_claude_for_summary(
         model="haiku",
         system_prompt=summarizer_prompt,
         timeout=timeout,
+        priority=priority,
     )
@@ -0,0 +1,343 @@
+"""Claude agent host 預熱池與 session 工作目錄回收
+
+call_claude 原本每次都從頭準備執行環境：
+
+- 建立新的 ClaudeClient；ClaudeAcpAgent.new_session 為了取得 server info（指令、模型清單）
+  會先啟動一個暫時的 Claude CLI（連同所有 MCP server）再關閉，而 ClaudeClient 並不使用這些資訊
+- mkdtemp 建立工作目錄、建立 nanobanana-output symlink、複製 .mcp.json，結束時 rmtree
+
+改為保留並回收：
+
+- AgentHostPool：session 結束後只關閉該 session（close_session 結束其 CLI 行程），client 本身
+  放回池中給下一個 session 使用；server info 只取一次並由所有 host 共用。
+  同一個 host 同時只承載一個 session（ACP agent 的事件 callback 是 agent 層級），
+  承載 CLAUDE_AGENT_RECYCLE_SESSIONS 個 session 後回收重建
+- WorkdirPool：工作目錄歸還時清空（保留 .mcp.json 與 nanobanana-output），下次直接沿用；
+  沿用 CLAUDE_WORKDIR_RECYCLE_USES 次後刪除重建
+- 歸還時檢查健康狀態：仍有殘留 session、關閉失敗、工作目錄無法清空時直接丟棄不沿用
+
+對話 session 保留（claude_sessions）持有的 host 與工作目錄在對話 session 關閉時才歸還。
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+import weakref
+from collections.abc import Callable
+from typing import Any
+
+from ..config import settings
+from .metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+_hosts_total = counter(
+    "ctos_claude_agent_hosts_total",
+    "agent host 取用與歸還結果（reused / created / recycled / unhealthy / overflow）",
+    ("result",),
+)
+_workdirs_total = counter(
+    "ctos_claude_workdirs_total",
+    "session 工作目錄取用與歸還結果（reused / created / recycled / dropped / orphaned）",
+    ("result",),
+)
+
+# 工作目錄中歸還時保留的骨架
+_MCP_CONFIG = ".mcp.json"
+_NANOBANANA_LINK = "nanobanana-output"
+_SKELETON = frozenset({_MCP_CONFIG, _NANOBANANA_LINK})
+
+
+def _remove_entry(path: str) -> None:
+    """刪除檔案、symlink 或目錄（不跟隨 symlink）"""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+class WorkdirPool:
+    """session 工作目錄池"""
+
+    def __init__(self, base: str, max_idle: int, recycle_after: int) -> None:
+        self.base = base
+        self.max_idle = max_idle
+        self.recycle_after = recycle_after
+        self._idle: list[str] = []
+        self._leased: set[str] = set()
+        self._uses: dict[str, int] = {}
+
+    def acquire(self) -> str:
+        """取得乾淨的工作目錄（優先沿用歸還的目錄）"""
+        while self._idle:
+            path = self._idle.pop()
+            try:
+                self._prepare(path)
+            except OSError as e:
+                logger.warning(f"工作目錄無法沿用，改建新目錄 {path}: {e}")
+                self._drop(path)
+                continue
+            self._lease(path)
+            _workdirs_total.inc(result="reused")
+            return path
+
+        path = tempfile.mkdtemp(prefix="session-", dir=self.base)
+        self._prepare(path)
+        self._uses[path] = 0
+        self._lease(path)
+        _workdirs_total.inc(result="created")
+        return path
+
+    def release(self, path: str) -> None:
+        """歸還工作目錄：清空後放回池中，超過沿用次數或池已滿時刪除"""
+        self._leased.discard(path)
+        uses = self._uses.get(path)
+        if uses is None or uses >= self.recycle_after or len(self._idle) >= self.max_idle:
+            self._drop(path)
+            _workdirs_total.inc(result="recycled" if uses is not None and uses >= self.recycle_after else "dropped")
+            return
+        try:
+            self._reset(path)
+        except OSError as e:
+            logger.warning(f"清空工作目錄失敗，改為刪除 {path}: {e}")
+            self._drop(path)
+            _workdirs_total.inc(result="dropped")
+            return
+        self._idle.append(path)
+
+    def sweep_orphans(self, max_age_seconds: float) -> int:
+        """刪除 base 下不在池中、超過 max_age_seconds 未更動的 session 目錄（異常中斷遺留）"""
+        tracked = self._leased | set(self._idle)
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        try:
+            entries = list(os.scandir(self.base))
+        except OSError:
+            return 0
+        for entry in entries:
+            if not entry.name.startswith("session-") or entry.path in tracked:
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            _workdirs_total.inc(removed, result="orphaned")
+        return removed
+
+    def clear(self) -> None:
+        """刪除所有閒置目錄（程式結束時呼叫）"""
+        while self._idle:
+            self._drop(self._idle.pop())
+
+    def stats(self) -> dict:
+        return {"idle": len(self._idle), "leased": len(self._leased), "max_idle": self.max_idle}
+
+    def _lease(self, path: str) -> None:
+        self._leased.add(path)
+        self._uses[path] = self._uses.get(path, 0) + 1
+
+    def _drop(self, path: str) -> None:
+        self._uses.pop(path, None)
+        try:
+            shutil.rmtree(path, ignore_errors=True)
+        except OSError as e:
+            logger.warning(f"清理工作目錄失敗 {path}: {e}")
+
+    @staticmethod
+    def _reset(path: str) -> None:
+        """移除上一個 session 留下的所有檔案（骨架由 _prepare 在下次取用時校正）"""
+        for entry in os.scandir(path):
+            if entry.name in _SKELETON:
+                continue
+            _remove_entry(entry.path)
+
+    @staticmethod
+    def _prepare(path: str) -> None:
+        """確保工作目錄骨架：nanobanana-output symlink 到 NAS、.mcp.json 為專案設定的唯讀副本"""
+        if not os.path.isdir(path):
+            raise FileNotFoundError(path)
+
+        # 設定 nanobanana 輸出目錄（symlink 到 NAS）
+        link = os.path.join(path, _NANOBANANA_LINK)
+        nas_ai_images_dir = f"{settings.linebot_local_path}/ai-images"
+        if os.path.exists(settings.linebot_local_path):
+            os.makedirs(nas_ai_images_dir, exist_ok=True)
+            if not (os.path.islink(link) and os.readlink(link) == nas_ai_images_dir):
+                if os.path.lexists(link):
+                    _remove_entry(link)
+                os.symlink(nas_ai_images_dir, link)
+        elif os.path.lexists(link):
+            _remove_entry(link)
+
+        # 複製 .mcp.json（唯讀副本，不可被 AI 修改原檔；副本被改過或原檔更新時重新複製）
+        target = os.path.join(path, _MCP_CONFIG)
+        project_mcp = os.path.join(settings.project_root, _MCP_CONFIG)
+        if os.path.exists(project_mcp):
+            source = os.stat(project_mcp)
+            try:
+                current = os.lstat(target)
+                unchanged = (
+                    os.path.isfile(target) and not os.path.islink(target)
+                    and current.st_size == source.st_size
+                    and current.st_mtime_ns == source.st_mtime_ns
+                )
+            except FileNotFoundError:
+                unchanged = False
+            if not unchanged:
+                if os.path.lexists(target):
+                    _remove_entry(target)
+                shutil.copy2(project_mcp, target)
+        elif os.path.lexists(target):
+            _remove_entry(target)
+
+
+class AgentHostPool:
+    """預熱的 ClaudeClient（agent host）池"""
+
+    def __init__(self, max_idle: int, recycle_after: int) -> None:
+        self.max_idle = max_idle
+        self.recycle_after = recycle_after
+        self._idle: list[Any] = []
+        # host -> 已承載的 session 數
+        self._hosted: weakref.WeakKeyDictionary[Any, int] = weakref.WeakKeyDictionary()
+        self._server_info: dict | None = None
+        self._server_info_lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_idle > 0
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    async def acquire(
+        self,
+        factory: Callable[[], Any],
+        *,
+        cwd: str,
+        mcp_servers: list,
+        system_prompt: str | dict | None,
+    ) -> Any:
+        """取得承載新 session 的 client：有閒置 host 時沿用，否則以 factory 建立"""
+        while self._idle:
+            client = self._idle.pop()
+            if _open_sessions(client):
+                await self._close(client, "unhealthy")
+                continue
+            client.cwd = cwd
+            client.mcp_servers = mcp_servers or []
+            client.system_prompt = system_prompt
+            self._hosted[client] = self._hosted.get(client, 0) + 1
+            _hosts_total.inc(result="reused")
+            return client
+
+        client = factory()
+        if self.enabled:
+            self._share_server_info(client)
+        self._hosted[client] = 1
+        _hosts_total.inc(result="created")
+        return client
+
+    async def release(self, client: Any, reusable: bool = True) -> None:
+        """session 結束：關閉該 session，host 健康時放回池中，否則整個關閉"""
+        if not (reusable and self.enabled and _can_host(client)):
+            await self._close(client, None)
+            return
+        try:
+            await _end_session(client)
+        except Exception as e:
+            logger.debug(f"結束 agent session 失敗，關閉 host: {e}")
+            await self._close(client, "unhealthy")
+            return
+        if _open_sessions(client):
+            await self._close(client, "unhealthy")
+        elif self._hosted.get(client, 0) >= self.recycle_after:
+            await self._close(client, "recycled")
+        elif len(self._idle) >= self.max_idle:
+            await self._close(client, "overflow")
+        else:
+            self._idle.append(client)
+
+    async def close_all(self) -> None:
+        while self._idle:
+            await self._close(self._idle.pop(), None)
+
+    def stats(self) -> dict:
+        return {
+            "idle": len(self._idle),
+            "max_idle": self.max_idle,
+            "server_info_cached": self._server_info is not None,
+        }
+
+    def _share_server_info(self, client: Any) -> None:
+        """server info 只取一次：之後的 new_session 不再為此啟動暫時的 Claude CLI"""
+        agent = getattr(client, "agent", None)
+        fetch = getattr(agent, "_get_server_info", None)
+        if fetch is None:
+            return
+
+        async def cached_server_info(cwd: str, _mcp_servers: dict, _system_prompt: Any) -> dict | None:
+            if self._server_info is None:
+                async with self._server_info_lock:
+                    if self._server_info is None:
+                        # 只需要模型清單：不帶 MCP server 與 system prompt，避免啟動 MCP 子行程
+                        self._server_info = await fetch(cwd, {}, None)
+            return self._server_info
+
+        agent._get_server_info = cached_server_info
+
+    async def _close(self, client: Any, reason: str | None) -> None:
+        if reason:
+            _hosts_total.inc(result=reason)
+        try:
+            self._hosted.pop(client, None)
+        except TypeError:  # 不支援 weakref 的 client 本來就不會記錄
+            pass
+        try:
+            await client.close()
+        except Exception as e:
+            logger.debug(f"關閉 ClaudeClient 時忽略錯誤: {e}")
+
+
+def _can_host(client: Any) -> bool:
+    """client 是否支援只關閉單一 session（否則無法沿用）"""
+    agent = getattr(client, "agent", None)
+    return callable(getattr(agent, "close_session", None)) and hasattr(client, "events")
+
+
+def _open_sessions(client: Any) -> int:
+    return len(getattr(getattr(client, "agent", None), "_sessions", None) or {})
+
+
+async def _end_session(client: Any) -> None:
+    """關閉 client 目前的 session 並清除上一個呼叫留下的 callback 與緩衝"""
+    agent = client.agent
+    if client.session_id:
+        await agent.close_session(client.session_id)
+    client.session_id = None
+    client.events = type(client.events)()
+    client._text_buffer = ""
+    client._seen_text = set()
+    client.input_tokens = client.output_tokens = client.total_cost_usd = None
+    # 不保留上一個呼叫的 callback 參考
+    agent._conn = None
+    agent._on_result = None
+    agent._tool_input_transform = None
+
+
+agent_hosts = AgentHostPool(
+    settings.claude_agent_pool_size,
+    settings.claude_agent_recycle_sessions,
+)
+
+gauge(
+    "ctos_claude_agent_hosts_idle",
+    "閒置的預熱 agent host 數",
+    callback=lambda: len(agent_hosts),
+)
@@ -0,0 +1,290 @@
+"""Claude 對話 session 保留
+
+call_claude 每次都要建立 ClaudeClient、start_session、設定模型與權限模式，
+再把最多 40 則歷史重新組成 prompt 送出。同一對話連續提問時改為保留 ACP session：
+
+- 以對話為 key（Line 群組成員 / 個人、Telegram chat、Web ai_chats id）保留 client
+- 下一回合只送出 session 尚未看過的歷史訊息與新訊息
+- session 設定（模型、system prompt、工具、MCP 環境）改變時重建
+- 閒置超過 CLAUDE_SESSION_IDLE_SECONDS 或超過 CLAUDE_SESSION_MAX_ACTIVE（LRU）時關閉；
+  被關閉的對話下次回到完整歷史重送
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..config import settings
+from .metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+_sessions_total = counter(
+    "ctos_claude_sessions_total",
+    "對話 session 取用結果（reused=沿用、created=新建、replaced=設定改變重建、busy=使用中改用暫時 session）",
+    ("result",),
+)
+_evictions_total = counter(
+    "ctos_claude_session_evictions_total",
+    "對話 session 關閉原因",
+    ("reason",),
+)
+_tokens_saved_total = counter(
+    "ctos_claude_session_tokens_saved_total",
+    "沿用 session 而免重送的歷史 token 數（估計值）",
+)
+
+# 檔案訊息標記不會存進對話紀錄，比對歷史時先移除
+_FILE_MARKER_RE = re.compile(r"\[FILE_MESSAGE:\{.*?\}\]")
+_ROLE_PREFIX_RE = re.compile(r"^(user|assistant)(\[[^\]\n]*\])?: ")
+
+
+def session_fingerprint(**config: Any) -> str:
+    """session 設定指紋：任何一項改變都必須重建 session"""
+    normalized = {
+        key: sorted(value) if isinstance(value, (set, frozenset, list, tuple)) else value
+        for key, value in config.items()
+    }
+    raw = json.dumps(normalized, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _normalize(text: str) -> str:
+    return _FILE_MARKER_RE.sub("", text or "").strip()
+
+
+def _history_line(message: dict) -> str:
+    """歷史訊息的比對 key：角色、發送者與內容組合的單行格式"""
+    role = message.get("role", "user")
+    content = _normalize(str(message.get("content", "")))
+    sender = message.get("sender")
+    return f"{role}[{sender}]: {content}" if sender else f"{role}: {content}"
+
+
+def _prompt_line(prompt: str) -> str:
+    """本回合 prompt 對應的歷史單行（Bot 的 prompt 已是 user[發送者]: 內容 格式）"""
+    text = _normalize(prompt)
+    return text if _ROLE_PREFIX_RE.match(text) else f"user: {text}"
+
+
+def conversation_session_key(platform: str, user_id: str, group_id: str | None = None) -> str:
+    """對話 session key：個人對話以使用者區分；群組內每位成員各自一個 session
+
+    群組成員的 CTOS 身分與權限不同（MCP 環境變數隨 session 啟動固定），不能共用 session。
+    """
+    if group_id:
+        return f"{platform}:group:{group_id}:{user_id}"
+    return f"{platform}:user:{user_id}"
+
+
+@dataclass
+class PooledSession:
+    """保留中的 Claude session"""
+
+    key: str
+    fingerprint: str
+    client: Any
+    session_dir: str
+    close: Callable[[], Awaitable[None]] = field(repr=False)
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    turns: int = 0
+    in_use: bool = False
+    # 看過的歷史訊息 ID（Bot 對話的訊息皆帶 id）
+    seen_ids: set[str] = field(default_factory=set, repr=False)
+    # 沒有 id 的歷史（網頁對話）：每種單行看過幾次，相同內容的新訊息不會被誤判為已看過
+    seen_lines: Counter[str] = field(default_factory=Counter, repr=False)
+    # 上一回合的 prompt 與回覆：存進資料庫後才有 id，下回合依單行各對應一次
+    pending_lines: list[str] = field(default_factory=list, repr=False)
+
+    def unseen(self, history: list[dict] | None) -> list[dict]:
+        """session 尚未看過的歷史訊息（保持原順序）"""
+        result = []
+        lines = Counter(self.seen_lines)
+        pending = list(self.pending_lines)
+        for message in history or []:
+            if message.get("is_summary"):
+                continue
+            line = _history_line(message)
+            message_id = message.get("id")
+            if message_id is not None:
+                if str(message_id) in self.seen_ids:
+                    continue
+                if line in pending:
+                    # prompt 與回覆依序出現，對應到的項目與其之前的都不再使用
+                    del pending[:pending.index(line) + 1]
+                    continue
+            elif lines[line] > 0:
+                lines[line] -= 1
+                continue
+            result.append(message)
+        return result
+
+    def remember(self, history: list[dict] | None, prompt: str, reply: str) -> None:
+        """記錄本回合送出的歷史、prompt 與回覆，下回合不再重送"""
+        lines: Counter[str] = Counter()
+        for message in history or []:
+            if message.get("is_summary"):
+                continue
+            if message.get("id") is not None:
+                self.seen_ids.add(str(message["id"]))
+            else:
+                lines[_history_line(message)] += 1
+        self.pending_lines = [_prompt_line(prompt), f"assistant: {_normalize(reply)}"]
+        lines.update(self.pending_lines)
+        self.seen_lines = lines
+
+
+class ClaudeSessionPool:
+    """對話 session 池（LRU + 閒置逾時）"""
+
+    def __init__(self, max_sessions: int, idle_seconds: int) -> None:
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions: OrderedDict[str, PooledSession] = OrderedDict()
+        self.tokens_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_sessions > 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expired(self, session: PooledSession, now: float) -> bool:
+        return self.idle_seconds > 0 and now - session.last_used > self.idle_seconds
+
+    async def checkout(self, key: str, fingerprint: str) -> PooledSession | None:
+        """取出可沿用的 session；沒有可用的回傳 None（呼叫端改走完整歷史）"""
+        session = self._sessions.get(key)
+        if session is None:
+            return None
+        if session.in_use:
+            # 同一對話同時兩個回合：後到的用暫時 session，不影響保留中的 session
+            _sessions_total.inc(result="busy")
+            return None
+        if session.fingerprint != fingerprint:
+            await self._evict(session, "config_changed")
+            _sessions_total.inc(result="replaced")
+            return None
+        if self._expired(session, time.monotonic()):
+            await self._evict(session, "idle")
+            return None
+        session.in_use = True
+        self._sessions.move_to_end(key)
+        _sessions_total.inc(result="reused")
+        return session
+
+    async def checkin(self, session: PooledSession, tokens_saved: int = 0) -> None:
+        """回合成功結束：放回（或首次加入）session 池"""
+        session.in_use = False
+        session.turns += 1
+        session.last_used = time.monotonic()
+        if tokens_saved > 0:
+            self.tokens_saved += tokens_saved
+            _tokens_saved_total.inc(tokens_saved)
+
+        current = self._sessions.get(session.key)
+        if current is not session:
+            if current is not None:
+                if current.in_use:
+                    # 保留中的 session 仍在使用，這個暫時 session 直接關閉
+                    await _close_quietly(session)
+                    return
+                await self._evict(current, "replaced")
+            self._sessions[session.key] = session
+            _sessions_total.inc(result="created")
+        self._sessions.move_to_end(session.key)
+
+        while len(self._sessions) > self.max_sessions:
+            victim = next((s for s in self._sessions.values() if not s.in_use), None)
+            if victim is None:
+                break
+            await self._evict(victim, "lru")
+
+    async def drop(self, key: str) -> bool:
+        """結束指定對話的 session（例如使用者重置對話）"""
+        session = self._sessions.get(key)
+        if session is None or session.in_use:
+            return False
+        await self._evict(session, "reset")
+        return True
+
+    async def discard(self, session: PooledSession) -> None:
+        """回合失敗（逾時、錯誤）：session 狀態不確定，直接關閉"""
+        session.in_use = False
+        if self._sessions.get(session.key) is session:
+            await self._evict(session, "error")
+        else:
+            await _close_quietly(session)
+
+    async def evict_idle(self) -> int:
+        """關閉閒置逾時的 session"""
+        now = time.monotonic()
+        expired = [s for s in self._sessions.values() if not s.in_use and self._expired(s, now)]
+        for session in expired:
+            await self._evict(session, "idle")
+        return len(expired)
+
+    async def close_all(self) -> None:
+        for session in list(self._sessions.values()):
+            await self._evict(session, "shutdown")
+
+    async def _evict(self, session: PooledSession, reason: str) -> None:
+        if self._sessions.get(session.key) is session:
+            del self._sessions[session.key]
+        _evictions_total.inc(reason=reason)
+        logger.debug(f"關閉 Claude session: key={session.key}, reason={reason}, turns={session.turns}")
+        await _close_quietly(session)
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._sessions),
+            "in_use": sum(1 for s in self._sessions.values() if s.in_use),
+            "max_sessions": self.max_sessions,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+async def _close_quietly(session: PooledSession) -> None:
+    try:
+        await session.close()
+    except Exception as e:
+        logger.debug(f"關閉 Claude session 時忽略錯誤: {e}")
+
+
+session_pool = ClaudeSessionPool(
+    settings.claude_session_max_active,
+    settings.claude_session_idle_seconds,
+)
+
+gauge(
+    "ctos_claude_sessions_active",
+    "保留中的 Claude 對話 session 數",
+    callback=lambda: len(session_pool),
+)
+
+
+async def evict_idle_sessions() -> int:
+    """關閉閒置的對話 session（排程呼叫）"""
+    evicted = await session_pool.evict_idle()
+    if evicted:
+        logger.info(f"關閉閒置 Claude session: {evicted} 個")
+    return evicted
+
+
+async def end_sessions(*keys: str) -> None:
+    """結束指定對話的 session（重置對話時呼叫，之後回到完整歷史）"""
+    for key in keys:
+        await session_pool.drop(key)
+
+
+async def close_all_sessions() -> None:
+    """關閉所有保留中的 session（程式結束時呼叫）"""
+    await session_pool.close_all()
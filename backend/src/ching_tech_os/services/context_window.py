@@ -0,0 +1,195 @@
+"""對話上下文視窗（token 預算）
+
+原本 compose_prompt_with_history 固定取最後 40 則、get_conversation_context 固定取 20 則，
+長訊息（貼上的文件、程式碼）會讓 prompt 暴增，短訊息的對話又浪費可用空間；
+is_summary 的摘要訊息則被直接略過。改為：
+
+- 在本機估算 token 數，由新到舊放入訊息直到用完預算（AI_CONTEXT_BUDGET_TOKENS）
+- 單則訊息超過 AI_CONTEXT_MESSAGE_MAX_TOKENS 時截斷，避免一則訊息吃掉整個預算
+- 摘要訊息（is_summary）放在歷史最前面並計入預算，不再略過
+- 每次呼叫的 token 分配記錄到 metrics，供調整預算使用
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from ..config import settings
+from .metrics import histogram
+
+_context_tokens = histogram(
+    "ctos_ai_context_tokens",
+    "送出的對話上下文 token 數（估計值；history=歷史訊息、summary=摘要、prompt=完整 prompt）",
+    ("part",),
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+)
+_context_messages = histogram(
+    "ctos_ai_context_messages",
+    "對話上下文訊息數（kept=放入 prompt、dropped=超出預算）",
+    ("result",),
+    buckets=(0, 5, 10, 20, 40, 80),
+)
+
+_CJK_RE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+HISTORY_HEADER = "對話歷史："
+SUMMARY_HEADER = "先前對話摘要："
+# 每則訊息的角色標記與換行
+_LINE_OVERHEAD_TOKENS = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：中日韓字元約 1 字 1 token，其餘約 4 字元 1 token"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def format_history_line(message: dict) -> str:
+    """將一則歷史訊息格式化為 prompt 中的單行"""
+    role = message.get("role", "user")
+    content = message.get("content", "")
+    sender = message.get("sender")
+    if sender:
+        # 清理 sender 名稱，防止 prompt injection
+        safe_sender = sender.replace("\n", " ").replace("\r", " ")[:50]
+        return f"{role}[{safe_sender}]: {content}"
+    return f"{role}: {content}"
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """截斷文字到約 max_tokens，保留開頭並註明截斷字數"""
+    if max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return text
+    # 二分搜尋可保留的字元數（token 估算與字元種類有關）
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return f"{text[:low]}…（以下省略 {len(text) - low} 字）"
+
+
+@dataclass
+class ContextWindow:
+    """依 token 預算選出的對話上下文"""
+
+    messages: list[dict] = field(default_factory=list)  # 放入 prompt 的訊息（由舊到新）
+    dropped: list[dict] = field(default_factory=list)  # 超出預算未放入的較舊訊息（由舊到新）
+    summary: str | None = None
+    history_tokens: int = 0
+    summary_tokens: int = 0
+    truncated: int = 0  # 被截斷的訊息數
+
+    @property
+    def tokens(self) -> int:
+        return self.history_tokens + self.summary_tokens
+
+    def stats(self, prompt_tokens: int | None = None) -> dict:
+        """每次呼叫記錄的 token 分配"""
+        result = {
+            "history_tokens": self.history_tokens,
+            "summary_tokens": self.summary_tokens,
+            "messages": len(self.messages),
+            "dropped": len(self.dropped),
+            "truncated": self.truncated,
+        }
+        if prompt_tokens is not None:
+            result["prompt_tokens"] = prompt_tokens
+        return result
+
+
+def fit_history(
+    history: list[dict] | None,
+    budget_tokens: int | None = None,
+    max_messages: int | None = None,
+    max_message_tokens: int | None = None,
+) -> ContextWindow:
+    """由新到舊放入訊息直到用完 token 預算
+
+    Args:
+        history: 對話歷史（由舊到新），可包含 is_summary 摘要訊息（取最新一則）
+        budget_tokens: token 預算（None 使用設定值，0 = 不限制）
+        max_messages: 訊息數上限（None = 不限制）
+        max_message_tokens: 單則訊息 token 上限（None 使用設定值，0 = 不截斷）
+    """
+    if budget_tokens is None:
+        budget_tokens = settings.ai_context_budget_tokens
+    if max_message_tokens is None:
+        max_message_tokens = settings.ai_context_message_max_tokens
+
+    window = ContextWindow()
+    messages: list[dict] = []
+    for message in history or []:
+        if message.get("is_summary"):
+            window.summary = message.get("content") or None
+        else:
+            messages.append(message)
+
+    remaining = budget_tokens if budget_tokens > 0 else None
+    if window.summary:
+        summary = window.summary
+        if remaining is not None:
+            # 摘要最多佔一半預算，其餘留給近期訊息
+            summary = truncate_to_tokens(summary, remaining // 2)
+        window.summary = summary
+        window.summary_tokens = estimate_tokens(summary) + _LINE_OVERHEAD_TOKENS
+        if remaining is not None:
+            remaining -= window.summary_tokens
+
+    kept: list[dict] = []
+    index = len(messages)
+    while index > 0:
+        if max_messages is not None and len(kept) >= max_messages:
+            break
+        message = messages[index - 1]
+        content = str(message.get("content") or "")
+        limited = truncate_to_tokens(content, max_message_tokens)
+        cost = estimate_tokens(format_history_line({**message, "content": limited})) + _LINE_OVERHEAD_TOKENS
+        if remaining is not None and cost > remaining:
+            if kept:
+                break
+            # 最新一則一定放入：截斷到剩餘預算
+            limited = truncate_to_tokens(content, max(remaining, 1))
+            cost = estimate_tokens(format_history_line({**message, "content": limited})) + _LINE_OVERHEAD_TOKENS
+        if limited != content:
+            message = {**message, "content": limited}
+            window.truncated += 1
+        kept.append(message)
+        window.history_tokens += cost
+        if remaining is not None:
+            remaining -= cost
+        index -= 1
+
+    kept.reverse()
+    window.messages = kept
+    window.dropped = messages[:index]
+    return window
+
+
+def render_prompt(window: ContextWindow, new_message: str) -> str:
+    """將上下文視窗與新訊息組成完整 prompt"""
+    parts: list[str] = []
+    if window.summary:
+        parts.append(SUMMARY_HEADER)
+        parts.append(window.summary)
+        parts.append("")
+    if window.messages:
+        parts.append(HISTORY_HEADER)
+        parts.append("")
+        parts.extend(format_history_line(message) for message in window.messages)
+        parts.append("")
+    parts.append(new_message)
+    return "\n".join(parts)
+
+
+def record_context_usage(window: ContextWindow, prompt_tokens: int) -> dict:
+    """記錄本次呼叫的上下文 token 分配，回傳可寫入 AI Log 的統計"""
+    _context_tokens.observe(window.history_tokens, part="history")
+    _context_tokens.observe(window.summary_tokens, part="summary")
+    _context_tokens.observe(prompt_tokens, part="prompt")
+    _context_messages.observe(len(window.messages), result="kept")
+    _context_messages.observe(len(window.dropped), result="dropped")
+    return window.stats(prompt_tokens)
@@ -0,0 +1,258 @@
+"""常駐 Git 物件讀取器
+
+知識庫版本歷史原本每次請求都以同步 subprocess 執行 `git log --follow` /
+`git show`，會卡住 event loop。這裡改為：
+
+- 每個 repository 維持一個 `git cat-file --batch` 常駐行程，
+  以 `<commit>:<path>` 讀取檔案內容、以 `HEAD` 取得目前 commit（毫秒等級）
+- 檔案歷史依 (路徑) 快取並記錄當時的 HEAD；HEAD 前進時只對
+  `舊 HEAD..新 HEAD` 執行增量 `git log --follow`，不再每次走完整歷史
+- 所有 git 呼叫皆為 asyncio subprocess，不阻塞 event loop
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from .errors import ServiceError
+
+logger = logging.getLogger(__name__)
+
+# 單次 git 操作逾時（秒）
+GIT_TIMEOUT = 10
+
+# 每個 repository 快取的檔案歷史數量上限
+_HISTORY_CACHE_SIZE = 512
+
+# git log 輸出格式（欄位以 \x1f 分隔，避免 commit 訊息中的 | 造成誤判）
+_LOG_FORMAT = "--pretty=format:%H%x1f%an%x1f%aI%x1f%s"
+
+
+class GitReaderError(ServiceError):
+    """Git 讀取錯誤"""
+
+    def __init__(self, message: str = "Git 讀取錯誤"):
+        super().__init__(message, "GIT_ERROR", 500)
+
+
+@dataclass(frozen=True)
+class CommitEntry:
+    """檔案歷史中的一筆 commit"""
+
+    commit: str
+    author: str
+    date: str
+    message: str
+
+
+async def _run_git(cwd: Path, *args: str) -> tuple[int, str]:
+    """執行一次性 git 指令，回傳 (returncode, stdout)"""
+    proc = await asyncio.create_subprocess_exec(
+        "git",
+        *args,
+        cwd=str(cwd),
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=GIT_TIMEOUT)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise GitReaderError(f"git {args[0]} 逾時")
+    return proc.returncode or 0, stdout.decode("utf-8", errors="replace")
+
+
+def _parse_log(output: str) -> list[CommitEntry]:
+    entries = []
+    for line in output.splitlines():
+        parts = line.split("\x1f", 3)
+        if len(parts) == 4:
+            entries.append(CommitEntry(*parts))
+    return entries
+
+
+class GitRepoReader:
+    """單一 repository 的常駐讀取器（cat-file 行程 + 檔案歷史快取）"""
+
+    def __init__(self, root: Path, history_cache_size: int = _HISTORY_CACHE_SIZE):
+        self.root = root
+        self._proc: asyncio.subprocess.Process | None = None
+        self._proc_loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+        self._history: OrderedDict[str, tuple[str, list[CommitEntry]]] = OrderedDict()
+        self._history_cache_size = history_cache_size
+        self.stats = {"history_hits": 0, "history_incremental": 0, "history_full": 0, "objects_read": 0}
+
+    # ------------------------------------------------------------------
+    # cat-file --batch 行程
+    # ------------------------------------------------------------------
+
+    def _bind_loop(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._proc_loop is not loop or self._lock is None:
+            # 行程綁定在建立它的 event loop，換 loop 時重新啟動
+            self._discard_process()
+            self._lock = asyncio.Lock()
+            self._proc_loop = loop
+        return self._lock
+
+    async def _ensure_process(self) -> asyncio.subprocess.Process:
+        if self._proc is None or self._proc.returncode is not None:
+            self._proc = await asyncio.create_subprocess_exec(
+                "git",
+                "cat-file",
+                "--batch",
+                cwd=str(self.root),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def _discard_process(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.returncode is None:
+            try:
+                proc.kill()
+            except (ProcessLookupError, RuntimeError):
+                pass
+
+    async def _batch_request(self, spec: str) -> tuple[str, bytes] | None:
+        """送出一筆物件查詢，回傳 (sha, 內容)；物件不存在時回傳 None"""
+        if not spec or "\n" in spec or "\r" in spec:
+            return None
+        async with self._bind_loop():
+            proc = await self._ensure_process()
+            try:
+                return await asyncio.wait_for(self._exchange(proc, spec), timeout=GIT_TIMEOUT)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, BrokenPipeError, ConnectionResetError) as e:
+                # 讀寫中斷後串流狀態不可信，下次重新啟動行程
+                logger.warning(f"git cat-file 讀取失敗，重新啟動行程: {spec} ({e!r})")
+                self._discard_process()
+                raise GitReaderError(f"讀取 git 物件失敗：{spec}") from e
+
+    async def _exchange(self, proc: asyncio.subprocess.Process, spec: str) -> tuple[str, bytes] | None:
+        assert proc.stdin is not None and proc.stdout is not None
+        proc.stdin.write(spec.encode("utf-8") + b"\n")
+        await proc.stdin.drain()
+        header = (await proc.stdout.readline()).decode("utf-8", errors="replace").rstrip("\n")
+        if not header:
+            raise asyncio.IncompleteReadError(b"", None)
+        parts = header.split(" ")
+        if len(parts) != 3 or parts[-1] in ("missing", "ambiguous"):
+            # `<spec> missing`（spec 可能含空白，以最後一欄判斷）
+            return None
+        sha, _obj_type, size = parts
+        data = await proc.stdout.readexactly(int(size) + 1)
+        self.stats["objects_read"] += 1
+        return sha, data[:-1]
+
+    async def resolve(self, rev: str = "HEAD") -> str | None:
+        """取得 revision 對應的 commit sha（空 repository 回傳 None）"""
+        result = await self._batch_request(rev)
+        return result[0] if result else None
+
+    async def read_file(self, rev: str, rel_path: str) -> bytes | None:
+        """讀取某個 revision 的檔案內容，不存在時回傳 None"""
+        result = await self._batch_request(f"{rev}:{rel_path}")
+        return result[1] if result else None
+
+    # ------------------------------------------------------------------
+    # 檔案歷史
+    # ------------------------------------------------------------------
+
+    async def _log(self, rel_path: str, rev_range: str | None = None) -> list[CommitEntry]:
+        args = ["log", "--follow", _LOG_FORMAT]
+        if rev_range:
+            args.append(rev_range)
+        args += ["--", rel_path]
+        code, output = await _run_git(self.root, *args)
+        if code != 0:
+            raise GitReaderError(f"git log 失敗：{rel_path}")
+        return _parse_log(output)
+
+    async def _is_ancestor(self, old: str, new: str) -> bool:
+        code, _ = await _run_git(self.root, "merge-base", "--is-ancestor", old, new)
+        return code == 0
+
+    async def file_history(self, rel_path: str) -> list[CommitEntry]:
+        """取得檔案歷史（新到舊），HEAD 未變時直接回傳快取"""
+        head = await self.resolve("HEAD")
+        if head is None:
+            return []
+
+        cached = self._history.get(rel_path)
+        if cached is not None and cached[0] == head:
+            self._history.move_to_end(rel_path)
+            self.stats["history_hits"] += 1
+            return list(cached[1])
+
+        if cached is not None and await self._is_ancestor(cached[0], head):
+            entries = await self._log(rel_path, f"{cached[0]}..{head}") + cached[1]
+            self.stats["history_incremental"] += 1
+        else:
+            entries = await self._log(rel_path)
+            self.stats["history_full"] += 1
+
+        self._history[rel_path] = (head, entries)
+        self._history.move_to_end(rel_path)
+        while len(self._history) > self._history_cache_size:
+            self._history.popitem(last=False)
+        return list(entries)
+
+    def invalidate(self, rel_path: str | None = None) -> None:
+        """清除檔案歷史快取（rel_path 為 None 時全部清除）"""
+        if rel_path is None:
+            self._history.clear()
+        else:
+            self._history.pop(rel_path, None)
+
+    async def close(self) -> None:
+        """結束 cat-file 行程"""
+        proc = self._proc
+        same_loop = self._proc_loop is asyncio.get_running_loop()
+        self._discard_process()
+        if proc is not None and same_loop:
+            await proc.wait()
+        self._proc_loop = None
+        self._lock = None
+
+
+# 依 repository 根目錄共用讀取器；另記錄「任意路徑 → 根目錄」的對應
+_readers: dict[Path, GitRepoReader] = {}
+_toplevels: dict[Path, Path] = {}
+
+
+async def get_git_reader(path: Path) -> GitRepoReader:
+    """取得包含 path 的 repository 讀取器
+
+    Raises:
+        GitReaderError: path 不在 git repository 中
+    """
+    path = Path(path).resolve()
+    root = _toplevels.get(path)
+    if root is None:
+        if not path.is_dir():
+            raise GitReaderError(f"目錄不存在：{path}")
+        code, output = await _run_git(path, "rev-parse", "--show-toplevel")
+        if code != 0 or not output.strip():
+            raise GitReaderError(f"{path} 不是 git repository")
+        root = Path(output.strip()).resolve()
+        _toplevels[path] = root
+
+    reader = _readers.get(root)
+    if reader is None:
+        reader = _readers[root] = GitRepoReader(root)
+    return reader
+
+
+async def close_git_readers() -> None:
+    """關閉所有常駐 git 行程（應用程式關閉時呼叫）"""
+    for reader in _readers.values():
+        await reader.close()
+    _readers.clear()
+    _toplevels.clear()
@@ -1,5 +1,11 @@
-"""物料管理服務"""
+"""物料管理服務
 
+庫存數量（inventory_items.current_stock）與專案物料彙總
+（inventory_project_item_totals）由資料庫 trigger 依每筆異動增量維護；
+批次匯入時改由匯入流程依物料一次套用差額，並由排程定期對帳。
+"""
+
+from collections import defaultdict
 from datetime import date
 from decimal import Decimal
 from uuid import UUID
@@ -12,6 +18,7 @@ from ..models.inventory import (
     InventoryItemListItem,
     InventoryItemListResponse,
     InventoryTransactionCreate,
+    InventoryTransactionImportItem,
     InventoryTransactionUpdate,
     InventoryTransactionResponse,
     InventoryTransactionListItem,
@@ -28,6 +35,7 @@ from ..models.inventory import (
 
 
 from .errors import ServiceError
+from .text_search import build_search_clause
 
 
 class InventoryError(ServiceError):
@@ -87,19 +95,14 @@ async def list_inventory_items(
         params = []
         param_idx = 1
 
-        if query:
-            # 正規化搜尋：移除連字符和空格後再比較
-            # 讓 "kv7500" 可以匹配到 "PLC KV-7500"
-            normalized_query = query.replace('-', '').replace(' ', '').lower()
-            sql += f""" AND (
-                REPLACE(REPLACE(LOWER(name), '-', ''), ' ', '') LIKE ${param_idx}
-                OR REPLACE(REPLACE(LOWER(COALESCE(specification, '')), '-', ''), ' ', '') LIKE ${param_idx}
-                OR REPLACE(REPLACE(LOWER(COALESCE(model, '')), '-', ''), ' ', '') LIKE ${param_idx}
-                OR REPLACE(REPLACE(LOWER(COALESCE(category, '')), '-', ''), ' ', '') LIKE ${param_idx}
-                OR REPLACE(REPLACE(LOWER(COALESCE(default_vendor, '')), '-', ''), ' ', '') LIKE ${param_idx}
-            )"""
-            params.append(f"%{normalized_query}%")
-            param_idx += 1
+        order_by = "name ASC"
+        # 正規化搜尋（search_text 已移除連字符和空格，讓 "kv7500" 可以匹配到 "PLC KV-7500"）
+        clause = build_search_clause(query, param_idx)
+        if clause:
+            sql += f" AND {clause.where}"
+            params.extend(clause.params)
+            param_idx = clause.next_param_idx
+            order_by = f"{clause.order_by}, name ASC"
 
         if category:
             sql += f" AND category = ${param_idx}"
@@ -115,7 +118,7 @@ async def list_inventory_items(
         if low_stock:
             sql += " AND current_stock < COALESCE(min_stock, 0)"
 
-        sql += " ORDER BY name ASC"
+        sql += f" ORDER BY {order_by}"
 
         rows = await conn.fetch(sql, *params)
 
@@ -206,21 +209,21 @@ async def search_inventory_items(
     keyword: str,
     limit: int = 10,
 ) -> list[InventoryItemListItem]:
-    """搜尋物料（模糊匹配）"""
+    """搜尋物料（正規化子字串 + 相似度排序）"""
+    clause = build_search_clause(keyword, 1, fuzzy=True)
+    if clause is None:
+        return []
     async with get_connection() as conn:
         rows = await conn.fetch(
-            """
+            f"""
             SELECT id, name, model, specification, unit, category, storage_location,
                    current_stock, min_stock, updated_at
             FROM inventory_items
-            WHERE name ILIKE $1 OR specification ILIKE $1 OR model ILIKE $1
-            ORDER BY
-                CASE WHEN name ILIKE $2 THEN 0 ELSE 1 END,
-                name ASC
-            LIMIT $3
+            WHERE {clause.where}
+            ORDER BY {clause.order_by}, name ASC
+            LIMIT ${clause.next_param_idx}
             """,
-            f"%{keyword}%",
-            f"{keyword}%",
+            *clause.params,
             limit,
         )
 
@@ -542,6 +545,121 @@ async def delete_inventory_transaction(
             raise InventoryTransactionNotFoundError(f"進出貨記錄 {transaction_id} 不存在")
 
 
+# 批次匯入時 COPY 的欄位（順序需與 _import_record 一致）
+_IMPORT_COLUMNS = (
+    "item_id", "type", "quantity", "transaction_date", "vendor", "project_id", "notes", "created_by",
+)
+
+
+def _import_record(row: InventoryTransactionImportItem, created_by: str | None) -> tuple:
+    return (
+        row.item_id,
+        row.type.value,
+        row.quantity,
+        row.transaction_date or date.today(),
+        row.vendor,
+        row.project_id,
+        row.notes,
+        row.created_by or created_by,
+    )
+
+
+async def bulk_import_inventory_transactions(
+    rows: list[InventoryTransactionImportItem],
+    created_by: str | None = None,
+) -> dict:
+    """批次匯入進出貨記錄
+
+    以 COPY 寫入 inventory_transactions，匯入期間 trigger 略過逐筆更新，
+    最後依物料（及專案物料）各套用一次差額。整批在同一個交易內完成。
+
+    Args:
+        rows: 進出貨記錄
+        created_by: 預設建立者（個別記錄未指定時使用）
+
+    Returns:
+        {"imported": 筆數, "items_updated": 物料數, "project_items_updated": 專案物料數}
+    """
+    if not rows:
+        return {"imported": 0, "items_updated": 0, "project_items_updated": 0}
+
+    stock_delta: dict[UUID, Decimal] = defaultdict(Decimal)
+    project_totals: dict[tuple[UUID, UUID], list] = {}
+    for row in rows:
+        signed = row.quantity if row.type == TransactionType.IN else -row.quantity
+        stock_delta[row.item_id] += signed
+        if row.project_id:
+            totals = project_totals.setdefault((row.project_id, row.item_id), [Decimal("0"), Decimal("0"), 0])
+            totals[0 if row.type == TransactionType.IN else 1] += row.quantity
+            totals[2] += 1
+
+    item_ids = list(stock_delta)
+    project_ids = list({project_id for project_id, _ in project_totals})
+
+    async with get_connection() as conn:
+        async with conn.transaction():
+            found = await conn.fetch(
+                "SELECT id FROM inventory_items WHERE id = ANY($1::uuid[])",
+                item_ids,
+            )
+            missing = set(item_ids) - {r["id"] for r in found}
+            if missing:
+                raise InventoryItemNotFoundError(f"物料 {sorted(map(str, missing))[0]} 不存在")
+            if project_ids:
+                found_projects = await conn.fetch(
+                    "SELECT id FROM projects WHERE id = ANY($1::uuid[])",
+                    project_ids,
+                )
+                missing_projects = set(project_ids) - {r["id"] for r in found_projects}
+                if missing_projects:
+                    raise InventoryError(f"專案 {sorted(map(str, missing_projects))[0]} 不存在")
+
+            await conn.execute("SET LOCAL ctos.inventory_bulk_import = 'on'")
+            await conn.copy_records_to_table(
+                "inventory_transactions",
+                records=[_import_record(row, created_by) for row in rows],
+                columns=list(_IMPORT_COLUMNS),
+            )
+            await conn.execute("SET LOCAL ctos.inventory_bulk_import = 'off'")
+
+            await conn.execute(
+                """
+                UPDATE inventory_items i
+                SET current_stock = COALESCE(i.current_stock, 0) + d.delta
+                FROM unnest($1::uuid[], $2::numeric[]) AS d(item_id, delta)
+                WHERE i.id = d.item_id
+                """,
+                item_ids,
+                [stock_delta[item_id] for item_id in item_ids],
+            )
+
+            if project_totals:
+                keys = list(project_totals)
+                await conn.execute(
+                    """
+                    INSERT INTO inventory_project_item_totals
+                        (project_id, item_id, total_in, total_out, transaction_count)
+                    SELECT * FROM unnest($1::uuid[], $2::uuid[], $3::numeric[], $4::numeric[], $5::int[])
+                    ON CONFLICT (project_id, item_id) DO UPDATE
+                    SET total_in = inventory_project_item_totals.total_in + EXCLUDED.total_in,
+                        total_out = inventory_project_item_totals.total_out + EXCLUDED.total_out,
+                        transaction_count = inventory_project_item_totals.transaction_count
+                                            + EXCLUDED.transaction_count
+                    """,
+                    [k[0] for k in keys],
+                    [k[1] for k in keys],
+                    [project_totals[k][0] for k in keys],
+                    [project_totals[k][1] for k in keys],
+                    [project_totals[k][2] for k in keys],
+                )
+
+    return {
+        "imported": len(rows),
+        "items_updated": len(item_ids),
+        "project_items_updated": len(project_totals),
+    }
+
+
 # ============================================
 # 庫存統計
 # ============================================
@@ -560,6 +678,84 @@ async def get_categories() -> list[str]:
         return [row["category"] for row in rows]
 
 
+async def reconcile_inventory_stock(fix: bool = True, keep_days: int = 90) -> dict:
+    """庫存對帳：以進出貨記錄重新計算庫存並記錄快照
+
+    增量維護的 current_stock 若因手動修改資料等原因與記錄不符，
+    在此校正並重建專案物料彙總表。對帳期間以 SHARE 鎖暫停寫入，不影響讀取。
+
+    Args:
+        fix: 是否校正不一致的庫存
+        keep_days: 快照保留天數
+
+    Returns:
+        {"items": 物料數, "drifted": 不一致數, "fixed": 已校正數}
+    """
+    async with get_connection() as conn:
+        async with conn.transaction():
+            await conn.execute("LOCK TABLE inventory_transactions IN SHARE MODE")
+            rows = await conn.fetch(
+                """
+                SELECT i.id, i.current_stock,
+                       COALESCE(SUM(CASE WHEN t.type = 'in' THEN t.quantity ELSE -t.quantity END), 0)
+                           AS ledger_stock
+                FROM inventory_items i
+                LEFT JOIN inventory_transactions t ON t.item_id = i.id
+                GROUP BY i.id, i.current_stock
+                """
+            )
+            drifted = [r for r in rows if r["current_stock"] != r["ledger_stock"]]
+
+            if rows:
+                await conn.execute(
+                    """
+                    INSERT INTO inventory_stock_snapshots (item_id, stock, recorded_stock)
+                    SELECT * FROM unnest($1::uuid[], $2::numeric[], $3::numeric[])
+                    """,
+                    [r["id"] for r in rows],
+                    [r["ledger_stock"] for r in rows],
+                    [r["current_stock"] for r in rows],
+                )
+
+            if fix:
+                if drifted:
+                    await conn.execute(
+                        """
+                        UPDATE inventory_items i
+                        SET current_stock = d.stock
+                        FROM unnest($1::uuid[], $2::numeric[]) AS d(item_id, stock)
+                        WHERE i.id = d.item_id
+                        """,
+                        [r["id"] for r in drifted],
+                        [r["ledger_stock"] for r in drifted],
+                    )
+                await conn.execute("DELETE FROM inventory_project_item_totals")
+                await conn.execute(
+                    """
+                    INSERT INTO inventory_project_item_totals
+                        (project_id, item_id, total_in, total_out, transaction_count)
+                    SELECT project_id, item_id,
+                           COALESCE(SUM(CASE WHEN type = 'in' THEN quantity ELSE 0 END), 0),
+                           COALESCE(SUM(CASE WHEN type = 'out' THEN quantity ELSE 0 END), 0),
+                           COUNT(*)
+                    FROM inventory_transactions
+                    WHERE project_id IS NOT NULL
+                    GROUP BY project_id, item_id
+                    """
+                )
+
+            await conn.execute(
+                "DELETE FROM inventory_stock_snapshots WHERE taken_at < NOW() - make_interval(days => $1)",
+                keep_days,
+            )
+
+    return {
+        "items": len(rows),
+        "drifted": len(drifted),
+        "fixed": len(drifted) if fix else 0,
+    }
+
+
 async def get_low_stock_count() -> int:
     """取得庫存不足的物料數量"""
     async with get_connection() as conn:
@@ -653,6 +849,8 @@ async def find_item_by_id_or_name(
                 return ItemLookupResult(error=f"無效的物料 ID 格式: {item_id}")
         else:
             columns = "id, name, unit, current_stock" if include_stock else "id, name, unit"
+            # 只比對名稱（不做正規化 / 相似度）：結果會直接用於庫存異動，避免誤選相近料號
+            # name 有 pg_trgm GIN 索引（migration 023），開頭萬用字元的 ILIKE 也能走索引
             rows = await conn.fetch(
                 f"""
                 SELECT {columns} FROM inventory_items
@@ -1095,12 +1293,13 @@ async def get_project_inventory_status(
         if not project:
             raise InventoryError(f"專案 {project_id} 不存在")
 
-        # 查詢該專案所有相關物料（含訂購但尚未進出貨的），按物料分組彙總
+        # 查詢該專案所有相關物料（含訂購但尚未進出貨的），進出貨彙總由
+        # inventory_project_item_totals 提供，不需掃描進出貨記錄
         rows = await conn.fetch(
             """
             WITH project_items AS (
-                SELECT DISTINCT item_id
-                FROM inventory_transactions
+                SELECT item_id
+                FROM inventory_project_item_totals
                 WHERE project_id = $1
                 UNION
                 SELECT DISTINCT item_id
@@ -1111,13 +1310,12 @@ async def get_project_inventory_status(
                 i.id AS item_id,
                 i.name AS item_name,
                 i.unit,
-                COALESCE(SUM(CASE WHEN t.type = 'in' THEN t.quantity ELSE 0 END), 0) AS total_in,
-                COALESCE(SUM(CASE WHEN t.type = 'out' THEN t.quantity ELSE 0 END), 0) AS total_out
+                COALESCE(a.total_in, 0) AS total_in,
+                COALESCE(a.total_out, 0) AS total_out
             FROM project_items pi
             JOIN inventory_items i ON pi.item_id = i.id
-            LEFT JOIN inventory_transactions t
-                ON pi.item_id = t.item_id AND t.project_id = $1
-            GROUP BY i.id, i.name, i.unit
+            LEFT JOIN inventory_project_item_totals a
+                ON a.project_id = $1 AND a.item_id = pi.item_id
             ORDER BY i.name
             """,
             project_id,
@@ -40,6 +40,7 @@ from ching_tech_os.services.local_file import (
 
 
 from .errors import ServiceError
+from .git_reader import GitReaderError, get_git_reader
 
 
 class KnowledgeError(ServiceError):
@@ -249,6 +250,25 @@ def get_knowledge(kb_id: str) -> KnowledgeResponse:
         raise KnowledgeError(f"讀取知識失敗：{e}") from e
 
 
+def get_knowledge_version(kb_id: str) -> tuple[str, int, int] | None:
+    """取得知識檔案版本（路徑、mtime、大小），用於快取判斷
+
+    Args:
+        kb_id: 知識 ID
+
+    Returns:
+        版本 tuple，知識不存在時回傳 None
+    """
+    file_path = _find_knowledge_file(kb_id)
+    if not file_path:
+        return None
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return None
+    return (str(file_path), stat.st_mtime_ns, stat.st_size)
+
+
 def search_knowledge(
     query: str | None = None,
     project: str | None = None,
@@ -817,9 +837,11 @@ def rebuild_index() -> dict[str, Any]:
     }
 
 
-def get_history(kb_id: str) -> HistoryResponse:
+async def get_history(kb_id: str) -> HistoryResponse:
     """取得知識版本歷史
 
+    透過常駐 git 讀取器取得（git log --follow，依 HEAD 增量快取）。
+
     Args:
         kb_id: 知識 ID
 
@@ -834,46 +856,25 @@ def get_history(kb_id: str) -> HistoryResponse:
     entries: list[HistoryEntry] = []
 
     try:
-        # 使用 git log --follow 取得歷史
-        result = subprocess.run(
-            [
-                "git",
-                "log",
-                "--follow",
-                "--pretty=format:%H|%an|%aI|%s",
-                "--",
-                str(file_path),
-            ],
-            capture_output=True,
-            text=True,
-            cwd=base_path,
-            timeout=10,
-        )
-
-        if result.returncode == 0 and result.stdout:
-            for line in result.stdout.strip().split("\n"):
-                if not line:
-                    continue
-                parts = line.split("|", 3)
-                if len(parts) >= 4:
-                    entries.append(
-                        HistoryEntry(
-                            commit=parts[0],
-                            author=parts[1],
-                            date=parts[2],
-                            message=parts[3],
-                        )
-                    )
-
-    except subprocess.TimeoutExpired:
-        pass
-    except Exception:
-        pass
+        reader = await get_git_reader(base_path)
+        rel_path = file_path.resolve().relative_to(reader.root).as_posix()
+        for item in await reader.file_history(rel_path):
+            entries.append(
+                HistoryEntry(
+                    commit=item.commit,
+                    author=item.author,
+                    date=item.date,
+                    message=item.message,
+                )
+            )
+    except (GitReaderError, ValueError) as e:
+        # 非 git 目錄或 git 失敗時回傳空歷史
+        logger.debug(f"取得知識歷史失敗 {kb_id}: {e}")
 
     return HistoryResponse(id=kb_id, entries=entries)
 
 
-def get_version(kb_id: str, commit: str) -> VersionResponse:
+async def get_version(kb_id: str, commit: str) -> VersionResponse:
     """取得特定版本的知識內容
 
     Args:
@@ -889,30 +890,20 @@ def get_version(kb_id: str, commit: str) -> VersionResponse:
         raise KnowledgeNotFoundError(f"知識 {kb_id} 不存在")
 
     try:
-        # 取得相對路徑
-        rel_path = file_path.relative_to(base_path.parent.parent)
-
-        result = subprocess.run(
-            ["git", "show", f"{commit}:{rel_path}"],
-            capture_output=True,
-            text=True,
-            cwd=base_path.parent.parent,
-            timeout=10,
-        )
+        reader = await get_git_reader(base_path)
+        rel_path = file_path.resolve().relative_to(reader.root).as_posix()
+        data = await reader.read_file(commit, rel_path)
+    except GitReaderError as e:
+        raise KnowledgeError(f"取得版本內容失敗：{e.message}") from e
+    except ValueError as e:
+        raise KnowledgeError(f"取得版本內容失敗：{e}") from e
 
-        if result.returncode != 0:
-            raise KnowledgeError(f"無法取得版本 {commit}")
+    if data is None:
+        raise KnowledgeError(f"無法取得版本 {commit}")
 
-        # 解析 frontmatter，只回傳內容部分
-        _, content = _parse_front_matter(result.stdout)
-        return VersionResponse(id=kb_id, commit=commit, content=content)
-
-    except subprocess.TimeoutExpired:
-        raise KnowledgeError("取得版本內容逾時")
-    except Exception as e:
-        if isinstance(e, KnowledgeError):
-            raise
-        raise KnowledgeError(f"取得版本內容失敗：{e}") from e
+    # 解析 frontmatter，只回傳內容部分
+    _, content = _parse_front_matter(data.decode("utf-8", errors="replace"))
+    return VersionResponse(id=kb_id, commit=commit, content=content)
 
 
 def upload_attachment(
@@ -1091,6 +1082,25 @@ def get_nas_attachment(path: str) -> bytes:
         raise KnowledgeError(f"讀取 NAS 附件失敗：{e}") from e
 
 
+def get_nas_attachment_path(path: str) -> Path:
+    """取得 NAS 附件的檔案系統路徑（供串流下載）
+
+    Args:
+        path: 附件路徑（不含 nas://knowledge/ 前綴）
+
+    Returns:
+        檔案完整路徑
+
+    Raises:
+        KnowledgeError: 附件不存在
+    """
+    file_service = create_knowledge_file_service()
+    full_path = Path(file_service.get_full_path(f"attachments/{path}"))
+    if not full_path.is_file():
+        raise KnowledgeError(f"讀取 NAS 附件失敗：檔案不存在 attachments/{path}")
+    return full_path
+
+
 def update_attachment(
     kb_id: str,
     attachment_idx: int,
@@ -8,13 +8,17 @@
 """
 
 import asyncio
+import functools
 import json
 import logging
 import re
 import time
+from collections.abc import Awaitable, Callable
 from uuid import UUID
 
+from .ai_admission import Priority
 from .claude_agent import call_claude, compose_prompt_with_history
+from .claude_sessions import conversation_session_key
 from .image_fallback import (
     generate_image_with_fallback,
     get_fallback_notification,
@@ -50,11 +54,13 @@ from .bot_line import (
 )
 from . import ai_manager
 from .linebot_agents import get_linebot_agent, AGENT_LINEBOT_PERSONAL, AGENT_LINEBOT_GROUP
+from ..config import settings
 from ..database import get_connection
 from ..models.ai import AiLogCreate
 
 # 從 bot.ai 匯入平台無關的純函式（向後相容 re-export）
 from .bot.ai import (
+    bot_reply_seconds,
     parse_ai_response,
     extract_nanobanana_error,
     extract_nanobanana_prompt,
@@ -63,6 +69,10 @@ from .bot.ai import (
     extract_generated_images_from_tool_calls,
 )
 from .bot.media import parse_pdf_temp_path
+from .bot.context_cache import ConversationKey, conversation_context_cache, conversation_key
+from .bot.delivery import split_text
+from .bot.conversation_summary import conversation_summaries
+from .context_window import fit_history
 
 logger = logging.getLogger("linebot_ai")
 
@@ -200,26 +210,7 @@ LINE_TEXT_MAX_CHARS = 5000
 
 def _split_long_text(text: str, max_chars: int = LINE_TEXT_MAX_CHARS) -> list[str]:
     """將超過 LINE 上限的長文字分割成多段（在換行處斷開）。"""
-    if not text or len(text) <= max_chars:
-        return [text] if text else []
-
-    chunks: list[str] = []
-    remaining = text
-    while remaining:
-        if len(remaining) <= max_chars:
-            chunks.append(remaining)
-            break
-        # 在 max_chars 以內找最後一個換行位置
-        cut = remaining.rfind("\n", 0, max_chars)
-        if cut <= 0:
-            # 沒有換行，找空白
-            cut = remaining.rfind(" ", 0, max_chars)
-        if cut <= 0:
-            # 都沒有，硬切
-            cut = max_chars
-        chunks.append(remaining[:cut].rstrip())
-        remaining = remaining[cut:].lstrip("\n ")
-    return chunks
+    return split_text(text, max_chars)
 
 
 async def send_ai_response(
@@ -227,6 +218,7 @@ async def send_ai_response(
     text: str,
     file_messages: list[dict],
     mention_line_user_id: str | None = None,
+    push_target: Callable[[], Awaitable[str | None]] | None = None,
 ) -> list[str]:
     """
     發送 AI 回應（文字 + 檔案訊息）
@@ -236,9 +228,11 @@ async def send_ai_response(
         text: 文字回覆
         file_messages: 檔案訊息列表
         mention_line_user_id: 要 mention 的 Line 用戶 ID（群組對話時使用）
+        push_target: 取得 push 目標的函式；長文字分段超過單次回覆上限時，
+            剩餘的段落在回覆後以 push 補送（未提供時只送出前 5 則）
 
     Returns:
-        發送成功的訊息 ID 列表
+        發送成功的訊息 ID 列表（回覆在前、補送在後）
     """
     from linebot.v3.messaging import ImageMessage
 
@@ -277,8 +271,10 @@ async def send_ai_response(
 
     # Line 限制每次最多 5 則訊息
     # 如果檔案太多，只發送前 4 張圖片（預留 1 則給文字）
+    overflow_texts = []
+    overflow_target = None
     if len(messages) > 5:
-        # 提取超出的圖片訊息
+        # 提取超出的訊息
         extra_messages = messages[5:]
         messages = messages[:5]
 
@@ -287,16 +283,30 @@ async def send_ai_response(
         for msg in extra_messages:
             if isinstance(msg, ImageMessage):
                 extra_links.append(msg.original_content_url)
+            else:
+                overflow_texts.append(msg)
 
         if extra_links:
             extra_text = "其他圖片連結：\n" + "\n".join(extra_links)
             _append_text_to_first_message(messages, extra_text, mention_line_user_id)
 
+        # 超出的長文字段落改以 push 補送（reply token 只能用一次）
+        if overflow_texts:
+            overflow_target = await push_target() if push_target else None
+            if not overflow_target:
+                logger.warning(f"長文字超過單次回覆上限，{len(overflow_texts)} 段未送出（無 push 目標）")
+
     if not messages:
         return []
 
     # 發送訊息
-    return await reply_messages(reply_token, messages)
+    sent_ids = list(await reply_messages(reply_token, messages))
+    if overflow_target:
+        pushed_ids, error = await push_messages(overflow_target, overflow_texts)
+        sent_ids.extend(pushed_ids)
+        if error:
+            logger.warning(f"長文字補送失敗或部分失敗: {error}")
+    return sent_ids
 
 
 # ============================================================
@@ -636,6 +646,7 @@ async def process_message_with_ai(
         logger.debug(f"訊息不觸發 AI: {content[:50]}...")
         return None
 
+    triggered_at = time.monotonic()
     try:
         # 取得 Agent 設定
         # 群組 ID 轉換為字串（bot_groups.id 是 UUID）
@@ -706,10 +717,13 @@ async def process_message_with_ai(
             role=user_role,
         )
 
-        # 取得對話歷史（20 則提供更好的上下文理解，包含圖片和檔案）
+        # 取得對話歷史（依 token 預算由新到舊選取，包含圖片和檔案；較舊的對話以摘要呈現）
         # 排除當前訊息，避免重複（compose_prompt_with_history 會再加一次）
         history, images, files = await get_conversation_context(
-            line_group_id, line_user_id, limit=20, exclude_message_id=message_uuid
+            line_group_id,
+            line_user_id,
+            limit=settings.ai_context_max_messages,
+            exclude_message_id=message_uuid,
         )
 
         # 處理回覆舊訊息（quotedMessageId）- 圖片、檔案或文字
@@ -813,6 +827,14 @@ async def process_message_with_ai(
         # 取得需要的 MCP server 集合（按需載入）
         required_mcp_servers = await get_mcp_servers_for_user(app_permissions, role=user_role)
 
+        # 系統忙碌需要排隊時先告知使用者；此通知會用掉 reply token，AI 回覆改以 push 發送
+        async def _notify_queued(position: int) -> None:
+            nonlocal reply_token
+            if not reply_token or position <= 0:
+                return
+            token, reply_token = reply_token, None
+            await reply_text(token, f"⏳ 目前詢問的人較多，已排入佇列（第 {position} 位），輪到時會自動回覆。")
+
         # 計時開始
         start_time = time.time()
 
@@ -829,6 +851,12 @@ async def process_message_with_ai(
             tools=all_tools,
             required_mcp_servers=required_mcp_servers,
             ctos_user_id=ctos_user_id,
+            priority=Priority.GROUP if is_group else Priority.INTERACTIVE,
+            user_key=f"line:{line_user_id}" if line_user_id else None,
+            on_queued=_notify_queued,
+            session_key=conversation_session_key(
+                "line", line_user_id, str(line_group_id) if is_group else None,
+            ) if line_user_id else None,
         )
 
         # 計算耗時
@@ -964,6 +992,17 @@ async def process_message_with_ai(
         # 群組對話時，mention 發問的用戶
         line_message_ids = []
         reply_success = False
+        resolved_push_target: list[str | None] = []
+
+        async def resolve_push_target() -> str | None:
+            """push 發送目標（個人對話用 line_user_id，群組用 line_group_external_id），只查詢一次"""
+            if not resolved_push_target:
+                if is_group and line_group_id:
+                    resolved_push_target.append(await get_line_group_external_id(line_group_id))
+                else:
+                    resolved_push_target.append(line_user_id)
+            return resolved_push_target[0]
+
         if reply_token and (text_response or file_messages):
             try:
                 line_message_ids = await send_ai_response(
@@ -971,6 +1010,7 @@ async def process_message_with_ai(
                     text=text_response,
                     file_messages=file_messages,
                     mention_line_user_id=line_user_id if is_group else None,
+                    push_target=resolve_push_target,
                 )
                 reply_success = True
             except Exception as e:
@@ -979,12 +1019,7 @@ async def process_message_with_ai(
         # Reply 失敗時 fallback 到 push message（合併發送）
         if not reply_success and (text_response or file_messages):
             logger.info("嘗試使用 push message 發送訊息...")
-            # 取得發送目標（個人對話用 line_user_id，群組用 line_group_external_id）
-            push_target = None
-            if is_group and line_group_id:
-                push_target = await get_line_group_external_id(line_group_id)
-            else:
-                push_target = line_user_id
+            push_target = await resolve_push_target()
 
             if push_target:
                 # 建立訊息列表（合併文字和圖片訊息）
@@ -1018,18 +1053,26 @@ async def process_message_with_ai(
             else:
                 logger.warning("無法取得 push 發送目標")
 
+        if text_response or file_messages:
+            if reply_success:
+                delivery = "reply"
+            else:
+                delivery = "push" if line_message_ids else "failed"
+            bot_reply_seconds.observe(time.monotonic() - triggered_at, platform="line", delivery=delivery)
+
         # 儲存 Bot 回應到資料庫（包含所有 Line 訊息 ID）
         # 計算文字和圖片訊息的對應關係
-        # send_ai_response 順序：先文字（如有），再圖片
-        text_msg_count = 1 if text_response else 0
+        # send_ai_response 順序：先文字（如有，長文字分段時每段一則），再圖片
+        text_chunks = _split_long_text(text_response)
+        text_msg_count = len(text_chunks)
         image_messages = [f for f in file_messages if f.get("type") == "image"]
 
         for i, msg_id in enumerate(line_message_ids):
-            if i == 0 and text_response:
-                # 第一則是文字訊息
+            if i < text_msg_count:
+                # 文字訊息
                 await save_bot_response(
                     group_uuid=line_group_id,
-                    content=text_response,
+                    content=text_response if text_msg_count == 1 else text_chunks[i],
                     responding_to_line_user_id=line_user_id if not is_group else None,
                     line_message_id=msg_id,
                 )
@@ -1107,7 +1150,11 @@ async def log_linebot_ai_call(
 
         # 將 tool_calls 和 tool_timings 轉換為可序列化的格式
         parsed_response = None
-        if response.tool_calls or response.tool_timings or tool_routing:
+        session_reused = getattr(response, "session_reused", False) is True
+        context_stats = getattr(response, "context_stats", None)
+        if not isinstance(context_stats, dict):
+            context_stats = None
+        if response.tool_calls or response.tool_timings or tool_routing or session_reused or context_stats:
             parsed_response = {}
             if response.tool_calls:
                 parsed_response["tool_calls"] = [
@@ -1123,6 +1170,15 @@ async def log_linebot_ai_call(
                 parsed_response["tool_timings"] = response.tool_timings
             if tool_routing:
                 parsed_response["tool_routing"] = tool_routing
+            if session_reused:
+                # 沿用對話 session：實際只送出新訊息，input_prompt 仍記錄完整歷史供追查
+                parsed_response["session"] = {
+                    "reused": True,
+                    "tokens_saved": getattr(response, "tokens_saved", 0),
+                }
+            if context_stats:
+                # 上下文 token 分配（估計值），供調整 AI_CONTEXT_BUDGET_TOKENS 參考
+                parsed_response["context"] = context_stats
 
         # 組合完整輸入（含歷史對話）
         if history:
@@ -1178,14 +1234,126 @@ async def get_conversation_context(
         - images: 圖片資訊列表 [{"line_message_id": "...", "nas_path": "..."}]
         - files: 檔案資訊列表 [{"line_message_id": "...", "nas_path": "...", "file_name": "...", "file_size": ...}]
     """
-    from .bot_line import get_temp_image_path
+    key = conversation_key(line_group_id, line_user_id)
+    if key is None:
+        return [], [], []
+
+    rows = conversation_context_cache.get(key, limit, exclude_message_id)
+    if rows is None:
+        # 快取可容納時一次載入 capacity 筆（不排除當前訊息）並寫入快取
+        cacheable = conversation_context_cache.enabled and limit < conversation_context_cache.capacity
+        query_limit = conversation_context_cache.capacity if cacheable else limit
+        query_exclude = None if cacheable else exclude_message_id
+        rows = await _fetch_conversation_rows(line_group_id, line_user_id, query_limit, query_exclude)
+        if cacheable:
+            conversation_context_cache.fill(key, rows)
+            if exclude_message_id is not None:
+                excluded = str(exclude_message_id)
+                rows = [r for r in rows if str(r.get("id")) != excluded]
+            rows = rows[-limit:] if limit > 0 else []
+
+    rows, summary = await _window_conversation_rows(key, rows, limit)
+    context, images, files = await _format_conversation_rows(rows)
+    if summary:
+        context.insert(0, {"role": "system", "content": summary, "is_summary": True})
+    return context, images, files
+
+
+def _row_preview(row: dict) -> dict:
+    """估算 token 與產生摘要用的訊息內容（不建立附件暫存）"""
+    role = "assistant" if row["is_from_bot"] else "user"
+    if row["message_type"] == "image" and row["nas_path"]:
+        content = "[上傳圖片]"
+    elif row["message_type"] == "file" and row["nas_path"]:
+        content = f"[上傳檔案: {row['file_name'] or 'unknown'}]"
+    else:
+        content = row["content"] or ""
+    sender = row["display_name"] if not row["is_from_bot"] and row["display_name"] else None
+    return {"role": role, "content": content, "sender": sender}
+
+
+async def _window_conversation_rows(
+    key: ConversationKey,
+    rows: list[dict],
+    limit: int,
+) -> tuple[list[dict], str | None]:
+    """依 token 預算裁切上下文，並取得（必要時在背景更新）較舊訊息的滾動摘要
 
+    超出預算的訊息不建立附件暫存；累積足夠的未摘要訊息時以背景任務更新摘要。
+    rows 已達 limit 且摘要涵蓋範圍不在 rows 中時，較舊訊息可能在預算內就被擠出 limit，
+    由背景任務補查這段尚未摘要的訊息一併摘要。
+
+    Returns:
+        (放入上下文的 rows, 摘要內容)
+    """
+    previews = [_row_preview(row) for row in rows]
+    window = fit_history(previews, max_messages=limit)
+    # 整段對話都在預算內：不需要摘要
+    if not window.dropped and len(rows) < limit:
+        return rows, None
+    if not settings.ai_context_summary_enabled:
+        return rows[len(window.dropped):], None
+
+    stored = await conversation_summaries.get(key)
+    if stored is not None:
+        # 摘要也佔用預算
+        summary_message = {"role": "system", "content": stored.summary, "is_summary": True}
+        window = fit_history([summary_message, *previews], max_messages=limit)
+    dropped = len(window.dropped)
+
+    pending = conversation_summaries.uncovered(stored, rows, dropped)
+    backfill = None
+    if rows and len(rows) >= limit and not conversation_summaries.covers(stored, rows):
+        backfill = functools.partial(
+            _backfill_summary_rows,
+            key,
+            rows[0].get("id"),
+            stored.covered_message_id if stored else None,
+        )
+    if backfill is not None or len(pending) >= settings.ai_context_summary_min_messages:
+        offset = rows.index(pending[0]) if pending else 0
+        conversation_summaries.schedule_update(
+            key,
+            stored,
+            pending,
+            [{"role": m["role"], "content": m["content"]} for m in previews[offset:offset + len(pending)]],
+            backfill=backfill,
+        )
+    return rows[dropped:], stored.summary if stored else None
+
+
+async def _backfill_summary_rows(
+    key: ConversationKey,
+    before_id,
+    after_id: str | None,
+) -> tuple[list[dict], list[dict]]:
+    """查詢 before_id 之前、摘要涵蓋範圍（after_id）之後的訊息，供滾動摘要補上（由舊到新）"""
+    limit = settings.ai_context_summary_backfill_messages
+    if before_id is None or limit <= 0:
+        return [], []
+    rows = await _fetch_conversation_rows_before(
+        key,
+        UUID(str(before_id)),
+        UUID(after_id) if after_id else None,
+        limit,
+    )
+    previews = [_row_preview(row) for row in rows]
+    return rows, [{"role": m["role"], "content": m["content"]} for m in previews]
+
+
+async def _fetch_conversation_rows(
+    line_group_id: UUID | None,
+    line_user_id: str | None,
+    limit: int,
+    exclude_message_id: UUID | None,
+) -> list[dict]:
+    """從資料庫查詢對話上下文原始資料（由舊到新）"""
     async with get_connection() as conn:
         if line_group_id:
             # 群組對話（包含 text、image 和 file）
             rows = await conn.fetch(
                 """
-                SELECT m.content, m.is_from_bot, u.display_name,
+                SELECT m.id, m.content, m.is_from_bot, u.display_name,
                        m.message_type, m.message_id as line_message_id,
                        f.nas_path, f.file_name, f.file_size, f.file_type as actual_file_type
                 FROM bot_messages m
@@ -1206,7 +1374,7 @@ async def get_conversation_context(
             # 個人對話：查詢該用戶的對話歷史，考慮對話重置時間
             rows = await conn.fetch(
                 """
-                SELECT m.content, m.is_from_bot, u.display_name,
+                SELECT m.id, m.content, m.is_from_bot, u.display_name,
                        m.message_type, m.message_id as line_message_id,
                        f.nas_path, f.file_name, f.file_size, f.file_type as actual_file_type
                 FROM bot_messages m
@@ -1229,114 +1397,166 @@ async def get_conversation_context(
                 exclude_message_id,
             )
         else:
-            return [], [], []
+            return []
+
+    # 反轉順序（從舊到新）
+    return [dict(row) for row in reversed(rows)]
+
+
+async def _fetch_conversation_rows_before(
+    key: ConversationKey,
+    before_id: UUID,
+    after_id: UUID | None,
+    limit: int,
+) -> list[dict]:
+    """查詢早於 before_id、晚於 after_id 的上下文原始資料（最多 limit 則最新的，由舊到新）"""
+    kind, identifier = key
+    if kind == "group":
+        scope, scope_param = "m.bot_group_id = $1", UUID(identifier)
+    else:
+        scope_param = identifier
+        scope = """u.platform_user_id = $1
+                  AND m.bot_group_id IS NULL
+                  AND (u.conversation_reset_at IS NULL OR m.created_at > u.conversation_reset_at)"""
+    async with get_connection() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT m.id, m.content, m.is_from_bot, u.display_name,
+                   m.message_type, m.message_id as line_message_id,
+                   f.nas_path, f.file_name, f.file_size, f.file_type as actual_file_type
+            FROM bot_messages m
+            LEFT JOIN bot_users u ON m.bot_user_id = u.id
+            LEFT JOIN bot_files f ON f.message_id = m.id
+            WHERE {scope}
+              AND m.message_type IN ('text', 'image', 'file')
+              AND (m.content IS NOT NULL OR m.message_type IN ('image', 'file'))
+              AND m.created_at < (SELECT created_at FROM bot_messages WHERE id = $2)
+              AND m.created_at > COALESCE(
+                    (SELECT created_at FROM bot_messages WHERE id = $3), '-infinity'::timestamptz
+                  )
+            ORDER BY m.created_at DESC
+            LIMIT $4
+            """,
+            scope_param,
+            before_id,
+            after_id,
+            limit,
+        )
+    return [dict(row) for row in reversed(rows)]
 
-        # 反轉順序（從舊到新）
-        rows = list(reversed(rows))
 
-        # 找出最新的圖片訊息 ID（用於標記）
-        latest_image_id = None
-        for row in reversed(rows):  # 從新到舊找第一張有 nas_path 的圖片
-            if row["message_type"] == "image" and row["nas_path"]:
-                latest_image_id = row["line_message_id"]
-                break
+async def _format_conversation_rows(rows: list[dict]) -> tuple[list[dict], list[dict], list[dict]]:
+    """將上下文原始資料格式化為 (context, images, files)"""
+    # 找出最新的圖片訊息 ID（用於標記）
+    latest_image_id = None
+    for row in reversed(rows):  # 從新到舊找第一張有 nas_path 的圖片
+        if row["message_type"] == "image" and row["nas_path"]:
+            latest_image_id = row["line_message_id"]
+            break
 
-        # 找出最新的檔案訊息 ID（用於標記）
-        latest_file_id = None
-        for row in reversed(rows):
-            if row["message_type"] == "file" and row["nas_path"]:
-                latest_file_id = row["line_message_id"]
-                break
+    # 找出最新的檔案訊息 ID（用於標記）
+    latest_file_id = None
+    for row in reversed(rows):
+        if row["message_type"] == "file" and row["nas_path"]:
+            latest_file_id = row["line_message_id"]
+            break
 
-        context = []
-        images = []
-        files = []
+    context = []
+    images = []
+    files = []
 
-        for row in rows:
-            role = "assistant" if row["is_from_bot"] else "user"
+    for row in rows:
+        role = "assistant" if row["is_from_bot"] else "user"
 
-            if row["message_type"] == "image" and row["nas_path"]:
-                # 圖片訊息：確保暫存存在並格式化為特殊標記
-                temp_path = await ensure_temp_image(
-                    row["line_message_id"], row["nas_path"]
-                )
-                if temp_path:
-                    # 暫存成功，標記最新的圖片
-                    if row["line_message_id"] == latest_image_id:
-                        content = f"[上傳圖片（最近）: {temp_path}]"
-                    else:
-                        content = f"[上傳圖片: {temp_path}]"
-                    # 記錄圖片資訊（暫存成功才加入）
-                    images.append({
-                        "line_message_id": row["line_message_id"],
-                        "nas_path": row["nas_path"],
-                    })
+        if row["message_type"] == "image" and row["nas_path"]:
+            # 圖片訊息：確保暫存存在並格式化為特殊標記
+            temp_path = await ensure_temp_image(
+                row["line_message_id"], row["nas_path"]
+            )
+            if temp_path:
+                # 暫存成功，標記最新的圖片
+                if row["line_message_id"] == latest_image_id:
+                    content = f"[上傳圖片（最近）: {temp_path}]"
                 else:
-                    # 暫存失敗，提示使用 MCP 工具
-                    content = "[圖片暫存已過期，若要加入知識庫請使用 get_message_attachments]"
-            elif row["message_type"] == "file" and row["nas_path"]:
-                # 檔案訊息：根據是否可讀取決定顯示方式
-                file_name = row["file_name"] or "unknown"
-                file_size = row["file_size"]
-
-                if is_readable_file(file_name):
-                    if file_size and file_size > MAX_READABLE_FILE_SIZE:
-                        # 檔案過大無法讀取內容，但仍提供 NAS 路徑供歸檔等操作
-                        size_mb = file_size / 1024 / 1024
-                        content = (
-                            f"[上傳檔案: {file_name}（{size_mb:.1f} MB，"
-                            f"過大無法讀取內容，NAS 路徑: {row['nas_path']}）]"
-                        )
-                    else:
-                        # 可讀取的檔案：確保暫存存在
-                        temp_path = await ensure_temp_file(
-                            row["line_message_id"], row["nas_path"], file_name, file_size
-                        )
-                        if temp_path:
-                            # 使用共用函式解析 PDF 特殊格式
-                            pdf_path, txt_path = parse_pdf_temp_path(temp_path)
-                            is_recent = row["line_message_id"] == latest_file_id
-
-                            if pdf_path != temp_path:
-                                # 是 PDF 特殊格式
-                                if txt_path:
-                                    prefix = "上傳 PDF（最近）" if is_recent else "上傳 PDF"
-                                    content = f"[{prefix}: {pdf_path}（文字版: {txt_path}）]"
-                                else:
-                                    prefix = "上傳 PDF（最近）" if is_recent else "上傳 PDF"
-                                    content = f"[{prefix}: {pdf_path}（純圖片，無文字）]"
+                    content = f"[上傳圖片: {temp_path}]"
+                # 記錄圖片資訊（暫存成功才加入）
+                images.append({
+                    "line_message_id": row["line_message_id"],
+                    "nas_path": row["nas_path"],
+                })
+            else:
+                # 暫存失敗，提示使用 MCP 工具
+                content = "[圖片暫存已過期，若要加入知識庫請使用 get_message_attachments]"
+        elif row["message_type"] == "file" and row["nas_path"]:
+            # 檔案訊息：根據是否可讀取決定顯示方式
+            file_name = row["file_name"] or "unknown"
+            file_size = row["file_size"]
+
+            if is_readable_file(file_name):
+                if file_size and file_size > MAX_READABLE_FILE_SIZE:
+                    # 檔案過大無法讀取內容，但仍提供 NAS 路徑供歸檔等操作
+                    size_mb = file_size / 1024 / 1024
+                    content = (
+                        f"[上傳檔案: {file_name}（{size_mb:.1f} MB，"
+                        f"過大無法讀取內容，NAS 路徑: {row['nas_path']}）]"
+                    )
+                else:
+                    # 可讀取的檔案：確保暫存存在
+                    temp_path = await ensure_temp_file(
+                        row["line_message_id"], row["nas_path"], file_name, file_size
+                    )
+                    if temp_path:
+                        # 使用共用函式解析 PDF 特殊格式
+                        pdf_path, txt_path = parse_pdf_temp_path(temp_path)
+                        is_recent = row["line_message_id"] == latest_file_id
+
+                        if pdf_path != temp_path:
+                            # 是 PDF 特殊格式
+                            if txt_path:
+                                prefix = "上傳 PDF（最近）" if is_recent else "上傳 PDF"
+                                content = f"[{prefix}: {pdf_path}（文字版: {txt_path}）]"
                             else:
-                                # 一般檔案
-                                prefix = "上傳檔案（最近）" if is_recent else "上傳檔案"
-                                content = f"[{prefix}: {temp_path}]"
-                            # 記錄檔案資訊（暫存成功才加入）
-                            files.append({
-                                "line_message_id": row["line_message_id"],
-                                "nas_path": row["nas_path"],
-                                "file_name": file_name,
-                                "file_size": file_size,
-                            })
+                                prefix = "上傳 PDF（最近）" if is_recent else "上傳 PDF"
+                                content = f"[{prefix}: {pdf_path}（純圖片，無文字）]"
                         else:
-                            # 暫存失敗
-                            content = f"[檔案 {file_name} 暫存已過期，若要加入知識庫請使用 get_message_attachments]"
-                else:
-                    # 不可讀取的檔案類型
-                    if is_legacy_office_file(file_name):
-                        # 舊版 Office 格式，提示轉檔
-                        content = f"[上傳檔案: {file_name}（不支援舊版格式，請轉存為 .docx/.xlsx/.pptx）]"
+                            # 一般檔案
+                            prefix = "上傳檔案（最近）" if is_recent else "上傳檔案"
+                            content = f"[{prefix}: {temp_path}]"
+                        # 記錄檔案資訊（暫存成功才加入）
+                        files.append({
+                            "line_message_id": row["line_message_id"],
+                            "nas_path": row["nas_path"],
+                            "file_name": file_name,
+                            "file_size": file_size,
+                        })
                     else:
-                        content = f"[上傳檔案: {file_name}（無法讀取此類型）]"
+                        # 暫存失敗
+                        content = f"[檔案 {file_name} 暫存已過期，若要加入知識庫請使用 get_message_attachments]"
             else:
-                content = row["content"]
-
-            # 記錄發送者名稱（群組和個人對話都顯示）
-            sender = None
-            if not row["is_from_bot"] and row["display_name"]:
-                sender = row["display_name"]
-
-            context.append({"role": role, "content": content, "sender": sender})
-
-        return context, images, files
+                # 不可讀取的檔案類型
+                if is_legacy_office_file(file_name):
+                    # 舊版 Office 格式，提示轉檔
+                    content = f"[上傳檔案: {file_name}（不支援舊版格式，請轉存為 .docx/.xlsx/.pptx）]"
+                else:
+                    content = f"[上傳檔案: {file_name}（無法讀取此類型）]"
+        else:
+            content = row["content"]
+
+        # 記錄發送者名稱（群組和個人對話都顯示）
+        sender = None
+        if not row["is_from_bot"] and row["display_name"]:
+            sender = row["display_name"]
+
+        # id 供沿用中的 Claude session 判斷哪些訊息已看過
+        message_id = row.get("id")
+        context.append({
+            "role": role,
+            "content": content,
+            "sender": sender,
+            "id": str(message_id) if message_id is not None else None,
+        })
+
+    return context, images, files
 
 
 async def build_system_prompt(
@@ -4,7 +4,7 @@ import math
 from datetime import datetime
 from decimal import Decimal
 
-from ..database import get_connection
+from ..database import Workload, get_connection, use_workload
 from ..models.login_record import (
     DeviceInfo,
     GeoLocation,
@@ -303,6 +303,7 @@ async def get_recent_logins(
         return RecentLoginsResponse(items=items)
 
 
+@use_workload(Workload.ANALYTICS, readonly=True)
 async def get_login_stats(user_id: int | None = None, days: int = 30) -> dict:
     """取得登入統計資訊
 
@@ -0,0 +1,279 @@
+"""Event loop 健康監控
+
+整個 UI 卡住時，通常是某個 async handler 在 event loop 上做了同步工作
+（SMB、磁碟、bcrypt、subprocess）。這裡提供兩個互補的量測：
+
+- 排程延遲（lag）：event loop 上的取樣 task 每 interval 醒來一次，
+  實際醒來時間與預期的差值即為延遲，保留最近的樣本計算 p50/p99/max
+- 慢回呼（slow callback）：背景 watchdog 執行緒監看取樣 task 的心跳，
+  event loop 超過門檻未回應時，直接擷取 event loop 執行緒「當下」的堆疊，
+  並記錄正在執行的 task 與 HTTP 路由（由 LoopMonitorMiddleware 標記）
+
+不使用 asyncio debug 模式（對所有回呼計時成本太高，且只能在回呼結束後記錄，
+拿不到卡住當下的堆疊）。
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+
+from ..config import settings
+from .metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+# 保留的延遲樣本數（預設 100ms 取樣一次，約 10 分鐘）
+_LAG_SAMPLES = 6000
+
+# 保留的慢回呼事件數
+_SLOW_EVENTS = 50
+
+# 擷取的堆疊層數上限
+_STACK_LIMIT = 30
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _describe_task(task: asyncio.Task | None) -> str | None:
+    if task is None:
+        return None
+    coro = task.get_coro()
+    name = getattr(coro, "__qualname__", None) or repr(coro)
+    return f"{task.get_name()} ({name})"
+
+
+class LoopMonitor:
+    """event loop 延遲取樣與慢回呼偵測"""
+
+    def __init__(
+        self,
+        interval_ms: int = 100,
+        slow_callback_ms: int = 200,
+    ):
+        self.interval = max(interval_ms, 10) / 1000
+        self.slow_threshold = max(slow_callback_ms, 10) / 1000
+        self._lags: deque[float] = deque(maxlen=_LAG_SAMPLES)
+        self._events: deque[dict] = deque(maxlen=_SLOW_EVENTS)
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._sampler: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._last_tick = 0.0
+        self._current_event: dict | None = None
+        self._task_routes: dict[asyncio.Task, str] = {}
+        self.total_samples = 0
+        self.total_slow = 0
+        self.max_lag = 0.0
+        self.started_at: datetime | None = None
+
+    # ------------------------------------------------------------------
+    # 啟停
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._sampler is not None and not self._sampler.done()
+
+    def start(self) -> None:
+        """在目前的 event loop 啟動取樣 task 與 watchdog 執行緒"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self.started_at = datetime.now(timezone.utc)
+        self._sampler = self._loop.create_task(self._sample(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """停止取樣與 watchdog"""
+        self._stop.set()
+        sampler, self._sampler = self._sampler, None
+        if sampler is not None:
+            sampler.cancel()
+            try:
+                await sampler
+            except asyncio.CancelledError:
+                pass
+        watchdog, self._watchdog = self._watchdog, None
+        if watchdog is not None:
+            await asyncio.to_thread(watchdog.join, self.interval * 2)
+
+    # ------------------------------------------------------------------
+    # event loop 端：延遲取樣
+    # ------------------------------------------------------------------
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+            self.record_lag(max(0.0, now - expected))
+
+    def record_lag(self, lag: float) -> None:
+        """記錄一筆排程延遲（秒）"""
+        with self._lock:
+            self._lags.append(lag)
+            self.total_samples += 1
+            if lag > self.max_lag:
+                self.max_lag = lag
+            event, self._current_event = self._current_event, None
+        if event is not None:
+            # 卡住結束，補上實際阻塞時間
+            event["duration_ms"] = round(lag * 1000, 1)
+            logger.warning(
+                "Event loop 阻塞 %.0fms（task=%s, route=%s）",
+                lag * 1000,
+                event["task"],
+                event["route"],
+            )
+
+    # ------------------------------------------------------------------
+    # watchdog 執行緒：卡住當下擷取堆疊
+    # ------------------------------------------------------------------
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.slow_threshold) / 2
+        while not self._stop.wait(poll):
+            stalled = time.monotonic() - self._last_tick - self.interval
+            if stalled < self.slow_threshold:
+                continue
+            with self._lock:
+                if self._current_event is not None:
+                    self._current_event["duration_ms"] = round(stalled * 1000, 1)
+                    continue
+            self.capture_slow_event(stalled)
+
+    def capture_slow_event(self, stalled: float) -> dict:
+        """擷取 event loop 執行緒目前的堆疊與 task，記錄為一筆慢回呼事件"""
+        stack: list[str] = []
+        frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id else None
+        if frame is not None:
+            summary = traceback.extract_stack(frame, limit=_STACK_LIMIT)
+            stack = [f"{f.filename}:{f.lineno} in {f.name}" for f in summary]
+
+        task = None
+        if self._loop is not None:
+            try:
+                task = asyncio.current_task(self._loop)
+            except RuntimeError:
+                task = None
+
+        event = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(stalled * 1000, 1),
+            "task": _describe_task(task),
+            "route": self._task_routes.get(task) if task is not None else None,
+            "stack": stack,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._current_event = event
+            self.total_slow += 1
+        return event
+
+    # ------------------------------------------------------------------
+    # 路由標記（由 middleware 呼叫）
+    # ------------------------------------------------------------------
+
+    def tag_task(self, task: asyncio.Task, route: str) -> None:
+        self._task_routes[task] = route
+
+    def untag_task(self, task: asyncio.Task) -> None:
+        self._task_routes.pop(task, None)
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def summary(self) -> dict:
+        """精簡統計（供 /api/health）"""
+        with self._lock:
+            lags = sorted(self._lags)
+            total_slow = self.total_slow
+            max_lag = self.max_lag
+        return {
+            "running": self.running,
+            "lag_ms_p50": round(_percentile(lags, 50) * 1000, 1),
+            "lag_ms_p99": round(_percentile(lags, 99) * 1000, 1),
+            "lag_ms_max": round(max_lag * 1000, 1),
+            "slow_callbacks": total_slow,
+        }
+
+    def snapshot(self) -> dict:
+        """完整統計與最近的慢回呼事件（供管理員端點）"""
+        data = self.summary()
+        with self._lock:
+            events = [dict(e) for e in reversed(self._events)]
+            samples = len(self._lags)
+            total_samples = self.total_samples
+        data.update(
+            interval_ms=round(self.interval * 1000),
+            slow_callback_ms=round(self.slow_threshold * 1000),
+            samples=samples,
+            total_samples=total_samples,
+            started_at=self.started_at.isoformat() if self.started_at else None,
+            active_requests=len(self._task_routes),
+            recent_slow_callbacks=events,
+        )
+        return data
+
+    def reset(self) -> None:
+        """清除統計與事件記錄"""
+        with self._lock:
+            self._lags.clear()
+            self._events.clear()
+            self._current_event = None
+            self.total_samples = 0
+            self.total_slow = 0
+            self.max_lag = 0.0
+
+
+loop_monitor = LoopMonitor(
+    interval_ms=settings.loop_monitor_interval_ms,
+    slow_callback_ms=settings.loop_slow_callback_ms,
+)
+
+
+def _lag_samples() -> dict[tuple[str, ...], float]:
+    summary = loop_monitor.summary()
+    return {(stat,): summary[f"lag_ms_{stat}"] / 1000 for stat in ("p50", "p99", "max")}
+
+
+gauge(
+    "ctos_event_loop_lag_seconds",
+    "Event loop 排程延遲（最近樣本的 p50 / p99 / max）",
+    ("stat",),
+    callback=_lag_samples,
+)
+counter(
+    "ctos_event_loop_slow_callbacks_total",
+    "Event loop 阻塞超過門檻的次數",
+    callback=lambda: loop_monitor.total_slow,
+)
+
+
+def start_loop_monitor() -> None:
+    """應用程式啟動時呼叫（LOOP_MONITOR_ENABLED=false 時不啟動）"""
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+
+
+async def stop_loop_monitor() -> None:
+    """應用程式關閉時呼叫"""
+    await loop_monitor.stop()
@@ -0,0 +1,334 @@
+"""Marp 簡報渲染服務
+
+PDF 以常駐的 marp-cli server 模式轉換，避免每份簡報都重新啟動 marp 與 Chromium。
+HTML 一律以單次 `marp` 子行程轉換：server 模式會同時開啟 watch，回傳的 HTML 內嵌
+live-reload 用的 WebSocket script，不能直接存成簡報檔；HTML 轉換也不需要瀏覽器。
+
+- 渲染請求經由 semaphore 排隊，限制同時轉換數量
+- 渲染結果依 (Markdown, 主題, 格式) 的 hash 快取於磁碟
+- server 無法啟動時退回單次轉換，並以指數退避稍後重試啟動
+- 單份文件轉換失敗（HTTP 錯誤狀態）只對該文件改用單次轉換；
+  連線中斷或行程結束才關閉 server，下次請求重新啟動
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# 單次轉換逾時（秒）
+RENDER_TIMEOUT = 180
+
+# 等待 marp server 啟動的上限（秒）
+SERVER_STARTUP_TIMEOUT = 30
+
+# server 啟動失敗後的重試間隔（秒，指數退避）
+_SERVER_RETRY_BASE_SECONDS = 30
+_SERVER_RETRY_MAX_SECONDS = 600
+
+
+def resolve_marp_command() -> list[str]:
+    """取得 marp-cli 執行指令
+
+    優先使用 backend/node_modules 內的本地安裝版本，沒有時才 fallback 到 npx。
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(script_dir)))
+    marp_bin = os.path.join(backend_dir, "node_modules", ".bin", "marp")
+    if os.path.exists(marp_bin):
+        return [marp_bin]
+    return ["npx", "--yes", "@marp-team/marp-cli"]
+
+
+def render_cache_key(markdown: str, theme: str, output_format: str) -> str:
+    """計算渲染結果的快取 key"""
+    digest = hashlib.sha256()
+    for part in (output_format, theme, markdown):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """以檔案為單位的簡易磁碟快取
+
+    超過 max_entries 時依 mtime 刪除最舊的項目；命中時更新 mtime。
+    """
+
+    def __init__(self, directory: str | Path, max_entries: int = 200):
+        self._dir = Path(directory)
+        self._max_entries = max_entries
+
+    def _path(self, key: str) -> Path:
+        return self._dir / key
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._dir / f".{key}.{uuid.uuid4().hex}.tmp"
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"寫入快取失敗 {self._dir}: {e}")
+            return
+        self._prune()
+
+    def _prune(self) -> None:
+        try:
+            entries = [p for p in self._dir.iterdir() if p.is_file() and not p.name.startswith(".")]
+        except OSError:
+            return
+        overflow = len(entries) - self._max_entries
+        if overflow <= 0:
+            return
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for path in entries[:overflow]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MarpRenderer:
+    """常駐 marp-cli 渲染 worker
+
+    第一次 PDF 渲染時以 `marp --server` 啟動常駐行程，之後的 PDF 請求都透過 HTTP
+    （`?pdf`）取得轉換結果，由 marp-cli 重用同一個瀏覽器實例。
+    """
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        cache_dir: str | None = None,
+    ):
+        base_dir = Path(cache_dir or settings.presentation_cache_dir)
+        self._cache = DiskCache(base_dir / "renders")
+        self._semaphore = asyncio.Semaphore(
+            max(1, concurrency or settings.marp_render_concurrency)
+        )
+        self._input_dir = base_dir / "marp-input"
+        self._server_proc: asyncio.subprocess.Process | None = None
+        self._server_port: int | None = None
+        # 連續啟動失敗次數與下次可重試啟動的時間（monotonic）
+        self._server_failures = 0
+        self._server_retry_at = 0.0
+        self._start_lock = asyncio.Lock()
+        self._client: httpx.AsyncClient | None = None
+
+    async def render(self, markdown: str, output_format: str = "html", theme: str = "") -> bytes:
+        """將 Marp Markdown 轉換為 HTML 或 PDF
+
+        Args:
+            markdown: Marp Markdown 內容
+            output_format: 輸出格式（html 或 pdf）
+            theme: 主題名稱（納入快取 key）
+
+        Returns:
+            轉換結果（HTML 為 UTF-8 bytes）
+
+        Raises:
+            RuntimeError: marp-cli 轉換失敗
+        """
+        key = render_cache_key(markdown, theme, output_format)
+        # 快取與暫存檔的磁碟 I/O 都在 thread 中執行，不阻塞 event loop
+        cached = await asyncio.to_thread(self._cache.get, key)
+        if cached is not None:
+            logger.info(f"Marp 渲染快取命中: {key[:12]}")
+            return cached
+
+        async with self._semaphore:
+            # 排隊期間可能已有相同內容完成渲染
+            cached = await asyncio.to_thread(self._cache.get, key)
+            if cached is not None:
+                return cached
+
+            started = time.monotonic()
+            output = None
+            if output_format == "pdf" and await self._ensure_server():
+                try:
+                    output = await self._render_via_server(markdown, output_format)
+                except httpx.HTTPStatusError as e:
+                    # 這份文件轉換失敗，server 本身正常
+                    logger.warning(
+                        f"marp server 轉換失敗（HTTP {e.response.status_code}），改用單次轉換"
+                    )
+                except (httpx.HTTPError, OSError) as e:
+                    logger.warning(f"marp server 連線失敗，重新啟動並改用單次轉換: {e}")
+                    await self._stop_server()
+            if output is None:
+                output = await self._render_once(markdown, output_format)
+
+            logger.info(
+                f"Marp 渲染完成 ({output_format}): {int((time.monotonic() - started) * 1000)}ms"
+            )
+
+        await asyncio.to_thread(self._cache.set, key, output)
+        return output
+
+    # ------------------------------------------------------------
+    # 常駐 server 模式
+    # ------------------------------------------------------------
+
+    async def _ensure_server(self) -> bool:
+        """確保 marp server 正在執行，回傳是否可用（啟動失敗後的退避期間回傳 False）"""
+        if self._server_proc is not None and self._server_proc.returncode is None:
+            return True
+        if time.monotonic() < self._server_retry_at:
+            return False
+
+        async with self._start_lock:
+            if self._server_proc is not None and self._server_proc.returncode is None:
+                return True
+            if time.monotonic() < self._server_retry_at:
+                return False
+            try:
+                await self._start_server()
+            except (OSError, RuntimeError, asyncio.TimeoutError) as e:
+                self._server_failures += 1
+                delay = min(
+                    _SERVER_RETRY_MAX_SECONDS,
+                    _SERVER_RETRY_BASE_SECONDS * 2 ** (self._server_failures - 1),
+                )
+                self._server_retry_at = time.monotonic() + delay
+                logger.warning(f"marp server 啟動失敗，改用單次轉換，{delay} 秒後重試: {e}")
+                await self._stop_server()
+                return False
+            self._server_failures = 0
+            return True
+
+    async def _start_server(self) -> None:
+        await asyncio.to_thread(self._input_dir.mkdir, parents=True, exist_ok=True)
+        port = _find_free_port()
+        env = {**os.environ, "PORT": str(port)}
+        self._server_proc = await asyncio.create_subprocess_exec(
+            *resolve_marp_command(),
+            "--server",
+            "--html",
+            "--allow-local-files",
+            str(self._input_dir),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=env,
+        )
+        self._server_port = port
+        self._client = httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            timeout=RENDER_TIMEOUT,
+        )
+
+        deadline = time.monotonic() + SERVER_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._server_proc.returncode is not None:
+                raise RuntimeError(f"marp server 結束（exit={self._server_proc.returncode}）")
+            try:
+                response = await self._client.get("/", timeout=2.0)
+                if response.status_code < 500:
+                    logger.info(f"marp server 已啟動: port={port}")
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+        raise asyncio.TimeoutError("等待 marp server 啟動逾時")
+
+    async def _render_via_server(self, markdown: str, output_format: str) -> bytes:
+        name = f"{uuid.uuid4().hex}.md"
+        md_path = self._input_dir / name
+        await asyncio.to_thread(md_path.write_text, markdown, encoding="utf-8")
+        try:
+            url = f"/{name}?pdf" if output_format == "pdf" else f"/{name}"
+            response = await self._client.get(url)
+            response.raise_for_status()
+            return response.content
+        finally:
+            await asyncio.to_thread(md_path.unlink, missing_ok=True)
+
+    async def _stop_server(self) -> None:
+        proc, self._server_proc = self._server_proc, None
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+        if proc is not None and proc.returncode is None:
+            proc.terminate()
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                proc.kill()
+
+    async def close(self) -> None:
+        """停止常駐 server（應用程式關閉時呼叫）"""
+        await self._stop_server()
+        shutil.rmtree(self._input_dir, ignore_errors=True)
+
+    # ------------------------------------------------------------
+    # 單次轉換（fallback）
+    # ------------------------------------------------------------
+
+    async def _render_once(self, markdown: str, output_format: str) -> bytes:
+        if output_format == "pdf":
+            output_ext = ".pdf"
+            marp_args = ["--pdf", "--allow-local-files", "--no-stdin"]
+        else:
+            output_ext = ".html"
+            marp_args = ["--html", "--no-stdin"]
+
+        with tempfile.TemporaryDirectory(prefix="marp-") as tmp_dir:
+            md_path = Path(tmp_dir) / "slides.md"
+            output_path = Path(tmp_dir) / f"slides{output_ext}"
+            await asyncio.to_thread(md_path.write_text, markdown, encoding="utf-8")
+
+            proc = await asyncio.create_subprocess_exec(
+                *resolve_marp_command(),
+                str(md_path),
+                "-o",
+                str(output_path),
+                *marp_args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout=RENDER_TIMEOUT)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise RuntimeError(f"marp-cli 轉換逾時（{RENDER_TIMEOUT} 秒）")
+
+            if proc.returncode != 0:
+                error_msg = stderr.decode("utf-8", errors="replace") if stderr else ""
+                logger.error(f"marp-cli 錯誤: {error_msg}")
+                raise RuntimeError(f"marp-cli 轉換失敗: {error_msg}")
+
+            return await asyncio.to_thread(output_path.read_bytes)
+
+
+# 全域 Marp 渲染器實例
+marp_renderer = MarpRenderer()
@@ -12,6 +12,7 @@ from .server import (
     check_mcp_tool_permission,
     _LIST_ALL_KNOWLEDGE_QUERIES,
 )
+from .tool_cache import cached_tool, invalidates
 from ...database import get_connection
 
 
@@ -73,6 +74,7 @@ async def _determine_knowledge_scope(
 
 
 @mcp.tool()
+@cached_tool("knowledge")
 async def search_knowledge(
     query: str,
     project: str | None = None,
@@ -163,6 +165,7 @@ async def search_knowledge(
 
 
 @mcp.tool()
+@cached_tool("knowledge")
 async def get_knowledge_item(
     kb_id: str,
     ctos_user_id: int | None = None,
@@ -217,6 +220,7 @@ async def get_knowledge_item(
 
 
 @mcp.tool()
+@invalidates("knowledge")
 async def update_knowledge_item(
     kb_id: str,
     title: str | None = None,
@@ -304,6 +308,7 @@ async def update_knowledge_item(
 
 
 @mcp.tool()
+@invalidates("knowledge")
 async def add_attachments_to_knowledge(
     kb_id: str,
     attachments: list[str],
@@ -381,6 +386,7 @@ async def add_attachments_to_knowledge(
 
 
 @mcp.tool()
+@invalidates("knowledge")
 async def delete_knowledge_item(
     kb_id: str,
     ctos_user_id: int | None = None,
@@ -411,6 +417,7 @@ async def delete_knowledge_item(
 
 
 @mcp.tool()
+@cached_tool("knowledge")
 async def get_knowledge_attachments(
     kb_id: str,
     ctos_user_id: int | None = None,
@@ -462,6 +469,7 @@ async def get_knowledge_attachments(
 
 
 @mcp.tool()
+@invalidates("knowledge")
 async def update_knowledge_attachment(
     kb_id: str,
     attachment_index: int,
@@ -504,6 +512,7 @@ async def update_knowledge_attachment(
 
 
 @mcp.tool()
+@cached_tool("knowledge")
 async def read_knowledge_attachment(
     kb_id: str,
     attachment_index: int = 0,
@@ -582,6 +591,7 @@ async def read_knowledge_attachment(
 
 
 @mcp.tool()
+@invalidates("knowledge")
 async def add_note(
     title: str,
     content: str,
@@ -662,6 +672,7 @@ async def add_note(
 
 
 @mcp.tool()
+@invalidates("knowledge")
 async def add_note_with_attachments(
     title: str,
     content: str,
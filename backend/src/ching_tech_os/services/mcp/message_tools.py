@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 from uuid import UUID
 
 from .server import mcp, logger, ensure_db_connection, to_taipei_time
+from .tool_cache import cached_tool
 from ...database import get_connection
 
 
@@ -71,6 +72,8 @@ async def summarize_chat(
 
 
 @mcp.tool()
+# 新附件隨使用者傳訊而增加，保留時間較短
+@cached_tool("attachments", ttl=60)
 async def get_message_attachments(
     line_user_id: str | None = None,
     line_group_id: str | None = None,
@@ -13,6 +13,7 @@ from pathlib import Path as FsPath
 from uuid import UUID
 
 from .server import mcp, logger, ensure_db_connection, check_mcp_tool_permission, to_taipei_time, TAIPEI_TZ
+from .tool_cache import cached_tool, invalidates
 from ...database import get_connection
 from ..shared_source_permissions import (
     SharedSourceAccessDeniedError,
@@ -127,6 +128,7 @@ def _get_knowledge_paths():
 
 
 @mcp.tool()
+@cached_tool("nas")
 async def search_nas_files(
     keywords: str,
     file_types: str | None = None,
@@ -346,6 +348,7 @@ async def search_nas_files(
 
 
 @mcp.tool()
+@cached_tool("nas")
 async def get_nas_file_info(
     file_path: str,
     ctos_user_id: int | None = None,
@@ -1052,6 +1055,7 @@ def _walk_tree(
 
 
 @mcp.tool()
+@invalidates("nas")
 async def archive_to_library(
     source_path: str,
     category: str,
@@ -52,6 +52,7 @@ async def manage_scheduled_task(
     trigger_config: JSON 字串，cron 範例 {"hour": "8", "minute": "0"}，interval 範例 {"hours": 1}
     executor_type: "agent" 或 "skill_script"
     executor_config: JSON 字串，agent 範例 {"agent_name": "bot", "prompt": "執行每日報告"}，
+                     可加 "notify_targets": [{"platform": "line", "target": "C..."}] 推送執行結果，
                      skill_script 範例 {"skill": "my-skill", "script": "run.py"}
     """
     await ensure_db_connection()
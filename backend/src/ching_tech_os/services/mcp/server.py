@@ -46,7 +46,7 @@ async def ensure_db_connection():
     from ...database import _pool
     if _pool is None:
         logger.info("初始化資料庫連線池...")
-        await init_db_pool()
+        await init_db_pool(compact=True)
 
 
 # ============================================================
@@ -0,0 +1,234 @@
+"""唯讀 MCP 工具結果快取
+
+同一回合、以及沿用 session 的連續回合中，模型常以相同參數重複呼叫唯讀工具
+（search_knowledge、get_knowledge_item、search_nas_files、get_nas_file_info、
+get_message_attachments…），每次都重新查權限、查資料庫、掃描檔案系統。
+
+- 以 @cached_tool 宣告可快取的唯讀工具（放在 @mcp.tool() 之下），
+  key 為 (工具, 正規化參數, 使用者)，結果保留 MCP_TOOL_CACHE_TTL_SECONDS
+- 以 @invalidates 宣告寫入工具，執行後清除同一標籤的快取
+- 快取在 MCP server 行程內（每個 Claude session 一個行程），只在 call_claude 啟動的
+  server 中啟用（注入 CTOS_TOOL_CACHE_LOG）；命中與否寫入該檔案，
+  由 call_claude 併入工具執行時間（tool_timings）統計
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from ...config import settings
+
+logger = logging.getLogger("mcp_server")
+
+# call_claude 注入的事件檔路徑（未設定時不啟用快取）
+TOOL_CACHE_LOG_ENV = "CTOS_TOOL_CACHE_LOG"
+TOOL_CACHE_LOG_FILE = ".tool-cache-events.jsonl"
+
+# 錯誤訊息不快取（權限、參數錯誤等應在下次呼叫重新判斷）
+_UNCACHEABLE_PREFIXES = ("❌", "錯誤", "搜尋失敗", "執行失敗", "搜尋時發生錯誤")
+
+
+def _is_cacheable(result: Any) -> bool:
+    return isinstance(result, str) and bool(result) and not result.startswith(_UNCACHEABLE_PREFIXES)
+
+
+class ToolResultCache:
+    """工具結果快取（TTL + LRU 筆數上限）"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # key -> (到期時間, 標籤, 結果)
+        self._entries: OrderedDict[str, tuple[float, frozenset[str], str]] = OrderedDict()
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0 and bool(os.environ.get(TOOL_CACHE_LOG_ENV))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, _, result = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: str, tags: frozenset[str], ttl: int | None = None) -> None:
+        expires = time.monotonic() + (ttl if ttl is not None else self.ttl_seconds)
+        self._entries[key] = (expires, tags, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *tags: str) -> int:
+        """清除帶有任一標籤的快取，回傳清除筆數"""
+        targets = set(tags)
+        stale = [key for key, (_, entry_tags, _) in self._entries.items() if entry_tags & targets]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def record(self, tool: str, hit: bool) -> None:
+        counts = self.hits if hit else self.misses
+        counts[tool] = counts.get(tool, 0) + 1
+        _write_event(tool, "hit" if hit else "miss")
+
+    def stats(self) -> dict:
+        hits = sum(self.hits.values())
+        lookups = hits + sum(self.misses.values())
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+        }
+
+
+tool_cache = ToolResultCache(
+    ttl_seconds=settings.mcp_tool_cache_ttl_seconds,
+    max_entries=settings.mcp_tool_cache_max_entries,
+)
+
+
+def _write_event(tool: str, result: str) -> None:
+    path = os.environ.get(TOOL_CACHE_LOG_ENV)
+    if not path:
+        return
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"tool": tool, "result": result}) + "\n")
+    except OSError as e:
+        logger.debug(f"寫入工具快取事件失敗: {e}")
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def _cache_key(tool: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    """(工具, 正規化參數, 使用者) 組成的快取 key"""
+    from .server import resolve_ctos_user_id
+
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = {name: _normalize(value) for name, value in bound.arguments.items()}
+    # 使用者身分一律以解析後的 ctos_user_id 為準（參數未帶時 fallback 環境變數）
+    user = resolve_ctos_user_id(arguments.pop("ctos_user_id", None))
+    return json.dumps([tool, user, arguments], ensure_ascii=False, sort_keys=True, default=str)
+
+
+def cached_tool(
+    *tags: str,
+    ttl: int | None = None,
+) -> Callable[[Callable[..., Awaitable[str]]], Callable[..., Awaitable[str]]]:
+    """宣告唯讀工具的結果可快取
+
+    Args:
+        tags: 失效標籤，對應的寫入工具以 @invalidates(tag) 清除
+        ttl: 保留秒數（None 使用 MCP_TOOL_CACHE_TTL_SECONDS）
+    """
+    tag_set = frozenset(tags)
+
+    def decorator(func: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+        signature = inspect.signature(func)
+        tool = func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> str:
+            if not tool_cache.enabled:
+                return await func(*args, **kwargs)
+            key = _cache_key(tool, signature, args, kwargs)
+            cached = tool_cache.get(key)
+            if cached is not None:
+                tool_cache.record(tool, hit=True)
+                return cached
+            result = await func(*args, **kwargs)
+            if _is_cacheable(result):
+                tool_cache.put(key, result, tag_set, ttl)
+            tool_cache.record(tool, hit=False)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(*tags: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """宣告寫入工具：執行後清除帶有這些標籤的快取（失敗時也清除，避免部分寫入後讀到舊資料）"""
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                if len(tool_cache):
+                    tool_cache.invalidate(*tags)
+
+        return wrapper
+
+    return decorator
+
+
+class ToolCacheEventLog:
+    """call_claude 端讀取 MCP server 寫入的快取事件，對應到各次工具呼叫"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # 沿用 session 時檔案保留前幾回合的事件，只讀取本回合新增的部分
+        try:
+            self._offset = os.path.getsize(path)
+        except OSError:
+            self._offset = 0
+        self._pending: list[tuple[str, str]] = []
+
+    def _read_new(self) -> None:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return
+        # 只處理完整的行，寫到一半的行留待下次
+        end = data.rfind(b"\n")
+        if end < 0:
+            return
+        self._offset += end + 1
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            try:
+                event = json.loads(line)
+                self._pending.append((str(event["tool"]), str(event["result"])))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    def pop(self, tool_name: str) -> str | None:
+        """取出指定工具最早一筆未對應的事件（hit / miss），沒有則回傳 None"""
+        self._read_new()
+        for index, (tool, result) in enumerate(self._pending):
+            if tool_name == tool or tool_name.endswith(f"__{tool}"):
+                del self._pending[index]
+                return result
+        return None
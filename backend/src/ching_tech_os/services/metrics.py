@@ -0,0 +1,266 @@
+"""程序內指標（Prometheus 文字格式）
+
+不依賴外部套件或服務：各模組以 counter() / gauge() / histogram() 取得指標並更新，
+`/metrics` 端點以 render() 輸出 Prometheus exposition format（0.0.4）。
+
+設計重點：
+- 更新路徑只有 dict 查找與數值加總（histogram 另加一次 bisect），
+  成本遠低於被量測的操作本身
+- 指標只在 event loop 執行緒更新，不加鎖
+- 連線池使用量、佇列深度等「狀態值」以 callback 在輸出時讀取，平時零成本
+
+使用方式：
+    _calls = histogram("ctos_claude_call_seconds", "call_claude 耗時", ("model", "outcome"))
+    _calls.observe(elapsed, model="sonnet", outcome="success")
+"""
+
+import logging
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 預設 histogram 分界（秒）：涵蓋毫秒級 DB 操作到數分鐘的 AI 呼叫
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelValues = tuple[str, ...]
+SampleCallback = Callable[[], float | dict[LabelValues, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """指標基底類別"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple(str(labels[n]) for n in self.labelnames)
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name} 需要標籤 {self.labelnames}，收到 {tuple(labels)}")
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """清除累計值（測試用）"""
+
+
+class _ValueMetric(_Metric):
+    """單一數值的指標（counter / gauge），可改由 callback 在輸出時取值"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        callback: SampleCallback | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def _samples(self) -> dict[LabelValues, float]:
+        if self._callback is None:
+            return self._values
+        try:
+            result = self._callback()
+        except Exception as e:  # 指標輸出不應影響服務
+            logger.debug(f"指標 {self.name} callback 失敗: {e}")
+            return {}
+        if isinstance(result, dict):
+            return result
+        return {(): float(result)}
+
+    def value(self, **labels: str) -> float:
+        return self._samples().get(self._key(labels), 0.0)
+
+    def _render_samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._samples().items())
+        ]
+
+    def reset(self) -> None:
+        self._values.clear()
+
+
+class Counter(_ValueMetric):
+    """只增不減的累計值"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_ValueMetric):
+    """可增可減的目前值"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """分布統計（累積 bucket、總和、次數）"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [各 bucket 次數（非累積，最後一格為 +Inf）..., sum, count]
+        self._data: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        data = self._data.get(key)
+        if data is None:
+            data = self._data[key] = [0] * (len(self.buckets) + 3)
+        data[bisect_left(self.buckets, value)] += 1
+        data[-2] += value
+        data[-1] += 1
+
+    def count(self, **labels: str) -> int:
+        data = self._data.get(self._key(labels))
+        return int(data[-1]) if data else 0
+
+    def sum(self, **labels: str) -> float:
+        data = self._data.get(self._key(labels))
+        return data[-2] if data else 0.0
+
+    def _render_samples(self) -> list[str]:
+        lines = []
+        bounds = [*self.buckets, float("inf")]
+        for key, data in sorted(self._data.items()):
+            cumulative = 0
+            for bound, n in zip(bounds, data):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {int(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(data[-2])}")
+            lines.append(f"{self.name}_count{labels} {int(data[-1])}")
+        return lines
+
+    def reset(self) -> None:
+        self._data.clear()
+
+
+class MetricsRegistry:
+    """指標註冊表（同名指標只建立一次）"""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls: type, name: str, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"指標 {name} 已註冊為 {metric.type_name}")
+        return metric
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """清除所有累計值（測試用；callback 指標不受影響）"""
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+# Prometheus 文字格式的 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    callback: SampleCallback | None = None,
+) -> Counter:
+    """取得（或建立）counter"""
+    return registry._get_or_create(Counter, name, documentation, labelnames, callback)
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    callback: SampleCallback | None = None,
+) -> Gauge:
+    """取得（或建立）gauge"""
+    return registry._get_or_create(Gauge, name, documentation, labelnames, callback)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """取得（或建立）histogram"""
+    return registry._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+
+def render_metrics() -> str:
+    """輸出所有指標（Prometheus 文字格式）"""
+    return registry.render()
@@ -1,12 +1,18 @@
 """密碼管理服務
 
 提供密碼雜湊、驗證和安全相關功能
+
+bcrypt 為刻意設計的慢速運算（每次約數十到數百毫秒），在 async 路徑中
+請使用 hash_password_async / verify_password_async，改在認證執行緒池執行，
+避免登入尖峰時阻塞 event loop。
 """
 
 import secrets
 import string
 import bcrypt
 
+from .workers import run_in_auth_pool
+
 
 def hash_password(password: str) -> str:
     """
@@ -43,6 +49,39 @@ def verify_password(password: str, password_hash: str) -> bool:
         return False
 
 
+async def hash_password_async(password: str, client_key: str | None = None) -> str:
+    """hash_password 的非同步版本（在認證執行緒池執行）
+
+    Args:
+        password: 明文密碼
+        client_key: 來源識別（通常為 IP），用於單一來源並行上限
+
+    Raises:
+        AuthPoolBusyError: 認證執行緒池忙碌
+    """
+    return await run_in_auth_pool(hash_password, password, client_key=client_key)
+
+
+async def verify_password_async(
+    password: str,
+    password_hash: str,
+    client_key: str | None = None,
+) -> bool:
+    """verify_password 的非同步版本（在認證執行緒池執行）
+
+    Args:
+        password: 明文密碼
+        password_hash: bcrypt 雜湊字串
+        client_key: 來源識別（通常為 IP），用於單一來源並行上限
+
+    Raises:
+        AuthPoolBusyError: 認證執行緒池忙碌
+    """
+    return await run_in_auth_pool(
+        verify_password, password, password_hash, client_key=client_key
+    )
+
+
 def generate_temporary_password(length: int = 12) -> str:
     """
     產生隨機臨時密碼
@@ -3,11 +3,15 @@
 使用 Marp 生成 HTML/PDF 簡報，Claude CLI 生成大綱，Pexels/AI 配圖。
 """
 
+import asyncio
+import base64
+import hashlib
 import json
 import logging
 import os
 import re
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
 
 import httpx
@@ -15,8 +19,10 @@ import httpx
 from ..config import settings
 from .smb import SMBService
 from .workers import run_in_smb_pool
+from .ai_admission import Priority
 from .claude_agent import call_claude
 from .huggingface_image import generate_image_with_flux, is_fallback_available
+from .marp_renderer import DiskCache, marp_renderer
 
 logger = logging.getLogger("presentation")
 
@@ -120,6 +126,7 @@ layout 類型說明：
             prompt=prompt,
             model="sonnet",
             timeout=120,
+            priority=Priority.BACKGROUND,
         )
 
         if not response.success:
@@ -228,6 +235,7 @@ async def generate_nanobanana_image(keyword: str) -> Optional[bytes]:
             model="haiku",
             timeout=120,
             tools=["mcp__nanobanana__generate_image"],
+            priority=Priority.BACKGROUND,
         )
 
         if not response.success:
@@ -273,6 +281,62 @@ async def fetch_image(keyword: str, source: str = "pexels") -> Optional[bytes]:
         return await fetch_pexels_image(keyword)
 
 
+# 關鍵字 → 圖片的磁碟快取（同一關鍵字重新生成簡報時不再重新下載/生成）
+_image_cache = DiskCache(Path(settings.presentation_cache_dir) / "images", max_entries=500)
+
+
+def _image_cache_key(keyword: str, source: str) -> str:
+    normalized = " ".join(keyword.lower().split())
+    return hashlib.sha256(f"{source}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+async def fetch_image_cached(keyword: str, source: str = "pexels") -> Optional[bytes]:
+    """取得圖片（優先使用關鍵字快取）"""
+    key = _image_cache_key(keyword, source)
+    cached = await asyncio.to_thread(_image_cache.get, key)
+    if cached is not None:
+        return cached
+
+    image_bytes = await fetch_image(keyword, source)
+    if image_bytes:
+        await asyncio.to_thread(_image_cache.set, key, image_bytes)
+    return image_bytes
+
+
+async def attach_slide_images(outline: dict, image_source: str = "pexels") -> None:
+    """並行為內容頁取得配圖，並以 base64 data URL 寫入 image_url"""
+    targets = [
+        slide_data
+        for slide_data in outline.get("slides", [])
+        if slide_data.get("layout", slide_data.get("type", "content")) not in ["title", "section"]
+        and slide_data.get("image_keyword")
+    ]
+    if not targets:
+        return
+
+    semaphore = asyncio.Semaphore(max(1, settings.presentation_image_concurrency))
+
+    async def _fetch(keyword: str) -> Optional[bytes]:
+        async with semaphore:
+            return await fetch_image_cached(keyword, image_source)
+
+    # 相同關鍵字只取一次
+    keywords = list(dict.fromkeys(slide["image_keyword"] for slide in targets))
+    results = await asyncio.gather(*(_fetch(k) for k in keywords), return_exceptions=True)
+    images: dict[str, bytes] = {}
+    for keyword, result in zip(keywords, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"配圖失敗 ({keyword}): {result}")
+        elif result:
+            images[keyword] = result
+
+    for slide_data in targets:
+        image_bytes = images.get(slide_data["image_keyword"])
+        if image_bytes:
+            b64 = base64.b64encode(image_bytes).decode("utf-8")
+            slide_data["image_url"] = f"data:image/jpeg;base64,{b64}"
+
+
 # ============================================================
 # 工具函數
 # ============================================================
@@ -386,9 +450,6 @@ async def generate_html_presentation(
     Returns:
         包含簡報資訊和 NAS 路徑的 dict
     """
-    import subprocess
-    import tempfile
-
     # 1. 取得大綱
     if outline_json:
         if isinstance(outline_json, str):
@@ -398,64 +459,21 @@ async def generate_html_presentation(
     else:
         outline = await generate_outline(topic, num_slides, theme)
 
-    # 2. 為每張投影片配圖
+    # 2. 為每張投影片配圖（並行 + 關鍵字快取）
     if include_images:
-        for slide_data in outline.get("slides", []):
-            slide_type = slide_data.get("layout", slide_data.get("type", "content"))
-            if slide_type not in ["title", "section"] and slide_data.get("image_keyword"):
-                image_bytes = await fetch_image(slide_data["image_keyword"], image_source)
-                if image_bytes:
-                    import base64
-                    b64 = base64.b64encode(image_bytes).decode("utf-8")
-                    slide_data["image_url"] = f"data:image/jpeg;base64,{b64}"
+        await attach_slide_images(outline, image_source)
 
     # 3. 生成 Marp Markdown
     marp_md = generate_marp_markdown(outline, theme, include_images)
 
-    # 4. 使用 marp-cli 轉換
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False, encoding="utf-8") as md_file:
-        md_file.write(marp_md)
-        md_path = md_file.name
-
+    # 4. 使用常駐 marp-cli 轉換（結果依內容 hash 快取）
+    rendered = await marp_renderer.render(marp_md, output_format, theme=theme)
     if output_format == "pdf":
         output_ext = ".pdf"
-        marp_args = ["--pdf", "--allow-local-files", "--no-stdin"]
+        output_content = rendered
     else:
         output_ext = ".html"
-        marp_args = ["--html", "--no-stdin"]
-
-    output_path = md_path.replace(".md", output_ext)
-
-    # 使用本地安裝的 marp-cli（避免 npx 每次下載）
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(script_dir)))
-    marp_bin = os.path.join(backend_dir, "node_modules", ".bin", "marp")
-
-    # 如果本地沒有，fallback 到 npx
-    if not os.path.exists(marp_bin):
-        marp_cmd = ["npx", "--yes", "@marp-team/marp-cli"]
-    else:
-        marp_cmd = [marp_bin]
-
-    try:
-        result = subprocess.run(
-            marp_cmd + [md_path, "-o", output_path] + marp_args,
-            capture_output=True,
-            text=True,
-            timeout=180,  # 增加超時時間到 3 分鐘
-        )
-        if result.returncode != 0:
-            logger.error(f"marp-cli 錯誤: {result.stderr}")
-            raise RuntimeError(f"marp-cli 轉換失敗: {result.stderr}")
-
-        with open(output_path, "rb" if output_format == "pdf" else "r", encoding=None if output_format == "pdf" else "utf-8") as f:
-            output_content = f.read()
-
-    finally:
-        if os.path.exists(md_path):
-            os.unlink(md_path)
-        if os.path.exists(output_path):
-            os.unlink(output_path)
+        output_content = rendered.decode("utf-8")
 
     # 5. 儲存到 NAS
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -73,23 +73,18 @@ async def notify_job_complete(
 
 
 async def _push_line(to: str, message: str) -> None:
-    """透過 Line Push API 發送訊息"""
-    from .bot_line.messaging import push_text
-    _msg_id, error = await push_text(to, message)
-    if error:
-        logger.warning(f"Line push 失敗: {error}")
+    """透過 Line Push API 發送訊息（超過字數上限時分段）"""
+    from .bot.delivery import deliver, text_messages
+
+    result = await deliver("line", to, text_messages("line", message))
+    if result.error:
+        logger.warning(f"Line push 失敗: {result.error}")
 
 
 async def _push_telegram(chat_id: str, message: str) -> None:
-    """透過 Telegram Bot API 發送訊息"""
-    from .bot_settings import get_bot_credentials
-    from .bot_telegram.adapter import TelegramBotAdapter
-
-    credentials = await get_bot_credentials("telegram")
-    token = credentials.get("bot_token", "")
-    if not token:
-        logger.warning("Telegram bot_token 未設定，無法推送")
-        return
+    """透過 Telegram Bot API 發送訊息（超過字數上限時分段）"""
+    from .bot.delivery import deliver, text_messages
 
-    adapter = TelegramBotAdapter(token=token)
-    await adapter.send_text(chat_id, message)
+    result = await deliver("telegram", chat_id, text_messages("telegram", message))
+    if result.error:
+        logger.warning(f"Telegram push 失敗: {result.error}")
@@ -38,6 +38,7 @@ from .local_file import LocalFileService, LocalFileError, create_project_file_se
 
 
 from .errors import ServiceError
+from .text_search import build_search_clause
 
 
 class ProjectError(ServiceError):
@@ -64,52 +65,111 @@ class ProjectNotFoundError(ProjectError):
 async def list_projects(
     status: str | None = None,
     query: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    updated_since: datetime | None = None,
 ) -> ProjectListResponse:
-    """列出專案"""
-    async with get_connection() as conn:
-        # 建立查詢
-        sql = """
-            SELECT
-                p.id, p.name, p.status, p.start_date, p.end_date, p.updated_at,
-                (SELECT COUNT(*) FROM project_members WHERE project_id = p.id) as member_count,
-                (SELECT COUNT(*) FROM project_meetings WHERE project_id = p.id) as meeting_count,
-                (SELECT COUNT(*) FROM project_attachments WHERE project_id = p.id) as attachment_count
-            FROM projects p
-            WHERE 1=1
-        """
-        params = []
-        param_idx = 1
-
-        if status:
-            sql += f" AND p.status = ${param_idx}"
-            params.append(status)
-            param_idx += 1
+    """列出專案
 
-        if query:
-            sql += f" AND (p.name ILIKE ${param_idx} OR p.description ILIKE ${param_idx})"
-            params.append(f"%{query}%")
-            param_idx += 1
+    成員、會議、附件數量以分組彙總一次取得（只針對目前這一頁的專案），
+    不再對每個專案執行相關子查詢。
 
-        sql += " ORDER BY p.updated_at DESC"
+    Args:
+        status: 狀態過濾
+        query: 關鍵字（名稱、描述）
+        limit: 每頁數量（None 表示全部）
+        offset: 偏移量
+        updated_since: 只列出此時間之後更新的專案
+
+    Returns:
+        ProjectListResponse（total 為符合條件的總數，不受分頁影響）
+    """
+    conditions = ["1=1"]
+    params: list = []
+    param_idx = 1
+
+    if status:
+        conditions.append(f"p.status = ${param_idx}")
+        params.append(status)
+        param_idx += 1
+
+    if updated_since:
+        conditions.append(f"p.updated_at >= ${param_idx}")
+        params.append(updated_since)
+        param_idx += 1
+
+    order_by = "p.updated_at DESC, p.id"
+    clause = build_search_clause(query, param_idx, column="p.search_text")
+    if clause:
+        conditions.append(clause.where)
+        params.extend(clause.params)
+        param_idx = clause.next_param_idx
+        order_by = f"{clause.order_by}, {order_by}"
+
+    where_clause = " AND ".join(conditions)
+    page_sql = f"""
+        SELECT p.id, p.name, p.status, p.start_date, p.end_date, p.updated_at,
+               COUNT(*) OVER () AS full_count,
+               ROW_NUMBER() OVER (ORDER BY {order_by}) AS rn
+        FROM projects p
+        WHERE {where_clause}
+        ORDER BY rn
+    """
+    if limit is not None:
+        page_sql += f" LIMIT ${param_idx} OFFSET ${param_idx + 1}"
+        params.extend([limit, offset])
+
+    sql = f"""
+        WITH page AS ({page_sql})
+        SELECT page.*,
+               COALESCE(m.n, 0) AS member_count,
+               COALESCE(mt.n, 0) AS meeting_count,
+               COALESCE(a.n, 0) AS attachment_count
+        FROM page
+        LEFT JOIN (
+            SELECT project_id, COUNT(*) AS n FROM project_members
+            WHERE project_id IN (SELECT id FROM page) GROUP BY project_id
+        ) m ON m.project_id = page.id
+        LEFT JOIN (
+            SELECT project_id, COUNT(*) AS n FROM project_meetings
+            WHERE project_id IN (SELECT id FROM page) GROUP BY project_id
+        ) mt ON mt.project_id = page.id
+        LEFT JOIN (
+            SELECT project_id, COUNT(*) AS n FROM project_attachments
+            WHERE project_id IN (SELECT id FROM page) GROUP BY project_id
+        ) a ON a.project_id = page.id
+        ORDER BY page.rn
+    """
 
+    async with get_connection() as conn:
         rows = await conn.fetch(sql, *params)
 
-        items = [
-            ProjectListItem(
-                id=row["id"],
-                name=row["name"],
-                status=row["status"],
-                start_date=row["start_date"],
-                end_date=row["end_date"],
-                updated_at=row["updated_at"],
-                member_count=row["member_count"],
-                meeting_count=row["meeting_count"],
-                attachment_count=row["attachment_count"],
-            )
-            for row in rows
-        ]
+        if rows:
+            total = rows[0]["full_count"]
+        elif offset and limit is not None:
+            # 超出最後一頁時仍回傳正確總數
+            total = await conn.fetchval(
+                f"SELECT COUNT(*) FROM projects p WHERE {where_clause}",
+                *params[:-2],
+            ) or 0
+        else:
+            total = 0
 
-        return ProjectListResponse(items=items, total=len(items))
+    items = [
+        ProjectListItem(
+            id=row["id"],
+            name=row["name"],
+            status=row["status"],
+            start_date=row["start_date"],
+            end_date=row["end_date"],
+            updated_at=row["updated_at"],
+            member_count=row["member_count"],
+            meeting_count=row["meeting_count"],
+            attachment_count=row["attachment_count"],
+        )
+        for row in rows
+    ]
+    return ProjectListResponse(items=items, total=total)
 
 
 async def get_project(
@@ -205,7 +265,7 @@ async def create_project(
             data.end_date,
             created_by,
         )
-        return ProjectResponse(**dict(row))
+    return ProjectResponse(**dict(row))
 
 
 async def update_project(
@@ -260,7 +320,7 @@ async def update_project(
 
         sql = f"UPDATE projects SET {', '.join(updates)} WHERE id = ${param_idx} RETURNING *"
         row = await conn.fetchrow(sql, *params)
-        return ProjectResponse(**dict(row))
+    return ProjectResponse(**dict(row))
 
 
 async def delete_project(
@@ -487,7 +547,7 @@ async def create_meeting(
             data.content,
             created_by,
         )
-        return ProjectMeetingResponse(**dict(row))
+    return ProjectMeetingResponse(**dict(row))
 
 
 async def update_meeting(
@@ -657,49 +717,58 @@ async def upload_attachment(
             description,
             uploaded_by,
         )
-        return ProjectAttachmentResponse(**dict(row))
+    return ProjectAttachmentResponse(**dict(row))
 
 
-async def get_attachment_content(project_id: UUID, attachment_id: UUID) -> tuple[bytes, str]:
-    """取得附件內容"""
+async def get_attachment_file_path(project_id: UUID, attachment_id: UUID) -> tuple[Path, str]:
+    """取得附件的檔案系統路徑（供串流下載，不讀入記憶體）
+
+    Returns:
+        (檔案路徑, 原始檔名)
+    """
     async with get_connection() as conn:
         row = await conn.fetchrow(
             "SELECT storage_path, filename FROM project_attachments WHERE id = $1 AND project_id = $2",
             attachment_id, project_id,
         )
-        if not row:
-            raise ProjectNotFoundError(f"附件 {attachment_id} 不存在")
+    if not row:
+        raise ProjectNotFoundError(f"附件 {attachment_id} 不存在")
 
-        storage_path = row["storage_path"]
-        filename = row["filename"]
-
-        # 使用 PathManager 解析路徑
-        from .path_manager import path_manager, StorageZone
-        try:
-            parsed = path_manager.parse(storage_path)
-
-            if parsed.zone == StorageZone.CTOS:
-                # CTOS 區檔案（透過掛載路徑存取）
-                try:
-                    fs_path = path_manager.to_filesystem(storage_path)
-                    file_path = Path(fs_path)
-                    if not file_path.exists():
-                        raise ProjectError(f"檔案不存在：{storage_path}")
-                    with open(file_path, "rb") as f:
-                        return f.read(), filename
-                except LocalFileError as e:
-                    raise ProjectError(f"讀取檔案失敗：{e}") from e
-            elif parsed.zone == StorageZone.LOCAL:
-                # 本機檔案
-                file_path = Path(settings.project_attachments_path) / parsed.path
-                if not file_path.exists():
-                    raise ProjectError(f"檔案不存在：{storage_path}")
-                with open(file_path, "rb") as f:
-                    return f.read(), filename
-            else:
-                raise ProjectError(f"不支援的儲存區域：{parsed.zone.value}")
-        except ValueError as e:
-            raise ProjectError(f"無效的路徑格式：{storage_path}") from e
+    storage_path = row["storage_path"]
+    filename = row["filename"]
+
+    # 使用 PathManager 解析路徑
+    from .path_manager import path_manager, StorageZone
+    try:
+        parsed = path_manager.parse(storage_path)
+
+        if parsed.zone == StorageZone.CTOS:
+            # CTOS 區檔案（透過掛載路徑存取）
+            try:
+                file_path = Path(path_manager.to_filesystem(storage_path))
+            except LocalFileError as e:
+                raise ProjectError(f"讀取檔案失敗：{e}") from e
+        elif parsed.zone == StorageZone.LOCAL:
+            # 本機檔案
+            file_path = Path(settings.project_attachments_path) / parsed.path
+        else:
+            raise ProjectError(f"不支援的儲存區域：{parsed.zone.value}")
+    except ValueError as e:
+        raise ProjectError(f"無效的路徑格式：{storage_path}") from e
+
+    if not file_path.exists():
+        raise ProjectError(f"檔案不存在：{storage_path}")
+    return file_path, filename
+
+
+async def get_attachment_content(project_id: UUID, attachment_id: UUID) -> tuple[bytes, str]:
+    """取得附件內容"""
+    file_path, filename = await get_attachment_file_path(project_id, attachment_id)
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(), filename
+    except OSError as e:
+        raise ProjectError(f"讀取檔案失敗：{e}") from e
 
 
 async def update_attachment(
@@ -3,6 +3,7 @@ ChingTech OS - 排程服務
 使用 APScheduler 執行定時任務
 """
 
+import asyncio
 import logging
 import os
 import shutil
@@ -14,7 +15,7 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
 from ..config import settings
-from ..database import get_connection
+from ..database import Workload, get_connection, use_workload
 from ..modules import get_module_registry, is_module_enabled
 
 logger = logging.getLogger(__name__)
@@ -26,6 +27,7 @@ scheduler = AsyncIOScheduler()
 _pending_dynamic_module_jobs: list[tuple[str, dict]] = []
 
 
+@use_workload(Workload.BACKGROUND)
 async def cleanup_old_messages():
     """
     清理過期的訊息和登入記錄
@@ -65,6 +67,7 @@ async def cleanup_old_messages():
         logger.error(f"訊息清理失敗: {e}")
 
 
+@use_workload(Workload.BACKGROUND)
 async def create_next_month_partitions():
     """
     建立下個月的分區表
@@ -125,6 +128,7 @@ async def create_next_month_partitions():
             logger.error(f"建立分區失敗: {e}")
 
 
+@use_workload(Workload.BACKGROUND)
 async def cleanup_expired_share_links():
     """
     清理過期的分享連結
@@ -144,42 +148,64 @@ async def cleanup_expired_share_links():
         logger.error(f"清理過期分享連結失敗: {e}")
 
 
-async def cleanup_linebot_temp_files():
+@use_workload(Workload.BACKGROUND)
+async def flush_share_access_counts():
     """
-    清理 Line Bot 暫存檔（圖片和檔案）
-    刪除修改時間超過 1 小時的暫存檔
+    將分享連結累積的存取次數批次寫入資料庫
     """
-    temp_dirs = [
-        "/tmp/bot-images",
-        "/tmp/bot-files",
-    ]
+    from .share import flush_access_counts
 
-    one_hour_ago = time.time() - 3600  # 1 小時前
-    total_deleted = 0
+    try:
+        flushed = await flush_access_counts()
+        if flushed:
+            logger.debug(f"寫入分享連結存取次數: {flushed} 次")
+    except Exception as e:
+        logger.error(f"寫入分享連結存取次數失敗: {e}")
 
-    for temp_dir in temp_dirs:
-        if not os.path.exists(temp_dir):
-            continue
 
-        try:
-            deleted_count = 0
+@use_workload(Workload.BACKGROUND)
+async def reconcile_inventory_stock():
+    """
+    庫存對帳：校正增量維護的庫存數量並記錄快照
+    （未建立物料資料表的環境直接略過）
+    """
+    from .inventory import reconcile_inventory_stock as _reconcile
+
+    try:
+        async with get_connection() as conn:
+            exists = await conn.fetchval("SELECT to_regclass('public.inventory_transactions') IS NOT NULL")
+        if not exists:
+            return
+        result = await _reconcile()
+        if result["drifted"]:
+            logger.warning(f"庫存對帳校正 {result['drifted']} 筆物料（共 {result['items']} 筆）")
+        else:
+            logger.info(f"庫存對帳完成，{result['items']} 筆物料皆一致")
+    except Exception as e:
+        logger.error(f"庫存對帳失敗: {e}")
 
-            for filename in os.listdir(temp_dir):
-                filepath = os.path.join(temp_dir, filename)
-                if os.path.isfile(filepath):
-                    if os.path.getmtime(filepath) < one_hour_ago:
-                        os.unlink(filepath)
-                        deleted_count += 1
 
-            total_deleted += deleted_count
+async def cleanup_linebot_temp_files():
+    """
+    整理 Bot 附件暫存（圖片、檔案與解析結果）
+    刪除閒置超過 BOT_STAGING_CACHE_MAX_IDLE_HOURS 的暫存檔，並將總容量壓回上限內
+    """
+    from .bot.staging_cache import staging_cache
 
-        except Exception as e:
-            logger.error(f"清理 {temp_dir} 失敗: {e}")
+    try:
+        total_deleted = await asyncio.to_thread(staging_cache.sweep)
+    except Exception as e:
+        logger.error(f"整理附件暫存失敗: {e}")
+        return
 
     if total_deleted > 0:
-        logger.info(f"清理 Line Bot 暫存檔: 刪除 {total_deleted} 個檔案")
+        stats = staging_cache.stats()
+        logger.info(
+            f"整理附件暫存: 刪除 {total_deleted} 個檔案，"
+            f"剩餘 {stats['entries']} 個（{stats['total_bytes'] // (1024 * 1024)} MB）"
+        )
     else:
-        logger.debug("Line Bot 暫存檔清理: 無過期檔案")
+        logger.debug("附件暫存整理: 無需刪除的檔案")
 
 
 async def cleanup_ai_images():
@@ -223,11 +249,12 @@ async def cleanup_cli_temp_dirs():
     """
     清理 Claude CLI 的舊暫存目錄
     每次伺服器重啟會在 /tmp 建立新的 ching-tech-os-cli-* base 目錄，
-    舊的不會自動清除。此排程刪除超過 1 天且非當前使用中的目錄。
+    舊的不會自動清除。此排程刪除超過 1 天且非當前使用中的目錄；
+    當前 base 下不在工作目錄池中的 session 目錄（異常中斷遺留）也一併刪除。
     """
     import glob
     import shutil
-    from .claude_agent import _WORKING_DIR_BASE
+    from .claude_agent import _WORKING_DIR_BASE, workdir_pool
 
     pattern = "/tmp/ching-tech-os-cli-*"
     one_day_ago = time.time() - (24 * 3600)
@@ -248,6 +275,10 @@ async def cleanup_cli_temp_dirs():
                 shutil.rmtree(dirpath, ignore_errors=True)
                 deleted_count += 1
 
+        orphaned = workdir_pool.sweep_orphans(max_age_seconds=24 * 3600)
+        if orphaned:
+            logger.info(f"清理遺留的 session 工作目錄: 刪除 {orphaned} 個")
+
         if deleted_count > 0:
             logger.info(f"清理 CLI 暫存目錄: 刪除 {deleted_count} 個舊目錄")
         else:
@@ -321,6 +352,7 @@ async def cleanup_media_temp_folders():
         logger.debug("媒體暫存清理: 無過期資料夾")
 
 
+@use_workload(Workload.BACKGROUND)
 async def cleanup_old_bot_tracking():
     """清理過期的 bot 使用量追蹤資料（保留 30 天）"""
     from .bot.rate_limiter import cleanup_old_tracking
@@ -335,6 +367,31 @@ async def cleanup_old_bot_tracking():
         logger.error(f"清理 Bot 使用量追蹤失敗: {e}")
 
 
+@use_workload(Workload.BACKGROUND)
+async def cleanup_webhook_events():
+    """清理已處理完畢的 webhook 佇列事件（保留 WEBHOOK_EVENT_RETENTION_DAYS 天供去重）"""
+    from .bot.webhook_queue import cleanup_webhook_events as _cleanup
+
+    try:
+        deleted = await _cleanup(settings.webhook_event_retention_days)
+        if deleted > 0:
+            logger.info(f"清理 webhook 佇列事件: 刪除 {deleted} 筆")
+        else:
+            logger.debug("Webhook 佇列事件清理: 無過期資料")
+    except Exception as e:
+        logger.error(f"清理 webhook 佇列事件失敗: {e}")
+
+
+async def evict_idle_claude_sessions():
+    """關閉閒置的 Claude 對話 session（釋放 Claude client 與 MCP 子行程）"""
+    from .claude_sessions import evict_idle_sessions
+
+    try:
+        await evict_idle_sessions()
+    except Exception as e:
+        logger.error(f"關閉閒置 Claude session 失敗: {e}")
+
+
 async def check_telegram_webhook_health():
     """
     檢查 Telegram Webhook 健康狀態
@@ -456,6 +513,15 @@ def start_scheduler():
         replace_existing=True
     )
 
+    # 每 30 秒批次寫入分享連結存取次數
+    scheduler.add_job(
+        flush_share_access_counts,
+        IntervalTrigger(seconds=30),
+        id='flush_share_access_counts',
+        name='寫入分享連結存取次數',
+        replace_existing=True
+    )
+
     # 每天凌晨 4:30 清理過期的 bot 使用量追蹤資料
     scheduler.add_job(
         cleanup_old_bot_tracking,
@@ -465,6 +531,24 @@ def start_scheduler():
         replace_existing=True,
     )
 
+    # 每天凌晨 4:45 清理已處理完畢的 webhook 佇列事件
+    scheduler.add_job(
+        cleanup_webhook_events,
+        CronTrigger(hour=4, minute=45),
+        id='cleanup_webhook_events',
+        name='清理 Webhook 佇列事件',
+        replace_existing=True,
+    )
+
+    # 每分鐘關閉閒置的 Claude 對話 session
+    scheduler.add_job(
+        evict_idle_claude_sessions,
+        IntervalTrigger(minutes=1),
+        id='evict_idle_claude_sessions',
+        name='關閉閒置 Claude Session',
+        replace_existing=True,
+    )
+
     # 依啟用模組註冊排程任務
     for module_id, info in get_module_registry().items():
         if not is_module_enabled(module_id):
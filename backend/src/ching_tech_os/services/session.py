@@ -14,9 +14,17 @@ from ..config import settings
 from ..database import get_connection
 from ..models.auth import SessionData
 from ..utils.crypto import encrypt_credential, decrypt_credential
+from .metrics import counter
 
 logger = logging.getLogger(__name__)
 
+_session_lookups = counter(
+    "ctos_session_lookups_total",
+    "Session 查詢次數（cache / db / miss）",
+    ("result",),
+)
+_sessions_created = counter("ctos_sessions_created_total", "建立的 session 數")
+
 # Session cache TTL（秒）— 減少高頻 DB 查詢
 _CACHE_TTL = 30
 
@@ -105,6 +113,7 @@ class SessionManager:
                 app_permissions or {},
                 float(settings.session_ttl_hours),
             )
+        _sessions_created.inc()
 
         return token
 
@@ -122,6 +131,7 @@ class SessionManager:
         # 先查 cache
         cached = self._cache.get(token)
         if cached is not None:
+            _session_lookups.inc(result="cache")
             return cached
 
         # Cache miss → 查 DB 並更新 last_accessed_at
@@ -137,7 +147,9 @@ class SessionManager:
             )
 
         if row is None:
+            _session_lookups.inc(result="miss")
             return None
+        _session_lookups.inc(result="db")
 
         # 解密密碼
         password = decrypt_credential(row["password_enc"]) if row["password_enc"] else ""
@@ -1,9 +1,13 @@
 """公開分享連結服務"""
 
+import logging
 import secrets
 import string
+import time
 import bcrypt
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta, timezone
+from typing import Any, Hashable
 from uuid import UUID
 
 from pathlib import Path
@@ -17,14 +21,30 @@ from ..models.share import (
     PublicResourceResponse,
     PasswordRequiredResponse,
 )
-from .knowledge import get_knowledge, KnowledgeNotFoundError
+from .knowledge import get_knowledge, get_knowledge_version, KnowledgeNotFoundError
 from .project import get_project, ProjectNotFoundError
 
+logger = logging.getLogger(__name__)
+
 # 密碼錯誤最大嘗試次數
 MAX_PASSWORD_ATTEMPTS = 5
 
+# 連結解析快取：token → 連結資訊（不含 content），TTL 讓其他行程的撤銷也能生效
+LINK_CACHE_TTL_SECONDS = 60
+LINK_CACHE_MAX_ENTRIES = 2048
+
+# 公開頁面資料快取：(resource_type, resource_id) → (內容版本, data)
+RENDERED_VIEW_CACHE_MAX_ENTRIES = 256
+
+_link_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_rendered_view_cache: OrderedDict[tuple[str, str], tuple[Hashable, dict]] = OrderedDict()
+
+# 尚未寫入資料庫的存取次數（由排程批次寫入）
+_pending_access_counts: Counter[str] = Counter()
+
 
 from .errors import ServiceError
+from .workers import run_in_auth_pool
 
 
 class NasFileNotFoundError(ServiceError):
@@ -276,6 +296,218 @@ async def get_project_attachment_info(attachment_id: str) -> dict:
         return dict(row)
 
 
+# ============================================================
+# 連結解析快取與存取計數
+# ============================================================
+
+
+def invalidate_link_cache(token: str | None = None) -> None:
+    """讓連結解析快取失效（未指定 token 時清空全部）"""
+    if token is None:
+        _link_cache.clear()
+    else:
+        _link_cache.pop(token, None)
+
+
+def clear_rendered_view_cache() -> None:
+    """清空公開頁面資料快取"""
+    _rendered_view_cache.clear()
+
+
+def _get_cached_link(token: str) -> dict | None:
+    entry = _link_cache.get(token)
+    if entry is None:
+        return None
+    cached_at, meta = entry
+    if time.monotonic() - cached_at > LINK_CACHE_TTL_SECONDS:
+        del _link_cache[token]
+        return None
+    _link_cache.move_to_end(token)
+    return meta
+
+
+async def _resolve_link(token: str) -> dict | None:
+    """解析分享連結
+
+    快取命中時不查詢資料庫；未命中時一併取回 content。
+    有密碼或已鎖定的連結需要即時的嘗試次數，不放入快取。
+    """
+    meta = _get_cached_link(token)
+    if meta is not None:
+        return meta
+
+    async with get_connection() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT token, resource_type, resource_id, created_by, expires_at, created_at,
+                   content, content_type, filename, password_hash, attempt_count, locked_at
+            FROM public_share_links
+            WHERE token = $1
+            """,
+            token,
+        )
+    if not row:
+        return None
+
+    meta = dict(row)
+    if not meta.get("password_hash") and not meta.get("locked_at"):
+        _link_cache[token] = (
+            time.monotonic(),
+            {k: v for k, v in meta.items() if k != "content"},
+        )
+        _link_cache.move_to_end(token)
+        while len(_link_cache) > LINK_CACHE_MAX_ENTRIES:
+            _link_cache.popitem(last=False)
+    return meta
+
+
+def _check_not_expired(token: str, meta: dict) -> None:
+    expires_at = meta.get("expires_at")
+    if expires_at and expires_at < datetime.now(timezone.utc):
+        invalidate_link_cache(token)
+        raise ShareLinkExpiredError("此連結已過期")
+
+
+async def flush_access_counts() -> int:
+    """將累積的存取次數批次寫入資料庫，回傳寫入的次數總和"""
+    if not _pending_access_counts:
+        return 0
+
+    pending = dict(_pending_access_counts)
+    _pending_access_counts.clear()
+    tokens = list(pending)
+    counts = [pending[t] for t in tokens]
+    try:
+        async with get_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE public_share_links AS l
+                SET access_count = l.access_count + v.n
+                FROM unnest($1::text[], $2::int[]) AS v(token, n)
+                WHERE l.token = v.token
+                """,
+                tokens,
+                counts,
+            )
+    except Exception:
+        # 寫入失敗時放回，下次再試
+        _pending_access_counts.update(pending)
+        raise
+    return sum(counts)
+
+
+# ============================================================
+# 公開頁面資料（依內容版本快取）
+# ============================================================
+
+
+def _get_cached_view(key: tuple[str, str], version: Hashable | None) -> dict | None:
+    if version is None:
+        return None
+    entry = _rendered_view_cache.get(key)
+    if entry is None or entry[0] != version:
+        return None
+    _rendered_view_cache.move_to_end(key)
+    return entry[1]
+
+
+def _set_cached_view(key: tuple[str, str], version: Hashable | None, data: dict) -> None:
+    if version is None:
+        return
+    _rendered_view_cache[key] = (version, data)
+    _rendered_view_cache.move_to_end(key)
+    while len(_rendered_view_cache) > RENDERED_VIEW_CACHE_MAX_ENTRIES:
+        _rendered_view_cache.popitem(last=False)
+
+
+def _build_knowledge_view(resource_id: str) -> dict[str, Any]:
+    """知識庫公開頁面資料（依檔案版本快取）"""
+    key = ("knowledge", resource_id)
+    version = get_knowledge_version(resource_id)
+    cached = _get_cached_view(key, version)
+    if cached is not None:
+        return cached
+
+    knowledge = get_knowledge(resource_id)
+    # 正規化附件路徑，將 ../assets/images/xxx 轉換為 local/images/xxx
+    normalized_attachments = []
+    for att in knowledge.attachments:
+        att_dict = att.model_dump()
+        path = att_dict.get("path", "")
+        # 將 ../assets/ 轉換為 local/
+        if path.startswith("../assets/"):
+            att_dict["path"] = "local/" + path[len("../assets/"):]
+        normalized_attachments.append(att_dict)
+
+    data = {
+        "id": knowledge.id,
+        "title": knowledge.title,
+        "content": knowledge.content,
+        "attachments": normalized_attachments,
+        "related": knowledge.related,
+        "created_at": knowledge.created_at.isoformat() if knowledge.created_at else None,
+        "updated_at": knowledge.updated_at.isoformat() if knowledge.updated_at else None,
+    }
+    _set_cached_view(key, version, data)
+    return data
+
+
+async def _get_project_version(project_id: UUID) -> str | None:
+    """取得專案公開頁面使用資料的版本字串（專案、里程碑、成員變更都會改變）"""
+    async with get_connection() as conn:
+        return await conn.fetchval(
+            """
+            SELECT concat_ws(
+                '|',
+                p.updated_at,
+                (SELECT max(updated_at) FROM project_milestones WHERE project_id = p.id),
+                (SELECT count(*) FROM project_milestones WHERE project_id = p.id),
+                (SELECT md5(string_agg(name || ':' || COALESCE(role, ''), ',' ORDER BY id))
+                 FROM project_members WHERE project_id = p.id)
+            )
+            FROM projects p
+            WHERE p.id = $1
+            """,
+            project_id,
+        )
+
+
+async def _build_project_view(resource_id: str) -> dict[str, Any]:
+    """專案公開頁面資料（只包含安全的資訊，依內容版本快取）"""
+    project_id = UUID(resource_id)
+    key = ("project", resource_id)
+    version = await _get_project_version(project_id)
+    cached = _get_cached_view(key, version)
+    if cached is not None:
+        return cached
+
+    project = await get_project(project_id)
+    data = {
+        "id": str(project.id),
+        "name": project.name,
+        "description": project.description,
+        "status": project.status,
+        "start_date": project.start_date.isoformat() if project.start_date else None,
+        "end_date": project.end_date.isoformat() if project.end_date else None,
+        "milestones": [
+            {
+                "name": m.name,
+                "milestone_type": m.milestone_type,
+                "planned_date": m.planned_date.isoformat() if m.planned_date else None,
+                "actual_date": m.actual_date.isoformat() if m.actual_date else None,
+                "status": m.status,
+            }
+            for m in project.milestones
+        ],
+        "members": [
+            {"name": m.name, "role": m.role}
+            for m in project.members
+        ],
+    }
+    _set_cached_view(key, version, data)
+    return data
+
+
 async def create_share_link(
     data: ShareLinkCreate,
     created_by: str,
@@ -295,6 +527,18 @@ async def create_share_link(
         # 驗證資源存在
         resource_title = await get_resource_title(data.resource_type, data.resource_id)
 
+    # 處理密碼（bcrypt 在認證執行緒池執行，且不佔用資料庫連線）
+    password_raw = None
+    password_hashed = None
+    if data.password:
+        # 如果提供密碼，使用提供的密碼
+        password_raw = data.password
+    elif data.resource_type == "content":
+        # content 類型預設產生密碼
+        password_raw = generate_password()
+    if password_raw:
+        password_hashed = await run_in_auth_pool(hash_password, password_raw)
+
     # 產生唯一 token
     async with get_connection() as conn:
         # 嘗試產生唯一 token（最多 10 次）
@@ -313,18 +557,6 @@ async def create_share_link(
         # 計算過期時間
         expires_at = parse_expires_in(data.expires_in)
 
-        # 處理密碼
-        password_raw = None
-        password_hashed = None
-        if data.password:
-            # 如果提供密碼，使用提供的密碼
-            password_raw = data.password
-            password_hashed = hash_password(password_raw)
-        elif data.resource_type == "content":
-            # content 類型預設產生密碼
-            password_raw = generate_password()
-            password_hashed = hash_password(password_raw)
-
         # 儲存到資料庫
         now = datetime.now(timezone.utc)
         row = await conn.fetchrow(
@@ -491,13 +723,21 @@ async def revoke_link(token: str, username: str, is_admin: bool = False) -> None
             token,
         )
 
+    invalidate_link_cache(token)
+    _pending_access_counts.pop(token, None)
+
 
-async def get_public_resource(token: str, password: str | None = None) -> PublicResourceResponse | PasswordRequiredResponse:
+async def get_public_resource(
+    token: str,
+    password: str | None = None,
+    client_key: str | None = None,
+) -> PublicResourceResponse | PasswordRequiredResponse:
     """取得公開資源
 
     Args:
         token: 分享連結 token
         password: 密碼（如果連結有密碼保護）
+        client_key: 來源識別（通常為 IP），用於密碼驗證的並行上限
 
     Returns:
         PublicResourceResponse: 資源內容
@@ -509,41 +749,32 @@ async def get_public_resource(token: str, password: str | None = None) -> Public
         ShareLinkLockedError: 連結已鎖定
         PasswordIncorrectError: 密碼錯誤
     """
-    async with get_connection() as conn:
-        # 查詢連結（包含密碼相關欄位）
-        row = await conn.fetchrow(
-            """
-            SELECT token, resource_type, resource_id, created_by, expires_at, created_at,
-                   content, content_type, filename, password_hash, attempt_count, locked_at
-            FROM public_share_links
-            WHERE token = $1
-            """,
-            token,
-        )
-
-        if not row:
-            raise ShareLinkNotFoundError("連結不存在或已被撤銷")
-
-        # 檢查是否過期
-        now = datetime.now(timezone.utc)
-        if row["expires_at"] and row["expires_at"] < now:
-            raise ShareLinkExpiredError("此連結已過期")
-
-        # 檢查是否鎖定
-        if row["locked_at"]:
-            raise ShareLinkLockedError("此連結因密碼錯誤次數過多而被鎖定")
-
-        # 密碼驗證
-        if row["password_hash"]:
-            if not password:
-                # 需要密碼但未提供
-                return PasswordRequiredResponse(
-                    requires_password=True,
-                    message="此連結需要密碼才能存取",
-                    is_locked=False,
-                )
+    row = await _resolve_link(token)
+    if not row:
+        raise ShareLinkNotFoundError("連結不存在或已被撤銷")
+
+    # 檢查是否過期
+    _check_not_expired(token, row)
+
+    # 檢查是否鎖定
+    if row.get("locked_at"):
+        raise ShareLinkLockedError("此連結因密碼錯誤次數過多而被鎖定")
+
+    # 密碼驗證（有密碼的連結不會被快取，row 為資料庫即時資料）
+    if row.get("password_hash"):
+        if not password:
+            # 需要密碼但未提供
+            return PasswordRequiredResponse(
+                requires_password=True,
+                message="此連結需要密碼才能存取",
+                is_locked=False,
+            )
 
-            if not verify_password(password, row["password_hash"]):
+        password_ok = await run_in_auth_pool(
+            verify_password, password, row["password_hash"], client_key=client_key
+        )
+        async with get_connection() as conn:
+            if not password_ok:
                 # 密碼錯誤，增加嘗試次數
                 new_attempt_count = row["attempt_count"] + 1
                 if new_attempt_count >= MAX_PASSWORD_ATTEMPTS:
@@ -555,7 +786,7 @@ async def get_public_resource(token: str, password: str | None = None) -> Public
                         WHERE token = $3
                         """,
                         new_attempt_count,
-                        now,
+                        datetime.now(timezone.utc),
                         token,
                     )
                     raise ShareLinkLockedError("密碼錯誤次數過多，連結已被鎖定")
@@ -582,171 +813,123 @@ async def get_public_resource(token: str, password: str | None = None) -> Public
                     token,
                 )
 
-        # 更新存取次數（異步，不阻塞）
-        await conn.execute(
-            "UPDATE public_share_links SET access_count = access_count + 1 WHERE token = $1",
-            token,
-        )
-
-        # 取得資源內容
-        resource_type = row["resource_type"]
-        resource_id = row["resource_id"]
+    # 累積存取次數，由排程批次寫入（避免熱門連結每次都寫資料庫）
+    _pending_access_counts[token] += 1
 
-        if resource_type == "knowledge":
-            try:
-                knowledge = get_knowledge(resource_id)
-                # 正規化附件路徑，將 ../assets/images/xxx 轉換為 local/images/xxx
-                normalized_attachments = []
-                for att in knowledge.attachments:
-                    att_dict = att.model_dump()
-                    path = att_dict.get("path", "")
-                    # 將 ../assets/ 轉換為 local/
-                    if path.startswith("../assets/"):
-                        att_dict["path"] = "local/" + path[len("../assets/"):]
-                    normalized_attachments.append(att_dict)
-
-                data = {
-                    "id": knowledge.id,
-                    "title": knowledge.title,
-                    "content": knowledge.content,
-                    "attachments": normalized_attachments,
-                    "related": knowledge.related,
-                    "created_at": knowledge.created_at.isoformat() if knowledge.created_at else None,
-                    "updated_at": knowledge.updated_at.isoformat() if knowledge.updated_at else None,
-                }
-            except KnowledgeNotFoundError:
-                raise ResourceNotFoundError("原始內容已被刪除")
+    # 取得資源內容
+    resource_type = row["resource_type"]
+    resource_id = row["resource_id"]
 
-        elif resource_type == "project":
-            try:
-                project = await get_project(UUID(resource_id))
-                # 只顯示安全的資訊
-                data = {
-                    "id": str(project.id),
-                    "name": project.name,
-                    "description": project.description,
-                    "status": project.status,
-                    "start_date": project.start_date.isoformat() if project.start_date else None,
-                    "end_date": project.end_date.isoformat() if project.end_date else None,
-                    "milestones": [
-                        {
-                            "name": m.name,
-                            "milestone_type": m.milestone_type,
-                            "planned_date": m.planned_date.isoformat() if m.planned_date else None,
-                            "actual_date": m.actual_date.isoformat() if m.actual_date else None,
-                            "status": m.status,
-                        }
-                        for m in project.milestones
-                    ],
-                    "members": [
-                        {"name": m.name, "role": m.role}
-                        for m in project.members
-                    ],
-                }
-            except ProjectNotFoundError:
-                raise ResourceNotFoundError("原始內容已被刪除")
-
-        elif resource_type == "nas_file":
-            try:
-                # 驗證檔案存在且可存取
-                full_path = validate_nas_file_path(resource_id)
-                stat = full_path.stat()
-
-                # 格式化大小
-                size = stat.st_size
-                if size >= 1024 * 1024:
-                    size_str = f"{size / 1024 / 1024:.2f} MB"
-                elif size >= 1024:
-                    size_str = f"{size / 1024:.2f} KB"
-                else:
-                    size_str = f"{size} bytes"
-
-                # 回傳檔案資訊（實際下載透過另一個端點）
-                data = {
-                    "file_name": full_path.name,
-                    "file_path": str(full_path),
-                    "file_size": size,
-                    "file_size_str": size_str,
-                    "download_url": f"/api/public/{token}/download",
-                }
-            except (NasFileNotFoundError, NasFileAccessDenied) as e:
-                raise ResourceNotFoundError(str(e))
-            except Exception as e:
-                raise ResourceNotFoundError(f"無法存取檔案：{e}")
+    if resource_type == "knowledge":
+        try:
+            data = _build_knowledge_view(resource_id)
+        except KnowledgeNotFoundError:
+            raise ResourceNotFoundError("原始內容已被刪除")
 
-        elif resource_type == "project_attachment":
-            try:
-                # 取得附件資訊（已包含 file_size）
-                attachment = await get_project_attachment_info(resource_id)
-                filename = attachment["filename"]
-                size = attachment.get("file_size") or 0
-
-                if size >= 1024 * 1024:
-                    size_str = f"{size / 1024 / 1024:.2f} MB"
-                elif size >= 1024:
-                    size_str = f"{size / 1024:.2f} KB"
-                elif size > 0:
-                    size_str = f"{size} bytes"
-                else:
-                    size_str = "未知"
-
-                # 回傳檔案資訊（實際下載透過 /download 端點）
-                data = {
-                    "file_name": filename,
-                    "file_type": attachment.get("file_type", ""),
-                    "file_size": size,
-                    "file_size_str": size_str,
-                    "download_url": f"/api/public/{token}/download",
-                }
-            except ResourceNotFoundError:
-                raise
-            except Exception as e:
-                raise ResourceNotFoundError(f"無法存取附件：{e}")
+    elif resource_type == "project":
+        try:
+            data = await _build_project_view(resource_id)
+        except ProjectNotFoundError:
+            raise ResourceNotFoundError("原始內容已被刪除")
 
-        elif resource_type == "content":
-            # 直接儲存的內容
+    elif resource_type == "nas_file":
+        try:
+            # 驗證檔案存在且可存取
+            full_path = validate_nas_file_path(resource_id)
+            stat = full_path.stat()
+
+            # 格式化大小
+            size = stat.st_size
+            if size >= 1024 * 1024:
+                size_str = f"{size / 1024 / 1024:.2f} MB"
+            elif size >= 1024:
+                size_str = f"{size / 1024:.2f} KB"
+            else:
+                size_str = f"{size} bytes"
+
+            # 回傳檔案資訊（實際下載透過另一個端點）
             data = {
-                "content": row["content"],
-                "content_type": row["content_type"] or "text/plain",
-                "filename": row["filename"] or "content.txt",
+                "file_name": full_path.name,
+                "file_path": str(full_path),
+                "file_size": size,
+                "file_size_str": size_str,
+                "download_url": f"/api/public/{token}/download",
             }
+        except (NasFileNotFoundError, NasFileAccessDenied) as e:
+            raise ResourceNotFoundError(str(e))
+        except Exception as e:
+            raise ResourceNotFoundError(f"無法存取檔案：{e}")
 
+    elif resource_type == "project_attachment":
+        try:
+            # 取得附件資訊（已包含 file_size）
+            attachment = await get_project_attachment_info(resource_id)
+            filename = attachment["filename"]
+            size = attachment.get("file_size") or 0
+
+            if size >= 1024 * 1024:
+                size_str = f"{size / 1024 / 1024:.2f} MB"
+            elif size >= 1024:
+                size_str = f"{size / 1024:.2f} KB"
+            elif size > 0:
+                size_str = f"{size} bytes"
+            else:
+                size_str = "未知"
+
+            # 回傳檔案資訊（實際下載透過 /download 端點）
+            data = {
+                "file_name": filename,
+                "file_type": attachment.get("file_type", ""),
+                "file_size": size,
+                "file_size_str": size_str,
+                "download_url": f"/api/public/{token}/download",
+            }
+        except ResourceNotFoundError:
+            raise
+        except Exception as e:
+            raise ResourceNotFoundError(f"無法存取附件：{e}")
+
+    elif resource_type == "content":
+        # 直接儲存的內容（快取不保存 content，命中時另外讀取）
+        if "content" in row:
+            content = row["content"]
         else:
-            raise ShareError(f"不支援的資源類型：{resource_type}")
+            async with get_connection() as conn:
+                content = await conn.fetchval(
+                    "SELECT content FROM public_share_links WHERE token = $1",
+                    token,
+                )
+        data = {
+            "content": content,
+            "content_type": row["content_type"] or "text/plain",
+            "filename": row["filename"] or "content.txt",
+        }
 
-        return PublicResourceResponse(
-            type=resource_type,
-            data=data,
-            shared_by=row["created_by"],
-            shared_at=row["created_at"],
-            expires_at=row["expires_at"],
-        )
+    else:
+        raise ShareError(f"不支援的資源類型：{resource_type}")
+
+    return PublicResourceResponse(
+        type=resource_type,
+        data=data,
+        shared_by=row["created_by"],
+        shared_at=row["created_at"],
+        expires_at=row["expires_at"],
+    )
 
 
 async def get_link_info(token: str) -> dict:
     """取得連結資訊（用於驗證附件存取權限）"""
-    async with get_connection() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT token, resource_type, resource_id, expires_at
-            FROM public_share_links
-            WHERE token = $1
-            """,
-            token,
-        )
+    row = await _resolve_link(token)
+    if not row:
+        raise ShareLinkNotFoundError("連結不存在")
 
-        if not row:
-            raise ShareLinkNotFoundError("連結不存在")
+    # 檢查是否過期
+    _check_not_expired(token, row)
 
-        # 檢查是否過期
-        now = datetime.now(timezone.utc)
-        if row["expires_at"] and row["expires_at"] < now:
-            raise ShareLinkExpiredError("此連結已過期")
-
-        return {
-            "resource_type": row["resource_type"],
-            "resource_id": row["resource_id"],
-        }
+    return {
+        "resource_type": row["resource_type"],
+        "resource_id": row["resource_id"],
+    }
 
 
 async def cleanup_expired_links() -> int:
@@ -769,4 +952,7 @@ async def cleanup_expired_links() -> int:
         )
         # result 格式為 "DELETE N"
         deleted_count = int(result.split()[-1]) if result else 0
-        return deleted_count
+
+    if deleted_count:
+        invalidate_link_cache()
+    return deleted_count
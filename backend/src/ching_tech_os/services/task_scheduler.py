@@ -268,6 +268,7 @@ async def _execute_agent_task(task_name: str, config: dict, fallback_user_id: in
     import time
 
     from .ai_manager import create_log, get_agent_by_name
+    from .ai_admission import Priority
     from .claude_agent import call_claude
     from ..models.ai import AiLogCreate
 
@@ -288,16 +289,16 @@ async def _execute_agent_task(task_name: str, config: dict, fallback_user_id: in
     model = agent.get("model", "sonnet")
     tools = agent.get("tools")
 
+    # timeout 只計算實際執行時間（不含等待 AI 名額的排隊時間）
     start_time = time.time()
-    response = await asyncio.wait_for(
-        call_claude(
-            prompt=prompt,
-            model=model,
-            system_prompt=system_prompt,
-            tools=tools,
-            ctos_user_id=ctos_user_id,
-        ),
+    response = await call_claude(
+        prompt=prompt,
+        model=model,
+        system_prompt=system_prompt,
+        tools=tools,
+        ctos_user_id=ctos_user_id,
         timeout=180,
+        priority=Priority.BACKGROUND,
     )
     duration_ms = int((time.time() - start_time) * 1000)
 
@@ -326,6 +327,33 @@ async def _execute_agent_task(task_name: str, config: dict, fallback_user_id: in
     if not response.success:
         raise RuntimeError(f"Agent 執行失敗: {response.error or response.message}")
 
+    await _notify_agent_result(task_name, config.get("notify_targets") or [], response.message)
+
+
+async def _notify_agent_result(task_name: str, targets: list[dict], message: str) -> None:
+    """將 Agent 執行結果推送給設定的目標（多個目標並行推送）"""
+    from .bot.ai import parse_ai_response
+    from .bot.delivery import Delivery, deliver_many, text_messages
+
+    text, _files = parse_ai_response(message)
+    targets = [t for t in targets if isinstance(t, dict) and t.get("platform") and t.get("target")]
+    if not targets or not text:
+        return
+
+    results = await deliver_many(
+        Delivery(t["platform"], t["target"], text_messages(t["platform"], text))
+        for t in targets
+    )
+    failed = [r for r in results if not r.ok]
+    if failed:
+        logger.warning(
+            "排程 %s 結果推送失敗 %d/%d: %s",
+            task_name,
+            len(failed),
+            len(results),
+            "; ".join(f"{r.platform}:{r.target} {r.error}" for r in failed),
+        )
+
 
 async def _execute_skill_script_task(task_name: str, config: dict, fallback_user_id: int | None = None) -> None:
     """執行 Skill Script 模式排程"""
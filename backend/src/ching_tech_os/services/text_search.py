@@ -0,0 +1,82 @@
+"""正規化文字搜尋（pg_trgm）
+
+物料、廠商、專案的搜尋共用同一套規則：轉小寫並移除連字符與空白，
+讓 "kv7500" 可以找到 "PLC KV-7500"。資料表上的 `search_text` 是以相同規則
+產生的 stored generated column，並建有 pg_trgm GIN 索引（migration 018），
+因此 `LIKE '%q%'` 與 `<%`（word similarity）都能走索引，不需逐列計算字串函式。
+
+使用方式：
+    clause = build_search_clause(query, param_idx)
+    if clause:
+        sql += f" AND {clause.where}"
+        params.extend(clause.params)
+        order_by = f"{clause.order_by}, name"
+"""
+
+import re
+from dataclasses import dataclass, field
+
+# 與 migration 018 的 search_text 產生規則一致：移除連字符與所有空白
+_STRIP_RE = re.compile(r"[-\s]+")
+
+# LIKE 特殊字元（以反斜線跳脫，PostgreSQL LIKE 預設跳脫字元）
+_LIKE_ESCAPE_RE = re.compile(r"([\\%_])")
+
+
+def normalize_search_text(text: str | None) -> str:
+    """正規化搜尋文字：轉小寫、移除連字符與空白"""
+    if not text:
+        return ""
+    return _STRIP_RE.sub("", text.lower())
+
+
+def escape_like(text: str) -> str:
+    """跳脫 LIKE 萬用字元"""
+    return _LIKE_ESCAPE_RE.sub(r"\\\1", text)
+
+
+@dataclass
+class SearchClause:
+    """搜尋條件 SQL 片段與參數"""
+
+    where: str
+    order_by: str
+    params: list = field(default_factory=list)
+    next_param_idx: int = 0
+
+
+def build_search_clause(
+    query: str | None,
+    param_idx: int,
+    column: str = "search_text",
+    fuzzy: bool = False,
+) -> SearchClause | None:
+    """建立正規化搜尋條件
+
+    Args:
+        query: 使用者輸入的關鍵字
+        param_idx: 第一個可用的 $N 參數編號
+        column: 正規化搜尋欄位（可含別名，如 "p.search_text"）
+        fuzzy: 除了子字串外，也接受 word similarity 達門檻的結果
+            （適合 bot 查詢料號等可能打錯的情境）
+
+    Returns:
+        SearchClause；query 正規化後為空時回傳 None
+    """
+    normalized = normalize_search_text(query)
+    if not normalized:
+        return None
+
+    like_param = f"${param_idx}"
+    term_param = f"${param_idx + 1}"
+    like = f"{column} LIKE {like_param}"
+    where = f"({like} OR {term_param} <% {column})" if fuzzy else like
+
+    # 子字串命中優先，再依相似度排序
+    order_by = f"({like}) DESC, word_similarity({term_param}, {column}) DESC"
+    return SearchClause(
+        where=where,
+        order_by=order_by,
+        params=[f"%{escape_like(normalized)}%", normalized],
+        next_param_idx=param_idx + 2,
+    )
@@ -3,6 +3,7 @@
 from datetime import datetime
 
 from ..database import get_connection
+from ..utils.json_codec import decode_jsonb
 
 
 async def upsert_user(username: str) -> int:
@@ -311,8 +312,6 @@ async def update_user_permissions(user_id: int, permissions: dict) -> dict:
     Returns:
         更新後的完整偏好設定
     """
-    import json
-
     async with get_connection() as conn:
         # 先取得現有偏好設定
         row = await conn.fetchrow(
@@ -347,7 +346,7 @@ async def update_user_permissions(user_id: int, permissions: dict) -> dict:
             RETURNING preferences
             """,
             user_id,
-            json.dumps(current_prefs),
+            current_prefs,
         )
         if row and row["preferences"]:
             return _parse_preferences(row["preferences"])
@@ -392,17 +391,13 @@ def _parse_preferences(value) -> dict:
     Returns:
         偏好設定 dict
     """
-    import json
-
-    if value is None:
-        return {"theme": "dark"}
-    if isinstance(value, dict):
-        return value
     if isinstance(value, str):
         try:
-            return json.loads(value)
-        except json.JSONDecodeError:
+            value = decode_jsonb(value)
+        except ValueError:
             return {"theme": "dark"}
+    if isinstance(value, dict):
+        return value
     return {"theme": "dark"}
 
 
@@ -467,8 +462,6 @@ async def update_user_preferences(user_id: int, preferences: dict) -> dict:
     Returns:
         更新後的完整偏好設定
     """
-    import json
-
     async with get_connection() as conn:
         # 使用 jsonb_concat (||) 合併現有與新的偏好設定
         row = await conn.fetchrow(
@@ -479,7 +472,7 @@ async def update_user_preferences(user_id: int, preferences: dict) -> dict:
             RETURNING preferences
             """,
             user_id,
-            json.dumps(preferences),
+            preferences,
         )
         if row and row["preferences"]:
             return _parse_preferences(row["preferences"])
@@ -13,6 +13,7 @@ from ..models.vendor import (
 
 
 from .errors import ServiceError
+from .text_search import build_search_clause
 
 
 class VendorError(ServiceError):
@@ -58,12 +59,15 @@ async def list_vendors(
         if active_only:
             sql += " AND is_active = true"
 
-        if query:
-            sql += f" AND (name ILIKE ${param_idx} OR short_name ILIKE ${param_idx} OR erp_code ILIKE ${param_idx})"
-            params.append(f"%{query}%")
-            param_idx += 1
+        order_by = "name"
+        clause = build_search_clause(query, param_idx)
+        if clause:
+            sql += f" AND {clause.where}"
+            params.extend(clause.params)
+            param_idx = clause.next_param_idx
+            order_by = f"{clause.order_by}, name"
 
-        sql += f" ORDER BY name LIMIT ${param_idx}"
+        sql += f" ORDER BY {order_by} LIMIT ${param_idx}"
         params.append(limit)
 
         rows = await conn.fetch(sql, *params)
@@ -86,9 +90,10 @@ async def list_vendors(
         count_params = []
         if active_only:
             count_sql += " AND is_active = true"
-        if query:
-            count_sql += " AND (name ILIKE $1 OR short_name ILIKE $1 OR erp_code ILIKE $1)"
-            count_params.append(f"%{query}%")
+        count_clause = build_search_clause(query, 1)
+        if count_clause:
+            count_sql += f" AND {count_clause.where}"
+            count_params.extend(count_clause.params[:1])
         total = await conn.fetchval(count_sql, *count_params) or 0
 
         return VendorListResponse(items=items, total=total)
@@ -1,14 +1,20 @@
 """共用執行緒池
 
-將阻塞式 SMB 和文件處理操作移至執行緒池，避免阻塞 asyncio event loop。
+將阻塞式 SMB、文件處理與認證雜湊操作移至執行緒池，避免阻塞 asyncio event loop。
 """
 
 import asyncio
 import logging
+import time
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from typing import Any, Callable, TypeVar
 
+from ...config import settings
+from ..errors import ServiceError
+from ..metrics import counter, gauge, histogram
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
@@ -20,6 +26,99 @@ _smb_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="smb")
 _doc_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="doc")
 
 
+# 認證雜湊執行緒池（bcrypt，CPU 密集；執行緒數受限，登入尖峰不會吃滿 CPU）
+_auth_pool = ThreadPoolExecutor(
+    max_workers=max(1, settings.auth_pool_workers),
+    thread_name_prefix="auth",
+)
+
+
+class AuthPoolBusyError(ServiceError):
+    """認證執行緒池忙碌（排隊已滿或單一來源同時請求過多）"""
+
+    def __init__(self, message: str, status_code: int = 503):
+        code = "TOO_MANY_REQUESTS" if status_code == 429 else "SERVICE_BUSY"
+        super().__init__(message, code, status_code)
+
+
+class _AuthPoolState:
+    """認證執行緒池的排隊狀態與統計"""
+
+    def __init__(self) -> None:
+        self.pending = 0
+        self.per_client: Counter[str] = Counter()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected_queue_full = 0
+        self.rejected_per_client = 0
+        self.max_pending = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def snapshot(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "workers": _auth_pool._max_workers,
+            "max_pending": settings.auth_pool_max_pending,
+            "max_per_client": settings.auth_max_concurrent_per_ip,
+            "pending": self.pending,
+            "peak_pending": self.max_pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_per_client": self.rejected_per_client,
+            "avg_wait_ms": round(self.total_wait / finished * 1000, 2) if finished else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "avg_run_ms": round(self.total_run / finished * 1000, 2) if finished else 0.0,
+        }
+
+
+_auth_state = _AuthPoolState()
+
+_POOLS = {"smb": _smb_pool, "doc": _doc_pool, "auth": _auth_pool}
+
+
+def _pool_gauge(read: Callable[[ThreadPoolExecutor], int]) -> Callable[[], dict]:
+    return lambda: {(name,): read(pool) for name, pool in _POOLS.items()}
+
+
+gauge(
+    "ctos_thread_pool_queue_depth",
+    "執行緒池等待中的工作數",
+    ("pool",),
+    callback=_pool_gauge(lambda pool: pool._work_queue.qsize()),
+)
+gauge(
+    "ctos_thread_pool_workers",
+    "執行緒池已啟動的執行緒數",
+    ("pool",),
+    callback=_pool_gauge(lambda pool: len(pool._threads)),
+)
+gauge(
+    "ctos_thread_pool_max_workers",
+    "執行緒池執行緒上限",
+    ("pool",),
+    callback=_pool_gauge(lambda pool: pool._max_workers),
+)
+counter(
+    "ctos_auth_pool_rejected_total",
+    "認證執行緒池拒絕的請求數",
+    ("reason",),
+    callback=lambda: {
+        ("queue_full",): _auth_state.rejected_queue_full,
+        ("per_client",): _auth_state.rejected_per_client,
+    },
+)
+_pool_task_seconds = histogram(
+    "ctos_thread_pool_task_seconds",
+    "執行緒池工作耗時（含排隊）",
+    ("pool",),
+)
+
+
 async def run_in_smb_pool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
     """在 SMB 執行緒池中執行阻塞式操作
 
@@ -31,9 +130,12 @@ async def run_in_smb_pool(func: Callable[..., T], *args: Any, **kwargs: Any) ->
         函式回傳值
     """
     loop = asyncio.get_running_loop()
-    if kwargs:
-        return await loop.run_in_executor(_smb_pool, partial(func, *args, **kwargs))
-    return await loop.run_in_executor(_smb_pool, partial(func, *args) if args else func)
+    call = partial(func, *args, **kwargs) if args or kwargs else func
+    started = time.perf_counter()
+    try:
+        return await loop.run_in_executor(_smb_pool, call)
+    finally:
+        _pool_task_seconds.observe(time.perf_counter() - started, pool="smb")
 
 
 async def run_in_doc_pool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
@@ -47,9 +149,83 @@ async def run_in_doc_pool(func: Callable[..., T], *args: Any, **kwargs: Any) ->
         函式回傳值
     """
     loop = asyncio.get_running_loop()
-    if kwargs:
-        return await loop.run_in_executor(_doc_pool, partial(func, *args, **kwargs))
-    return await loop.run_in_executor(_doc_pool, partial(func, *args) if args else func)
+    call = partial(func, *args, **kwargs) if args or kwargs else func
+    started = time.perf_counter()
+    try:
+        return await loop.run_in_executor(_doc_pool, call)
+    finally:
+        _pool_task_seconds.observe(time.perf_counter() - started, pool="doc")
+
+
+async def run_in_auth_pool(
+    func: Callable[..., T],
+    *args: Any,
+    client_key: str | None = None,
+    **kwargs: Any,
+) -> T:
+    """在認證執行緒池中執行雜湊運算
+
+    排隊數量超過 auth_pool_max_pending 時拋出 503；指定 client_key（通常為
+    來源 IP）時，同一來源同時進行的運算超過 auth_max_concurrent_per_ip 會拋出 429。
+
+    Args:
+        func: 要執行的同步函式
+        *args, **kwargs: 傳遞給函式的參數
+        client_key: 來源識別（用於單一來源並行上限）
+
+    Returns:
+        函式回傳值
+
+    Raises:
+        AuthPoolBusyError: 排隊已滿或單一來源請求過多
+    """
+    state = _auth_state
+    if state.pending >= settings.auth_pool_max_pending:
+        state.rejected_queue_full += 1
+        raise AuthPoolBusyError("系統忙碌中，請稍後再試")
+    if client_key is not None and state.per_client[client_key] >= settings.auth_max_concurrent_per_ip:
+        state.rejected_per_client += 1
+        raise AuthPoolBusyError("請求過於頻繁，請稍後再試", status_code=429)
+
+    state.pending += 1
+    state.max_pending = max(state.max_pending, state.pending)
+    state.submitted += 1
+    if client_key is not None:
+        state.per_client[client_key] += 1
+
+    submitted_at = time.perf_counter()
+    started_at = submitted_at
+
+    def _run() -> T:
+        nonlocal started_at
+        started_at = time.perf_counter()
+        return func(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(_auth_pool, _run)
+        state.completed += 1
+        return result
+    except Exception:
+        state.failed += 1
+        raise
+    finally:
+        finished_at = time.perf_counter()
+        wait = max(0.0, started_at - submitted_at)
+        state.total_wait += wait
+        state.max_wait = max(state.max_wait, wait)
+        state.total_run += max(0.0, finished_at - started_at)
+        _pool_task_seconds.observe(finished_at - submitted_at, pool="auth")
+        state.pending -= 1
+        if client_key is not None:
+            state.per_client[client_key] -= 1
+            if state.per_client[client_key] <= 0:
+                del state.per_client[client_key]
+
+
+def get_auth_pool_stats() -> dict:
+    """取得認證執行緒池的排隊統計"""
+    return _auth_state.snapshot()
 
 
 def shutdown_pools() -> None:
@@ -57,3 +233,4 @@ def shutdown_pools() -> None:
     logger.info("Shutting down worker thread pools")
     _smb_pool.shutdown(wait=False)
     _doc_pool.shutdown(wait=False)
+    _auth_pool.shutdown(wait=False)
@@ -76,6 +76,61 @@ class Skill:
     skill_dir: Path | None = None
 
 
+@dataclass(frozen=True)
+class SkillProjection:
+    """某一組（角色, 已授權 App）可見的 skills 預先計算結果"""
+    skills: tuple[Skill, ...]
+    tools_prompt: str
+    tool_names: tuple[str, ...]
+    mcp_servers: frozenset[str]
+
+
+# 判斷 skill 目錄是否變更時檢查的檔案與子目錄
+_SIGNATURE_FILES = ("SKILL.md", "skill.yaml", "prompt.md")
+_SIGNATURE_SUBDIRS = ("references", "scripts", "assets")
+
+
+def _subdir_signature(subdir: Path) -> tuple | None:
+    """遞迴掃描子目錄：(最大 mtime, 檔案數, 總大小)，與 _scan_subdir 的 rglob 範圍一致"""
+    if not subdir.is_dir():
+        return None
+    max_mtime = subdir.stat().st_mtime_ns
+    count = total = 0
+    for root, _dirs, files in os.walk(subdir):
+        root_path = Path(root)
+        max_mtime = max(max_mtime, root_path.stat().st_mtime_ns)
+        for name in files:
+            try:
+                st = (root_path / name).stat()
+            except OSError:
+                continue
+            max_mtime = max(max_mtime, st.st_mtime_ns)
+            count += 1
+            total += st.st_size
+    return (max_mtime, count, total)
+
+
+def _skill_dir_signature(skill_dir: Path) -> tuple:
+    """以 mtime/size 組成 skill 目錄指紋，用於增量重載。
+
+    子目錄（references/ scripts/ assets/）遞迴計入，深層檔案的新增、刪除或修改也會觸發重載。
+    """
+    parts = []
+    for path in (skill_dir, *(skill_dir / n for n in _SIGNATURE_FILES)):
+        try:
+            st = path.stat()
+        except OSError:
+            parts.append(None)
+            continue
+        parts.append((st.st_mtime_ns, st.st_size))
+    for name in _SIGNATURE_SUBDIRS:
+        try:
+            parts.append(_subdir_signature(skill_dir / name))
+        except OSError:
+            parts.append(None)
+    return tuple(parts)
+
+
 def _extract_ctos_metadata(config: dict) -> tuple[Optional[str], list[str]]:
     """從 frontmatter 提取 CTOS 擴充欄位。
 
@@ -182,6 +237,13 @@ class SkillManager:
         self._skill_dirs: dict[str, Path] = {}
         self._loaded = False
         self._load_lock = asyncio.Lock()
+        # skill 目錄 → (指紋, 解析結果)；指紋未變時重載直接沿用
+        self._parse_cache: dict[Path, tuple[tuple, Skill | None]] = {}
+        # 上次載入時各 skill 目錄的指紋（供 watcher 比對）
+        self._snapshot: dict[Path, tuple] = {}
+        # (role, 已授權 App) → SkillProjection；重載時整個替換
+        self._projections: dict[tuple[str, frozenset[str]], SkillProjection] = {}
+        self._watch_task: asyncio.Task | None = None
 
     @property
     def skills_dir(self) -> Path:
@@ -241,11 +303,58 @@ class SkillManager:
 
         return _build_skill(config, prompt, skill_dir, source=source)
 
+    def _iter_skill_roots(self) -> list[tuple[Path, str, bool]]:
+        """依優先順序列出 (skills 根目錄, 來源, 可否覆蓋同名 skill)。"""
+        # external-first：同名 skill 由 external 覆蓋 native
+        roots = [(self._external_skills_dir, "external", True)]
+        # extends 子模組：掃描 extends/*/skills/*/ 結構
+        if self._extends_skills_dir.exists():
+            for submodule_skills in sorted(self._extends_skills_dir.glob("*/skills")):
+                if submodule_skills.is_dir():
+                    roots.append((submodule_skills, "extends", False))
+        roots.append((self._native_skills_dir, "native", False))
+        return roots
+
+    @staticmethod
+    def _iter_skill_dirs(root: Path) -> list[Path]:
+        return [
+            skill_dir
+            for skill_dir in sorted(root.iterdir())
+            if skill_dir.is_dir() and not skill_dir.name.startswith("_")
+        ]
+
+    def _scan_skill_dirs(self) -> dict[Path, tuple]:
+        """計算所有 skill 目錄目前的指紋（只做 stat，不解析檔案）。"""
+        snapshot: dict[Path, tuple] = {}
+        for root, _source, _override in self._iter_skill_roots():
+            if not root.exists():
+                continue
+            for skill_dir in self._iter_skill_dirs(root):
+                snapshot[skill_dir] = _skill_dir_signature(skill_dir)
+        return snapshot
+
+    def _parse_skill_dir(self, skill_dir: Path, source: str, signature: tuple) -> Skill | None:
+        """解析 skill 目錄；指紋未變時沿用上次結果。"""
+        cached = self._parse_cache.get(skill_dir)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        skill = None
+        try:
+            # 優先讀 SKILL.md，否則回退到 skill.yaml + prompt.md
+            skill = self._load_skill_from_skill_md(skill_dir, source=source)
+            if skill is None:
+                skill = self._load_skill_from_yaml(skill_dir, source=source)
+        except (yaml.YAMLError, OSError) as e:
+            logger.error(f"載入 skill 失敗 {skill_dir}: {e}")
+        self._parse_cache[skill_dir] = (signature, skill)
+        return skill
+
     def _load_skills_sync(self) -> None:
-        """同步載入 skills（在 thread pool 中執行，避免 blocking event loop）"""
-        self._skills.clear()
-        self._skill_dirs.clear()
+        """同步載入 skills（在 thread pool 中執行，避免 blocking event loop）
 
+        只重新解析指紋有變動的 skill 目錄，完成後一次替換 skills 與權限投影。
+        """
         # 確保 external root 存在（預設 ~/SDD/skill）
         try:
             self._external_skills_dir.mkdir(parents=True, exist_ok=True)
@@ -254,68 +363,67 @@ class SkillManager:
         except Exception as e:
             logger.warning(f"建立/初始化 external skills 目錄失敗: {self._external_skills_dir} ({e})")
 
-        def _load_root(root: Path, source: str, can_override_existing: bool) -> None:
+        skills: dict[str, Skill] = {}
+        skill_dirs: dict[str, Path] = {}
+        snapshot: dict[Path, tuple] = {}
+        reparsed = 0
+
+        for root, source, can_override_existing in self._iter_skill_roots():
             if not root.exists():
                 logger.warning(f"Skills 目錄不存在: {root}")
-                return
+                continue
 
-            for skill_dir in sorted(root.iterdir()):
-                if not skill_dir.is_dir() or skill_dir.name.startswith("_"):
+            for skill_dir in self._iter_skill_dirs(root):
+                signature = _skill_dir_signature(skill_dir)
+                snapshot[skill_dir] = signature
+                cached = self._parse_cache.get(skill_dir)
+                if cached is None or cached[0] != signature:
+                    reparsed += 1
+                skill = self._parse_skill_dir(skill_dir, source, signature)
+                if skill is None:
                     continue
 
-                try:
-                    # 優先讀 SKILL.md，否則回退到 skill.yaml + prompt.md
-                    skill = self._load_skill_from_skill_md(skill_dir, source=source)
-                    if skill is None:
-                        skill = self._load_skill_from_yaml(skill_dir, source=source)
-                    if skill is None:
+                if skill.name in skills:
+                    if can_override_existing:
+                        logger.info(
+                            "skill 來源覆蓋: %s (%s -> %s)",
+                            skill.name,
+                            skill_dirs.get(skill.name),
+                            skill_dir,
+                        )
+                    else:
+                        logger.info(
+                            "跳過同名 skill（保留 external 優先）: %s (%s)",
+                            skill.name,
+                            skill_dir,
+                        )
                         continue
 
-                    existing = self._skills.get(skill.name)
-                    if existing:
-                        if can_override_existing:
-                            prev_dir = self._skill_dirs.get(skill.name)
-                            logger.info(
-                                "skill 來源覆蓋: %s (%s -> %s)",
-                                skill.name,
-                                prev_dir,
-                                skill_dir,
-                            )
-                        else:
-                            logger.info(
-                                "跳過同名 skill（保留 external 優先）: %s (%s)",
-                                skill.name,
-                                skill_dir,
-                            )
-                            continue
-
-                    self._skills[skill.name] = skill
-                    self._skill_dirs[skill.name] = skill_dir
-                    refs_info = f", {len(skill.references)} refs" if skill.references else ""
-                    logger.debug(
-                        "載入 skill: %s (%s, %s tools%s)",
-                        skill.name,
-                        source,
-                        len(skill.allowed_tools),
-                        refs_info,
-                    )
-
-                except (yaml.YAMLError, OSError) as e:
-                    logger.error(f"載入 skill 失敗 {skill_dir}: {e}")
-
-        # external-first：同名 skill 由 external 覆蓋 native
-        _load_root(self._external_skills_dir, source="external", can_override_existing=True)
-        # extends 子模組：掃描 extends/*/skills/*/ 結構
-        if self._extends_skills_dir.exists():
-            for submodule_skills in sorted(self._extends_skills_dir.glob("*/skills")):
-                if submodule_skills.is_dir():
-                    _load_root(submodule_skills, source="extends", can_override_existing=False)
-        _load_root(self._native_skills_dir, source="native", can_override_existing=False)
-
+                skills[skill.name] = skill
+                skill_dirs[skill.name] = skill_dir
+                refs_info = f", {len(skill.references)} refs" if skill.references else ""
+                logger.debug(
+                    "載入 skill: %s (%s, %s tools%s)",
+                    skill.name,
+                    source,
+                    len(skill.allowed_tools),
+                    refs_info,
+                )
+
+        # 移除已不存在目錄的解析快取
+        for stale_dir in set(self._parse_cache) - set(snapshot):
+            del self._parse_cache[stale_dir]
+
+        # 一次替換，確保讀取端不會看到載入一半的狀態
+        self._skills = skills
+        self._skill_dirs = skill_dirs
+        self._snapshot = snapshot
+        self._projections = {}
         self._loaded = True
         logger.info(
-            "共載入 %s 個 skills（external: %s, native: %s）",
-            len(self._skills),
+            "共載入 %s 個 skills（重新解析 %s 個；external: %s, native: %s）",
+            len(skills),
+            reparsed,
             self._external_skills_dir,
             self._native_skills_dir,
         )
@@ -380,6 +488,7 @@ class SkillManager:
         # 重設載入狀態
         self._loaded = False
         self._skills.clear()
+        self._projections = {}
 
         return dest_dir
 
@@ -409,6 +518,46 @@ class SkillManager:
         await self.load_skills()
         return self._skill_dirs.get(name)
 
+    def _build_projection(self, role: str, granted_apps: frozenset[str]) -> SkillProjection:
+        skills = tuple(
+            skill
+            for skill in self._skills.values()
+            if role == "admin"
+            or skill.requires_app is None
+            or skill.requires_app in granted_apps
+        )
+        tool_names: list[str] = []
+        servers: set[str] = set()
+        for skill in skills:
+            tool_names.extend(skill.allowed_tools)
+            servers.update(skill.mcp_servers)
+        return SkillProjection(
+            skills=skills,
+            tools_prompt="\n\n".join(skill.prompt for skill in skills if skill.prompt),
+            tool_names=tuple(tool_names),
+            mcp_servers=frozenset(servers),
+        )
+
+    async def get_projection(
+        self,
+        app_permissions: dict[str, bool],
+        *,
+        role: str = "user",
+    ) -> SkillProjection:
+        """取得使用者權限對應的 skills 投影（依 (role, 已授權 App) 快取）"""
+        await self.load_skills()
+        granted_apps = frozenset() if role == "admin" else frozenset(
+            app for app, allowed in (app_permissions or {}).items() if allowed
+        )
+        key = (role, granted_apps)
+        # 取出目前的投影表；重載時會整個替換，寫入舊表不影響新結果
+        projections = self._projections
+        projection = projections.get(key)
+        if projection is None:
+            projection = self._build_projection(role, granted_apps)
+            projections[key] = projection
+        return projection
+
     async def get_skills_for_user(
         self,
         app_permissions: dict[str, bool],
@@ -416,16 +565,8 @@ class SkillManager:
         role: str = "user",
     ) -> list[Skill]:
         """根據使用者權限回傳可用的 skills"""
-        await self.load_skills()
-        result = []
-        for skill in self._skills.values():
-            if role == "admin":
-                result.append(skill)
-            elif skill.requires_app is None:
-                result.append(skill)
-            elif app_permissions.get(skill.requires_app, False):
-                result.append(skill)
-        return result
+        projection = await self.get_projection(app_permissions, role=role)
+        return list(projection.skills)
 
     async def generate_tools_prompt(
         self,
@@ -435,9 +576,8 @@ class SkillManager:
         role: str = "user",
     ) -> str:
         """根據使用者權限動態生成工具說明 prompt"""
-        skills = await self.get_skills_for_user(app_permissions, role=role)
-        sections = [skill.prompt for skill in skills if skill.prompt]
-        return "\n\n".join(sections)
+        projection = await self.get_projection(app_permissions, role=role)
+        return projection.tools_prompt
 
     async def get_tool_names(
         self,
@@ -446,11 +586,8 @@ class SkillManager:
         role: str = "user",
     ) -> list[str]:
         """回傳使用者可用的所有工具名稱"""
-        skills = await self.get_skills_for_user(app_permissions, role=role)
-        tools = []
-        for skill in skills:
-            tools.extend(skill.allowed_tools)
-        return tools
+        projection = await self.get_projection(app_permissions, role=role)
+        return list(projection.tool_names)
 
     async def get_required_mcp_servers(
         self,
@@ -459,24 +596,62 @@ class SkillManager:
         role: str = "user",
     ) -> set[str]:
         """回傳使用者需要的 MCP server 名稱"""
-        skills = await self.get_skills_for_user(app_permissions, role=role)
-        servers = set()
-        for skill in skills:
-            servers.update(skill.mcp_servers)
-        return servers
+        projection = await self.get_projection(app_permissions, role=role)
+        return set(projection.mcp_servers)
 
     async def reload_skills(self) -> int:
-        """重新載入所有 skills（不需重啟服務）。
+        """重新載入 skills（不需重啟服務）。
+
+        只重新解析有變動的 skill 目錄。
 
         Returns:
             載入的 skill 數量
         """
         async with self._load_lock:
-            self._loaded = False
-            self._skills.clear()
-        await self.load_skills()
+            await asyncio.to_thread(self._load_skills_sync)
         return len(self._skills)
 
+    async def check_for_changes(self) -> bool:
+        """比對 skill 目錄指紋，有變動時觸發增量重載。
+
+        Returns:
+            是否有重載
+        """
+        if not self._loaded:
+            return False
+        snapshot = await asyncio.to_thread(self._scan_skill_dirs)
+        if snapshot == self._snapshot:
+            return False
+        count = await self.reload_skills()
+        logger.info("偵測到 skill 目錄變動，已重新載入 %s 個 skills", count)
+        return True
+
+    async def start_watch_task(self) -> None:
+        """啟動背景 skill 目錄監看任務（間隔由 SKILL_WATCH_INTERVAL_SECONDS 設定）"""
+        interval = settings.skill_watch_interval_seconds
+        if self._watch_task is not None or interval <= 0:
+            return
+
+        async def watch_loop():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.check_for_changes()
+                except Exception as e:
+                    logger.error("Skill 目錄監看失敗: %s", e)
+
+        self._watch_task = asyncio.create_task(watch_loop())
+
+    async def stop_watch_task(self) -> None:
+        """停止背景 skill 目錄監看任務"""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
     async def update_skill_metadata(
         self,
         name: str,
@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import asyncio
 import concurrent.futures
+import hashlib
 import ipaddress
 import json
 import os
@@ -12,6 +13,7 @@ import re
 import shutil
 import socket
 import sys
+import threading
 import time
 import uuid as uuid_module
 from datetime import datetime, timedelta
@@ -44,6 +46,12 @@ MAX_RESEARCH_WORKERS = 1
 QUEUE_WAIT_TIMEOUT_SEC = 120
 QUEUE_POLL_INTERVAL_SEC = 2
 MAX_TOOL_TRACE_ITEMS = 80
+FETCH_CONCURRENCY = 4
+FETCH_PER_HOST_LIMIT = 2
+FETCH_DEADLINE_SEC = 45
+STATUS_FLUSH_INTERVAL_SEC = 1.0
+HTTP_CACHE_DIRNAME = ".http-cache"
+HTTP_CACHE_RETENTION_DAYS = 14
 
 _SCRIPT_STYLE_RE = re.compile(r"(?is)<(script|style|noscript).*?>.*?</\1>")
 _NAV_BLOCK_RE = re.compile(r"(?is)<(nav|header|footer|aside)[\s>].*?</\1>")
@@ -92,6 +100,29 @@ def _write_status(status_path: Path, data: dict) -> None:
     tmp_path.replace(status_path)
 
 
+class _StatusWriter:
+    """合併頻繁的狀態更新：間隔內的更新只保留最後一次，階段切換時強制寫入。"""
+
+    def __init__(self, status_path: Path, min_interval: float = STATUS_FLUSH_INTERVAL_SEC) -> None:
+        self.status_path = status_path
+        self.min_interval = min_interval
+        self._last_write = 0.0
+        self._pending: dict | None = None
+
+    def update(self, data: dict, force: bool = False) -> None:
+        """登記最新狀態；距上次寫入超過間隔（或 force）才實際寫檔。"""
+        self._pending = data
+        if force or time.monotonic() - self._last_write >= self.min_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending is None:
+            return
+        _write_status(self.status_path, self._pending)
+        self._pending = None
+        self._last_write = time.monotonic()
+
+
 def _clamp_int(value: object, default: int, min_value: int, max_value: int) -> int:
     """將輸入轉為整數並限制範圍。"""
     try:
@@ -528,8 +559,81 @@ def _search_with_provider_fallback(
     return merged, provider_name, provider_trace
 
 
-def _fetch_source(client: httpx.Client, source: dict) -> dict:
-    """抓取單一來源內容。"""
+class _HttpCache:
+    """來源內容的磁碟快取：以 ETag / Last-Modified 條件式請求重新驗證。
+
+    同一主題重複研究時，未變動的頁面只需一個 304 回應，也省下 HTML 解析。
+    只快取帶有驗證標頭的回應（沒有驗證方式就無法判斷內容是否過期）。
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = cache_dir
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest[:40]}.json"
+
+    def load(self, url: str) -> dict | None:
+        try:
+            entry = json.loads(self._path(url).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        if not isinstance(entry, dict) or entry.get("url") != url or not entry.get("content"):
+            return None
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: dict) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = str(entry["etag"])
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = str(entry["last_modified"])
+        return headers
+
+    def store(self, url: str, response: httpx.Response, content: str) -> None:
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+        payload = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content": content,
+            "stored_at": datetime.now().isoformat(),
+        }
+        path = self._path(url)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError:
+            pass
+
+    def touch(self, url: str) -> None:
+        """重新驗證成功（304）時更新檔案時間，避免常用的快取被清理。"""
+        try:
+            os.utime(self._path(url))
+        except OSError:
+            pass
+
+    def cleanup(self, retention_days: int = HTTP_CACHE_RETENTION_DAYS) -> None:
+        """刪除超過保留天數未更新的快取檔。"""
+        if not self.cache_dir.is_dir():
+            return
+        cutoff = time.time() - retention_days * 86400
+        for path in self.cache_dir.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+
+def _fetch_source(client: httpx.Client, source: dict, cache: _HttpCache | None = None) -> dict:
+    """抓取單一來源內容（提供 cache 時以條件式請求重新驗證）。"""
     title = str(source.get("title") or source.get("url") or "來源")
     url = str(source.get("url") or "")
     # 保留搜尋引擎提供的原始 snippet（比從 content 截斷的更有意義）
@@ -545,18 +649,25 @@ def _fetch_source(client: httpx.Client, source: dict) -> dict:
         }
 
     try:
-        response = client.get(url)
-        response.raise_for_status()
-
-        raw_text = response.text[:MAX_RAW_HTML_CHARS]
-        content_type = (response.headers.get("content-type") or "").lower()
-        if "html" in content_type or "<html" in raw_text[:500].lower():
-            normalized_text = _strip_html(raw_text)
+        cached = cache.load(url) if cache else None
+        response = client.get(url, headers=_HttpCache.conditional_headers(cached) if cached else None)
+        if cached and response.status_code == 304:
+            normalized_text = str(cached["content"])
+            cache.touch(url)
         else:
-            normalized_text = _WHITESPACE_RE.sub(" ", raw_text).strip()
+            response.raise_for_status()
+
+            raw_text = response.text[:MAX_RAW_HTML_CHARS]
+            content_type = (response.headers.get("content-type") or "").lower()
+            if "html" in content_type or "<html" in raw_text[:500].lower():
+                normalized_text = _strip_html(raw_text)
+            else:
+                normalized_text = _WHITESPACE_RE.sub(" ", raw_text).strip()
 
-        if not normalized_text:
-            raise RuntimeError("來源內容為空")
+            if not normalized_text:
+                raise RuntimeError("來源內容為空")
+            if cache:
+                cache.store(url, response, normalized_text)
 
         # snippet 優先保留搜尋引擎的原始摘要，沒有的話才從 content 截取
         snippet = original_snippet if original_snippet else _truncate(normalized_text, MAX_SNIPPET_CHARS)
@@ -567,6 +678,7 @@ def _fetch_source(client: httpx.Client, source: dict) -> dict:
             "error": None,
             "snippet": snippet,
             "content": normalized_text,
+            "from_cache": bool(cached and response.status_code == 304),
         }
     except (httpx.HTTPError, RuntimeError) as exc:
         return {
@@ -579,6 +691,97 @@ def _fetch_source(client: httpx.Client, source: dict) -> dict:
         }
 
 
+def _fetch_sources_concurrently(
+    client: httpx.Client,
+    sources: list[dict],
+    max_ok: int,
+    cache: _HttpCache | None = None,
+    on_result=None,
+    is_canceled=None,
+    concurrency: int = FETCH_CONCURRENCY,
+    per_host_limit: int = FETCH_PER_HOST_LIMIT,
+    deadline_sec: float = FETCH_DEADLINE_SEC,
+) -> tuple[list[dict], bool]:
+    """並行擷取來源，取得 max_ok 個成功來源即提前結束。
+
+    - 同時最多 concurrency 個請求，同一主機最多 per_host_limit 個
+    - 整體超過 deadline_sec 後不再等待，仍在進行中的來源記為逾時
+    - 尚未開始的來源在提前結束時直接取消
+    - 每完成一個來源呼叫 on_result(已完成結果)，供更新進度
+
+    Returns:
+        (依來源原始順序排列的結果, 是否因任務取消而中止)
+    """
+    if not sources:
+        return [], False
+
+    host_limits: dict[str, threading.BoundedSemaphore] = {}
+    for source in sources:
+        host = (urlparse(str(source.get("url") or "")).hostname or "").lower()
+        host_limits.setdefault(host, threading.BoundedSemaphore(max(1, per_host_limit)))
+
+    deadline = time.monotonic() + deadline_sec
+    stop_event = threading.Event()
+
+    def _worker(source: dict) -> dict | None:
+        host = (urlparse(str(source.get("url") or "")).hostname or "").lower()
+        with host_limits[host]:
+            if stop_event.is_set():
+                return None
+            return _fetch_source(client, source, cache)
+
+    results: dict[int, dict] = {}
+    ok_count = 0
+    canceled = False
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(sources))),
+        thread_name_prefix="research-fetch",
+    )
+    try:
+        pending = {executor.submit(_worker, source): idx for idx, source in enumerate(sources)}
+        while pending and ok_count < max_ok:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = concurrent.futures.wait(
+                pending,
+                timeout=min(remaining, 0.5),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                idx = pending.pop(future)
+                fetched = future.result()
+                if fetched is None:
+                    continue
+                results[idx] = fetched
+                if fetched.get("fetch_status") == "ok":
+                    ok_count += 1
+                if on_result:
+                    on_result([results[i] for i in sorted(results)])
+            if is_canceled and is_canceled():
+                canceled = True
+                break
+
+        # 已開始但未完成的來源記為逾時；尚未開始的直接取消
+        for future, idx in pending.items():
+            if future.cancel() or ok_count >= max_ok or canceled:
+                continue
+            source = sources[idx]
+            results[idx] = {
+                "title": str(source.get("title") or source.get("url") or "來源"),
+                "url": str(source.get("url") or ""),
+                "fetch_status": "failed",
+                "error": f"超過整體擷取時限（{int(deadline_sec)} 秒）",
+                "snippet": str(source.get("snippet") or "").strip(),
+                "content": "",
+            }
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return [results[i] for i in sorted(results)], canceled
+
+
 def _extract_body_content(content: str, max_chars: int = 600) -> str:
     """從網頁純文字中提取正文內容，跳過開頭的選單/導覽碎片。
 
@@ -810,6 +1013,7 @@ def _build_local_synthesis_prompt(query: str, fetched_results: list[dict]) -> st
 
 async def _call_claude_local_synthesis(query: str, fetched_results: list[dict]) -> str:
     """使用 Claude 對 fallback 來源做二次深度統整。"""
+    from ching_tech_os.services.ai_admission import Priority
     from ching_tech_os.services.claude_agent import call_claude
 
     prompt = _build_local_synthesis_prompt(query=query, fetched_results=fetched_results)
@@ -821,6 +1025,7 @@ async def _call_claude_local_synthesis(query: str, fetched_results: list[dict])
         prompt=prompt,
         model=_get_research_claude_model(),
         timeout=timeout_sec,
+        priority=Priority.BACKGROUND,
     )
     if response.success is not True:
         raise RuntimeError(str(response.error or "local synthesis failed"))
@@ -845,6 +1050,7 @@ async def _call_claude_research(
     timeout_sec: int,
 ) -> tuple[str, list[dict], list[dict]]:
     """在背景 worker 內呼叫 Claude 進行 web research。"""
+    from ching_tech_os.services.ai_admission import Priority
     from ching_tech_os.services.claude_agent import call_claude
 
     model_name = _get_research_claude_model()
@@ -859,6 +1065,7 @@ async def _call_claude_research(
         model=model_name,
         tools=["WebSearch", "WebFetch"],
         timeout=timeout_sec,
+        priority=Priority.BACKGROUND,
     )
 
     tool_trace: list[dict] = []
@@ -1305,27 +1512,12 @@ def _do_research_local_pipeline(
             status_data["progress"] = 35
             _write_status(status_path, status_data)
 
-            to_fetch = candidate_sources[: max(1, max_fetch)]
-            total_fetch = len(to_fetch)
-            fetched_results: list[dict] = []
+            # 並行擷取全部候選來源，取得 max_fetch 個成功來源即停止（失敗的由後續候選補上）
+            fetch_target = max(1, max_fetch)
+            status_writer = _StatusWriter(status_path)
 
-            for idx, source in enumerate(to_fetch, start=1):
-                if _is_job_canceled(status_path):
-                    _write_status(
-                        status_path,
-                        {
-                            **status_data,
-                            "status": "canceled",
-                            "status_label": "已取消",
-                            "stage": "canceled",
-                            "stage_label": "任務已取消",
-                            "progress": status_data.get("progress", 0),
-                            "updated_at": datetime.now().isoformat(),
-                        },
-                    )
-                    return
-                fetched = _fetch_source(client, source)
-                fetched_results.append(fetched)
+            def _on_fetched(results: list[dict]) -> None:
+                ok_count = sum(1 for item in results if item.get("fetch_status") == "ok")
                 status_data["partial_results"] = [
                     {
                         "title": item.get("title"),
@@ -1334,10 +1526,36 @@ def _do_research_local_pipeline(
                         "snippet": item.get("snippet", ""),
                         "error": item.get("error"),
                     }
-                    for item in fetched_results
+                    for item in results
                 ]
-                status_data["progress"] = min(85, 35 + int(idx / total_fetch * 50))
-                _write_status(status_path, status_data)
+                done_ratio = max(ok_count / fetch_target, len(results) / len(candidate_sources))
+                status_data["progress"] = min(85, 35 + int(min(1.0, done_ratio) * 50))
+                status_writer.update(dict(status_data))
+
+            http_cache = _HttpCache(job_dir.parent.parent / HTTP_CACHE_DIRNAME)
+            fetched_results, canceled = _fetch_sources_concurrently(
+                client,
+                candidate_sources,
+                max_ok=fetch_target,
+                cache=http_cache,
+                on_result=_on_fetched,
+                is_canceled=lambda: _is_job_canceled(status_path),
+            )
+            status_writer.flush()
+            if canceled:
+                _write_status(
+                    status_path,
+                    {
+                        **status_data,
+                        "status": "canceled",
+                        "status_label": "已取消",
+                        "stage": "canceled",
+                        "stage_label": "任務已取消",
+                        "progress": status_data.get("progress", 0),
+                        "updated_at": datetime.now().isoformat(),
+                    },
+                )
+                return
 
             # 3) 統整結果
             status_data["status"] = "running"
@@ -1469,6 +1687,7 @@ def main() -> int:
     date_str = datetime.now().strftime("%Y-%m-%d")
     base_dir = _get_research_base_dir()
     _cleanup_old_research_dirs(base_dir=base_dir, retention_days=RESEARCH_RETENTION_DAYS)
+    _HttpCache(base_dir / HTTP_CACHE_DIRNAME).cleanup()
     job_dir = base_dir / date_str / job_id
     job_dir.mkdir(parents=True, exist_ok=True)
 
@@ -1,15 +1,22 @@
 """憑證加密/解密工具
 
 使用 AES-256-GCM 對稱加密儲存敏感資料（如 Line Bot Channel Secret、Access Token）。
+
+AES-GCM 單次加解密只需微秒等級，直接在呼叫端執行（送進執行緒池的切換成本更高）；
+金鑰推導與 AESGCM 物件依金鑰字串快取，避免每次呼叫重新建立。
 """
 
 import base64
 import hashlib
 import os
 import secrets
+from functools import lru_cache
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
+# 開發環境預設金鑰（生產環境必須設定 BOT_SECRET_KEY）
+_DEV_KEY = "ching-tech-os-default-dev-key-2024"
+
 
 def _get_encryption_key() -> bytes:
     """取得加密金鑰
@@ -17,15 +24,23 @@ def _get_encryption_key() -> bytes:
     從環境變數 BOT_SECRET_KEY 讀取。
     如果未設定，使用預設金鑰（僅限開發環境）。
     """
-    key_str = os.getenv("BOT_SECRET_KEY", "")
-    if not key_str:
-        # 開發環境預設金鑰（生產環境必須設定 BOT_SECRET_KEY）
-        key_str = "ching-tech-os-default-dev-key-2024"
+    key_str = os.getenv("BOT_SECRET_KEY", "") or _DEV_KEY
 
     # 使用 SHA-256 產生固定長度的金鑰（32 bytes = 256 bits）
     return hashlib.sha256(key_str.encode()).digest()
 
 
+@lru_cache(maxsize=4)
+def _cipher_for(key_str: str) -> AESGCM:
+    """依金鑰字串建立（並快取）AESGCM 物件"""
+    return AESGCM(hashlib.sha256(key_str.encode()).digest())
+
+
+def _get_cipher() -> AESGCM:
+    """取得目前金鑰對應的 AESGCM 物件（每次讀取環境變數，金鑰變更時自動切換）"""
+    return _cipher_for(os.getenv("BOT_SECRET_KEY", "") or _DEV_KEY)
+
+
 def encrypt_credential(plaintext: str) -> str:
     """加密憑證
 
@@ -41,8 +56,7 @@ def encrypt_credential(plaintext: str) -> str:
     if not plaintext:
         return ""
 
-    key = _get_encryption_key()
-    aesgcm = AESGCM(key)
+    aesgcm = _get_cipher()
 
     # 產生 12 bytes 的 nonce（GCM 建議值）
     nonce = secrets.token_bytes(12)
@@ -72,8 +86,7 @@ def decrypt_credential(encrypted: str) -> str:
         return ""
 
     try:
-        key = _get_encryption_key()
-        aesgcm = AESGCM(key)
+        aesgcm = _get_cipher()
 
         # 解碼 base64
         data = base64.b64decode(encrypted.encode("ascii"))
@@ -0,0 +1,110 @@
+"""JSON 編解碼
+
+全系統共用的 JSON 層：asyncpg 的 json/jsonb codec、API 預設回應類別與 Socket.IO 封包都經過這裡。
+使用 orjson（pyproject 相依套件；大型 ai_logs / ai_chats 內容編解碼快數倍），未安裝時退回標準庫 json；
+可用 JSON_BACKEND=orjson / stdlib 強制指定。
+
+兩種實作輸出一致：UTF-8 不跳脫、緊湊分隔符，datetime / UUID / Decimal / set 自動轉換。
+"""
+
+import json
+import logging
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import PurePath
+from typing import Any
+from uuid import UUID
+
+from starlette.responses import JSONResponse
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """標準庫無法序列化的型別"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (UUID, PurePath)):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _resolve_backend(name: str) -> str:
+    if name == "stdlib":
+        return "stdlib"
+    if orjson is not None:
+        return "orjson"
+    if name == "orjson":
+        logger.warning("JSON_BACKEND=orjson 但未安裝 orjson，改用標準庫 json")
+    return "stdlib"
+
+
+BACKEND = _resolve_backend(settings.json_backend)
+
+if BACKEND == "orjson":
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """序列化為 UTF-8 bytes"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    def dumps(obj: Any) -> str:
+        """序列化為字串"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode()
+
+    def loads(data: str | bytes | bytearray | memoryview) -> Any:
+        """解析 JSON"""
+        return orjson.loads(data)
+
+else:
+
+    def dumps(obj: Any) -> str:
+        """序列化為字串"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """序列化為 UTF-8 bytes"""
+        return dumps(obj).encode()
+
+    def loads(data: str | bytes | bytearray | memoryview) -> Any:
+        """解析 JSON"""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+def decode_jsonb(value: Any) -> Any:
+    """jsonb 欄位值：codec 已解碼為 dict / list；舊資料曾先 json.dumps 再寫入而存成字串，再解一次"""
+    if isinstance(value, str):
+        return loads(value)
+    return value
+
+
+class FastJSONResponse(JSONResponse):
+    """API 預設回應類別（FastAPI default_response_class）"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+class SocketIOJson:
+    """python-socketio 的 json 參數（介面同標準庫，忽略 separators 等排版參數）"""
+
+    @staticmethod
+    def dumps(obj: Any, **_kwargs: Any) -> str:
+        return dumps(obj)
+
+    @staticmethod
+    def loads(data: str | bytes, **_kwargs: Any) -> Any:
+        return loads(data)
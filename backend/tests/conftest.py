@@ -63,3 +63,28 @@ def mock_db_connection():
             pass
 
     return conn, MockContextManager()
+
+
+@pytest.fixture(autouse=True)
+def _clear_conversation_context_cache():
+    """每個測試前後清空全域對話上下文快取，避免測試間互相影響"""
+    from ching_tech_os.services.bot.context_cache import conversation_context_cache
+
+    conversation_context_cache.clear()
+    yield
+    conversation_context_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_share_caches():
+    """每個測試前後清空分享連結快取與待寫入的存取次數"""
+    from ching_tech_os.services import share
+
+    share.invalidate_link_cache()
+    share.clear_rendered_view_cache()
+    share._pending_access_counts.clear()
+    yield
+    share.invalidate_link_cache()
+    share.clear_rendered_view_cache()
+    share._pending_access_counts.clear()
+
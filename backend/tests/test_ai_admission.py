@@ -0,0 +1,161 @@
+"""AI 呼叫准入控制測試。"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from ching_tech_os.services import ai_admission
+from ching_tech_os.services.ai_admission import AdmissionController, AIQueueTimeoutError, Priority
+
+
+async def _hold(ctrl: AdmissionController, order: list[str], name: str, priority: Priority, user: str,
+                gate: asyncio.Event, positions: dict[str, int] | None = None) -> None:
+    async def _on_queued(position: int) -> None:
+        if positions is not None:
+            positions[name] = position
+
+    await ctrl.acquire(priority, user, _on_queued)
+    order.append(name)
+    try:
+        await gate.wait()
+    finally:
+        ctrl.release()
+
+
+@pytest.mark.asyncio
+async def test_priority_and_per_user_round_robin() -> None:
+    ctrl = AdmissionController(1)
+    order: list[str] = []
+    positions: dict[str, int] = {}
+    gate = asyncio.Event()
+
+    first = asyncio.create_task(_hold(ctrl, order, "first", Priority.INTERACTIVE, "u0", gate))
+    await asyncio.sleep(0)
+    assert ctrl.active == 1
+
+    # 背景任務先到，但群組與個人對話仍優先；u1 連發三則不會擋住 u2
+    specs = [
+        ("bg", Priority.BACKGROUND, "task"),
+        ("u1-a", Priority.GROUP, "u1"),
+        ("u1-b", Priority.GROUP, "u1"),
+        ("u1-c", Priority.GROUP, "u1"),
+        ("u2-a", Priority.GROUP, "u2"),
+        ("dm", Priority.INTERACTIVE, "u3"),
+    ]
+    tasks = []
+    for name, priority, user in specs:
+        tasks.append(asyncio.create_task(_hold(ctrl, order, name, priority, user, gate, positions)))
+        await asyncio.sleep(0)
+
+    assert ctrl.depth() == 6
+    assert positions == {"bg": 1, "u1-a": 1, "u1-b": 2, "u1-c": 3, "u2-a": 2, "dm": 1}
+
+    gate.set()
+    await asyncio.gather(first, *tasks)
+    assert order == ["first", "dm", "u1-a", "u2-a", "u1-b", "u1-c", "bg"]
+    # 排隊者取得名額時再以位置 0 通知
+    assert set(positions.values()) == {0}
+    assert ctrl.active == 0 and ctrl.depth() == 0
+    assert ctrl.stats()["queued"] == 6
+
+
+@pytest.mark.asyncio
+async def test_concurrency_budget_is_respected() -> None:
+    ctrl = AdmissionController(2)
+    running = 0
+    peak = 0
+
+    async def _call(i: int) -> None:
+        nonlocal running, peak
+        await ctrl.acquire(Priority.GROUP, f"user-{i % 3}")
+        try:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.005)
+            running -= 1
+        finally:
+            ctrl.release()
+
+    await asyncio.gather(*(_call(i) for i in range(10)))
+    assert peak == 2
+    assert ctrl.admitted == 10 and ctrl.active == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_and_cancellation_free_their_place() -> None:
+    ctrl = AdmissionController(1, queue_timeout=0.02)
+    await ctrl.acquire()
+
+    with pytest.raises(AIQueueTimeoutError) as exc_info:
+        await ctrl.acquire(Priority.GROUP, "u1")
+    assert exc_info.value.status_code == 503
+    assert ctrl.depth() == 0 and ctrl.timed_out == 1
+
+    ctrl.queue_timeout = 0
+    waiter = asyncio.create_task(ctrl.acquire(Priority.GROUP, "u2"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert ctrl.depth() == 0 and ctrl.cancelled == 1
+
+    ctrl.release()
+    assert ctrl.active == 0
+
+
+@pytest.mark.asyncio
+async def test_cancel_during_admitted_notification_releases_slot() -> None:
+    ctrl = AdmissionController(1)
+    await ctrl.acquire()
+    notifying = asyncio.Event()
+
+    async def _on_queued(position: int) -> None:
+        if position == 0:
+            notifying.set()
+            await asyncio.Event().wait()
+
+    waiter = asyncio.create_task(ctrl.acquire(Priority.GROUP, "u1", _on_queued))
+    await asyncio.sleep(0)
+    ctrl.release()
+    await notifying.wait()
+    assert ctrl.active == 1
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert ctrl.active == 0 and ctrl.depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_unlimited_budget_never_queues() -> None:
+    ctrl = AdmissionController(0)
+    for _ in range(20):
+        await ctrl.acquire(Priority.BACKGROUND)
+    assert ctrl.active == 20 and ctrl.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_call_claude_returns_failure_when_queue_times_out(monkeypatch: pytest.MonkeyPatch) -> None:
+    from ching_tech_os.services import claude_agent
+
+    ctrl = AdmissionController(1, queue_timeout=0.01)
+    ctrl.active = 1  # 名額已被佔用
+    monkeypatch.setattr(ai_admission, "controller", ctrl)
+
+    async def _should_not_run(**_kwargs):
+        raise AssertionError("排隊逾時不應啟動 Claude")
+
+    monkeypatch.setattr(claude_agent, "_call_claude_admitted", _should_not_run)
+    notified: list[int] = []
+
+    async def _on_queued(position: int) -> None:
+        notified.append(position)
+
+    response = await claude_agent.call_claude("hi", ctos_user_id=7, on_queued=_on_queued)
+
+    assert response.success is False
+    assert "排隊" in (response.error or "")
+    assert notified == [1]
+    assert ctrl.depth() == 0 and ctrl.active == 1
@@ -14,6 +14,7 @@ from fastapi import BackgroundTasks, HTTPException
 from ching_tech_os.api import linebot_router
 from ching_tech_os.models.auth import SessionData
 from ching_tech_os.models.linebot import LineGroupUpdate, MemoryCreate, MemoryUpdate, ProjectBindingRequest
+from ching_tech_os.services.bot.media_store import StoredMedia
 
 
 class _TextMessage:
@@ -329,7 +330,8 @@ async def test_process_message_event_paths(monkeypatch: pytest.MonkeyPatch) -> N
 @pytest.mark.asyncio
 async def test_process_media_and_user_group_events(monkeypatch: pytest.MonkeyPatch) -> None:
     save_file_record = AsyncMock()
-    monkeypatch.setattr(linebot_router, "download_and_save_file", AsyncMock(return_value="groups/g1/videos/x.mp4"))
+    stored = StoredMedia(nas_path="blobs/ab/abc.mp4", sha256="abc", size=321, head=b"xxxxftypavc1", deduplicated=False)
+    monkeypatch.setattr(linebot_router, "download_and_save_file", AsyncMock(return_value=stored))
     monkeypatch.setattr(linebot_router, "save_file_record", save_file_record)
 
     await linebot_router.process_media_message(
@@ -342,7 +344,11 @@ async def test_process_media_and_user_group_events(monkeypatch: pytest.MonkeyPat
         file_size=100,
         duration=10,
     )
-    assert save_file_record.await_args.kwargs["file_type"] == "video"
+    kwargs = save_file_record.await_args.kwargs
+    assert kwargs["file_type"] == "video"
+    assert kwargs["nas_path"] == "blobs/ab/abc.mp4"
+    assert kwargs["content_sha256"] == "abc" and kwargs["file_size"] == 321
+    assert kwargs["mime_type"] == "video/mp4"
 
     monkeypatch.setattr(linebot_router, "download_and_save_file", AsyncMock(side_effect=RuntimeError("fail")))
     await linebot_router.process_media_message(
@@ -406,12 +412,13 @@ async def test_webhook_and_message_event_extra_paths(monkeypatch: pytest.MonkeyP
         )
     assert parse_exc.value.status_code == 400
 
-    # webhook: success add tasks
+    # webhook: 停用佇列時以背景工作處理
     class _OkParser:
         def parse(self, *_args, **_kwargs):
             return [object(), object()]
 
     monkeypatch.setattr(linebot_router, "get_webhook_parser", lambda _secret: _OkParser())
+    monkeypatch.setattr(linebot_router.settings, "webhook_queue_enabled", False)
     tasks = BackgroundTasks()
     result = await linebot_router.webhook(
         request=_Request(b'{"events": []}'),
@@ -421,6 +428,24 @@ async def test_webhook_and_message_event_extra_paths(monkeypatch: pytest.MonkeyP
     assert result == {"status": "ok"}
     assert len(tasks.tasks) == 2
 
+    # webhook: 啟用佇列時寫入佇列（webhookEventId 去重、依來源分對話）
+    monkeypatch.setattr(linebot_router.settings, "webhook_queue_enabled", True)
+    enqueue = AsyncMock(return_value=2)
+    monkeypatch.setattr(linebot_router, "enqueue_events", enqueue)
+    body = (
+        b'{"events": ['
+        b'{"type": "message", "webhookEventId": "E1", "source": {"type": "group", "groupId": "C1", "userId": "U1"}},'
+        b'{"type": "follow", "source": {"type": "user", "userId": "U2"}}]}'
+    )
+    tasks = BackgroundTasks()
+    result = await linebot_router.webhook(request=_Request(body), background_tasks=tasks, x_line_signature="sig")
+    assert result == {"status": "ok"}
+    assert tasks.tasks == []
+    queued = enqueue.await_args.args[0]
+    assert [(e.event_key, e.conversation_key) for e in queued][0] == ("E1", "line:group:C1")
+    assert queued[1].event_key.startswith("sha256:")
+    assert queued[1].conversation_key == "line:user:U2"
+
     monkeypatch.setattr(linebot_router, "TextMessageContent", _TextMessage)
     monkeypatch.setattr(linebot_router, "VideoMessageContent", _VideoMessage)
     monkeypatch.setattr(linebot_router, "AudioMessageContent", _AudioMessage)
@@ -488,7 +513,7 @@ async def test_webhook_and_message_event_extra_paths(monkeypatch: pytest.MonkeyP
 
 @pytest.mark.asyncio
 async def test_process_media_audio_and_image_reclassify(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setattr(linebot_router, "download_and_save_file", AsyncMock(return_value="nas/path"))
+    monkeypatch.setattr(linebot_router, "download_and_save_file", AsyncMock(return_value=None))
     save_file_record = AsyncMock()
     monkeypatch.setattr(linebot_router, "save_file_record", save_file_record)
 
@@ -251,6 +251,11 @@ async def test_public_attachment_and_download_routes(monkeypatch: pytest.MonkeyP
         assert resp.status_code == 200
         assert resp.content == b"hello"
 
+        # Range 請求（續傳）
+        resp = await client.get("/api/public/tok/download", headers={"Range": "bytes=1-3"})
+        assert resp.status_code == 206
+        assert resp.content == b"ell"
+
     # 下載：project_attachment
     aid = uuid4()
     monkeypatch.setattr(share_api, "get_link_info", AsyncMock(return_value={"resource_type": "project_attachment", "resource_id": str(aid)}))
@@ -258,7 +263,9 @@ async def test_public_attachment_and_download_routes(monkeypatch: pytest.MonkeyP
     from ching_tech_os.services import project as project_service
 
     monkeypatch.setattr(share_service, "get_project_attachment_info", AsyncMock(return_value={"project_id": uuid4()}))
-    monkeypatch.setattr(project_service, "get_attachment_content", AsyncMock(return_value=(b"att", "a.pdf")))
+    att_file = tmp_path / "a.pdf"
+    att_file.write_bytes(b"att")
+    monkeypatch.setattr(project_service, "get_attachment_file_path", AsyncMock(return_value=(att_file, "a.pdf")))
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         resp = await client.get("/api/public/tok/download")
         assert resp.status_code == 200
@@ -279,18 +286,20 @@ async def test_get_public_attachment_additional_branches(monkeypatch: pytest.Mon
         AsyncMock(return_value={"resource_type": "knowledge", "resource_id": "kb1"}),
     )
     monkeypatch.setattr(share_api.settings, "knowledge_data_path", str(tmp_path))
-    monkeypatch.setattr(share_api, "get_nas_attachment", lambda _path: b"nas-bytes")
+    nas_attachment = tmp_path / "nas-a.txt"
+    nas_attachment.write_bytes(b"nas-bytes")
+    monkeypatch.setattr(share_api, "get_nas_attachment_path", lambda _path: nas_attachment)
 
     # local:/knowledge/assets/images
     local_asset = tmp_path / "assets" / "images" / "kb1-ok.png"
     local_asset.parent.mkdir(parents=True, exist_ok=True)
     local_asset.write_bytes(b"img")
     resp1 = await share_api.get_public_attachment("tok", "local:/knowledge/assets/images/kb1-ok.png")
-    assert resp1.body == b"img"
+    assert Path(resp1.path).read_bytes() == b"img"
 
     # local:/knowledge/images
     resp2 = await share_api.get_public_attachment("tok", "local:/knowledge/images/kb1-ok.png")
-    assert resp2.body == b"img"
+    assert Path(resp2.path).read_bytes() == b"img"
 
     # local/images 權限錯誤
     with pytest.raises(Exception) as exc1:
@@ -304,19 +313,19 @@ async def test_get_public_attachment_additional_branches(monkeypatch: pytest.Mon
 
     # ctos://knowledge/attachments
     resp3 = await share_api.get_public_attachment("tok", "ctos://knowledge/attachments/kb1/a.txt")
-    assert resp3.body == b"nas-bytes"
+    assert Path(resp3.path).read_bytes() == b"nas-bytes"
 
     # ctos:/knowledge/attachments
     resp3 = await share_api.get_public_attachment("tok", "ctos:/knowledge/attachments/kb1/a.txt")
-    assert resp3.body == b"nas-bytes"
+    assert Path(resp3.path).read_bytes() == b"nas-bytes"
 
     # nas://knowledge
     resp4 = await share_api.get_public_attachment("tok", "nas://knowledge/attachments/kb1/a.txt")
-    assert resp4.body == b"nas-bytes"
+    assert Path(resp4.path).read_bytes() == b"nas-bytes"
 
     # nas:/knowledge
     resp5 = await share_api.get_public_attachment("tok", "nas:/knowledge/attachments/kb1/a.txt")
-    assert resp5.body == b"nas-bytes"
+    assert Path(resp5.path).read_bytes() == b"nas-bytes"
 
     # NAS 附件越權
     with pytest.raises(Exception) as exc3:
@@ -403,7 +412,7 @@ async def test_download_shared_file_error_mappings(monkeypatch: pytest.MonkeyPat
         AsyncMock(return_value={"project_id": uuid4()}),
     )
     monkeypatch.setattr(
-        "ching_tech_os.services.project.get_attachment_content",
+        "ching_tech_os.services.project.get_attachment_file_path",
         AsyncMock(side_effect=ProjectError("missing")),
     )
     with pytest.raises(Exception) as exc6:
@@ -53,9 +53,21 @@ def test_telegram_webhook_paths(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(telegram_router, "handle_update", AsyncMock())
     monkeypatch.setattr(telegram_router.Update, "de_json", lambda body, _bot: {"body": body})
 
-    ok = client.post("/webhook", json={"update_id": 2})
+    enqueue = AsyncMock(return_value=1)
+    monkeypatch.setattr(telegram_router, "enqueue_events", enqueue)
+    ok = client.post("/webhook", json={"update_id": 2, "message": {"chat": {"id": 42}}})
     assert ok.status_code == 200
     assert ok.json()["status"] == "ok"
+    queued = enqueue.await_args.args[0]
+    assert [(e.platform, e.event_key, e.conversation_key) for e in queued] == [
+        ("telegram", "2", "telegram:chat:42")
+    ]
+
+    # 停用佇列時沿用背景工作
+    monkeypatch.setattr(telegram_router.settings, "webhook_queue_enabled", False)
+    assert client.post("/webhook", json={"update_id": 4}).status_code == 200
+    telegram_router.handle_update.assert_awaited_once()
+    assert enqueue.await_count == 1
 
     monkeypatch.setattr(
         telegram_router.Update,
@@ -109,7 +109,7 @@ async def test_login_paths(monkeypatch: pytest.MonkeyPatch) -> None:
         "must_change_password": True,
         "preferences": {},
     }))
-    monkeypatch.setattr(auth, "verify_password", lambda _pw, _h: True)
+    monkeypatch.setattr(auth, "verify_password_async", AsyncMock(return_value=True))
     monkeypatch.setattr(auth, "update_last_login", AsyncMock())
     ok = await auth.login(login_req, req)
     assert ok.success is True and ok.token == "token-1" and ok.must_change_password is True
@@ -129,7 +129,7 @@ async def test_login_paths(monkeypatch: pytest.MonkeyPatch) -> None:
         "password_hash": "h",
         "is_active": True,
     }))
-    monkeypatch.setattr(auth, "verify_password", lambda _pw, _h: False)
+    monkeypatch.setattr(auth, "verify_password_async", AsyncMock(return_value=False))
     bad_pw = await auth.login(login_req, req)
     assert bad_pw.success is False
 
@@ -0,0 +1,87 @@
+"""認證執行緒池（bcrypt offload）測試。"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from ching_tech_os.config import settings
+from ching_tech_os.services import password as password_service
+from ching_tech_os.services.workers import thread_pool
+from ching_tech_os.services.workers import AuthPoolBusyError, get_auth_pool_stats, run_in_auth_pool
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(thread_pool, "_auth_state", thread_pool._AuthPoolState())
+
+
+@pytest.mark.asyncio
+async def test_run_in_auth_pool_runs_off_loop_and_records_stats() -> None:
+    loop_thread = threading.get_ident()
+
+    result = await run_in_auth_pool(lambda x: (x * 2, threading.get_ident()), 21)
+
+    assert result[0] == 42
+    assert result[1] != loop_thread
+    stats = get_auth_pool_stats()
+    assert stats["submitted"] == 1
+    assert stats["completed"] == 1
+    assert stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_in_auth_pool_counts_failures() -> None:
+    def boom():
+        raise RuntimeError("x")
+
+    with pytest.raises(RuntimeError):
+        await run_in_auth_pool(boom)
+
+    stats = get_auth_pool_stats()
+    assert stats["failed"] == 1
+    assert stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_in_auth_pool_rejects_when_queue_full(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "auth_pool_max_pending", 0)
+
+    with pytest.raises(AuthPoolBusyError) as exc_info:
+        await run_in_auth_pool(lambda: None)
+
+    assert exc_info.value.status_code == 503
+    assert get_auth_pool_stats()["rejected_queue_full"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_in_auth_pool_caps_per_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "auth_max_concurrent_per_ip", 1)
+    release = threading.Event()
+
+    first = asyncio.create_task(run_in_auth_pool(release.wait, 5, client_key="1.2.3.4"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AuthPoolBusyError) as exc_info:
+        await run_in_auth_pool(lambda: None, client_key="1.2.3.4")
+    assert exc_info.value.status_code == 429
+
+    # 其他來源不受影響
+    assert await run_in_auth_pool(lambda: "ok", client_key="5.6.7.8") == "ok"
+
+    release.set()
+    assert await first is True
+    stats = get_auth_pool_stats()
+    assert stats["rejected_per_client"] == 1
+    assert thread_pool._auth_state.per_client == {}
+
+
+@pytest.mark.asyncio
+async def test_password_async_wrappers_roundtrip() -> None:
+    password_hash = await password_service.hash_password_async("Abcd1234", client_key="ip")
+
+    assert await password_service.verify_password_async("Abcd1234", password_hash) is True
+    assert await password_service.verify_password_async("wrong", password_hash, client_key="ip") is False
+    assert get_auth_pool_stats()["completed"] == 3
@@ -0,0 +1,137 @@
+"""Bot 對話上下文快取測試"""
+
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from ching_tech_os.services import linebot_ai
+from ching_tech_os.services.bot import context_cache as cc
+
+
+def _row(idx: int, message_type: str = "text", **extra) -> dict:
+    row = {
+        "id": f"m{idx}",
+        "content": f"msg {idx}" if message_type == "text" else None,
+        "is_from_bot": False,
+        "display_name": "小明",
+        "message_type": message_type,
+        "line_message_id": f"line{idx}",
+        "nas_path": None,
+        "file_name": None,
+        "file_size": None,
+        "actual_file_type": None,
+    }
+    row.update(extra)
+    return row
+
+
+class _CM:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *_args):
+        return None
+
+
+def test_conversation_key() -> None:
+    gid = uuid4()
+    assert cc.conversation_key(gid, "U1") == ("group", str(gid))
+    assert cc.conversation_key(None, "U1") == ("user", "U1")
+    assert cc.conversation_key(None, None) is None
+
+
+def test_fill_get_and_exclude() -> None:
+    cache = cc.ConversationContextCache(capacity=5, ttl=60)
+    key = ("user", "U1")
+    assert cache.get(key, 3) is None
+
+    cache.fill(key, [_row(i) for i in range(3)])
+    rows = cache.get(key, 2)
+    assert [r["id"] for r in rows] == ["m1", "m2"]
+    # 資料庫筆數少於容量 → 完整歷史，可提供少於 limit 的結果
+    assert [r["id"] for r in cache.get(key, 10, exclude_message_id="m2")] == ["m0", "m1"]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_incomplete_buffer_falls_back_to_db() -> None:
+    cache = cc.ConversationContextCache(capacity=3, ttl=60)
+    key = ("group", "g")
+    cache.fill(key, [_row(i) for i in range(3)])
+    assert cache.get(key, 3) is not None
+    # 排除一筆後不足 limit，且緩衝區不是完整歷史
+    assert cache.get(key, 3, exclude_message_id="m1") is None
+
+
+def test_append_rolls_buffer_and_ttl_expiry(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(cc.time, "monotonic", lambda: now[0])
+    cache = cc.ConversationContextCache(capacity=2, ttl=10)
+    key = ("user", "U1")
+
+    cache.append(key, _row(9))  # 未快取的對話不處理
+    assert cache.get(key, 1) is None
+
+    cache.fill(key, [_row(0)])
+    cache.append(key, _row(1))
+    cache.append(key, _row(2))
+    assert [r["id"] for r in cache.get(key, 2)] == ["m1", "m2"]
+
+    now[0] += 11
+    assert cache.get(key, 1) is None
+
+
+def test_invalidate_message_and_lru_limit() -> None:
+    cache = cc.ConversationContextCache(capacity=5, ttl=60, max_conversations=2)
+    cache.fill(("user", "a"), [_row(1)])
+    cache.fill(("user", "b"), [_row(2)])
+    cache.fill(("user", "c"), [_row(3)])
+    assert cache.stats()["conversations"] == 2
+    assert cache.get(("user", "a"), 1) is None
+
+    cache.invalidate_message("m3")
+    assert cache.get(("user", "c"), 1) is None
+    assert cache.get(("user", "b"), 1) is not None
+
+
+def test_record_saved_message_appends_text_and_invalidates_media() -> None:
+    cache = cc.conversation_context_cache
+    key = ("user", "U1")
+    cache.fill(key, [_row(0)])
+
+    cc.record_saved_message(
+        "m1", bot_group_id=None, platform_user_id="U1", message_id="line1",
+        message_type="text", content="hi", is_from_bot=False, display_name="小明",
+    )
+    assert [r["content"] for r in cache.get(key, 5)] == ["msg 0", "hi"]
+
+    cc.record_saved_message(
+        "m2", bot_group_id=None, platform_user_id="U1", message_id="line2",
+        message_type="image", content=None, is_from_bot=False, display_name="小明",
+    )
+    assert cache.get(key, 5) is None
+
+
+@pytest.mark.asyncio
+async def test_get_conversation_context_served_from_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    conn = AsyncMock()
+    conn.fetch = AsyncMock(return_value=[_row(2), _row(1), _row(0)])  # DESC
+    monkeypatch.setattr(linebot_ai, "get_connection", lambda: _CM(conn))
+
+    group_id = uuid4()
+    context, _, _ = await linebot_ai.get_conversation_context(group_id, None, limit=2)
+    assert [c["content"] for c in context] == ["msg 1", "msg 2"]
+
+    cc.record_saved_message(
+        "m3", bot_group_id=group_id, platform_user_id="U1", message_id="line3",
+        message_type="text", content="new", is_from_bot=True, display_name=None,
+    )
+    context, _, _ = await linebot_ai.get_conversation_context(
+        group_id, None, limit=2, exclude_message_id="m2",
+    )
+    assert [c["content"] for c in context] == ["msg 1", "new"]
+    conn.fetch.assert_awaited_once()
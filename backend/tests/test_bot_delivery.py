@@ -0,0 +1,132 @@
+"""bot.delivery 測試。"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from linebot.v3.messaging import ApiException, TextMessage
+
+from ching_tech_os.services.bot import delivery
+from ching_tech_os.services.bot_line import messaging
+
+
+@pytest.fixture(autouse=True)
+def _fast_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(delivery, "_quotas", {"line": delivery._ChannelQuota(0), "telegram": delivery._ChannelQuota(0)})
+    monkeypatch.setattr(delivery, "_BACKOFF_BASE_SECONDS", 0.001)
+
+
+class _LineApi:
+    def __init__(self, errors: list[Exception] | None = None) -> None:
+        self.errors = list(errors or [])
+        self.calls: list[tuple[list, str]] = []
+
+    async def push_message(self, req, x_line_retry_key=None):
+        self.calls.append(([m.text for m in req.messages], x_line_retry_key))
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(sent_messages=[SimpleNamespace(id=f"id-{m.text}") for m in req.messages])
+
+
+@pytest.mark.asyncio
+async def test_line_batches_and_idempotent_retry(monkeypatch: pytest.MonkeyPatch) -> None:
+    # 第二批先被限流、再遇到 5xx，重試時沿用同一個 retry key
+    api = _LineApi()
+    monkeypatch.setattr(messaging, "get_messaging_api", AsyncMock(return_value=api))
+    original = api.push_message
+
+    async def flaky(req, x_line_retry_key=None):
+        if len(api.calls) in (1, 2):
+            api.calls.append(([m.text for m in req.messages], x_line_retry_key))
+            raise ApiException(status=429 if len(api.calls) == 2 else 502)
+        return await original(req, x_line_retry_key=x_line_retry_key)
+
+    api.push_message = flaky
+    messages = [TextMessage(text=f"m{i}") for i in range(7)]
+
+    ids, error = await messaging.push_messages("C1", messages)
+
+    assert error is None
+    assert ids == [f"id-m{i}" for i in range(7)]
+    assert [len(texts) for texts, _ in api.calls] == [5, 2, 2, 2]
+    keys = [key for _, key in api.calls]
+    assert keys[1] == keys[2] == keys[3] and keys[0] != keys[1]
+
+
+@pytest.mark.asyncio
+async def test_line_non_retryable_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    # 重試時已被接受（409）視為送出
+    api = _LineApi([ApiException(status=500), ApiException(status=409)])
+    monkeypatch.setattr(messaging, "get_messaging_api", AsyncMock(return_value=api))
+    result = await delivery.deliver("line", "U1", [TextMessage(text="a")])
+    assert result.ok and result.message_ids == [] and len(api.calls) == 2
+
+    # 月額度用完不重試
+    quota_error = ApiException(status=429)
+    quota_error.body = b'{"message":"You have reached your monthly limit."}'
+    api = _LineApi([quota_error])
+    monkeypatch.setattr(messaging, "get_messaging_api", AsyncMock(return_value=api))
+    result = await delivery.deliver("line", "U1", [TextMessage(text="a")])
+    assert result.error == "已達本月推播上限"
+    assert len(api.calls) == 1
+
+    # 超過重試次數
+    monkeypatch.setattr(delivery.settings, "bot_delivery_max_retries", 1)
+    api = _LineApi([ApiException(status=503)] * 3)
+    monkeypatch.setattr(messaging, "get_messaging_api", AsyncMock(return_value=api))
+    result = await delivery.deliver("line", "U1", [TextMessage(text="a")])
+    assert not result.ok and len(api.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_deliver_many_fans_out_concurrently(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(delivery.settings, "bot_delivery_concurrency", 4)
+    active = peak = 0
+
+    async def fake_push(target, batch, _retry_key):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return [f"{target}-{i}" for i in range(len(batch))]
+
+    monkeypatch.setattr(delivery, "_push_line_batch", fake_push)
+    deliveries = [delivery.Delivery("line", f"C{i}", delivery.text_messages("line", "報告")) for i in range(30)]
+    deliveries.append(delivery.Delivery("discord", "x", ["hi"]))
+
+    results = await delivery.deliver_many(deliveries)
+
+    assert [r.target for r in results] == [d.target for d in deliveries]
+    assert all(r.ok and r.message_ids == [f"C{i}-0"] for i, r in enumerate(results[:30]))
+    assert results[-1].error == "不支援的平台: discord"
+    assert peak == 4
+
+
+@pytest.mark.asyncio
+async def test_telegram_retries_only_when_rate_limited(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    class _RetryAfter(Exception):
+        retry_after = timedelta(milliseconds=1)
+
+    async def send(target, batch, _retry_key):
+        calls.extend(batch)
+        if len(calls) == 1:
+            raise _RetryAfter("flood")
+        if len(calls) == 3:
+            raise RuntimeError("timed out")
+        return ["1"]
+
+    monkeypatch.setattr(delivery, "_telegram_sender", AsyncMock(return_value=send))
+    # Telegram 上限 4096 字：長文字分三段，逐則送出
+    text = "\n".join(["a" * 4000, "b" * 4000, "c" * 200])
+    result = await delivery.deliver("telegram", "123", delivery.text_messages("telegram", text))
+
+    assert calls == ["a" * 4000, "a" * 4000, "b" * 4000]
+    assert result.message_ids == ["1"]
+    assert result.error == "部分訊息發送失敗: 發送失敗：timed out"
@@ -65,23 +65,29 @@ async def test_save_record_download_and_guess(monkeypatch: pytest.MonkeyPatch) -
     assert returned == file_uuid
     conn.execute.assert_awaited_once()
 
-    monkeypatch.setattr(file_handler, "download_line_content", AsyncMock(return_value=b"abc"))
-    original_generate_nas_path = file_handler.generate_nas_path
-    monkeypatch.setattr(file_handler, "generate_nas_path", lambda **_kwargs: "groups/g1/files/a.txt")
-    monkeypatch.setattr(file_handler, "save_to_nas", AsyncMock(return_value=True))
-    saved = await file_handler.download_and_save_file("m1", message_uuid, "file", line_group_id="g1", file_name="a.txt")
-    assert saved == "groups/g1/files/a.txt"
-
-    monkeypatch.setattr(file_handler, "save_to_nas", AsyncMock(return_value=False))
-    assert await file_handler.download_and_save_file("m1", message_uuid, "file", line_group_id="g1", file_name="a.txt") is None
-
-    monkeypatch.setattr(file_handler, "download_line_content", AsyncMock(return_value=None))
-    assert await file_handler.download_and_save_file("m1", message_uuid, "file", line_group_id="g1", file_name="a.txt") is None
+    stored = file_handler.StoredMedia(
+        nas_path="blobs/ab/abc.txt", sha256="abc", size=3, head=b"abc", deduplicated=False
+    )
+    store_url = AsyncMock(return_value=stored)
+    monkeypatch.setattr(file_handler, "store_url", store_url)
+    monkeypatch.setattr(file_handler.settings, "line_channel_access_token", "token")
+    saved = await file_handler.download_and_save_file("m1", "file", file_name="a.TXT")
+    assert saved is stored
+    url = store_url.await_args.args[0]
+    assert url.endswith("/message/m1/content")
+    assert store_url.await_args.kwargs["headers"] == {"Authorization": "Bearer token"}
+    assert store_url.await_args.kwargs["ext"](b"") == ".txt"
+
+    request = file_handler.httpx.Request("GET", url)
+    status_error = file_handler.httpx.HTTPStatusError(
+        "404", request=request, response=file_handler.httpx.Response(404, request=request)
+    )
+    monkeypatch.setattr(file_handler, "store_url", AsyncMock(side_effect=status_error))
+    assert await file_handler.download_and_save_file("m1", "file", file_name="a.txt") is None
 
-    monkeypatch.setattr(file_handler, "download_line_content", AsyncMock(side_effect=RuntimeError("boom")))
-    assert await file_handler.download_and_save_file("m1", message_uuid, "file") is None
+    monkeypatch.setattr(file_handler, "store_url", AsyncMock(side_effect=RuntimeError("boom")))
+    assert await file_handler.download_and_save_file("m1", "image") is None
 
-    monkeypatch.setattr(file_handler, "generate_nas_path", original_generate_nas_path)
     path1 = file_handler.generate_nas_path("image", "m1", line_group_id="g1", file_name=None, content=b"\xff\xd8\xffx")
     path2 = file_handler.generate_nas_path("file", "m2", line_user_id="u1", file_name="../x.txt")
     path3 = file_handler.generate_nas_path("audio", "m3")
@@ -89,6 +95,10 @@ async def test_save_record_download_and_guess(monkeypatch: pytest.MonkeyPatch) -
     assert "m2_.._x.txt" in path2
     assert path3.startswith("unknown/audios/")
 
+    assert file_handler.resolve_extension("image", None, b"\x89PNG\r\n\x1a\n") == ".png"
+    assert file_handler.resolve_extension("video", None, b"unknown") == ".mp4"
+    assert file_handler.resolve_extension("file", "Report.PDF") == ".pdf"
+
     assert file_handler.guess_mime_type(b"\xff\xd8\xffa") == "image/jpeg"
     assert file_handler.guess_mime_type(b"\x89PNG\r\n\x1a\nabc") == "image/png"
     assert file_handler.guess_mime_type(b"GIF89aabc") == "image/gif"
@@ -109,27 +119,21 @@ async def test_line_content_and_nas_operations(monkeypatch: pytest.MonkeyPatch,
         def __init__(self, status_code: int):
             self.status_code = status_code
 
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, *_args):
-            return None
-
         async def get(self, _url, headers=None):
             return _Resp(self.status_code, b"ok", text="bad")
 
     monkeypatch.setattr(file_handler.settings, "line_channel_access_token", "token")
-    monkeypatch.setattr(file_handler.httpx, "AsyncClient", lambda timeout=300.0: _Client(200))
+    monkeypatch.setattr(file_handler, "get_http_client", lambda: _Client(200))
     assert await file_handler.download_line_content("m1") == b"ok"
 
-    monkeypatch.setattr(file_handler.httpx, "AsyncClient", lambda timeout=300.0: _Client(500))
+    monkeypatch.setattr(file_handler, "get_http_client", lambda: _Client(500))
     assert await file_handler.download_line_content("m1") is None
 
     class _ErrClient(_Client):
         async def get(self, _url, headers=None):
             raise RuntimeError("http fail")
 
-    monkeypatch.setattr(file_handler.httpx, "AsyncClient", lambda timeout=300.0: _ErrClient(200))
+    monkeypatch.setattr(file_handler, "get_http_client", lambda: _ErrClient(200))
     assert await file_handler.download_line_content("m1") is None
 
     fake_service = _FakeFileService()
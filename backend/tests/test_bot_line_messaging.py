@@ -24,7 +24,7 @@ class _FakeApi:
             raise self.reply_error
         return SimpleNamespace(sent_messages=[SimpleNamespace(id="r1"), SimpleNamespace(id="r2")])
 
-    async def push_message(self, req):
+    async def push_message(self, req, **_kwargs):
         self.push_calls.append(req)
         if self.push_error:
             raise self.push_error
@@ -97,7 +97,7 @@ async def test_reply_messages_and_push_paths(monkeypatch: pytest.MonkeyPatch) ->
             super().__init__()
             self.calls = 0
 
-        async def push_message(self, req):
+        async def push_message(self, req, **_kwargs):
             self.calls += 1
             if self.calls == 1:
                 return SimpleNamespace(sent_messages=[SimpleNamespace(id="ok1")])
@@ -113,7 +113,7 @@ async def test_reply_messages_and_push_paths(monkeypatch: pytest.MonkeyPatch) ->
     assert "部分訊息發送失敗" in (partial_err or "")
 
     class _FailApi(_FakeApi):
-        async def push_message(self, req):
+        async def push_message(self, req, **_kwargs):
             raise RuntimeError("forbidden 403")
 
     fail_api = _FailApi()
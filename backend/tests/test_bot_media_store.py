@@ -0,0 +1,110 @@
+"""bot.media_store 內容定址媒體收錄測試。"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from ching_tech_os.services.bot import media_store
+from ching_tech_os.services.bot_line import file_handler
+from ching_tech_os.services.local_file import LocalFileError, LocalFileService
+
+
+@pytest.fixture
+def nas_root(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    monkeypatch.setattr(media_store, "create_linebot_file_service", lambda: LocalFileService(str(tmp_path)))
+    return tmp_path
+
+
+@pytest.fixture
+def http_client(monkeypatch: pytest.MonkeyPatch):
+    requests: list[httpx.Request] = []
+    bodies = {"/a": b"\x89PNG\r\n\x1a\n" + b"x" * 600_000, "/b": b"plain text"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body = bodies.get(request.url.path)
+        if body is None:
+            return httpx.Response(404, text="missing")
+        return httpx.Response(200, content=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(media_store, "_http_client", client)
+    return SimpleNamespace(requests=requests, bodies=bodies)
+
+
+@pytest.mark.asyncio
+async def test_streams_to_content_addressed_blob_and_dedups(nas_root: Path, http_client) -> None:
+    body = http_client.bodies["/a"]
+    first = await media_store.store_url("https://cdn.example.com/a", ext=lambda head: ".png" if head[:4] == b"\x89PNG" else "")
+    second = await media_store.store_url("https://cdn.example.com/a?copy=1", ext=".png")
+
+    sha = hashlib.sha256(body).hexdigest()
+    assert first.sha256 == sha and first.size == len(body)
+    assert first.nas_path == f"blobs/{sha[:2]}/{sha}.png"
+    assert first.deduplicated is False
+    assert second.nas_path == first.nas_path and second.deduplicated is True
+    assert (nas_root / first.nas_path).read_bytes() == body
+    # 暫存檔不殘留
+    assert list((nas_root / media_store.INCOMING_DIR).iterdir()) == []
+    assert len(http_client.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_http_error_and_write_failure_leave_no_partial_file(
+    nas_root: Path, http_client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    with pytest.raises(httpx.HTTPStatusError):
+        await media_store.store_url("https://cdn.example.com/missing")
+
+    def _fail(*_args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(media_store, "_commit_blob", _fail)
+    with pytest.raises(LocalFileError):
+        await media_store.store_bytes(b"data", ext=".bin")
+    assert list((nas_root / media_store.INCOMING_DIR).iterdir()) == []
+    assert not (nas_root / "blobs" / hashlib.sha256(b"data").hexdigest()[:2]).exists()
+
+
+class _ConnCtx:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *_args):
+        return False
+
+
+@pytest.mark.asyncio
+async def test_delete_keeps_blob_while_other_messages_reference_it(monkeypatch: pytest.MonkeyPatch) -> None:
+    file_id = uuid4()
+    deleted_paths: list[str] = []
+    monkeypatch.setattr(
+        file_handler,
+        "get_file_by_id",
+        AsyncMock(return_value={"id": file_id, "message_id": uuid4(), "nas_path": "blobs/ab/abc.jpg"}),
+    )
+    monkeypatch.setattr(
+        file_handler,
+        "create_linebot_file_service",
+        lambda: SimpleNamespace(delete_file=deleted_paths.append),
+    )
+
+    conn = SimpleNamespace(fetchval=AsyncMock(return_value=2), execute=AsyncMock())
+    monkeypatch.setattr(file_handler, "get_connection", lambda: _ConnCtx(conn))
+    assert await file_handler.delete_file(file_id) is True
+    assert deleted_paths == []
+    assert conn.fetchval.await_args.args[1:] == ("blobs/ab/abc.jpg", file_id)
+
+    conn.fetchval = AsyncMock(return_value=0)
+    assert await file_handler.delete_file(file_id) is True
+    assert deleted_paths == ["blobs/ab/abc.jpg"]
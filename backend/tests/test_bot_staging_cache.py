@@ -0,0 +1,140 @@
+"""bot.staging_cache 附件暫存 LRU 測試。"""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from ching_tech_os.services.bot import staging_cache as staging_module
+from ching_tech_os.services.bot.staging_cache import StagingCache
+from ching_tech_os.services.bot_line import file_handler
+
+
+def _write(path: Path, size: int, age: float) -> str:
+    path.write_bytes(b"x" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return str(path)
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path: Path) -> None:
+    a = _write(tmp_path / "a.jpg", 40, age=3000)
+    b = _write(tmp_path / "b.jpg", 40, age=2000)
+    cache = StagingCache([str(tmp_path)], max_bytes=100, min_residency_seconds=60)
+    cache.scan()
+
+    # 命中 a：更新存取時間，b 變成最久未用
+    assert cache.lookup("image", a) is True
+    c = _write(tmp_path / "c.jpg", 40, age=1000)
+    cache.record(c)
+
+    assert not os.path.exists(b)
+    assert os.path.exists(a) and os.path.exists(c)
+    assert cache.total_bytes == 80
+    assert cache.stats()["hits"] == 1
+
+    assert cache.lookup("image", b) is False
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_recently_used_files_are_not_evicted(tmp_path: Path) -> None:
+    cache = StagingCache([str(tmp_path)], max_bytes=50, min_residency_seconds=60)
+    first = _write(tmp_path / "a.txt", 40, age=0)
+    cache.record(first)
+    second = _write(tmp_path / "b.txt", 40, age=0)
+    cache.record(second)
+    # 兩者都剛使用過（可能正被讀取），暫時超過上限也不刪除
+    assert os.path.exists(first) and os.path.exists(second)
+
+
+def test_concurrent_record_and_scan_keep_accounting(tmp_path: Path) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = StagingCache([str(tmp_path)], max_bytes=0)
+    paths = [_write(tmp_path / f"{i}.bin", 10, age=0) for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.record, p) for p in paths]
+        futures += [pool.submit(cache.scan) for _ in range(20)]
+        for future in futures:
+            future.result()
+
+    assert len(cache) == 200
+    assert cache.total_bytes == 2000
+
+
+def test_sweep_removes_idle_and_picks_up_external_files(tmp_path: Path) -> None:
+    cache = StagingCache([str(tmp_path), str(tmp_path / "missing")], max_bytes=0, max_idle_seconds=3600)
+    cache.record(_write(tmp_path / "fresh.pdf", 10, age=0))
+    stale = _write(tmp_path / "stale.png", 10, age=7200)  # 其他程式寫入，索引中沒有
+
+    assert cache.sweep() == 1
+    assert not os.path.exists(stale)
+    assert len(cache) == 1 and cache.total_bytes == 10
+
+
+def test_stage_file_copies_without_touching_source(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = tmp_path / "nas" / "blob.jpg"
+    source.parent.mkdir()
+    source.write_bytes(b"image")
+    os.utime(source, (1_000_000_000, 1_000_000_000))
+    cache = StagingCache([str(tmp_path / "stage")], max_bytes=0)
+
+    dest = str(tmp_path / "stage" / "m1.jpg")
+    assert cache.stage_file(str(source), dest) in ("copy_file_range", "copy")
+    assert os.stat(dest).st_ino != source.stat().st_ino
+    # 命中只更新索引中的存取時間，NAS 原始檔的 mtime 不變
+    assert cache.lookup("image", dest) is True
+    cache.touch(dest)
+    assert source.stat().st_mtime == 1_000_000_000
+
+    def _unsupported(*_args):
+        raise OSError(95, "Operation not supported")
+
+    monkeypatch.setattr(staging_module.os, "copy_file_range", _unsupported, raising=False)
+    dest2 = str(tmp_path / "stage" / "m2.jpg")
+    assert cache.stage_file(str(source), dest2) == "copy"
+    assert Path(dest2).read_bytes() == b"image"
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_parsed_document_is_reused_without_reparsing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    nas = tmp_path / "nas"
+    (nas / "blobs").mkdir(parents=True)
+    (nas / "blobs" / "report.pdf").write_bytes(b"%PDF-1.4")
+    stage_dir = tmp_path / "bot-files"
+    cache = StagingCache([str(stage_dir)], max_bytes=0)
+    monkeypatch.setattr(file_handler, "staging_cache", cache)
+    monkeypatch.setattr(file_handler, "TEMP_FILE_DIR", str(stage_dir))
+    monkeypatch.setattr(
+        file_handler,
+        "create_linebot_file_service",
+        lambda: SimpleNamespace(get_full_path=lambda p: str(nas / p)),
+    )
+    read_nas = AsyncMock(return_value=None)
+    monkeypatch.setattr(file_handler, "read_file_from_nas", read_nas)
+
+    import ching_tech_os.services.workers as workers_module
+
+    parsed: list[str] = []
+
+    async def _run_in_doc_pool(_func, path):
+        parsed.append(path)
+        return SimpleNamespace(text="第一頁內容", error=None)
+
+    monkeypatch.setattr(workers_module, "run_in_doc_pool", _run_in_doc_pool)
+
+    first = await file_handler.ensure_temp_file("m1", "blobs/report.pdf", "report.pdf", file_size=8)
+    second = await file_handler.ensure_temp_file("m1", "blobs/report.pdf", "report.pdf", file_size=8)
+
+    assert first == second == f"PDF:{stage_dir}/m1_report.pdf|TXT:{stage_dir}/m1_report.txt"
+    # 直接解析 NAS 原始檔，不經由讀入記憶體；第二次命中不再解析
+    assert parsed == [str(nas / "blobs" / "report.pdf")]
+    read_nas.assert_not_awaited()
+    assert Path(f"{stage_dir}/m1_report.txt").read_text(encoding="utf-8") == "第一頁內容"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
@@ -102,12 +102,6 @@ async def test_telegram_adapter_paths(monkeypatch: pytest.MonkeyPatch) -> None:
 
 @pytest.mark.asyncio
 async def test_telegram_media_paths(monkeypatch: pytest.MonkeyPatch) -> None:
-    # 路徑生成
-    p1 = media._generate_telegram_nas_path("image", 1, "c1", True, ext=".jpg")
-    p2 = media._generate_telegram_nas_path("file", 2, "u1", False, file_name="../a.txt", ext=".txt")
-    assert "telegram/groups/c1/images/" in p1
-    assert "2_.._a.txt" in p2
-
     bot = _FakePTBBot()
     message_photo = SimpleNamespace(
         message_id=11,
@@ -118,20 +112,26 @@ async def test_telegram_media_paths(monkeypatch: pytest.MonkeyPatch) -> None:
         document=SimpleNamespace(file_id="d1", file_name="doc.PDF", file_size=456, mime_type="application/pdf"),
     )
 
-    monkeypatch.setattr(media, "save_to_nas", AsyncMock(return_value=True))
-    monkeypatch.setattr(media, "save_file_record", AsyncMock(return_value=None))
+    async def _store_bytes(content: bytes, ext: str = ""):
+        return SimpleNamespace(nas_path=f"blobs/aa/hash{ext}", sha256="hash", size=len(content))
+
+    monkeypatch.setattr(media, "store_bytes", _store_bytes)
+    save_file_record = AsyncMock(return_value=None)
+    monkeypatch.setattr(media, "save_file_record", save_file_record)
 
     ok_photo = await media.download_telegram_photo(bot, message_photo, "m-1", "c1", True)
-    assert ok_photo is not None and ok_photo.endswith(".jpg")
+    assert ok_photo == "blobs/aa/hash.jpg"
     ok_doc = await media.download_telegram_document(bot, message_doc, "m-2", "u1", False)
-    assert ok_doc is not None and "doc.PDF" in ok_doc
+    assert ok_doc == "blobs/aa/hash.pdf"
+    record = save_file_record.await_args.kwargs
+    assert record["file_name"] == "doc.PDF" and record["content_sha256"] == "hash" and record["file_size"] == 6
 
     # 無媒體
     assert await media.download_telegram_photo(bot, SimpleNamespace(photo=[]), "m", "c", True) is None
     assert await media.download_telegram_document(bot, SimpleNamespace(document=None), "m", "c", True) is None
 
     # 儲存失敗
-    monkeypatch.setattr(media, "save_to_nas", AsyncMock(return_value=False))
+    monkeypatch.setattr(media, "store_bytes", AsyncMock(side_effect=media.httpx.ReadError("x")))
     assert await media.download_telegram_photo(bot, message_photo, "m-1", "c1", True) is None
 
     # 下載例外
@@ -188,8 +188,31 @@ async def test_telegram_polling_paths(monkeypatch: pytest.MonkeyPatch) -> None:
         return SimpleNamespace()
 
     monkeypatch.setattr(asyncio, "create_task", _fake_create_task)
+    monkeypatch.setattr(polling.settings, "webhook_queue_enabled", False)
+    await polling.run_telegram_polling()
+    assert len(created) == 1
+
+    # 啟用佇列：update 寫入與 webhook 共用的佇列
+    enqueue = AsyncMock(return_value=1)
+    monkeypatch.setattr(polling, "enqueue_events", enqueue)
+    monkeypatch.setattr(polling.settings, "webhook_queue_enabled", True)
+
+    class _Update(SimpleNamespace):
+        def to_dict(self):
+            return {"update_id": self.update_id, "message": {"chat": {"id": -100}}}
+
+    class _QueuePollBot(_PollBot):
+        async def get_updates(self, **_kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                return [_Update(update_id=8)]
+            raise asyncio.CancelledError()
+
+    monkeypatch.setattr(telegram, "Bot", _QueuePollBot)
     await polling.run_telegram_polling()
     assert len(created) == 1
+    queued = enqueue.await_args.args[0]
+    assert [(e.event_key, e.conversation_key) for e in queued] == [("8", "telegram:chat:-100")]
 
     # _safe_handle_update 例外分支
     monkeypatch.setattr(polling, "handle_update", AsyncMock(side_effect=RuntimeError("x")))
@@ -195,3 +195,44 @@ async def test_existing_cache_control_not_overridden():
     async with AsyncClient(transport=transport, base_url="http://test") as c:
         resp = await c.get("/api/preset")
         assert resp.headers["cache-control"] == "public, max-age=3600"
+
+
+# === 純 ASGI 行為 ===
+
+@pytest.mark.asyncio
+async def test_streaming_response_gets_header():
+    """串流回應應直接通過 middleware 並帶有 cache-control"""
+    from fastapi.responses import StreamingResponse
+
+    test_app = _create_app()
+
+    @test_app.get("/api/stream")
+    async def stream():
+        async def gen():
+            for i in range(3):
+                yield f"chunk{i}\n".encode()
+        return StreamingResponse(gen(), media_type="text/plain")
+
+    resp = await _get("/api/stream", app=test_app)
+    assert resp.text == "chunk0\nchunk1\nchunk2\n"
+    assert resp.headers["cache-control"] == "private, no-cache"
+
+
+@pytest.mark.asyncio
+async def test_unmatched_path_has_no_header():
+    """不在規則內的路徑不加 cache-control"""
+    test_app = _create_app()
+
+    @test_app.get("/other")
+    async def other():
+        return PlainTextResponse("other")
+
+    resp = await _get("/other", app=test_app)
+    assert "cache-control" not in resp.headers
+
+
+def test_get_cache_value_static_prefixes():
+    """靜態資源前綴對應的快取策略"""
+    assert CacheControlMiddleware._get_cache_value("/assets/app.js") == "public, max-age=31536000, immutable"
+    assert CacheControlMiddleware._get_cache_value("/js/app.js") == "no-cache"
+    assert CacheControlMiddleware._get_cache_value("/unknown") is None
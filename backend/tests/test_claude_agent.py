@@ -12,12 +12,14 @@ from unittest.mock import AsyncMock
 import pytest
 
 from ching_tech_os.services import ai_manager, claude_agent
+from ching_tech_os.services.claude_hosts import WorkdirPool
 
 
 def test_workdir_and_prompt_helpers(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
     workbase = tmp_path / "workbase"
     workbase.mkdir(parents=True, exist_ok=True)
     monkeypatch.setattr(claude_agent, "_WORKING_DIR_BASE", str(workbase))
+    monkeypatch.setattr(claude_agent, "workdir_pool", WorkdirPool(str(workbase), max_idle=0, recycle_after=10))
 
     from ching_tech_os.config import settings
 
@@ -258,7 +260,7 @@ async def test_call_claude_success_timeout_and_error(monkeypatch: pytest.MonkeyP
     monkeypatch.setattr(
         claude_agent,
         "_build_mcp_servers",
-        lambda _session_dir, _required: [SimpleNamespace(name="ching-tech-os")],
+        lambda _session_dir, _required: [SimpleNamespace(name="ching-tech-os", env=[])],
     )
 
     started: list[str] = []
@@ -270,6 +272,10 @@ async def test_call_claude_success_timeout_and_error(monkeypatch: pytest.MonkeyP
     async def _on_end(name: str, _raw: dict):
         ended.append(name)
 
+    opus = claude_agent.MODEL_MAP.get("claude-opus", "claude-opus")
+    calls_before = claude_agent._claude_call_seconds.count(model=opus, outcome="success")
+    tokens_before = claude_agent._claude_tokens.value(model=opus, direction="output")
+
     monkeypatch.setattr(claude_agent, "ClaudeClient", _SuccessClient)
     ok = await claude_agent.call_claude(
         prompt="hello",
@@ -289,6 +295,9 @@ async def test_call_claude_success_timeout_and_error(monkeypatch: pytest.MonkeyP
     assert started == ["search_knowledge"]
     assert ended == ["search_knowledge"]
     assert cleanup_calls[-1] == str(session_dir)
+    assert claude_agent._claude_call_seconds.count(model=opus, outcome="success") == calls_before + 1
+    assert claude_agent._claude_tokens.value(model=opus, direction="output") == tokens_before + 22
+    assert claude_agent._tool_seconds.count(tool="search_knowledge") >= 1
 
     monkeypatch.setattr(claude_agent, "ClaudeClient", _TimeoutClient)
     timeout_resp = await claude_agent.call_claude(
@@ -0,0 +1,136 @@
+"""claude_hosts agent host 預熱池與工作目錄回收測試。"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from ching_tech_os.config import settings
+from ching_tech_os.services.claude_hosts import AgentHostPool, WorkdirPool
+
+
+class _Agent:
+    def __init__(self) -> None:
+        self._sessions: dict[str, object] = {}
+        self._conn = self._on_result = self._tool_input_transform = None
+        self.server_info_calls = 0
+
+    async def _get_server_info(self, _cwd, _mcp_servers, _system_prompt):
+        self.server_info_calls += 1
+        return {"models": []}
+
+    async def new_session(self, cwd, mcp_servers, system_prompt=None):
+        await self._get_server_info(cwd, mcp_servers, system_prompt)
+        session_id = f"s{len(self._sessions)}"
+        self._sessions[session_id] = object()
+        return SimpleNamespace(session_id=session_id)
+
+    async def close_session(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+
+class _Client:
+    """與 ClaudeClient 相同的屬性介面"""
+
+    def __init__(self, cwd: str = ".", mcp_servers=None, system_prompt=None) -> None:
+        self.cwd, self.mcp_servers, self.system_prompt = cwd, mcp_servers or [], system_prompt
+        self.agent = _Agent()
+        self.session_id = None
+        self.events = SimpleNamespace()
+        self._text_buffer = ""
+        self.closed = False
+
+    async def start_session(self) -> str:
+        session = await self.agent.new_session(self.cwd, self.mcp_servers, self.system_prompt)
+        self.session_id = session.session_id
+        return self.session_id
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_host_is_reused_for_isolated_sessions_and_recycled() -> None:
+    pool = AgentHostPool(max_idle=2, recycle_after=2)
+    created: list[_Client] = []
+
+    def factory() -> _Client:
+        created.append(_Client())
+        return created[-1]
+
+    first = await pool.acquire(factory, cwd="/w1", mcp_servers=[], system_prompt="A")
+    await first.start_session()
+    first._text_buffer = "上一個回覆"
+    await pool.release(first)
+    assert len(pool) == 1 and first.agent._sessions == {} and first.session_id is None
+
+    second = await pool.acquire(factory, cwd="/w2", mcp_servers=["m"], system_prompt="B")
+    assert second is first and len(created) == 1
+    assert (second.cwd, second.mcp_servers, second.system_prompt, second._text_buffer) == ("/w2", ["m"], "B", "")
+    await second.start_session()
+    # server info 只取一次（之後的 session 不再啟動暫時的 CLI）
+    assert first.agent.server_info_calls == 1 and pool.stats()["server_info_cached"] is True
+
+    # 承載滿 recycle_after 個 session 後回收
+    await pool.release(second)
+    assert first.closed is True and len(pool) == 0
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_or_failed_hosts_are_closed() -> None:
+    pool = AgentHostPool(max_idle=2, recycle_after=10)
+
+    failed = await pool.acquire(_Client, cwd="/w", mcp_servers=[], system_prompt=None)
+    await pool.release(failed, reusable=False)
+    assert failed.closed is True
+
+    leaked = await pool.acquire(_Client, cwd="/w", mcp_servers=[], system_prompt=None)
+    leaked.agent._sessions["other"] = object()  # 殘留的 session
+    await pool.release(leaked)
+    assert leaked.closed is True and len(pool) == 0
+
+    # 不支援單一 session 關閉的 client 不沿用
+    plain = SimpleNamespace(closed=False)
+
+    async def _close() -> None:
+        plain.closed = True
+
+    plain.close = _close
+    await pool.release(plain)
+    assert plain.closed is True
+
+
+def test_workdir_is_wiped_and_reused(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(settings, "ctos_mount_path", str(tmp_path))
+    monkeypatch.setattr(settings, "project_root", str(tmp_path))
+    Path(settings.linebot_local_path).mkdir(parents=True, exist_ok=True)
+    (tmp_path / ".mcp.json").write_text(json.dumps({"mcpServers": {}}), encoding="utf-8")
+    base = tmp_path / "base"
+    base.mkdir()
+    pool = WorkdirPool(str(base), max_idle=2, recycle_after=2)
+
+    path = Path(pool.acquire())
+    (path / "output.txt").write_text("secret", encoding="utf-8")
+    (path / "nested").mkdir()
+    (path / ".mcp.json").write_text("{}", encoding="utf-8")  # AI 改寫副本
+    pool.release(str(path))
+
+    again = Path(pool.acquire())
+    assert again == path
+    assert sorted(p.name for p in path.iterdir()) == [".mcp.json", "nanobanana-output"]
+    assert (path / ".mcp.json").read_text(encoding="utf-8") == (tmp_path / ".mcp.json").read_text(encoding="utf-8")
+    assert (path / "nanobanana-output").is_symlink()
+
+    # 沿用滿 recycle_after 次後刪除
+    pool.release(str(path))
+    assert not path.exists()
+
+    # 不在池中的遺留目錄由排程清除
+    orphan = base / "session-orphan"
+    orphan.mkdir()
+    leased = Path(pool.acquire())
+    assert pool.sweep_orphans(max_age_seconds=-1) == 1
+    assert not orphan.exists() and leased.exists()
@@ -0,0 +1,206 @@
+"""Claude 對話 session 保留測試。"""
+
+from __future__ import annotations
+
+import itertools
+import time
+from pathlib import Path
+
+import pytest
+
+from ching_tech_os.services import claude_agent
+from ching_tech_os.services.claude_sessions import (
+    ClaudeSessionPool,
+    PooledSession,
+    conversation_session_key,
+)
+
+
+class _RecordingClient:
+    instances: list["_RecordingClient"] = []
+
+    def __init__(self, cwd=None, mcp_servers=None, system_prompt=None) -> None:
+        self.cwd = cwd
+        self.system_prompt = system_prompt
+        self.prompts: list[str] = []
+        self.sessions_started = 0
+        self.closed = False
+        self._text_buffer = ""
+        self._on_result = None
+        self.fail_next = False
+        _RecordingClient.instances.append(self)
+
+    def on_tool_start(self, fn):
+        return fn
+
+    def on_tool_end(self, fn):
+        return fn
+
+    def on_permission(self, fn):
+        return fn
+
+    def on_result(self, fn):
+        self._on_result = fn
+        return fn
+
+    async def start_session(self):
+        self.sessions_started += 1
+
+    async def set_model(self, _model: str):
+        return None
+
+    async def set_mode(self, _mode: str):
+        return None
+
+    async def query(self, prompt: str) -> str:
+        if self.fail_next:
+            raise RuntimeError("session broken")
+        self.prompts.append(prompt)
+        self._text_buffer = f"回覆{len(self.prompts)}"
+        return self._text_buffer
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> ClaudeSessionPool:
+    _RecordingClient.instances = []
+    counter = itertools.count()
+
+    def _workdir() -> str:
+        path = tmp_path / f"session-{next(counter)}"
+        path.mkdir()
+        return str(path)
+
+    fresh = ClaudeSessionPool(max_sessions=4, idle_seconds=600)
+    monkeypatch.setattr(claude_agent, "session_pool", fresh)
+    monkeypatch.setattr(claude_agent, "ClaudeClient", _RecordingClient)
+    monkeypatch.setattr(claude_agent, "_create_session_workdir", _workdir)
+    monkeypatch.setattr(claude_agent, "_build_mcp_servers", lambda _dir, _required: [])
+    return fresh
+
+
+@pytest.mark.asyncio
+async def test_second_turn_reuses_session_and_sends_only_new_messages(pool: ClaudeSessionPool) -> None:
+    key = conversation_session_key("line", "U1")
+    history = [
+        {"role": "user", "content": "很久以前的問題" * 20, "sender": "小明"},
+        {"role": "assistant", "content": "很久以前的回答" * 20},
+    ]
+    first = await claude_agent.call_claude("user[小明]: 第一題", history=history, system_prompt="sys", session_key=key)
+    assert first.success is True and first.session_reused is False
+    assert "很久以前的問題" in _RecordingClient.instances[0].prompts[0]
+
+    # 下一回合的歷史：先前看過的 + 本回合問答 + 一則未觸發 AI 的新訊息
+    history2 = history + [
+        {"role": "user", "content": "第一題", "sender": "小明"},
+        {"role": "assistant", "content": "回覆1"},
+        {"role": "user", "content": "順帶一提", "sender": "小華"},
+    ]
+    second = await claude_agent.call_claude("user[小明]: 第二題", history=history2, system_prompt="sys", session_key=key)
+
+    assert len(_RecordingClient.instances) == 1
+    client = _RecordingClient.instances[0]
+    assert client.sessions_started == 1 and client.closed is False
+    assert second.session_reused is True
+    assert client.prompts[1] == "對話歷史：\n\nuser[小華]: 順帶一提\n\nuser[小明]: 第二題"
+    assert second.tokens_saved > 0
+    assert pool.tokens_saved == second.tokens_saved
+    assert len(pool) == 1
+
+
+@pytest.mark.asyncio
+async def test_config_change_and_failure_replace_the_session(pool: ClaudeSessionPool) -> None:
+    key = "web:chat-1"
+    await claude_agent.call_claude("hi", system_prompt="A", session_key=key)
+    await claude_agent.call_claude("hi again", system_prompt="B", session_key=key)
+
+    first, second = _RecordingClient.instances
+    assert first.closed is True  # system prompt 改變：重建
+    assert second.closed is False
+
+    second.fail_next = True
+    failed = await claude_agent.call_claude("boom", system_prompt="B", session_key=key)
+    assert failed.success is False
+    assert second.closed is True and len(pool) == 0
+
+    # 被關閉後回到完整歷史重送
+    await claude_agent.call_claude("again", history=[{"role": "user", "content": "舊訊息"}], system_prompt="B",
+                                   session_key=key)
+    third = _RecordingClient.instances[-1]
+    assert "舊訊息" in third.prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_calls_without_session_key_close_immediately(pool: ClaudeSessionPool) -> None:
+    await claude_agent.call_claude("one-off")
+    assert _RecordingClient.instances[0].closed is True
+    assert len(pool) == 0
+
+
+def _entry(key: str, closed: list[str]) -> PooledSession:
+    async def _close() -> None:
+        closed.append(key)
+
+    return PooledSession(key=key, fingerprint="f", client=object(), session_dir="/tmp/x", close=_close)
+
+
+@pytest.mark.asyncio
+async def test_lru_cap_idle_eviction_and_drop() -> None:
+    pool = ClaudeSessionPool(max_sessions=2, idle_seconds=60)
+    closed: list[str] = []
+    for key in ("a", "b"):
+        await pool.checkin(_entry(key, closed))
+
+    # a 最近使用過，加入 c 時淘汰 b
+    assert await pool.checkout("a", "f") is not None
+    await pool.checkin(pool._sessions["a"])
+    await pool.checkin(_entry("c", closed))
+    assert closed == ["b"] and set(pool._sessions) == {"a", "c"}
+
+    # 指紋不同：關閉並回傳 None
+    assert await pool.checkout("c", "other") is None
+    assert closed == ["b", "c"]
+
+    pool._sessions["a"].last_used = time.monotonic() - 120
+    assert await pool.evict_idle() == 1
+    assert closed == ["b", "c", "a"] and len(pool) == 0
+
+    await pool.checkin(_entry("d", closed))
+    assert await pool.drop("d") is True
+    assert await pool.drop("missing") is False
+
+
+def test_unseen_matches_by_id_and_sender_not_bare_content() -> None:
+    session = _entry("line:group:g:U1", [])
+    history = [
+        {"id": "1", "role": "user", "content": "好", "sender": "小明"},
+        {"id": "2", "role": "assistant", "content": "收到"},
+    ]
+    session.remember(history, "user[小明]: 謝謝", "不客氣")
+
+    # 下一回合：本回合的 prompt / 回覆存檔後帶 id 出現；其他成員說了相同的話
+    history2 = history + [
+        {"id": "3", "role": "user", "content": "謝謝", "sender": "小明"},
+        {"id": "4", "role": "assistant", "content": "不客氣"},
+        {"id": "5", "role": "user", "content": "好", "sender": "小華"},
+        {"id": "6", "role": "user", "content": "謝謝", "sender": "小華"},
+    ]
+    assert [m["id"] for m in session.unseen(history2)] == ["5", "6"]
+
+    # 沒有 id 的歷史（網頁對話）：相同內容的新訊息依次數判斷
+    web = _entry("web:chat", [])
+    web.remember([{"role": "user", "content": "ok"}], "ok", "好的")
+    web_history = [
+        {"role": "user", "content": "ok"},
+        {"role": "user", "content": "ok"},
+        {"role": "assistant", "content": "好的"},
+        {"role": "user", "content": "ok"},
+    ]
+    assert web.unseen(web_history) == [{"role": "user", "content": "ok"}]
+
+
+def test_helpers() -> None:
+    assert conversation_session_key("line", "U1") == "line:user:U1"
+    assert conversation_session_key("telegram", "7", "-100") == "telegram:group:-100:7"
@@ -0,0 +1,188 @@
+"""context_window token 預算上下文與 Bot 滾動摘要測試。"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from ching_tech_os.services import linebot_ai
+from ching_tech_os.services.bot import conversation_summary as summary_module
+from ching_tech_os.services.bot.conversation_summary import ConversationSummary, ConversationSummaryStore
+from ching_tech_os.services.context_window import (
+    estimate_tokens,
+    fit_history,
+    render_prompt,
+    truncate_to_tokens,
+)
+
+
+def _messages(*contents: str) -> list[dict]:
+    return [{"role": "user", "content": c} for c in contents]
+
+
+def test_estimate_tokens() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("你好") == 2
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_fills_budget_newest_first() -> None:
+    history = _messages("a" * 400, "b" * 400, "c" * 400)  # 每則約 100 tokens
+    window = fit_history(history, budget_tokens=250, max_message_tokens=0)
+
+    assert [m["content"][0] for m in window.messages] == ["b", "c"]
+    assert [m["content"][0] for m in window.dropped] == ["a"]
+    assert window.history_tokens <= 250
+
+    # 不限預算時只受訊息數上限影響
+    window = fit_history(history, budget_tokens=0, max_messages=2)
+    assert len(window.messages) == 2 and len(window.dropped) == 1
+
+
+def test_long_message_is_truncated_and_newest_always_kept() -> None:
+    pasted = "長" * 3000
+    window = fit_history(_messages("早安", pasted), budget_tokens=1000, max_message_tokens=500)
+    assert window.truncated == 1
+    assert "以下省略" in window.messages[-1]["content"]
+    assert estimate_tokens(window.messages[-1]["content"]) < 600
+
+    # 最新一則超過整個預算時仍放入（截斷到預算內）
+    window = fit_history(_messages(pasted), budget_tokens=100, max_message_tokens=0)
+    assert len(window.messages) == 1 and window.history_tokens <= 120
+    assert truncate_to_tokens("short", 10) == "short"
+
+
+def test_summary_is_rendered_and_counted() -> None:
+    history = [
+        {"role": "system", "content": "先前討論了報價", "is_summary": True},
+        {"role": "user", "content": "Q", "sender": "小明"},
+    ]
+    window = fit_history(history, budget_tokens=1000)
+    prompt = render_prompt(window, "新問題")
+
+    assert window.summary_tokens > 0
+    assert prompt.index("先前討論了報價") < prompt.index("user[小明]: Q") < prompt.index("新問題")
+    assert window.stats(estimate_tokens(prompt))["prompt_tokens"] == estimate_tokens(prompt)
+
+
+def _row(i: int, content: str) -> dict:
+    return {
+        "id": f"m{i}", "content": content, "is_from_bot": i % 2 == 1, "display_name": "小明",
+        "message_type": "text", "line_message_id": f"l{i}",
+        "nas_path": None, "file_name": None, "file_size": None, "actual_file_type": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_overflow_is_summarized_incrementally_in_background(monkeypatch: pytest.MonkeyPatch) -> None:
+    store = ConversationSummaryStore()
+    monkeypatch.setattr(linebot_ai, "conversation_summaries", store)
+    monkeypatch.setattr(linebot_ai.settings, "ai_context_budget_tokens", 300)
+    monkeypatch.setattr(linebot_ai.settings, "ai_context_summary_min_messages", 3)
+    key = ("group", "g1")
+    # 已有摘要涵蓋到 m1
+    store._cache["group:g1"] = ConversationSummary("較早的摘要", "m1", 2)
+
+    rows = [_row(i, f"{i}" * 200) for i in range(10)]  # 每則約 50 tokens
+    kept, summary = await linebot_ai._window_conversation_rows(key, rows, limit=40)
+
+    assert summary == "較早的摘要"
+    assert kept == rows[-len(kept):] and len(kept) < len(rows)
+
+    prompts: list[list[dict]] = []
+
+    async def _summarize(messages, priority=None):
+        prompts.append(messages)
+        return SimpleNamespace(success=True, message="新的摘要", error=None)
+
+    executed: list[tuple] = []
+
+    class _Conn:
+        async def execute(self, *args):
+            executed.append(args)
+
+    class _CM:
+        async def __aenter__(self):
+            return _Conn()
+
+        async def __aexit__(self, *_args):
+            return False
+
+    monkeypatch.setattr(summary_module, "call_claude_for_summary", _summarize)
+    monkeypatch.setattr(summary_module, "get_connection", lambda: _CM())
+    await next(iter(store._tasks))
+
+    dropped = len(rows) - len(kept)
+    # 只摘要 m1 之後、超出預算的訊息，並帶入先前摘要
+    assert prompts[0][0]["content"].endswith("較早的摘要")
+    assert [m["content"] for m in prompts[0][1:]] == [r["content"] for r in rows[2:dropped]]
+    assert executed[0][1:4] == ("group:g1", "新的摘要", rows[dropped - 1]["id"])
+    updated = await store.get(key)
+    assert updated.covered_message_id == rows[dropped - 1]["id"]
+    assert updated.covered_count == 2 + dropped - 2
+
+    # 未摘要的訊息不足門檻時不更新
+    assert store.uncovered(updated, rows, dropped) == []
+
+
+@pytest.mark.asyncio
+async def test_rows_past_message_limit_are_backfilled_into_summary(monkeypatch: pytest.MonkeyPatch) -> None:
+    import uuid
+
+    store = ConversationSummaryStore()
+    monkeypatch.setattr(linebot_ai, "conversation_summaries", store)
+    monkeypatch.setattr(linebot_ai.settings, "ai_context_budget_tokens", 8000)
+    monkeypatch.setattr(linebot_ai.settings, "ai_context_summary_min_messages", 3)
+    key = ("group", str(uuid.uuid4()))
+    covered = str(uuid.uuid4())
+    store._cache[f"group:{key[1]}"] = ConversationSummary("較早的摘要", covered, 5)
+
+    # 全部在預算內，但已達則數上限：較舊的訊息在預算內就被擠出
+    rows = [{**_row(i, "hi"), "id": uuid.uuid4()} for i in range(4)]
+    older = [{**_row(i, f"old{i}"), "id": uuid.uuid4()} for i in range(3)]
+    queried: list[tuple] = []
+
+    async def _fetch_before(k, before_id, after_id, limit):
+        queried.append((k, before_id, after_id, limit))
+        return older
+
+    monkeypatch.setattr(linebot_ai, "_fetch_conversation_rows_before", _fetch_before)
+    updates: list[tuple] = []
+
+    async def _update(k, stored, pending, messages):
+        updates.append((pending, messages))
+
+    monkeypatch.setattr(store, "update", _update)
+
+    kept, summary = await linebot_ai._window_conversation_rows(key, rows, limit=4)
+    assert kept == rows and summary == "較早的摘要"
+    await next(iter(store._tasks))
+
+    assert queried == [(key, rows[0]["id"], uuid.UUID(covered), 200)]
+    assert updates[0][0] == older
+    assert [m["content"] for m in updates[0][1]] == ["old0", "old1", "old2"]
+
+    # 補查結果不足門檻時不更新
+    older = older[:1]
+    await linebot_ai._window_conversation_rows(key, rows, limit=4)
+    await next(iter(store._tasks))
+    assert len(updates) == 1
+
+    # 摘要涵蓋範圍在這批訊息中：不需要補查
+    store._cache[f"group:{key[1]}"] = ConversationSummary("摘要", str(rows[0]["id"]), 9)
+    await linebot_ai._window_conversation_rows(key, rows, limit=4)
+    assert len(queried) == 2
+
+
+@pytest.mark.asyncio
+async def test_short_conversation_skips_summary_lookup(monkeypatch: pytest.MonkeyPatch) -> None:
+    store = ConversationSummaryStore()
+    store.get = AsyncMock()
+    monkeypatch.setattr(linebot_ai, "conversation_summaries", store)
+
+    rows = [_row(i, "hi") for i in range(3)]
+    kept, summary = await linebot_ai._window_conversation_rows(("user", "U1"), rows, limit=40)
+    assert kept == rows and summary is None
+    store.get.assert_not_awaited()
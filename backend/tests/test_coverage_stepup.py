@@ -119,7 +119,7 @@ async def test_thread_pool_run_with_kwargs_and_no_args() -> None:
 
 
 def test_thread_pool_shutdown_pools_calls_non_blocking(monkeypatch) -> None:
-    """shutdown_pools 應以 wait=False 關閉兩個 pool"""
+    """shutdown_pools 應以 wait=False 關閉所有 pool"""
 
     class DummyPool:
         def __init__(self) -> None:
@@ -130,10 +130,13 @@ def test_thread_pool_shutdown_pools_calls_non_blocking(monkeypatch) -> None:
 
     smb_dummy = DummyPool()
     doc_dummy = DummyPool()
+    auth_dummy = DummyPool()
     monkeypatch.setattr(thread_pool, "_smb_pool", smb_dummy)
     monkeypatch.setattr(thread_pool, "_doc_pool", doc_dummy)
+    monkeypatch.setattr(thread_pool, "_auth_pool", auth_dummy)
 
     thread_pool.shutdown_pools()
 
     assert smb_dummy.wait_values == [False]
     assert doc_dummy.wait_values == [False]
+    assert auth_dummy.wait_values == [False]
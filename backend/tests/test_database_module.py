@@ -14,8 +14,12 @@ from ching_tech_os import database
 def reset_db_pool() -> None:
     """每個測試前後重置全域連線池狀態。"""
     database._pool = None
+    database._replica_pool = None
+    database._workload_pools.clear()
     yield
     database._pool = None
+    database._replica_pool = None
+    database._workload_pools.clear()
 
 
 @pytest.mark.asyncio
@@ -40,10 +44,26 @@ async def test_init_db_pool_uses_expected_pool_options(monkeypatch: pytest.Monke
     await database.init_db_pool()
 
     assert database._pool is pool
-    kwargs = mock_create_pool.await_args.kwargs
+    # 第一個是 interactive 連線池，其後為 background / analytics
+    kwargs = mock_create_pool.await_args_list[0].kwargs
     assert kwargs["min_size"] == 2
     assert kwargs["max_size"] == 10
     assert kwargs["init"] is database._setup_json_codec
+    assert kwargs["statement_cache_size"] == database.settings.db_statement_cache_size
+    assert set(database._workload_pools) == {database.Workload.BACKGROUND, database.Workload.ANALYTICS}
+    assert database._replica_pool is None
+
+
+@pytest.mark.asyncio
+async def test_init_db_pool_compact_creates_single_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    mock_create_pool = AsyncMock(return_value=AsyncMock())
+    monkeypatch.setattr(database.asyncpg, "create_pool", mock_create_pool)
+
+    await database.init_db_pool(compact=True)
+
+    assert mock_create_pool.await_count == 1
+    assert mock_create_pool.await_args.kwargs["max_size"] == database.settings.db_pool_subprocess_max_size
+    assert database._workload_pools == {}
 
 
 @pytest.mark.asyncio
@@ -62,22 +82,69 @@ def test_get_pool_raises_when_uninitialized() -> None:
         database.get_pool()
 
 
+class _Pool:
+    """最小化的 asyncpg.Pool 替身"""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self.error = error
+        self.acquired: list[Any] = []
+        self.released: list[Any] = []
+
+    async def acquire(self, timeout: float | None = None) -> Any:
+        if self.error is not None:
+            raise self.error
+        conn = object()
+        self.acquired.append(conn)
+        return conn
+
+    async def release(self, conn: Any) -> None:
+        self.released.append(conn)
+
+
 @pytest.mark.asyncio
 async def test_get_connection_yields_acquired_connection() -> None:
-    conn = object()
+    pool = _Pool()
+    database._pool = pool  # type: ignore[assignment]
 
-    class _AcquireCM:
-        async def __aenter__(self) -> Any:
-            return conn
+    async with database.get_connection() as got:
+        assert got is pool.acquired[0]
+    assert pool.released == pool.acquired
 
-        async def __aexit__(self, *_: Any) -> None:
-            return None
 
-    class _Pool:
-        def acquire(self) -> _AcquireCM:
-            return _AcquireCM()
+@pytest.mark.asyncio
+async def test_get_connection_routes_by_workload_hint() -> None:
+    interactive, background, analytics, replica = _Pool(), _Pool(), _Pool(), _Pool()
+    database._pool = interactive  # type: ignore[assignment]
+    database._workload_pools[database.Workload.BACKGROUND] = background  # type: ignore[assignment]
+
+    @database.use_workload(database.Workload.BACKGROUND)
+    async def _job() -> None:
+        async with database.get_connection():
+            pass
+
+    await _job()
+    # 未設定 analytics 連線池時共用 interactive
+    async with database.get_connection(database.Workload.ANALYTICS):
+        pass
+    assert len(background.acquired) == 1 and len(interactive.acquired) == 1
+
+    database._workload_pools[database.Workload.ANALYTICS] = analytics  # type: ignore[assignment]
+    database._replica_pool = replica  # type: ignore[assignment]
+    with database.db_workload(database.Workload.ANALYTICS, readonly=True):
+        async with database.get_connection():
+            pass
+        # 明確指定 readonly=False 時仍走主資料庫
+        async with database.get_connection(readonly=False):
+            pass
+    assert len(replica.acquired) == 1 and len(analytics.acquired) == 1
 
-    database._pool = _Pool()  # type: ignore[assignment]
 
-    async with database.get_connection() as got:
-        assert got is conn
+@pytest.mark.asyncio
+async def test_readonly_falls_back_to_primary_when_replica_unreachable() -> None:
+    primary = _Pool()
+    database._pool = primary  # type: ignore[assignment]
+    database._replica_pool = _Pool(error=OSError("connection refused"))  # type: ignore[assignment]
+
+    async with database.get_connection(readonly=True) as got:
+        assert got is primary.acquired[0]
+    assert primary.released == primary.acquired
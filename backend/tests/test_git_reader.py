@@ -0,0 +1,97 @@
+"""常駐 git 讀取器測試（使用暫存 git repository）。"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from ching_tech_os.services import git_reader
+from ching_tech_os.services.git_reader import GitReaderError, get_git_reader
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="需要 git")
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=tester", "-c", "user.email=t@example.com", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+def _commit(repo: Path, rel: str, text: str, message: str) -> None:
+    path = repo / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    _git(repo, "add", rel)
+    _git(repo, "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def repo(tmp_path: Path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    _git(root, "init", "-q")
+    return root
+
+
+@pytest.mark.asyncio
+async def test_read_file_and_resolve(repo: Path) -> None:
+    _commit(repo, "data/a.md", "v1", "first | with pipe")
+    _commit(repo, "data/a.md", "v2", "second")
+
+    reader = await get_git_reader(repo / "data")
+    assert reader.root == repo.resolve()
+
+    head = await reader.resolve("HEAD")
+    assert head and len(head) == 40
+    assert await reader.read_file("HEAD", "data/a.md") == b"v2"
+    assert await reader.read_file("HEAD~1", "data/a.md") == b"v1"
+    assert await reader.read_file("HEAD", "data/missing.md") is None
+    assert await reader.read_file("HEAD", "bad\nspec") is None
+
+    # 同一個常駐行程處理多次查詢
+    assert reader.stats["objects_read"] == 3
+    await git_reader.close_git_readers()
+
+
+@pytest.mark.asyncio
+async def test_file_history_cache_is_incremental(repo: Path) -> None:
+    _commit(repo, "data/a.md", "v1", "first | with pipe")
+    _commit(repo, "data/b.md", "other", "unrelated")
+    reader = await get_git_reader(repo)
+
+    history = await reader.file_history("data/a.md")
+    assert [e.message for e in history] == ["first | with pipe"]
+    assert reader.stats["history_full"] == 1
+
+    assert await reader.file_history("data/a.md") == history
+    assert reader.stats["history_hits"] == 1
+
+    _commit(repo, "data/a.md", "v2", "second")
+    history = await reader.file_history("data/a.md")
+    assert [e.message for e in history] == ["second", "first | with pipe"]
+    assert reader.stats["history_incremental"] == 1
+
+    reader.invalidate("data/a.md")
+    assert len(await reader.file_history("data/a.md")) == 2
+    assert reader.stats["history_full"] == 2
+    await git_reader.close_git_readers()
+
+
+@pytest.mark.asyncio
+async def test_empty_repo_and_non_repo(repo: Path, tmp_path: Path) -> None:
+    reader = await get_git_reader(repo)
+    assert await reader.resolve("HEAD") is None
+    assert await reader.file_history("x.md") == []
+
+    await git_reader.close_git_readers()
+
+    plain = tmp_path / "plain"
+    plain.mkdir()
+    with pytest.raises(GitReaderError):
+        await get_git_reader(plain)
@@ -0,0 +1,150 @@
+"""物料庫存增量維護（批次匯入、對帳、專案彙總）測試。"""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from ching_tech_os.models.inventory import InventoryTransactionImportItem, TransactionType
+from ching_tech_os.services import inventory
+
+
+class _Conn:
+    def __init__(self, *, items=(), projects=(), reconcile_rows=()):
+        self.items = list(items)
+        self.projects = list(projects)
+        self.reconcile_rows = list(reconcile_rows)
+        self.executed: list[tuple[str, tuple]] = []
+        self.copied: list[tuple[str, list, list]] = []
+
+    @asynccontextmanager
+    async def _tx(self):
+        yield
+
+    def transaction(self):
+        return self._tx()
+
+    async def fetch(self, sql: str, *args):
+        if "FROM inventory_items WHERE id = ANY" in sql:
+            return [{"id": i} for i in self.items if i in args[0]]
+        if "FROM projects WHERE id = ANY" in sql:
+            return [{"id": p} for p in self.projects if p in args[0]]
+        if "ledger_stock" in sql:
+            return self.reconcile_rows
+        return []
+
+    async def execute(self, sql: str, *args):
+        self.executed.append((sql, args))
+        return "OK"
+
+    async def copy_records_to_table(self, table, *, records, columns):
+        self.copied.append((table, list(records), list(columns)))
+
+
+def _patch_conn(monkeypatch: pytest.MonkeyPatch, conn: _Conn) -> None:
+    @asynccontextmanager
+    async def _get_connection():
+        yield conn
+
+    monkeypatch.setattr(inventory, "get_connection", _get_connection)
+
+
+def _sql_index(conn: _Conn, needle: str) -> int:
+    return next(i for i, (sql, _) in enumerate(conn.executed) if needle in sql)
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_copies_rows_and_applies_deltas_once_per_item(monkeypatch) -> None:
+    item_a, item_b, project = uuid4(), uuid4(), uuid4()
+    conn = _Conn(items=[item_a, item_b], projects=[project])
+    _patch_conn(monkeypatch, conn)
+
+    rows = [
+        InventoryTransactionImportItem(item_id=item_a, type=TransactionType.IN, quantity=Decimal("10")),
+        InventoryTransactionImportItem(item_id=item_a, type=TransactionType.OUT, quantity=Decimal("3"), project_id=project),
+        InventoryTransactionImportItem(item_id=item_a, type=TransactionType.OUT, quantity=Decimal("2"), project_id=project),
+        InventoryTransactionImportItem(item_id=item_b, type=TransactionType.IN, quantity=Decimal("1.5"), created_by="bob"),
+    ]
+    result = await inventory.bulk_import_inventory_transactions(rows, created_by="importer")
+
+    assert result == {"imported": 4, "items_updated": 2, "project_items_updated": 1}
+
+    table, records, columns = conn.copied[0]
+    assert table == "inventory_transactions"
+    assert columns[0] == "item_id" and len(records) == 4
+    assert records[0][-1] == "importer" and records[3][-1] == "bob"
+
+    # trigger 在 COPY 期間略過，之後才套用差額
+    bulk_on = _sql_index(conn, "inventory_bulk_import = 'on'")
+    bulk_off = _sql_index(conn, "inventory_bulk_import = 'off'")
+    stock_update = _sql_index(conn, "UPDATE inventory_items")
+    assert bulk_on < bulk_off < stock_update
+
+    _, (item_ids, deltas) = conn.executed[stock_update]
+    assert dict(zip(item_ids, deltas)) == {item_a: Decimal("5"), item_b: Decimal("1.5")}
+
+    _, totals_args = conn.executed[_sql_index(conn, "INSERT INTO inventory_project_item_totals")]
+    assert totals_args == ([project], [item_a], [Decimal("0")], [Decimal("5")], [2])
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_validates_items_and_projects(monkeypatch) -> None:
+    item = uuid4()
+    conn = _Conn(items=[item])
+    _patch_conn(monkeypatch, conn)
+
+    assert (await inventory.bulk_import_inventory_transactions([]))["imported"] == 0
+
+    with pytest.raises(inventory.InventoryItemNotFoundError):
+        await inventory.bulk_import_inventory_transactions(
+            [InventoryTransactionImportItem(item_id=uuid4(), type=TransactionType.IN, quantity=Decimal("1"))]
+        )
+    with pytest.raises(inventory.InventoryError):
+        await inventory.bulk_import_inventory_transactions(
+            [InventoryTransactionImportItem(item_id=item, type=TransactionType.IN, quantity=Decimal("1"), project_id=uuid4())]
+        )
+    assert conn.copied == []
+
+
+@pytest.mark.asyncio
+async def test_reconcile_fixes_drift_and_records_snapshots(monkeypatch) -> None:
+    ok_item, drift_item = uuid4(), uuid4()
+    conn = _Conn(reconcile_rows=[
+        {"id": ok_item, "current_stock": Decimal("5"), "ledger_stock": Decimal("5")},
+        {"id": drift_item, "current_stock": Decimal("9"), "ledger_stock": Decimal("7")},
+    ])
+    _patch_conn(monkeypatch, conn)
+
+    result = await inventory.reconcile_inventory_stock()
+
+    assert result == {"items": 2, "drifted": 1, "fixed": 1}
+    _, snapshot_args = conn.executed[_sql_index(conn, "INSERT INTO inventory_stock_snapshots")]
+    assert snapshot_args[0] == [ok_item, drift_item]
+    _, fix_args = conn.executed[_sql_index(conn, "SET current_stock = d.stock")]
+    assert fix_args == ([drift_item], [Decimal("7")])
+    assert _sql_index(conn, "DELETE FROM inventory_project_item_totals") >= 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_report_only(monkeypatch) -> None:
+    conn = _Conn(reconcile_rows=[{"id": uuid4(), "current_stock": Decimal("1"), "ledger_stock": Decimal("2")}])
+    _patch_conn(monkeypatch, conn)
+
+    result = await inventory.reconcile_inventory_stock(fix=False)
+
+    assert result == {"items": 1, "drifted": 1, "fixed": 0}
+    assert not any("SET current_stock" in sql for sql, _ in conn.executed)
+
+
+def test_stock_trigger_migration_is_delta_based() -> None:
+    path = Path(__file__).resolve().parents[1] / "migrations" / "versions" / "017_inventory_stock_ledger.py"
+    source = path.read_text(encoding="utf-8")
+    delta_fn = source.split("_DELTA_FUNCTION = ", 1)[1].split("_LEGACY_FUNCTION", 1)[0]
+
+    assert "SUM(" not in delta_fn
+    assert "ctos.inventory_bulk_import" in delta_fn
+    assert "inventory_project_item_totals" in delta_fn
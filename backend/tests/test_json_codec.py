@@ -0,0 +1,71 @@
+"""utils.json_codec 測試。"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+import pytest
+
+from ching_tech_os.services import ai_chat
+from ching_tech_os.utils import json_codec
+from ching_tech_os.utils.json_codec import FastJSONResponse, SocketIOJson, decode_jsonb
+
+
+def test_output_matches_stdlib_and_converts_extra_types() -> None:
+    payload = {"role": "user", "content": "中文 ✓", "n": [1, 2.5, None, True], "nested": {"a": {}}}
+    assert json_codec.dumps(payload) == json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    assert json_codec.loads(json_codec.dumps_bytes(payload)) == payload
+
+    uid = UUID("12345678-1234-5678-1234-567812345678")
+    extra = {"at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), "id": uid, "amount": Decimal("1.5"), 1: "int key"}
+    assert json_codec.loads(json_codec.dumps(extra)) == {
+        "at": "2024-01-02T03:04:05+00:00",
+        "id": str(uid),
+        "amount": 1.5,
+        "1": "int key",
+    }
+    with pytest.raises(TypeError):
+        json_codec.dumps({"x": object()})
+
+
+def test_decode_jsonb_accepts_legacy_double_encoded_values() -> None:
+    messages = [{"role": "user", "content": "hi"}]
+    assert decode_jsonb(messages) is messages
+    assert decode_jsonb(json.dumps(messages)) == messages
+    assert decode_jsonb(None) is None
+
+
+def test_response_and_socketio_adapters() -> None:
+    assert FastJSONResponse({"ok": "是"}).body == '{"ok":"是"}'.encode()
+    # python-socketio 會傳入 separators 等標準庫參數
+    encoded = SocketIOJson.dumps(["event", {"a": 1}], separators=(",", ":"))
+    assert SocketIOJson.loads(encoded) == ["event", {"a": 1}]
+
+
+@pytest.mark.asyncio
+async def test_update_chat_messages_passes_list_to_codec(monkeypatch: pytest.MonkeyPatch) -> None:
+    chat_id = uuid4()
+    messages = [{"role": "user", "content": "x", "timestamp": 1}]
+    calls: list[tuple] = []
+
+    class _Conn:
+        async def fetchrow(self, _query: str, *args):
+            calls.append(args)
+            return {"id": chat_id, "messages": args[0]}
+
+    class _CM:
+        async def __aenter__(self):
+            return _Conn()
+
+        async def __aexit__(self, *_args):
+            return False
+
+    monkeypatch.setattr(ai_chat, "get_connection", lambda: _CM())
+
+    result = await ai_chat.update_chat_messages(chat_id, messages, 1)
+    # 不再先 json.dumps 成字串（否則 jsonb 會存成字串純量）
+    assert calls[0][0] is messages
+    assert result["messages"] == messages
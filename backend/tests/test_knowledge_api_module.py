@@ -229,15 +229,15 @@ async def test_get_create_update_delete_history_version(monkeypatch: pytest.Monk
         await knowledge_api.delete_existing_knowledge("kb-1", session=session)
 
     # history/version
-    monkeypatch.setattr(knowledge_api, "get_history", lambda _id: {"id": _id, "entries": []})
-    monkeypatch.setattr(knowledge_api, "get_version", lambda _id, _c: {"id": _id, "commit": _c, "content": "x"})
+    monkeypatch.setattr(knowledge_api, "get_history", AsyncMock(side_effect=lambda _id: {"id": _id, "entries": []}))
+    monkeypatch.setattr(knowledge_api, "get_version", AsyncMock(side_effect=lambda _id, _c: {"id": _id, "commit": _c, "content": "x"}))
     assert (await knowledge_api.get_knowledge_history("kb-1", session=session))["id"] == "kb-1"
     assert (await knowledge_api.get_knowledge_version("kb-1", "abc", session=session))["commit"] == "abc"
 
-    monkeypatch.setattr(knowledge_api, "get_history", lambda _id: (_ for _ in ()).throw(KnowledgeNotFoundError("x")))
+    monkeypatch.setattr(knowledge_api, "get_history", AsyncMock(side_effect=KnowledgeNotFoundError("x")))
     with pytest.raises(HTTPException):
         await knowledge_api.get_knowledge_history("kb-x", session=session)
-    monkeypatch.setattr(knowledge_api, "get_version", lambda _id, _c: (_ for _ in ()).throw(KnowledgeError("x")))
+    monkeypatch.setattr(knowledge_api, "get_version", AsyncMock(side_effect=KnowledgeError("x")))
     with pytest.raises(HTTPException):
         await knowledge_api.get_knowledge_version("kb-x", "abc", session=session)
 
@@ -118,25 +118,27 @@ async def test_knowledge_tags_rebuild_history_version(monkeypatch: pytest.Monkey
     assert rebuilt["next_id"] >= 2
     assert rebuilt["errors"]
 
-    class _Result:
-        def __init__(self, code: int, out: str):
-            self.returncode = code
-            self.stdout = out
+    class _Reader:
+        root = tmp_path.resolve()
 
-    monkeypatch.setattr(
-        "subprocess.run",
-        lambda args, **_kwargs: _Result(
-            0,
-            "c1|alice|2024-01-01T00:00:00+00:00|init"
-            if "log" in args
-            else "---\nid: kb-001\n---\n\nv1",
-        ),
-    )
+        async def file_history(self, rel_path):
+            assert rel_path == "knowledge/entries/kb-001-a.md"
+            return [SimpleNamespace(commit="c1", author="alice", date="2024-01-01T00:00:00+00:00", message="init")]
+
+        async def read_file(self, rev, rel_path):
+            return b"---\nid: kb-001\n---\n\nv1" if rev == "c1" else None
+
+    async def _get_reader(_path):
+        return _Reader()
 
-    hist = knowledge.get_history("kb-001")
+    monkeypatch.setattr(knowledge, "get_git_reader", _get_reader)
+
+    hist = await knowledge.get_history("kb-001")
     assert len(hist.entries) == 1
-    ver = knowledge.get_version("kb-001", "c1")
+    ver = await knowledge.get_version("kb-001", "c1")
     assert ver.content == "v1"
+    with pytest.raises(knowledge.KnowledgeError):
+        await knowledge.get_version("kb-001", "missing")
 
     tags = await knowledge.get_all_tags()
     assert "common" in tags.projects
@@ -191,6 +191,40 @@ async def test_send_ai_response_paths(monkeypatch: pytest.MonkeyPatch) -> None:
     assert "📎 file.pdf（1KB）" in called_messages[0].text
 
 
+@pytest.mark.asyncio
+async def test_send_ai_response_pushes_overflow_text(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        linebot_ai,
+        "create_text_message_with_mention",
+        lambda text, _uid: TextMessage(text=text),
+    )
+    reply_messages = AsyncMock(return_value=["r1", "r2", "r3", "r4", "r5"])
+    push_messages = AsyncMock(return_value=(["p1", "p2"], None))
+    monkeypatch.setattr(linebot_ai, "reply_messages", reply_messages)
+    monkeypatch.setattr(linebot_ai, "push_messages", push_messages)
+
+    # 7 段長文字：前 5 段回覆，剩餘 2 段以 push 補送（不再丟棄）
+    text = "\n".join(f"{i}" * 4000 for i in range(7))
+    sent_ids = await linebot_ai.send_ai_response(
+        reply_token="token",
+        text=text,
+        file_messages=[{"type": "image", "url": "https://example.com/a.jpg"}],
+        push_target=AsyncMock(return_value="C1"),
+    )
+
+    assert sent_ids == ["r1", "r2", "r3", "r4", "r5", "p1", "p2"]
+    assert len(reply_messages.await_args.args[1]) == 5
+    assert "其他圖片連結" in reply_messages.await_args.args[1][0].text
+    target, pushed = push_messages.await_args.args
+    assert target == "C1"
+    assert [m.text for m in pushed] == ["5" * 4000, "6" * 4000]
+
+    # 沒有 push 目標時維持只回覆前 5 則
+    push_messages.reset_mock()
+    await linebot_ai.send_ai_response(reply_token="token", text=text, file_messages=[])
+    push_messages.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_log_linebot_ai_call_success_and_failure(monkeypatch: pytest.MonkeyPatch) -> None:
     create_log = AsyncMock()
@@ -0,0 +1,97 @@
+"""Event loop 健康監控測試。"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from ching_tech_os.middleware.loop_monitor import LoopMonitorMiddleware
+from ching_tech_os.services import loop_monitor as loop_monitor_module
+from ching_tech_os.services.loop_monitor import LoopMonitor
+
+
+def _blocking_handler(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_captured_with_stack_and_task() -> None:
+    monitor = LoopMonitor(interval_ms=20, slow_callback_ms=50)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+
+        async def offender():
+            _blocking_handler(0.3)
+
+        await asyncio.create_task(offender(), name="offender-task")
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    snap = monitor.snapshot()
+    assert snap["slow_callbacks"] == 1
+    event = snap["recent_slow_callbacks"][0]
+    assert "offender-task" in event["task"]
+    assert any("_blocking_handler" in frame for frame in event["stack"])
+    # 阻塞結束後以實際延遲更新事件長度
+    assert event["duration_ms"] >= 250
+    assert snap["lag_ms_max"] >= 250
+    assert not monitor.running
+
+
+def test_summary_percentiles_and_reset() -> None:
+    monitor = LoopMonitor(interval_ms=100, slow_callback_ms=200)
+    for lag in [0.001] * 98 + [0.05, 0.5]:
+        monitor.record_lag(lag)
+
+    summary = monitor.summary()
+    assert summary["lag_ms_p50"] == 1.0
+    assert summary["lag_ms_p99"] == 50.0
+    assert summary["lag_ms_max"] == 500.0
+
+    monitor.reset()
+    assert monitor.summary()["lag_ms_max"] == 0.0
+    assert monitor.snapshot()["samples"] == 0
+
+
+@pytest.mark.asyncio
+async def test_middleware_tags_route_during_request(monkeypatch) -> None:
+    monitor = LoopMonitor()
+    monkeypatch.setattr("ching_tech_os.middleware.loop_monitor.loop_monitor", monitor)
+    seen: list[str] = []
+
+    app = FastAPI()
+    app.add_middleware(LoopMonitorMiddleware)
+
+    @app.get("/api/slow/{item}")
+    async def slow(item: str):
+        seen.extend(monitor._task_routes.values())
+        return {"item": item}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        resp = await client.get("/api/slow/42")
+
+    assert resp.status_code == 200
+    assert seen == ["GET /api/slow/42"]
+    assert monitor._task_routes == {}
+
+
+@pytest.mark.asyncio
+async def test_start_respects_setting(monkeypatch) -> None:
+    monitor = LoopMonitor()
+    monkeypatch.setattr(loop_monitor_module, "loop_monitor", monitor)
+    monkeypatch.setattr(loop_monitor_module.settings, "loop_monitor_enabled", False)
+
+    loop_monitor_module.start_loop_monitor()
+    assert not monitor.running
+
+    monkeypatch.setattr(loop_monitor_module.settings, "loop_monitor_enabled", True)
+    loop_monitor_module.start_loop_monitor()
+    assert monitor.running
+    await loop_monitor_module.stop_loop_monitor()
+    assert not monitor.running
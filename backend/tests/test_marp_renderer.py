@@ -0,0 +1,193 @@
+"""marp_renderer 服務測試。"""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from ching_tech_os.services import marp_renderer as mr
+
+
+def test_render_cache_key_depends_on_all_parts() -> None:
+    base = mr.render_cache_key("# A", "uncover", "html")
+    assert base == mr.render_cache_key("# A", "uncover", "html")
+    assert base != mr.render_cache_key("# A", "gaia", "html")
+    assert base != mr.render_cache_key("# A", "uncover", "pdf")
+    assert base != mr.render_cache_key("# B", "uncover", "html")
+
+
+def test_disk_cache_prunes_oldest(tmp_path: Path) -> None:
+    import os
+
+    cache = mr.DiskCache(tmp_path, max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    os.utime(tmp_path / "a", (1, 1))
+    cache.set("c", b"3")
+    assert cache.get("a") is None
+    assert cache.get("b") == b"2"
+    assert cache.get("c") == b"3"
+
+
+def test_resolve_marp_command_fallback(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(mr.os.path, "exists", lambda _p: False)
+    assert mr.resolve_marp_command() == ["npx", "--yes", "@marp-team/marp-cli"]
+    monkeypatch.setattr(mr.os.path, "exists", lambda _p: True)
+    assert mr.resolve_marp_command()[0].endswith("node_modules/.bin/marp")
+
+
+@pytest.mark.asyncio
+async def test_render_uses_server_for_pdf_and_caches(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    renderer = mr.MarpRenderer(concurrency=1, cache_dir=str(tmp_path))
+    calls: list[str] = []
+    one_shot: list[str] = []
+
+    async def _ensure():
+        return True
+
+    async def _via_server(markdown, output_format):
+        calls.append(output_format)
+        return f"{output_format}:{markdown}".encode()
+
+    async def _one_shot(markdown, output_format):
+        one_shot.append(output_format)
+        return f"one-shot:{markdown}".encode()
+
+    monkeypatch.setattr(renderer, "_ensure_server", _ensure)
+    monkeypatch.setattr(renderer, "_render_via_server", _via_server)
+    monkeypatch.setattr(renderer, "_render_once", _one_shot)
+
+    # HTML 不經 server（server 模式的 HTML 內嵌 live-reload script）
+    assert await renderer.render("# A", "html", theme="uncover") == b"one-shot:# A"
+    assert await renderer.render("# A", "pdf", theme="uncover") == b"pdf:# A"
+    assert await renderer.render("# A", "pdf", theme="uncover") == b"pdf:# A"
+    assert calls == ["pdf"]
+    assert one_shot == ["html"]
+
+
+@pytest.mark.asyncio
+async def test_document_http_error_keeps_server(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    import httpx
+
+    renderer = mr.MarpRenderer(concurrency=1, cache_dir=str(tmp_path))
+    stopped: list[bool] = []
+
+    async def _ensure():
+        return True
+
+    async def _via_server(_markdown, _output_format):
+        request = httpx.Request("GET", "http://127.0.0.1/x.md?pdf")
+        response = httpx.Response(500, request=request)
+        response.raise_for_status()
+
+    async def _one_shot(markdown, _output_format):
+        return f"one-shot:{markdown}".encode()
+
+    async def _stop():
+        stopped.append(True)
+
+    monkeypatch.setattr(renderer, "_ensure_server", _ensure)
+    monkeypatch.setattr(renderer, "_render_via_server", _via_server)
+    monkeypatch.setattr(renderer, "_render_once", _one_shot)
+    monkeypatch.setattr(renderer, "_stop_server", _stop)
+
+    assert await renderer.render("# bad", "pdf") == b"one-shot:# bad"
+    assert stopped == []
+
+    # 連線失敗才關閉 server
+    async def _conn_error(_markdown, _output_format):
+        raise httpx.ConnectError("refused")
+
+    monkeypatch.setattr(renderer, "_render_via_server", _conn_error)
+    assert await renderer.render("# other", "pdf") == b"one-shot:# other"
+    assert stopped == [True]
+
+
+@pytest.mark.asyncio
+async def test_render_falls_back_to_one_shot(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    renderer = mr.MarpRenderer(concurrency=1, cache_dir=str(tmp_path))
+
+    async def _fail_start():
+        raise OSError("marp not found")
+
+    monkeypatch.setattr(renderer, "_start_server", _fail_start)
+
+    class _Proc:
+        returncode = 0
+
+        async def communicate(self):
+            return b"", b""
+
+    async def _fake_exec(*cmd, **_kwargs):
+        output_path = Path(cmd[cmd.index("-o") + 1])
+        output_path.write_bytes(b"<html>ok</html>")
+        return _Proc()
+
+    monkeypatch.setattr(mr.asyncio, "create_subprocess_exec", _fake_exec)
+
+    assert await renderer.render("# A", "pdf") == b"<html>ok</html>"
+    # server 啟動失敗後進入退避，期間不重試
+    assert renderer._server_failures == 1
+    assert renderer._server_retry_at > mr.time.monotonic()
+    assert await renderer._ensure_server() is False
+    assert renderer._server_failures == 1
+
+    # 退避時間過後重試，成功即重置失敗次數
+    started: list[bool] = []
+
+    async def _ok_start():
+        started.append(True)
+
+    monkeypatch.setattr(renderer, "_start_server", _ok_start)
+    renderer._server_retry_at = 0.0
+    renderer._server_proc = None
+    assert await renderer._ensure_server() is True
+    assert started == [True]
+    assert renderer._server_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_render_one_shot_error(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    renderer = mr.MarpRenderer(concurrency=1, cache_dir=str(tmp_path))
+    renderer._server_retry_at = mr.time.monotonic() + 60
+
+    class _Proc:
+        returncode = 1
+
+        async def communicate(self):
+            return b"", b"bad"
+
+    async def _fake_exec(*_cmd, **_kwargs):
+        return _Proc()
+
+    monkeypatch.setattr(mr.asyncio, "create_subprocess_exec", _fake_exec)
+
+    with pytest.raises(RuntimeError, match="bad"):
+        await renderer.render("# A", "pdf")
+
+
+@pytest.mark.asyncio
+async def test_render_concurrency_limit(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    renderer = mr.MarpRenderer(concurrency=2, cache_dir=str(tmp_path))
+    active = 0
+    peak = 0
+
+    async def _ensure():
+        return True
+
+    async def _via_server(markdown, _output_format):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return markdown.encode()
+
+    monkeypatch.setattr(renderer, "_ensure_server", _ensure)
+    monkeypatch.setattr(renderer, "_render_via_server", _via_server)
+
+    results = await asyncio.gather(*(renderer.render(f"# {i}", "pdf") for i in range(6)))
+    assert results == [f"# {i}".encode() for i in range(6)]
+    assert peak == 2
@@ -0,0 +1,107 @@
+"""MCP 唯讀工具結果快取測試。"""
+
+from __future__ import annotations
+
+import inspect
+import json
+from pathlib import Path
+
+import pytest
+
+from ching_tech_os.services.claude_agent import tool_cache_stats
+from ching_tech_os.services.mcp import knowledge_tools
+from ching_tech_os.services.mcp import tool_cache as cache_module
+from ching_tech_os.services.mcp.tool_cache import (
+    TOOL_CACHE_LOG_ENV,
+    ToolCacheEventLog,
+    ToolResultCache,
+    cached_tool,
+    invalidates,
+)
+
+
+@pytest.fixture
+def events(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    path = tmp_path / "events.jsonl"
+    monkeypatch.setenv(TOOL_CACHE_LOG_ENV, str(path))
+    monkeypatch.delenv("CTOS_USER_ID", raising=False)
+    monkeypatch.setattr(cache_module, "tool_cache", ToolResultCache(ttl_seconds=60, max_entries=10))
+    return path
+
+
+@pytest.mark.asyncio
+async def test_read_tool_is_memoized_per_user_and_invalidated_by_writes(events: Path) -> None:
+    calls: list[tuple] = []
+
+    @cached_tool("knowledge")
+    async def search(query: str, limit: int = 5, ctos_user_id: int | None = None) -> str:
+        calls.append((query, limit, ctos_user_id))
+        return f"結果 {query} {len(calls)}"
+
+    @invalidates("knowledge")
+    async def add_note(title: str) -> str:
+        return "已新增"
+
+    first = await search("馬達", ctos_user_id=1)
+    # 參數正規化：位置參數、預設值、前後空白視為相同查詢
+    assert await search(" 馬達 ", 5, ctos_user_id=1) == first
+    assert len(calls) == 1
+    # 不同使用者不共用結果
+    await search("馬達", ctos_user_id=2)
+    assert len(calls) == 2
+
+    await add_note("新筆記")
+    await search("馬達", ctos_user_id=1)
+    assert len(calls) == 3
+
+    recorded = [json.loads(line)["result"] for line in events.read_text().splitlines()]
+    assert recorded == ["miss", "hit", "miss", "miss"]
+    assert cache_module.tool_cache.stats()["hit_rate"] == 0.25
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached_and_cache_is_off_outside_sessions(
+    events: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    results = iter(["❌ 需要權限", "正常結果", "另一個結果"])
+
+    @cached_tool()
+    async def lookup(kb_id: str) -> str:
+        return next(results)
+
+    assert await lookup("kb-1") == "❌ 需要權限"
+    assert await lookup("kb-1") == "正常結果"
+    assert await lookup("kb-1") == "正常結果"
+
+    monkeypatch.delenv(TOOL_CACHE_LOG_ENV)
+    assert await lookup("kb-1") == "另一個結果"
+
+
+def test_decorated_tools_keep_their_signature() -> None:
+    params = inspect.signature(knowledge_tools.search_knowledge).parameters
+    assert list(params)[:2] == ["query", "project"]
+    assert inspect.iscoroutinefunction(knowledge_tools.search_knowledge)
+
+
+def test_event_log_matches_tool_calls_and_reports_hit_rate(tmp_path: Path) -> None:
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"tool": "search_knowledge", "result": "miss"}\n')
+    log = ToolCacheEventLog(str(path))  # 前一回合的事件不計入
+
+    with path.open("a") as f:
+        f.write('{"tool": "search_knowledge", "result": "hit"}\n{"tool": "get_nas_file_info", "re')
+    assert log.pop("mcp__ching-tech-os__get_nas_file_info") is None  # 寫到一半的行
+    assert log.pop("mcp__ching-tech-os__search_knowledge") == "hit"
+    assert log.pop("mcp__ching-tech-os__search_knowledge") is None
+
+    with path.open("a") as f:
+        f.write('sult": "miss"}\n')
+    assert log.pop("mcp__ching-tech-os__get_nas_file_info") == "miss"
+
+    timings = [
+        {"name": "a", "duration_ms": 1, "cache": "hit"},
+        {"name": "b", "duration_ms": 9, "cache": "miss"},
+        {"name": "c", "duration_ms": 5},
+    ]
+    assert tool_cache_stats(timings) == {"hits": 1, "lookups": 2, "hit_rate": 0.5}
+    assert tool_cache_stats([{"name": "c", "duration_ms": 5}]) is None
@@ -0,0 +1,92 @@
+"""程序內指標與 /metrics 端點測試。"""
+
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from ching_tech_os.api import system
+from ching_tech_os.services import metrics
+from ching_tech_os.services.workers import thread_pool
+
+
+def test_counter_gauge_histogram_render() -> None:
+    registry = metrics.MetricsRegistry()
+    calls = registry._get_or_create(metrics.Counter, "t_calls_total", "呼叫次數", ("kind",))
+    depth = registry._get_or_create(metrics.Gauge, "t_depth", "深度", (), lambda: 3)
+    latency = registry._get_or_create(metrics.Histogram, "t_seconds", "延遲", ("op",), (0.1, 1))
+
+    calls.inc(kind='a"b')
+    calls.inc(2, kind='a"b')
+    for value in (0.05, 0.1, 0.5, 5):
+        latency.observe(value, op="q")
+
+    text = registry.render()
+    assert '# TYPE t_calls_total counter' in text
+    assert 't_calls_total{kind="a\\"b"} 3' in text
+    assert "t_depth 3" in text
+    assert 't_seconds_bucket{op="q",le="0.1"} 2' in text
+    assert 't_seconds_bucket{op="q",le="1"} 3' in text
+    assert 't_seconds_bucket{op="q",le="+Inf"} 4' in text
+    assert 't_seconds_sum{op="q"} 5.65' in text
+    assert 't_seconds_count{op="q"} 4' in text
+
+    # 同名指標只建立一次；型別不符時拒絕
+    assert registry._get_or_create(metrics.Counter, "t_calls_total", "x", ("kind",)) is calls
+    with pytest.raises(ValueError):
+        registry._get_or_create(metrics.Gauge, "t_calls_total", "x")
+    with pytest.raises(ValueError):
+        calls.inc(other="x")
+
+
+def test_failing_callback_does_not_break_render() -> None:
+    registry = metrics.MetricsRegistry()
+
+    def _boom():
+        raise RuntimeError("pool gone")
+
+    registry._get_or_create(metrics.Gauge, "t_broken", "壞掉的 callback", (), _boom)
+    assert "# TYPE t_broken gauge" in registry.render()
+
+
+@pytest.mark.asyncio
+async def test_thread_pool_instrumentation() -> None:
+    task_seconds = metrics.registry.get("ctos_thread_pool_task_seconds")
+    before = task_seconds.count(pool="doc")
+
+    assert await thread_pool.run_in_doc_pool(sum, [1, 2, 3]) == 6
+
+    assert task_seconds.count(pool="doc") == before + 1
+    text = metrics.render_metrics()
+    assert 'ctos_thread_pool_max_workers{pool="smb"} 4' in text
+    assert 'ctos_thread_pool_queue_depth{pool="auth"}' in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_token(monkeypatch) -> None:
+    app = FastAPI()
+    app.include_router(system.metrics_router)
+    transport = ASGITransport(app=app)
+
+    monkeypatch.setattr(system.settings, "metrics_token", "")
+    monkeypatch.setattr(system.settings, "metrics_public", False)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        # 預設未設定 token：拒絕匿名存取
+        assert (await client.get("/metrics")).status_code == 403
+
+        monkeypatch.setattr(system.settings, "metrics_public", True)
+        resp = await client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE ctos_thread_pool_queue_depth gauge" in resp.text
+
+        # 設定 token 後即使標記公開也必須帶 token
+        monkeypatch.setattr(system.settings, "metrics_token", "s3cret")
+        assert (await client.get("/metrics")).status_code == 401
+        ok = await client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert ok.status_code == 200
+
+        monkeypatch.setattr(system.settings, "metrics_enabled", False)
+        assert (await client.get("/metrics")).status_code == 404
@@ -127,25 +127,11 @@ async def test_generate_html_presentation_success_and_fallback(monkeypatch: pyte
     monkeypatch.setattr(presentation.settings, "nas_password", "pass")
     monkeypatch.setattr(presentation.settings, "nas_share", "share")
 
-    # marp-cli 轉換成功（fake subprocess）
-    def _fake_run(cmd, capture_output, text, timeout):  # noqa: ARG001
-        output_path = Path(cmd[cmd.index("-o") + 1])
-        if output_path.suffix == ".html":
-            output_path.write_text("<html>ok</html>", encoding="utf-8")
-        else:
-            output_path.write_bytes(b"%PDF-1.4")
-        return SimpleNamespace(returncode=0, stderr="")
+    # marp 轉換成功（fake renderer）
+    async def _fake_render(_markdown, output_format="html", theme=""):  # noqa: ARG001
+        return b"%PDF-1.4" if output_format == "pdf" else b"<html>ok</html>"
 
-    monkeypatch.setattr("subprocess.run", _fake_run)
-
-    orig_exists = presentation.os.path.exists
-
-    def _fake_exists(path):
-        if str(path).endswith("node_modules/.bin/marp"):
-            return False
-        return orig_exists(path)
-
-    monkeypatch.setattr(presentation.os.path, "exists", _fake_exists)
+    monkeypatch.setattr(presentation.marp_renderer, "render", _fake_render)
 
     class _DummySMB:
         def __init__(self, **_kwargs):
@@ -192,11 +178,10 @@ async def test_generate_html_presentation_success_and_fallback(monkeypatch: pyte
 
 @pytest.mark.asyncio
 async def test_generate_html_presentation_marp_error(monkeypatch: pytest.MonkeyPatch) -> None:
-    def _fail_run(_cmd, **_kwargs):
-        return SimpleNamespace(returncode=1, stderr="bad")
+    async def _fail_render(*_args, **_kwargs):
+        raise RuntimeError("marp-cli 轉換失敗: bad")
 
-    monkeypatch.setattr("subprocess.run", _fail_run)
-    monkeypatch.setattr(presentation.os.path, "exists", lambda _p: False)
+    monkeypatch.setattr(presentation.marp_renderer, "render", _fail_render)
 
     with pytest.raises(RuntimeError):
         await presentation.generate_html_presentation(
@@ -204,3 +189,39 @@ async def test_generate_html_presentation_marp_error(monkeypatch: pytest.MonkeyP
             include_images=False,
             output_format="html",
         )
+
+
+@pytest.mark.asyncio
+async def test_attach_slide_images_concurrent_and_cached(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(presentation, "_image_cache", presentation.DiskCache(tmp_path / "images"))
+    calls: list[str] = []
+
+    async def _fake_fetch(keyword, _source="pexels"):
+        calls.append(keyword)
+        return None if keyword == "missing" else f"img-{keyword}".encode()
+
+    monkeypatch.setattr(presentation, "fetch_image", _fake_fetch)
+
+    def _outline():
+        return {
+            "slides": [
+                {"layout": "title", "title": "封面", "image_keyword": "cover"},
+                {"layout": "content", "title": "A", "image_keyword": "robot"},
+                {"layout": "content", "title": "B", "image_keyword": "robot"},
+                {"layout": "content", "title": "C", "image_keyword": "missing"},
+            ]
+        }
+
+    outline = _outline()
+    await presentation.attach_slide_images(outline, "pexels")
+    # 相同關鍵字只取一次，封面不配圖
+    assert sorted(calls) == ["missing", "robot"]
+    assert outline["slides"][1]["image_url"].startswith("data:image/jpeg;base64,")
+    assert outline["slides"][1]["image_url"] == outline["slides"][2]["image_url"]
+    assert "image_url" not in outline["slides"][0]
+    assert "image_url" not in outline["slides"][3]
+
+    # 第二次命中快取，只重試失敗的關鍵字
+    calls.clear()
+    await presentation.attach_slide_images(_outline(), "pexels")
+    assert calls == ["missing"]
@@ -0,0 +1,88 @@
+"""專案列表分組彙總與分頁測試。"""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from ching_tech_os.services import project
+
+
+def _project_row(**overrides):
+    row = {
+        "id": uuid4(),
+        "name": "Demo",
+        "status": "active",
+        "start_date": None,
+        "end_date": None,
+        "updated_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "full_count": 12,
+        "rn": 1,
+        "member_count": 2,
+        "meeting_count": 0,
+        "attachment_count": 3,
+    }
+    row.update(overrides)
+    return row
+
+
+class _Conn:
+    def __init__(self, rows=(), total=0):
+        self.rows = list(rows)
+        self.total = total
+        self.fetch_calls: list[tuple[str, tuple]] = []
+        self.fetchval_calls: list[tuple[str, tuple]] = []
+
+    async def fetch(self, sql: str, *args):
+        self.fetch_calls.append((sql, args))
+        return self.rows
+
+    async def fetchval(self, sql: str, *args):
+        self.fetchval_calls.append((sql, args))
+        return self.total
+
+
+def _patch_conn(monkeypatch: pytest.MonkeyPatch, conn: _Conn) -> None:
+    @asynccontextmanager
+    async def _get_connection():
+        yield conn
+
+    monkeypatch.setattr(project, "get_connection", _get_connection)
+
+
+@pytest.mark.asyncio
+async def test_list_projects_uses_grouped_counts_and_window_total(monkeypatch) -> None:
+    conn = _Conn(rows=[_project_row(), _project_row(rn=2, member_count=0)])
+    _patch_conn(monkeypatch, conn)
+    since = datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+    result = await project.list_projects(status="active", limit=2, offset=4, updated_since=since)
+
+    assert result.total == 12
+    assert [i.member_count for i in result.items] == [2, 0]
+    assert result.items[0].attachment_count == 3
+
+    sql, args = conn.fetch_calls[0]
+    # 不再有逐列相關子查詢，改為針對當頁專案的分組彙總
+    assert "WHERE project_id = p.id" not in sql
+    assert sql.count("GROUP BY project_id") == 3
+    assert "COUNT(*) OVER ()" in sql
+    assert args == ("active", since, 2, 4)
+    assert conn.fetchval_calls == []
+
+
+@pytest.mark.asyncio
+async def test_list_projects_past_last_page_still_reports_total(monkeypatch) -> None:
+    conn = _Conn(rows=[], total=12)
+    _patch_conn(monkeypatch, conn)
+
+    result = await project.list_projects(query="kv 7500", limit=10, offset=50)
+
+    assert result.items == [] and result.total == 12
+    count_sql, count_args = conn.fetchval_calls[0]
+    assert "p.search_text LIKE $1" in count_sql
+    assert count_args == ("%kv7500%", "kv7500")
+
@@ -127,6 +127,7 @@ async def test_project_service_happy_path_smoke(monkeypatch: pytest.MonkeyPatch,
         actual_delivery_date=None,
         member_count=1,
         meeting_count=1,
+        full_count=1,
         attachment_count=1,
     )
     conn = _Conn(row)
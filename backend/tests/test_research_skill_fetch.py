@@ -0,0 +1,168 @@
+"""research-skill 來源並行擷取與 HTTP 快取測試。"""
+
+from __future__ import annotations
+
+import importlib.util
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+
+def _load_start_research_module():
+    module_path = (
+        Path(__file__).resolve().parents[1]
+        / "src/ching_tech_os/skills/research-skill/scripts/start-research.py"
+    )
+    spec = importlib.util.spec_from_file_location("ctos_start_research_script", module_path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _sources(*urls: str) -> list[dict]:
+    return [{"title": url, "url": url, "snippet": ""} for url in urls]
+
+
+def test_fetches_concurrently_with_per_host_limit_and_stops_early() -> None:
+    module = _load_start_research_module()
+    lock = threading.Lock()
+    active: dict[str, int] = {}
+    peak_per_host: dict[str, int] = {}
+    peak_total = 0
+    requested: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal peak_total
+        host = request.url.host
+        with lock:
+            requested.append(str(request.url))
+            active[host] = active.get(host, 0) + 1
+            peak_per_host[host] = max(peak_per_host.get(host, 0), active[host])
+            peak_total = max(peak_total, sum(active.values()))
+        time.sleep(0.05)
+        with lock:
+            active[host] -= 1
+        if "bad" in request.url.path:
+            return httpx.Response(500)
+        return httpx.Response(200, text=f"內容 {request.url.path}")
+
+    urls = (
+        [f"https://a.example.com/{i}" for i in range(4)]
+        + ["https://b.example.com/bad"]
+        + [f"https://h{i}.example.com/" for i in range(15)]
+    )
+    progress: list[int] = []
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        started = time.monotonic()
+        results, canceled = module._fetch_sources_concurrently(
+            client,
+            _sources(*urls),
+            max_ok=4,
+            on_result=lambda items: progress.append(len(items)),
+            concurrency=4,
+            per_host_limit=2,
+        )
+        elapsed = time.monotonic() - started
+
+    assert canceled is False
+    assert peak_per_host["a.example.com"] == 2
+    assert peak_total == 4
+    assert sum(1 for item in results if item["fetch_status"] == "ok") >= 4
+    # 結果依候選順序排列，且取得足夠來源後就不再擷取其餘候選
+    assert [item["url"] for item in results] == [u for u in urls if u in {i["url"] for i in results}]
+    assert len(requested) < len(urls)
+    assert progress == sorted(progress)
+    assert elapsed < len(urls) * 0.05 / 2
+
+
+def test_deadline_marks_slow_sources_failed() -> None:
+    module = _load_start_research_module()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "slow" in request.url.path:
+            time.sleep(0.5)
+        return httpx.Response(200, text="ok")
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        started = time.monotonic()
+        results, _ = module._fetch_sources_concurrently(
+            client,
+            _sources("https://a.example.com/fast", "https://b.example.com/slow"),
+            max_ok=2,
+            deadline_sec=0.15,
+        )
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 0.45
+    assert [item["fetch_status"] for item in results] == ["ok", "failed"]
+    assert "時限" in results[1]["error"]
+
+
+def test_cancel_stops_fetching() -> None:
+    module = _load_start_research_module()
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        time.sleep(0.02)
+        return httpx.Response(500)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        _, canceled = module._fetch_sources_concurrently(
+            client,
+            _sources(*[f"https://h{i}.example.com/" for i in range(20)]),
+            max_ok=5,
+            is_canceled=lambda: True,
+            concurrency=2,
+        )
+    assert canceled is True
+
+
+def test_http_cache_revalidates_with_etag(tmp_path: Path) -> None:
+    module = _load_start_research_module()
+    cache = module._HttpCache(tmp_path / ".http-cache")
+    seen_headers: list[str | None] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_headers.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            headers={"ETag": '"v1"', "Content-Type": "text/html"},
+            text="<html><body><p>第一版內容</p></body></html>",
+        )
+
+    source = {"title": "頁面", "url": "https://example.com/page"}
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        first = module._fetch_source(client, source, cache)
+        second = module._fetch_source(client, source, cache)
+
+    assert seen_headers == [None, '"v1"']
+    assert first["from_cache"] is False
+    assert second["from_cache"] is True
+    assert second["content"] == first["content"] and "第一版內容" in second["content"]
+
+    # 沒有驗證標頭的回應不快取
+    def no_validator(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="plain")
+
+    with httpx.Client(transport=httpx.MockTransport(no_validator)) as client:
+        module._fetch_source(client, {"url": "https://example.com/plain"}, cache)
+    assert cache.load("https://example.com/plain") is None
+
+
+def test_status_writer_coalesces_updates(tmp_path: Path, monkeypatch) -> None:
+    module = _load_start_research_module()
+    writes: list[dict] = []
+    monkeypatch.setattr(module, "_write_status", lambda _path, data: writes.append(dict(data)))
+
+    writer = module._StatusWriter(tmp_path / "status.json", min_interval=60)
+    for progress in range(10):
+        writer.update({"progress": progress})
+    assert [w["progress"] for w in writes] == [0]
+
+    writer.flush()
+    writer.flush()
+    assert [w["progress"] for w in writes] == [0, 9]
@@ -84,29 +84,26 @@ async def test_cleanup_expired_share_links(monkeypatch: pytest.MonkeyPatch) -> N
 
 
 @pytest.mark.asyncio
-async def test_cleanup_linebot_temp_files(monkeypatch: pytest.MonkeyPatch) -> None:
+async def test_cleanup_linebot_temp_files(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    from ching_tech_os.services.bot import staging_cache as staging_module
+
     now = time.time()
-    fake_files = {
-        "/tmp/bot-images": ["old.png", "new.png"],
-        "/tmp/bot-files": ["old.pdf"],
-    }
-    deleted: list[str] = []
-
-    monkeypatch.setattr(scheduler.os.path, "exists", lambda p: p in fake_files)
-    monkeypatch.setattr(scheduler.os, "listdir", lambda p: fake_files[p])
-    monkeypatch.setattr(scheduler.os.path, "join", os.path.join)
-    monkeypatch.setattr(scheduler.os.path, "isfile", lambda _p: True)
-    monkeypatch.setattr(
-        scheduler.os.path,
-        "getmtime",
-        lambda p: now - 7200 if "old" in p else now,
-    )
-    monkeypatch.setattr(scheduler.os, "unlink", lambda p: deleted.append(p))
+    images = tmp_path / "bot-images"
+    files = tmp_path / "bot-files"
+    images.mkdir()
+    files.mkdir()
+    for path, age in ((images / "old.png", 7200), (images / "new.png", 0), (files / "old.pdf", 7200)):
+        path.write_bytes(b"x")
+        os.utime(path, (now - age, now - age))
+
+    cache = staging_module.StagingCache([str(images), str(files)], max_bytes=0, max_idle_seconds=3600)
+    monkeypatch.setattr(staging_module, "staging_cache", cache)
 
     await scheduler.cleanup_linebot_temp_files()
-    assert any("old.png" in p for p in deleted)
-    assert any("old.pdf" in p for p in deleted)
-    assert all("new.png" not in p for p in deleted)
+    assert sorted(p.name for p in tmp_path.rglob("*.*")) == ["new.png"]
+
+    monkeypatch.setattr(cache, "sweep", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    await scheduler.cleanup_linebot_temp_files()  # 失敗分支
 
 
 @pytest.mark.asyncio
@@ -384,3 +384,113 @@ async def test_public_resource_size_format_branches(monkeypatch: pytest.MonkeyPa
     )
     att_unknown = await share.get_public_resource("att-unknown")
     assert att_unknown.data["file_size_str"] == "未知"
+
+
+@pytest.mark.asyncio
+async def test_link_cache_hit_revoke_and_access_count_flush(monkeypatch: pytest.MonkeyPatch) -> None:
+    conn = AsyncMock()
+    conn.fetchrow = AsyncMock(return_value=_row(token="hot"))
+    conn.fetchval = AsyncMock(return_value="hello")
+    conn.execute = AsyncMock(return_value="UPDATE 1")
+    monkeypatch.setattr(share, "get_connection", lambda: _CM(conn))
+
+    first = await share.get_public_resource("hot")
+    second = await share.get_public_resource("hot")
+    info = await share.get_link_info("hot")
+    assert first.data["content"] == second.data["content"] == "hello"
+    assert info["resource_type"] == "content"
+    # 第一次查詢連結，之後只讀取 content（快取不保存 content）
+    assert conn.fetchrow.await_count == 1
+    assert conn.fetchval.await_count == 1
+    # 存取次數累積，不逐次寫入
+    conn.execute.assert_not_awaited()
+
+    assert await share.flush_access_counts() == 2
+    args = conn.execute.await_args.args
+    assert args[1] == ["hot"] and args[2] == [2]
+    assert await share.flush_access_counts() == 0
+
+    # 撤銷後快取失效
+    conn.fetchrow = AsyncMock(return_value={"created_by": "admin"})
+    await share.revoke_link("hot", "admin")
+    conn.fetchrow = AsyncMock(return_value=None)
+    with pytest.raises(share.ShareLinkNotFoundError):
+        await share.get_public_resource("hot")
+
+
+@pytest.mark.asyncio
+async def test_link_cache_expiry_and_password_links_not_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    conn = AsyncMock()
+    conn.execute = AsyncMock(return_value="UPDATE 1")
+    monkeypatch.setattr(share, "get_connection", lambda: _CM(conn))
+
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    conn.fetchrow = AsyncMock(return_value=_row(token="soon", expires_at=expires_at))
+    await share.get_link_info("soon")
+
+    # 快取中的連結過期時仍會被拒絕，並移出快取
+    share._link_cache["soon"][1]["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+    with pytest.raises(share.ShareLinkExpiredError):
+        await share.get_link_info("soon")
+    assert "soon" not in share._link_cache
+
+    conn.fetchrow = AsyncMock(return_value=_row(token="pwd", password_hash=share.hash_password("1234")))
+    await share.get_public_resource("pwd")
+    await share.get_public_resource("pwd")
+    assert conn.fetchrow.await_count == 2
+    assert "pwd" not in share._link_cache
+
+
+@pytest.mark.asyncio
+async def test_flush_access_counts_restores_on_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    conn = AsyncMock()
+    conn.execute = AsyncMock(side_effect=RuntimeError("db down"))
+    monkeypatch.setattr(share, "get_connection", lambda: _CM(conn))
+
+    share._pending_access_counts["t1"] += 3
+    with pytest.raises(RuntimeError):
+        await share.flush_access_counts()
+    assert share._pending_access_counts["t1"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rendered_views_cached_by_content_version(monkeypatch: pytest.MonkeyPatch) -> None:
+    conn = AsyncMock()
+    conn.execute = AsyncMock(return_value="UPDATE 1")
+    monkeypatch.setattr(share, "get_connection", lambda: _CM(conn))
+
+    now = datetime.now(timezone.utc)
+    knowledge = SimpleNamespace(
+        id="kb1", title="T", content="C", attachments=[], related=[], created_at=now, updated_at=now,
+    )
+    calls: list[str] = []
+    version = {"v": ("kb1.md", 1, 10)}
+
+    def _get_knowledge(rid):
+        calls.append(rid)
+        return knowledge
+
+    monkeypatch.setattr(share, "get_knowledge", _get_knowledge)
+    monkeypatch.setattr(share, "get_knowledge_version", lambda _rid: version["v"])
+    conn.fetchrow = AsyncMock(return_value=_row(token="kb", resource_type="knowledge", resource_id="kb1"))
+
+    await share.get_public_resource("kb")
+    await share.get_public_resource("kb")
+    assert len(calls) == 1
+
+    version["v"] = ("kb1.md", 2, 12)
+    await share.get_public_resource("kb")
+    assert len(calls) == 2
+
+    # 專案：版本相同時不重新組裝
+    project = SimpleNamespace(
+        id=uuid4(), name="P", description=None, status="active",
+        start_date=None, end_date=None, milestones=[], members=[],
+    )
+    get_project = AsyncMock(return_value=project)
+    monkeypatch.setattr(share, "get_project", get_project)
+    conn.fetchval = AsyncMock(return_value="2026-01-01|3")
+    conn.fetchrow = AsyncMock(return_value=_row(token="pj", resource_type="project", resource_id=str(uuid4())))
+    await share.get_public_resource("pj")
+    await share.get_public_resource("pj")
+    assert get_project.await_count == 1
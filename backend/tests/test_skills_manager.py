@@ -208,3 +208,94 @@ async def test_native_base_file_manager_script_first(monkeypatch: pytest.MonkeyP
     assert research_map == {}
     assert await mgr.get_script_path("research-skill", "start-research") is not None
     assert await mgr.get_script_path("research-skill", "check-research") is not None
+
+
+@pytest.mark.asyncio
+async def test_incremental_reload_and_projection_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    native = tmp_path / "native"
+    external = tmp_path / "external"
+    native.mkdir()
+    external.mkdir()
+    _write_skill_md(external / "alpha", "description: a\nallowed-tools: \"t.a\"", body="alpha prompt")
+    _write_skill_md(
+        external / "beta",
+        "description: b\nallowed-tools: \"t.b\"\nmetadata:\n  ctos:\n    requires_app: nas\n    mcp_servers: \"m.b\"",
+        body="beta prompt",
+    )
+
+    import ching_tech_os.skills.seed_external as seed_external
+    monkeypatch.setattr(seed_external, "ensure_seed_skills", lambda _p: None)
+    monkeypatch.setattr("ching_tech_os.skills.settings.extends_dir", str(tmp_path / "no-extends"))
+
+    mgr = SkillManager(skills_dir=native, external_skills_dir=external)
+    await mgr.load_skills()
+
+    parsed: list[str] = []
+    original = mgr._load_skill_from_skill_md
+
+    def _tracking(skill_dir, source):
+        parsed.append(skill_dir.name)
+        return original(skill_dir, source)
+
+    monkeypatch.setattr(mgr, "_load_skill_from_skill_md", _tracking)
+
+    # 投影依 (role, 已授權 App) 快取
+    user_proj = await mgr.get_projection({"nas": False, "other": True})
+    assert [s.name for s in user_proj.skills] == ["alpha"]
+    assert await mgr.get_projection({"other": True}) is user_proj
+    nas_proj = await mgr.get_projection({"nas": True})
+    assert nas_proj.tool_names == ("t.a", "t.b")
+    assert nas_proj.mcp_servers == frozenset({"m.b"})
+    assert nas_proj.tools_prompt == "alpha prompt\n\nbeta prompt"
+    admin_proj = await mgr.get_projection({}, role="admin")
+    assert len(admin_proj.skills) == 2
+    # 回傳副本，呼叫端修改不影響快取
+    (await mgr.get_tool_names({"nas": True})).append("x")
+    assert await mgr.get_tool_names({"nas": True}) == ["t.a", "t.b"]
+
+    # 沒有變動時不重新解析
+    assert await mgr.check_for_changes() is False
+    await mgr.reload_skills()
+    assert parsed == []
+
+    # 只重新解析變動的目錄，並使投影失效
+    _write_skill_md(external / "beta", "description: b2\nallowed-tools: \"t.b2\"", body="beta v2")
+    os.utime(external / "beta" / "SKILL.md", ns=(1, 1))
+    assert await mgr.check_for_changes() is True
+    assert parsed == ["beta"]
+    assert (await mgr.get_skill("beta")).description == "b2"
+    assert "t.b2" in await mgr.get_tool_names({})
+    assert await mgr.get_projection({"other": True}) is not user_proj
+
+    # 子目錄深層的檔案變動也會觸發重載
+    nested = external / "beta" / "references" / "deep"
+    nested.mkdir(parents=True)
+    await mgr.check_for_changes()
+    parsed.clear()
+    top = nested.parent.stat()
+    (nested / "guide.md").write_text("guide", encoding="utf-8")
+    os.utime(nested.parent, ns=(top.st_atime_ns, top.st_mtime_ns))
+    assert await mgr.check_for_changes() is True
+    assert parsed == ["beta"]
+    assert (await mgr.get_skill("beta")).references == ["references/deep/guide.md"]
+
+    # 移除目錄
+    import shutil
+    shutil.rmtree(external / "alpha")
+    assert await mgr.check_for_changes() is True
+    assert await mgr.get_skill("alpha") is None
+    assert external / "alpha" not in mgr._parse_cache
+
+
+@pytest.mark.asyncio
+async def test_watch_task_start_stop(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    mgr = SkillManager(skills_dir=tmp_path, external_skills_dir=tmp_path)
+    monkeypatch.setattr("ching_tech_os.skills.settings.skill_watch_interval_seconds", 0)
+    await mgr.start_watch_task()
+    assert mgr._watch_task is None
+
+    monkeypatch.setattr("ching_tech_os.skills.settings.skill_watch_interval_seconds", 60)
+    await mgr.start_watch_task()
+    assert mgr._watch_task is not None
+    await mgr.stop_watch_task()
+    assert mgr._watch_task is None
@@ -0,0 +1,112 @@
+"""PrecompressedStaticFiles 測試"""
+
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from ching_tech_os.middleware.static_files import PrecompressedStaticFiles, parse_accept_encoding
+
+JS_CONTENT = b"console.log('hello');\n" * 200
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "app.js").write_bytes(JS_CONTENT)
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(JS_CONTENT))
+    (tmp_path / "app.js.br").write_bytes(b"fake-brotli")
+    (tmp_path / "plain.css").write_bytes(b"body{}")
+    return tmp_path
+
+
+async def _get(static_dir, path: str, headers: dict | None = None):
+    app = FastAPI()
+    app.mount("/js", PrecompressedStaticFiles(directory=static_dir), name="js")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        return await c.get(path, headers=headers or {})
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert parse_accept_encoding("br;q=0, gzip;q=0.8") == {"gzip"}
+    assert parse_accept_encoding("") == set()
+
+
+@pytest.mark.asyncio
+async def test_serves_brotli_when_accepted(static_dir):
+    resp = await _get(static_dir, "/js/app.js", {"accept-encoding": "br, gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "br"
+    assert resp.headers["content-type"].startswith("text/javascript")
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.headers["content-length"] == str(len(b"fake-brotli"))
+
+
+@pytest.mark.asyncio
+async def test_serves_gzip_and_identity(static_dir):
+    resp = await _get(static_dir, "/js/app.js", {"accept-encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.content == JS_CONTENT  # httpx 自動解壓
+
+    resp = await _get(static_dir, "/js/app.js", {"accept-encoding": "identity"})
+    assert "content-encoding" not in resp.headers
+    assert resp.content == JS_CONTENT
+
+
+@pytest.mark.asyncio
+async def test_stale_variant_is_ignored(static_dir):
+    gz_path = static_dir / "app.js.gz"
+    stat = os.stat(static_dir / "app.js")
+    os.utime(gz_path, (stat.st_atime - 100, stat.st_mtime - 100))
+    os.utime(static_dir / "app.js.br", (stat.st_atime - 100, stat.st_mtime - 100))
+
+    resp = await _get(static_dir, "/js/app.js", {"accept-encoding": "br, gzip"})
+    assert "content-encoding" not in resp.headers
+
+
+@pytest.mark.asyncio
+async def test_strong_etag_per_encoding_and_304(static_dir):
+    identity = await _get(static_dir, "/js/app.js", {"accept-encoding": "identity"})
+    gz = await _get(static_dir, "/js/app.js", {"accept-encoding": "gzip"})
+    etag = identity.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert etag != gz.headers["etag"]
+
+    resp = await _get(
+        static_dir, "/js/app.js", {"accept-encoding": "identity", "if-none-match": etag}
+    )
+    assert resp.status_code == 304
+
+    # 內容變更後 ETag 隨之改變
+    (static_dir / "app.js").write_bytes(JS_CONTENT + b"//changed")
+    changed = await _get(static_dir, "/js/app.js", {"accept-encoding": "identity"})
+    assert changed.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_missing_file_404(static_dir):
+    resp = await _get(static_dir, "/js/missing.js")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_etag_hashing_runs_off_event_loop(static_dir, monkeypatch):
+    import threading
+
+    from ching_tech_os.middleware import static_files
+
+    threads = []
+    original = static_files._ETagCache.compute
+
+    def compute(self, path, stat_result):
+        threads.append(threading.current_thread())
+        return original(self, path, stat_result)
+
+    monkeypatch.setattr(static_files._ETagCache, "compute", compute)
+    resp = await _get(static_dir, "/js/app.js", {"accept-encoding": "gzip"})
+
+    assert resp.headers["etag"].startswith('"') and "-" not in resp.headers["etag"]
+    assert threads and threading.main_thread() not in threads
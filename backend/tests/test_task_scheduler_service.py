@@ -430,3 +430,32 @@ async def test_load_dynamic_tasks_partial_failure(monkeypatch: pytest.MonkeyPatc
 
     loaded = await task_scheduler.load_dynamic_tasks()
     assert loaded == 2  # 2 成功，1 失敗
+
+
+@pytest.mark.asyncio
+async def test_notify_agent_result_fans_out(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Agent 結果推送給多個目標（一次 deliver_many）"""
+    from ching_tech_os.services import task_scheduler
+    from ching_tech_os.services.bot import delivery
+
+    deliver_many = AsyncMock(return_value=[
+        delivery.DeliveryResult("line", "C1", ["m1"]),
+        delivery.DeliveryResult("telegram", "42", error="發送失敗：x"),
+    ])
+    monkeypatch.setattr(delivery, "deliver_many", deliver_many)
+
+    targets = [
+        {"platform": "line", "target": "C1"},
+        {"platform": "telegram", "target": "42"},
+        {"platform": "line"},
+    ]
+    await task_scheduler._notify_agent_result("日報", targets, "今日摘要")
+
+    deliveries = list(deliver_many.await_args.args[0])
+    assert [(d.platform, d.target) for d in deliveries] == [("line", "C1"), ("telegram", "42")]
+    assert deliveries[0].messages[0].text == "今日摘要"
+    assert deliveries[1].messages == ["今日摘要"]
+
+    deliver_many.reset_mock()
+    await task_scheduler._notify_agent_result("日報", [], "今日摘要")
+    deliver_many.assert_not_called()
@@ -0,0 +1,38 @@
+"""正規化搜尋條件產生器測試。"""
+
+from __future__ import annotations
+
+from ching_tech_os.services.text_search import build_search_clause, escape_like, normalize_search_text
+
+
+def test_normalize_search_text_matches_db_rule() -> None:
+    assert normalize_search_text("PLC KV-7500") == "plckv7500"
+    assert normalize_search_text("  kv 7500\t") == "kv7500"
+    assert normalize_search_text(None) == ""
+    assert "kv7500" in normalize_search_text("PLC KV-7500")
+
+
+def test_escape_like() -> None:
+    assert escape_like("100%_a\\b") == "100\\%\\_a\\\\b"
+
+
+def test_build_search_clause_substring() -> None:
+    clause = build_search_clause("KV-7500", 3)
+
+    assert clause is not None
+    assert clause.where == "search_text LIKE $3"
+    assert "word_similarity($4, search_text)" in clause.order_by
+    assert clause.params == ["%kv7500%", "kv7500"]
+    assert clause.next_param_idx == 5
+
+
+def test_build_search_clause_fuzzy_and_alias() -> None:
+    clause = build_search_clause("motor", 1, column="p.search_text", fuzzy=True)
+
+    assert clause is not None
+    assert clause.where == "(p.search_text LIKE $1 OR $2 <% p.search_text)"
+
+
+def test_build_search_clause_empty_query() -> None:
+    assert build_search_clause(None, 1) is None
+    assert build_search_clause(" - ", 1) is None
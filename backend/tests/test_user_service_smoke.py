@@ -95,6 +95,9 @@ async def test_user_preferences_and_permissions(monkeypatch: pytest.MonkeyPatch)
     assert (await user_service.get_user_role_and_permissions(2))["role"] == "user"
     assert (await user_service.update_user_preferences(1, {"theme": "x"}))["theme"] == "blue"
     assert (await user_service.update_user_preferences(1, {"theme": "x"}))["theme"] == "dark"
+    # jsonb 參數直接傳 dict（由連線 codec 編碼），不可先 json.dumps 成字串
+    assert conn.fetchrow.await_args_list[2].args[2] == {"permissions": {"apps": {"a": True, "b": False}}}
+    assert conn.fetchrow.await_args.args[2] == {"theme": "x"}
 
     # _parse_preferences 分支
     assert user_service._parse_preferences(None)["theme"] == "dark"
@@ -0,0 +1,213 @@
+"""Bot webhook 事件佇列測試。"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+
+import pytest
+
+from ching_tech_os.services.bot import webhook_queue
+from ching_tech_os.services.bot.webhook_queue import QueuedEvent, WebhookDispatcher, _Job
+
+
+@pytest.fixture
+def marks(monkeypatch: pytest.MonkeyPatch):
+    processing = AsyncMock()
+    finished = AsyncMock()
+    monkeypatch.setattr(webhook_queue, "_mark_processing", processing)
+    monkeypatch.setattr(webhook_queue, "_mark_finished", finished)
+    return processing, finished
+
+
+def _job(event_id: int | None, payload: dict, platform: str = "line") -> _Job:
+    return _Job(event_id, platform, payload, 0.0)
+
+
+async def _wait_idle(dispatcher: WebhookDispatcher) -> None:
+    while dispatcher._drainers:
+        await asyncio.gather(*list(dispatcher._drainers.values()))
+
+
+@pytest.mark.asyncio
+async def test_serializes_per_conversation_and_parallelizes_across(marks) -> None:
+    dispatcher = WebhookDispatcher(max_workers=4)
+    running: dict[str, int] = {}
+    overlap_within: list[str] = []
+    concurrent_peak = 0
+    order: list[tuple[str, int]] = []
+
+    async def handler(payload: dict) -> None:
+        nonlocal concurrent_peak
+        conv = payload["conv"]
+        if running.get(conv):
+            overlap_within.append(conv)
+        running[conv] = running.get(conv, 0) + 1
+        concurrent_peak = max(concurrent_peak, sum(running.values()))
+        await asyncio.sleep(0.01)
+        order.append((conv, payload["seq"]))
+        running[conv] -= 1
+
+    dispatcher.register_handler("line", handler)
+    for seq in range(3):
+        dispatcher.submit("A", _job(seq, {"conv": "A", "seq": seq}))
+    dispatcher.submit("B", _job(10, {"conv": "B", "seq": 0}))
+    await _wait_idle(dispatcher)
+
+    assert overlap_within == []
+    assert [s for c, s in order if c == "A"] == [0, 1, 2]
+    assert concurrent_peak == 2  # A 與 B 同時處理
+    assert dispatcher.stats()["processed"] == 4
+    assert dispatcher.pending == 0 and dispatcher._queues == {}
+    _, finished = marks
+    assert [c.args[1] for c in finished.await_args_list] == ["done"] * 4
+
+
+@pytest.mark.asyncio
+async def test_worker_limit_and_failure_is_recorded(marks) -> None:
+    dispatcher = WebhookDispatcher(max_workers=2)
+    active = 0
+    peak = 0
+
+    async def handler(payload: dict) -> None:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if payload.get("boom"):
+            raise RuntimeError("handler failed")
+
+    dispatcher.register_handler("telegram", handler)
+    for i in range(5):
+        dispatcher.submit(f"chat-{i}", _job(i, {"boom": i == 3}, platform="telegram"))
+    await _wait_idle(dispatcher)
+
+    assert peak == 2
+    assert dispatcher.failed == 1
+    _, finished = marks
+    failed = [c.args for c in finished.await_args_list if c.args[1] == "failed"]
+    assert failed == [(3, "failed", "RuntimeError: handler failed")]
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_slow_events_without_marking(marks) -> None:
+    dispatcher = WebhookDispatcher(max_workers=1)
+
+    async def handler(_payload: dict) -> None:
+        await asyncio.sleep(10)
+
+    dispatcher.register_handler("line", handler)
+    dispatcher.submit("A", _job(1, {}))
+    dispatcher.submit("A", _job(2, {}))
+    await asyncio.sleep(0)
+    await dispatcher.stop(timeout=0.05)
+
+    processing, finished = marks
+    processing.assert_awaited_once_with(1)
+    finished.assert_not_awaited()  # 保留 processing 狀態，下次啟動補處理
+    assert dispatcher._drainers == {} and dispatcher.pending == 0
+
+
+class _Conn:
+    def __init__(self, rows=None, error: Exception | None = None) -> None:
+        self.rows = rows or []
+        self.error = error
+        self.fetch_calls: list[tuple] = []
+        self.executed: list[tuple] = []
+
+    async def fetch(self, query: str, *args):
+        if self.error:
+            raise self.error
+        self.fetch_calls.append((query, args))
+        return self.rows
+
+    async def execute(self, query: str, *args):
+        self.executed.append((query, args))
+        return "UPDATE 0"
+
+
+def _patch_conn(monkeypatch: pytest.MonkeyPatch, conn: _Conn) -> None:
+    @asynccontextmanager
+    async def _get_connection():
+        yield conn
+
+    monkeypatch.setattr(webhook_queue, "get_connection", _get_connection)
+
+
+class _RecordingDispatcher:
+    def __init__(self) -> None:
+        self.jobs: list[tuple[str, _Job]] = []
+
+    def submit(self, conversation_key: str, job: _Job) -> None:
+        self.jobs.append((conversation_key, job))
+
+
+@pytest.mark.asyncio
+async def test_enqueue_inserts_once_and_skips_redeliveries(monkeypatch: pytest.MonkeyPatch) -> None:
+    events = [
+        QueuedEvent("line", "E1", "line:group:C1", {"n": 1}),
+        QueuedEvent("line", "E2", "line:group:C1", {"n": 2}),
+        QueuedEvent("line", "E3", "line:user:U1", {"n": 3}),
+    ]
+    # E2 已寫入過（重送），RETURNING 只回傳新事件且順序不保證
+    conn = _Conn(rows=[
+        {"id": 12, "platform": "line", "event_key": "E3"},
+        {"id": 11, "platform": "line", "event_key": "E1"},
+    ])
+    _patch_conn(monkeypatch, conn)
+    recorder = _RecordingDispatcher()
+    monkeypatch.setattr(webhook_queue, "dispatcher", recorder)
+
+    assert await webhook_queue.enqueue_events(events) == 2
+
+    assert len(conn.fetch_calls) == 1
+    query, args = conn.fetch_calls[0]
+    assert "ON CONFLICT (platform, event_key) DO NOTHING" in query
+    assert args[1] == ["E1", "E2", "E3"]
+    assert [(key, job.event_id, job.payload) for key, job in recorder.jobs] == [
+        ("line:group:C1", 11, {"n": 1}),
+        ("line:user:U1", 12, {"n": 3}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_falls_back_to_in_process_dispatch(monkeypatch: pytest.MonkeyPatch) -> None:
+    _patch_conn(monkeypatch, _Conn(error=ConnectionError("db down")))
+    recorder = _RecordingDispatcher()
+    monkeypatch.setattr(webhook_queue, "dispatcher", recorder)
+
+    event = webhook_queue.telegram_queued_event({"update_id": 5, "message": {"chat": {"id": 7}}})
+    assert await webhook_queue.enqueue_events([event]) == 1
+    assert [(key, job.event_id) for key, job in recorder.jobs] == [("telegram:chat:7", None)]
+
+
+@pytest.mark.asyncio
+async def test_recover_pending_events_in_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    conn = _Conn(rows=[
+        {"id": 3, "platform": "line", "conversation_key": "line:user:U1", "payload": {"a": 1}, "received_at": 100},
+        {"id": 4, "platform": "telegram", "conversation_key": "telegram:chat:1", "payload": {}, "received_at": 101},
+    ])
+    _patch_conn(monkeypatch, conn)
+    recorder = _RecordingDispatcher()
+    monkeypatch.setattr(webhook_queue, "dispatcher", recorder)
+    monkeypatch.setattr(webhook_queue.settings, "webhook_queue_max_attempts", 3)
+    monkeypatch.setattr(webhook_queue.settings, "webhook_queue_recover_minutes", 30)
+
+    assert await webhook_queue.recover_pending_events() == 2
+
+    # 先將超過次數 / 過舊的事件標記為 failed
+    assert conn.executed[0][1] == (3, 30)
+    assert [job.event_id for _, job in recorder.jobs] == [3, 4]
+    assert recorder.jobs[0][1].platform == "line"
+
+
+def test_conversation_keys() -> None:
+    assert webhook_queue.line_conversation_key({"source": {"type": "room", "roomId": "R1"}}) == "line:room:R1"
+    assert webhook_queue.line_conversation_key({"source": {"type": "user", "userId": "U9"}}) == "line:user:U9"
+    assert (
+        webhook_queue.telegram_conversation_key({"update_id": 1, "callback_query": {"message": {"chat": {"id": 3}}}})
+        == "telegram:chat:3"
+    )
+    assert webhook_queue.telegram_conversation_key({"update_id": 2}) == "telegram:update:2"
@@ -523,8 +523,9 @@ const AIAssistantApp = (function() {
    * Set typing indicator state
    * @param {string} chatId
    * @param {boolean} typing
+   * @param {number} [queuePosition] - 系統忙碌時的排隊位置（取得名額後的事件不帶此欄位，恢復一般 typing 指示）
    */
-  function setTypingState(chatId, typing) {
+  function setTypingState(chatId, typing, queuePosition) {
     if (chatId !== currentChatId || !windowId) return;
 
     const container = document.querySelector(`#${windowId} .ai-messages-container`);
@@ -540,15 +541,18 @@ const AIAssistantApp = (function() {
       // Show typing indicator
       const typingDiv = document.createElement('div');
       typingDiv.className = 'ai-message ai-message-assistant ai-typing';
+      const indicator = queuePosition
+        ? `<div class="ai-message-text ai-queue-status">目前詢問的人較多，排隊中（第 ${Number(queuePosition)} 位）</div>`
+        : `<div class="ai-message-text ai-typing-indicator">
+            <span></span><span></span><span></span>
+          </div>`;
       typingDiv.innerHTML = `
         <div class="ai-message-avatar">
           <span class="icon">${getIcon('robot')}</span>
         </div>
         <div class="ai-message-content">
           <div class="ai-message-role">AI 助手</div>
-          <div class="ai-message-text ai-typing-indicator">
-            <span></span><span></span><span></span>
-          </div>
+          ${indicator}
         </div>
       `;
       container.appendChild(typingDiv);
@@ -184,15 +184,15 @@ const SocketClient = (function () {
 
   /**
    * 處理 AI typing 狀態
-   * @param {Object} data - { chatId, typing }
+   * @param {Object} data - { chatId, typing, queuePosition? }
    */
   function handleAITyping(data) {
-    const { chatId, typing } = data;
-    console.log('[SocketClient] AI typing:', chatId, typing);
+    const { chatId, typing, queuePosition } = data;
+    console.log('[SocketClient] AI typing:', chatId, typing, queuePosition);
 
     // 通知 AI 助手更新 UI
     if (typeof AIAssistantApp !== 'undefined' && AIAssistantApp.isWindowOpen()) {
-      AIAssistantApp.setTypingState(chatId, typing);
+      AIAssistantApp.setTypingState(chatId, typing, queuePosition);
     }
   }
 